@@ -0,0 +1,14 @@
+-- ============================================
+-- 알람 이벤트 멱등 키
+-- 용도: ksys_app/alarm/event_sink.py (EventSink 저널 재생)
+-- submit 시 이벤트마다 uuid 를 event_key 로 붙여 저널에 함께 저장, INSERT ... ON CONFLICT (event_key) DO NOTHING
+-- → 장애 후 저널 재생이 이미 커밋된 행을 다시 넣어도 중복 없음 (내용이 같은 서로 다른 이벤트는 각각 기록)
+-- 기존 행은 NULL (유니크 인덱스에서 서로 충돌하지 않음)
+-- ============================================
+
+ALTER TABLE public.alarm_events ADD COLUMN IF NOT EXISTS event_key text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS alarm_events_event_key_uq
+    ON public.alarm_events (event_key);
+
+COMMENT ON COLUMN public.alarm_events.event_key IS '이벤트 싱크 멱등 키 (이벤트별 uuid, 저널 재생 중복 방지)';
@@ -0,0 +1,28 @@
+-- ============================================
+-- 수질 준수율 시간별 판정 집계
+-- 용도: ksys_app/water_quality/compliance_rollup.py (WaterQualityMonitor.calculate_compliance_rate)
+-- 태그 × 1시간 버킷마다 influx_hist 표본을 판정 등급별로 센다.
+-- 갱신은 애플리케이션이 증분 upsert (rule_version = 판정 기준 해시, 바뀌면 재집계)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.wq_compliance_1h (
+    bucket        timestamptz NOT NULL,
+    tag_name      text        NOT NULL,
+    rule_version  text        NOT NULL,
+    n             bigint      NOT NULL,
+    compliant     bigint      NOT NULL,
+    warning       bigint      NOT NULL,
+    violation     bigint      NOT NULL,   -- 기준 위반 (심각 제외)
+    critical      bigint      NOT NULL,
+    vmin          double precision,
+    vmax          double precision,
+    updated_at    timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (tag_name, bucket),
+    CHECK (n = compliant + warning + violation + critical)
+);
+
+-- 1년 = 태그당 8,760행 - 기간 합계는 기본키 범위 읽기
+COMMENT ON TABLE public.wq_compliance_1h IS '수질 태그 시간별 판정 카운터 (준수/경고/위반/심각)';
+
+GRANT SELECT, INSERT, UPDATE ON public.wq_compliance_1h TO ksys_app_user;
+GRANT SELECT ON public.wq_compliance_1h TO ksys_readonly;
@@ -0,0 +1,35 @@
+-- ============================================
+-- 수질 일별 통계 (월간/연간 보고서용)
+-- 용도: ksys_app/water_quality/daily_rollup.py (WaterQualityReportGenerator)
+-- 태그 × 일(Asia/Seoul) 1행: 표본 통계, 판정 등급별 개수, 준수 상태 전환
+-- 갱신은 애플리케이션이 마감된 날만 증분 upsert (rule_version 이 바뀌면 재집계)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.wq_daily (
+    day                  date        NOT NULL,   -- Asia/Seoul 기준
+    tag_name             text        NOT NULL,
+    rule_version         text        NOT NULL,
+    n                    bigint      NOT NULL,
+    mean                 double precision,
+    vmin                 double precision,
+    vmax                 double precision,
+    stddev               double precision,       -- 표본 표준편차 (n = 1 이면 NULL)
+    compliant            bigint      NOT NULL,
+    warning              bigint      NOT NULL,
+    violation            bigint      NOT NULL,   -- 기준 위반 (심각 제외)
+    critical             bigint      NOT NULL,
+    open_compliant       boolean,                -- 하루 첫 표본 준수 여부
+    close_compliant      boolean,                -- 하루 마지막 표본 준수 여부
+    transitions          integer     NOT NULL DEFAULT 0,
+    first_transition_at  timestamptz,
+    last_transition_at   timestamptz,
+    updated_at           timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (tag_name, day),
+    CHECK (n = compliant + warning + violation + critical)
+);
+
+-- 1년 = 태그당 365행 - 기간 조회는 기본키 범위 읽기
+COMMENT ON TABLE public.wq_daily IS '수질 태그 일별 통계 / 판정 개수 / 준수 상태 전환';
+
+GRANT SELECT, INSERT, UPDATE ON public.wq_daily TO ksys_app_user;
+GRANT SELECT ON public.wq_daily TO ksys_readonly;
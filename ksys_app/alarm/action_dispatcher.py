@@ -0,0 +1,408 @@
+"""
+알람 대응 액션 디스패처
+
+_trigger_alarm 은 액션을 등록만 하고 바로 반환한다. 실행은 액션 타입별 워커 풀이 맡는다.
+- 타입별 동시 실행 수 제한 (예: 제어 액션은 1개씩 순서대로, 알림은 병렬)
+- 대상별 토큰 버킷 속도 제한: 한도를 넘은 작업은 워커를 붙잡지 않고 허용 시각으로 예약
+- 중복 억제: 같은 시나리오/타입/파라미터 액션은 dedupe 창(기본: 시나리오 쿨다운) 안에서 1회
+  (창이 지난 키는 등록 시 만료 힙 앞에서 제거 → 키 수는 창 안의 서로 다른 액션 수로 제한)
+- 실패 시 지수 백오프 재시도 (재시도도 예약으로 처리)
+- 지연 액션/재시도/속도 제한 대기 작업은 예약 파일(JSON)에 저장 → 재시작 후 이어서 실행
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..performance.metrics import register_metrics
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+DEFAULT_SCHEDULE = os.getenv("KSYS_ACTION_SCHEDULE", os.path.join("data", "journal", "action_schedule.json"))
+
+
+@dataclass(frozen=True)
+class ActionPolicy:
+    """액션 타입별 실행 정책"""
+    concurrency: int = 4
+    rate_per_s: float = 0.0      # 대상별 초당 허용 횟수 (0: 제한 없음)
+    burst: int = 1
+    max_attempts: int = 3
+    backoff_s: float = 1.0       # 재시도 대기: backoff_s * 2^(시도-1), 최대 backoff_max_s
+    backoff_max_s: float = 60.0
+    timeout_s: float = 30.0
+
+
+DEFAULT_POLICIES: Dict[str, ActionPolicy] = {
+    "log": ActionPolicy(concurrency=4, max_attempts=1),
+    "notify": ActionPolicy(concurrency=8, rate_per_s=0.2, burst=3, max_attempts=4, backoff_s=2.0, timeout_s=10.0),
+    # 설비 제어는 같은 타입끼리 순서대로 1개씩
+    "adjust": ActionPolicy(concurrency=1, max_attempts=3),
+    "stop": ActionPolicy(concurrency=1, max_attempts=3),
+    "emergency": ActionPolicy(concurrency=1, max_attempts=5, backoff_s=0.5, backoff_max_s=5.0),
+    "maintenance": ActionPolicy(concurrency=2, max_attempts=3),
+}
+
+
+@dataclass
+class ActionJob:
+    """실행 대기 액션 1건 (예약 파일에 그대로 저장)"""
+    job_id: str
+    action_type: str
+    params: Dict[str, Any]
+    scenario_id: str = ""
+    event_id: str = ""
+    due: float = 0.0
+    attempt: int = 0
+    reserved: bool = False  # 속도 제한 토큰을 이미 예약한 작업
+
+    @property
+    def target(self) -> str:
+        """속도 제한 단위 (알림 대상, 설비 등)"""
+        for key in ("target", "system"):
+            if self.params.get(key) is not None:
+                return f"{self.action_type}:{self.params[key]}"
+        return self.action_type
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = float(max(burst, 1))
+        self.tokens = self.burst
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """토큰 1개 예약 → 실행 가능 시각까지 대기 초 (음수 토큰 = 선예약)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1.0
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+@dataclass
+class DispatcherStats:
+    submitted: int = 0
+    executed: int = 0
+    failed: int = 0
+    retried: int = 0
+    deduped: int = 0
+    rate_limited: int = 0
+    in_flight: int = 0
+    max_in_flight: Dict[str, int] = field(default_factory=dict)
+
+
+class ActionDispatcher:
+    """타입별 워커 풀 + 예약 스케줄러"""
+
+    def __init__(self,
+                 handlers: Dict[str, Handler],
+                 policies: Optional[Dict[str, ActionPolicy]] = None,
+                 schedule_path: Optional[str] = DEFAULT_SCHEDULE,
+                 clock: Callable[[], float] = time.time,
+                 max_queue: int = 10_000):
+        self.handlers = dict(handlers)
+        self.policies = dict(DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        self.schedule_path = schedule_path
+        self.clock = clock
+        self.max_queue = max_queue
+        self.stats = DispatcherStats()
+
+        self._seq = itertools.count()
+        self._schedule: List[Tuple[float, int, ActionJob]] = []  # (실행 시각, 순번, 작업)
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._last_sent: Dict[Tuple, float] = {}  # dedupe 키 → 마지막 등록 시각
+        self._dedupe_expiry: List[Tuple[float, int, float, Tuple]] = []  # (만료 시각, 순번, 등록 시각, 키)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._scheduler: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._active: Dict[str, int] = {}
+        self._running: Dict[str, ActionJob] = {}
+        self._dirty = False
+        self._load_schedule()
+        _DISPATCHERS.add(self)
+
+    # ------------------------------------------------------------------ 입력
+    def submit(self,
+               action_type: str,
+               params: Dict[str, Any],
+               delay_s: float = 0.0,
+               scenario_id: str = "",
+               event_id: str = "",
+               dedupe_window_s: float = 0.0) -> str:
+        """
+        액션 등록 (대기 없음)
+
+        Returns:
+            'queued' | 'scheduled' | 'deduped' | 'unhandled'
+        """
+        if action_type not in self.handlers:
+            return "unhandled"
+        now = self.clock()
+        self._expire_dedupe(now)
+        if dedupe_window_s > 0:
+            key = (scenario_id, action_type, json.dumps(params, sort_keys=True, default=str))
+            last = self._last_sent.get(key)
+            if last is not None and now - last < dedupe_window_s:
+                self.stats.deduped += 1
+                return "deduped"
+            self._last_sent[key] = now
+            heapq.heappush(self._dedupe_expiry, (now + dedupe_window_s, next(self._seq), now, key))
+        self.stats.submitted += 1
+        job = ActionJob(f"A{next(self._seq)}_{int(now * 1000)}", action_type, dict(params),
+                        scenario_id, event_id, now + max(delay_s, 0.0))
+        if delay_s > 0:
+            self._push_schedule(job)
+            return "scheduled"
+        self._enqueue(job)
+        return "queued"
+
+    async def drain(self) -> None:
+        """대기/예약/실행 중 작업이 모두 끝날 때까지 대기 (테스트/종료용)"""
+        self._ensure_started()
+        while True:
+            for queue in list(self._queues.values()):
+                await queue.join()
+            if not self._schedule and all(q.empty() for q in self._queues.values()):
+                return
+            await asyncio.sleep(min(max(self._schedule[0][0] - self.clock(), 0.001), 0.05) if self._schedule else 0.001)
+
+    async def close(self) -> None:
+        """워커 종료 - 대기/실행 중이던 작업은 예약 파일에 남아 다음 시작 때 실행 (at-least-once)"""
+        interrupted = list(self._running.values())
+        tasks = self._workers + ([self._scheduler] if self._scheduler else [])
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001
+                pass
+        # 아직 실행 못 한 즉시 작업도 예약 파일로 넘김
+        for job in interrupted:
+            self._push_schedule(job, wake=False)
+        for queue in self._queues.values():
+            while not queue.empty():
+                self._push_schedule(queue.get_nowait(), wake=False)
+        self._save_schedule()
+        self._workers, self._scheduler, self._queues, self._loop = [], None, {}, None
+
+    # ------------------------------------------------------------ 실행 루프
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._scheduler is not None and not self._scheduler.done():
+            return
+        # 이전 루프에서 실행 못 한 즉시 작업은 새 큐로 이어받음
+        leftover = [q.get_nowait() for q in self._queues.values() for _ in range(q.qsize())]
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._queues = {t: asyncio.Queue(self.max_queue) for t in self.handlers}
+        for job in leftover:
+            self._queues[job.action_type].put_nowait(job)
+        self._workers = [
+            loop.create_task(self._worker(t))
+            for t in self.handlers
+            for _ in range(max(self._policy(t).concurrency, 1))
+        ]
+        self._scheduler = loop.create_task(self._run_schedule())
+
+    def _expire_dedupe(self, now: float) -> None:
+        """dedupe 창이 지난 키 제거 (그 뒤 다시 등록된 키는 새 항목이 남아 있으므로 유지)"""
+        expiry = self._dedupe_expiry
+        while expiry and expiry[0][0] <= now:
+            _, _, sent, key = heapq.heappop(expiry)
+            if self._last_sent.get(key) == sent:
+                del self._last_sent[key]
+
+    def _policy(self, action_type: str) -> ActionPolicy:
+        return self.policies.get(action_type) or ActionPolicy()
+
+    def _enqueue(self, job: ActionJob) -> None:
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            self._push_schedule(job)  # 이벤트 루프 밖 등록: 다음 시작 때 즉시 실행
+            return
+        try:
+            self._queues[job.action_type].put_nowait(job)
+        except asyncio.QueueFull:
+            job.due = self.clock() + 1.0  # 큐가 가득 차면 예약으로 넘겨 유실 방지
+            self._push_schedule(job)
+
+    def _push_schedule(self, job: ActionJob, wake: bool = True) -> None:
+        heapq.heappush(self._schedule, (job.due, next(self._seq), job))
+        self._dirty = True
+        if not wake:
+            return
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            self._save_schedule()  # 이벤트 루프 밖: 파일에만 기록, 다음 시작 때 실행
+            return
+        self._wake.set()
+
+    async def _run_schedule(self) -> None:
+        while True:
+            self._wake.clear()
+            now = self.clock()
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, job = heapq.heappop(self._schedule)
+                self._dirty = True
+                self._enqueue(job)
+            if self._dirty:
+                self._save_schedule()  # 변경분은 한 번에 원자적으로 교체
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), None if timeout is None else min(timeout, 60.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self, action_type: str) -> None:
+        queue = self._queues[action_type]
+        policy = self._policy(action_type)
+        while True:
+            job = await queue.get()
+            try:
+                await self._execute(job, policy)
+            except Exception as e:  # noqa: BLE001 - 워커는 계속 동작
+                logging.error(f"액션 처리 오류 {job.action_type}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _execute(self, job: ActionJob, policy: ActionPolicy) -> None:
+        if policy.rate_per_s > 0 and not job.reserved:
+            now = self.clock()
+            bucket = self._buckets.get(job.target)
+            if bucket is None:
+                bucket = self._buckets[job.target] = _TokenBucket(policy.rate_per_s, policy.burst, now)
+            wait = bucket.reserve(now)
+            if wait > 0:
+                # 워커를 점유하지 않고 예약된 허용 시각으로 넘김 (같은 대상은 등록 순서 유지)
+                self.stats.rate_limited += 1
+                job.due, job.reserved = now + wait, True
+                self._push_schedule(job)
+                return
+
+        job.attempt += 1
+        job.reserved = False
+        self._active[job.action_type] = self._active.get(job.action_type, 0) + 1
+        self.stats.in_flight += 1
+        peak = self.stats.max_in_flight
+        peak[job.action_type] = max(peak.get(job.action_type, 0), self._active[job.action_type])
+        self._running[job.job_id] = job
+        try:
+            await asyncio.wait_for(self.handlers[job.action_type](job.params), policy.timeout_s)
+            self.stats.executed += 1
+        except Exception as e:  # noqa: BLE001
+            if job.attempt < policy.max_attempts:
+                self.stats.retried += 1
+                job.due = self.clock() + min(policy.backoff_s * 2 ** (job.attempt - 1), policy.backoff_max_s)
+                self._push_schedule(job)
+            else:
+                self.stats.failed += 1
+                logging.error(f"액션 실패 ({job.action_type}, {job.attempt}회 시도, {job.scenario_id}): {e}")
+        finally:
+            self._running.pop(job.job_id, None)
+            self._active[job.action_type] -= 1
+            self.stats.in_flight -= 1
+
+    # ---------------------------------------------------------------- 예약 파일
+    def _save_schedule(self) -> None:
+        self._dirty = False
+        if not self.schedule_path:
+            return
+        directory = os.path.dirname(self.schedule_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.schedule_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([asdict(job) for _, _, job in sorted(self._schedule, key=lambda e: e[:2])],
+                      f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.schedule_path)
+
+    def _load_schedule(self) -> None:
+        if not self.schedule_path or not os.path.exists(self.schedule_path):
+            return
+        try:
+            with open(self.schedule_path, encoding="utf-8") as f:
+                jobs = [ActionJob(**item) for item in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            logging.error(f"액션 예약 파일 읽기 실패 ({self.schedule_path}): {e}")
+            return
+        for job in jobs:
+            heapq.heappush(self._schedule, (job.due, next(self._seq), job))
+
+    def pending(self) -> List[ActionJob]:
+        """예약된 작업 (실행 시각 순)"""
+        return [job for _, _, job in sorted(self._schedule, key=lambda e: e[:2])]
+
+    def metrics(self) -> Dict[str, float]:
+        s = self.stats
+        values = {
+            "ksys_action_submitted_total": s.submitted,
+            "ksys_action_executed_total": s.executed,
+            "ksys_action_failed_total": s.failed,
+            "ksys_action_retried_total": s.retried,
+            "ksys_action_deduped_total": s.deduped,
+            "ksys_action_rate_limited_total": s.rate_limited,
+            "ksys_action_in_flight": s.in_flight,
+            "ksys_action_scheduled": len(self._schedule),
+            "ksys_action_dedupe_keys": len(self._last_sent),
+        }
+        for action_type, queue in self._queues.items():
+            values[f"ksys_action_queue_depth_{action_type}"] = queue.qsize()
+        return values
+
+
+class StubTarget:
+    """로컬 테스트/벤치마크용 액션 대상 (지연, 실패 횟수 지정 가능)"""
+
+    def __init__(self, latency_s: float = 0.0, fail_first: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.latency_s = latency_s
+        self.fail_first = fail_first
+        self.clock = clock
+        self.calls: List[Tuple[float, Dict[str, Any]]] = []
+        self.delivered: List[Tuple[float, Dict[str, Any]]] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, params: Dict[str, Any]) -> None:
+        self.calls.append((self.clock(), params))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.latency_s:
+                await asyncio.sleep(self.latency_s)
+            if len(self.calls) <= self.fail_first:
+                raise ConnectionError("stub target unavailable")
+            self.delivered.append((self.clock(), params))
+        finally:
+            self.active -= 1
+
+
+_DISPATCHERS: "weakref.WeakSet[ActionDispatcher]" = weakref.WeakSet()
+
+
+def _dispatcher_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for dispatcher in list(_DISPATCHERS):
+        for name, value in dispatcher.metrics().items():
+            totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_dispatcher_metrics)
@@ -0,0 +1,444 @@
+"""
+알람 백테스트 / 임계값 스윕
+
+과거 데이터(influx_hist 또는 influx_agg_1m)를 기간 청크 단위로 읽어
+시나리오를 NumPy 배열 연산으로 평가한다. 액션 핸들러/DB 저장은 실행하지 않는다.
+
+- 입력: 고정 간격 격자(step_s)로 정렬한 값 행렬 (시각 x 태그), 샘플 사이는 직전 값 유지
+- 조건: 비교 → deadband 래치 → on-delay → off-delay, 모두 누적 최댓값(maximum.accumulate)
+  기반 벡터 연산 - 행 단위 Python 루프 없음, 청크 경계 상태는 조건별 carry로 이어감
+- 시나리오: 조건 AND → 활성 구간(episode) → 발생 수(쿨다운/재발생 포함), 지속시간,
+  알람 중 시간 비율, 채터링(해제 후 flap_window_s 안에 재활성) 비율
+- 스윕: 한 조건의 임계값 K개를 (시각 x K) 행렬로 한 번에 평가
+
+의미는 stream_evaluator와 같다 (격자 시각 기준). deadband는 지연 판정 전 래치로
+적용하므로 deadband > 0 이고 값이 해제 기준과 발생 기준 사이를 오가는 경우에만
+이벤트 시각 평가기와 차이가 날 수 있다.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .evaluation_plan import EQ_TOL, OPERATORS, release_bounds
+from .stream_evaluator import _epoch
+
+SOURCES = {
+    # source → (시각 컬럼, 기본 격자 간격 초)
+    "influx_hist": ("ts", 5.0),
+    "influx_agg_1m": ("bucket", 60.0),
+}
+AGG_COLUMNS = ("avg", "min", "max", "first", "last")
+
+# COPY ... (FORMAT binary) 한 행: 필드 수 + (길이, float8 epoch) + (길이, int4 태그) + (길이, float8 값)
+_COPY_ROW = np.dtype([
+    ("n", ">i2"), ("l0", ">i4"), ("ts", ">f8"), ("l1", ">i4"), ("col", ">i4"), ("l2", ">i4"), ("value", ">f8"),
+])
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+
+@dataclass
+class ThresholdSweep:
+    """시나리오 조건 하나의 임계값 후보 (condition_index: 시나리오 내 조건 순번)"""
+    scenario_id: str
+    thresholds: Sequence[float]
+    condition_index: int = 0
+
+
+@dataclass
+class BacktestStats:
+    """시나리오(또는 스윕 후보) 1개의 백테스트 집계"""
+    scenario_id: str
+    threshold: Optional[float] = None
+    episodes: int = 0            # 활성 구간 수 (모든 조건 충족 시작 횟수)
+    alarms: int = 0              # 엔진이 발생시켰을 알람 수 (쿨다운/재발생 반영)
+    time_in_alarm_s: float = 0.0
+    max_duration_s: float = 0.0
+    flapping_episodes: int = 0   # 직전 해제 후 flap_window_s 안에 다시 활성화된 구간
+    period_s: float = 0.0
+
+    @property
+    def mean_duration_s(self) -> float:
+        return self.time_in_alarm_s / self.episodes if self.episodes else 0.0
+
+    @property
+    def time_in_alarm_pct(self) -> float:
+        return 100.0 * self.time_in_alarm_s / self.period_s if self.period_s else 0.0
+
+    @property
+    def flapping_rate(self) -> float:
+        return self.flapping_episodes / self.episodes if self.episodes else 0.0
+
+    @property
+    def alarms_per_day(self) -> float:
+        return self.alarms * 86400.0 / self.period_s if self.period_s else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scenario_id": self.scenario_id,
+            "threshold": self.threshold,
+            "episodes": self.episodes,
+            "alarms": self.alarms,
+            "alarms_per_day": round(self.alarms_per_day, 3),
+            "time_in_alarm_s": round(self.time_in_alarm_s, 1),
+            "time_in_alarm_pct": round(self.time_in_alarm_pct, 3),
+            "mean_duration_s": round(self.mean_duration_s, 1),
+            "max_duration_s": round(self.max_duration_s, 1),
+            "flapping_episodes": self.flapping_episodes,
+            "flapping_rate": round(self.flapping_rate, 4),
+        }
+
+
+@dataclass
+class BacktestResult:
+    start: float
+    end: float
+    step_s: float
+    scenarios: Dict[str, BacktestStats]
+    sweeps: List[List[BacktestStats]] = field(default_factory=list)  # sweeps 인자 순서
+    source: str = ""
+    samples: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+
+
+# ---------------------------------------------------------------- 벡터 연산
+def _latch(set_: np.ndarray, reset: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """set/reset 중 마지막 사건으로 상태 결정 (둘 다 없으면 이전 청크 상태)"""
+    idx = np.arange(set_.shape[0])[:, None]
+    last_set = np.maximum.accumulate(np.where(set_, idx, -1), axis=0)
+    last_reset = np.maximum.accumulate(np.where(reset, idx, -1), axis=0)
+    return np.where((last_set < 0) & (last_reset < 0), carry, last_set > last_reset)
+
+
+def _run_length(x: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """각 시점에서 연속 True 길이 (carry: 이전 청크 끝의 연속 길이)"""
+    idx = np.arange(x.shape[0])[:, None]
+    last_false = np.maximum.accumulate(np.where(x, -1, idx), axis=0)
+    run = idx - last_false
+    return run + np.where(last_false < 0, carry, 0)
+
+
+def forward_fill(block: np.ndarray) -> np.ndarray:
+    """열별 NaN을 직전 값으로 채움 (sample-and-hold)"""
+    valid = ~np.isnan(block)
+    idx = np.where(valid, np.arange(block.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return block[idx, np.arange(block.shape[1])]
+
+
+def parse_copy_binary(buf: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(float8 epoch, int4 태그 순번, float8 값) 바이너리 COPY 출력 → 배열 (NULL 없음 전제)"""
+    if len(buf) <= len(_COPY_SIGNATURE) + 8:
+        empty = np.empty(0)
+        return empty, np.empty(0, dtype=np.int64), empty
+    if not buf.startswith(_COPY_SIGNATURE):
+        raise ValueError("not a binary COPY stream")
+    ext = int.from_bytes(buf[15:19], "big")
+    rows = np.frombuffer(memoryview(buf)[19 + ext:len(buf) - 2], dtype=_COPY_ROW)
+    return rows["ts"].astype(np.float64), rows["col"].astype(np.int64), rows["value"].astype(np.float64)
+
+
+# ---------------------------------------------------------------- 평가 커널
+class _ConditionKernel:
+    """조건 1개 (임계값 K개) - 청크 간 carry 유지"""
+
+    def __init__(self, cond: Any, col: int, thresholds: Sequence[float], step_s: float):
+        op = cond.operator
+        self.col = col
+        self.fn = OPERATORS.get(op)
+        deadband = getattr(cond, "deadband", 0.0)
+        self.thr = np.asarray(thresholds, dtype=np.float64)
+        bounds = [release_bounds(op, float(t), deadband) for t in self.thr]
+        self.hold_thr = np.asarray([b[0] for b in bounds], dtype=np.float64)
+        self.hold_band = np.asarray([b[1] for b in bounds], dtype=np.float64)
+        self.latched = bool(np.any(self.hold_thr != self.thr) or np.any(self.hold_band != EQ_TOL))
+        # 지연은 격자 단위로 올림 (step_s의 배수면 이벤트 시각 평가와 동일)
+        self.need_on = math.ceil(float(cond.duration_seconds or 0) / step_s - 1e-9)
+        self.need_off = math.ceil(float(getattr(cond, "off_delay_seconds", 0) or 0) / step_s - 1e-9)
+        k = len(self.thr)
+        self.raw = np.zeros(k, dtype=bool)
+        self.run_on = np.zeros(k, dtype=np.int64)
+        self.run_off = np.zeros(k, dtype=np.int64)
+        self.out = np.zeros(k, dtype=bool)
+
+    def evaluate(self, block: np.ndarray) -> np.ndarray:
+        n = block.shape[0]
+        if self.fn is None:
+            return np.zeros((n, len(self.thr)), dtype=bool)  # 알 수 없는 연산자는 항상 False
+        v = block[:, self.col][:, None]
+        with np.errstate(invalid="ignore"):
+            raw = self.fn(v, self.thr, EQ_TOL)
+            if self.latched:
+                raw = _latch(raw, ~self.fn(v, self.hold_thr, self.hold_band), self.raw)
+        self.raw = raw[-1].copy()
+
+        x = raw
+        if self.need_on > 0:
+            run = _run_length(raw, self.run_on)
+            self.run_on = run[-1].copy()
+            x = run > self.need_on  # 충족 시작부터 need_on 격자 이상 경과
+        if self.need_off > 0:
+            # 발생 후에는 이탈이 need_off 격자를 넘게 유지될 때만 해제
+            gap = _run_length(~raw, self.run_off)
+            self.run_off = gap[-1].copy()
+            out = _latch(x, gap > self.need_off, self.out)
+        else:
+            out = x
+        self.out = out[-1].copy()
+        return out
+
+
+class _Tally:
+    """후보 1개의 활성 구간 누적 (구간 단위 처리, 행 단위 아님)"""
+    __slots__ = ("stats", "cooldown", "open_start", "last_end", "cooldown_until")
+
+    def __init__(self, stats: BacktestStats, cooldown: float):
+        self.stats = stats
+        self.cooldown = cooldown
+        self.open_start: Optional[float] = None
+        self.last_end = -math.inf
+        self.cooldown_until = -math.inf
+
+    def add(self, rises: np.ndarray, falls: np.ndarray, flap_window_s: float) -> None:
+        st = self.stats
+        if len(rises):
+            prev_end = falls if self.open_start is not None else np.concatenate(([self.last_end], falls))
+            st.episodes += len(rises)
+            st.flapping_episodes += int(np.count_nonzero(rises - prev_end[:len(rises)] < flap_window_s))
+        starts = rises if self.open_start is None else np.concatenate(([self.open_start], rises))
+        closed = len(falls)
+        if closed:
+            self._close(starts[:closed], falls)
+            self.last_end = float(falls[-1])
+        self.open_start = float(starts[-1]) if len(starts) > closed else None
+
+    def finish(self, end: float) -> None:
+        if self.open_start is not None:
+            self._close(np.asarray([self.open_start]), np.asarray([end]))  # 기간 끝에서 절단
+            self.open_start = None
+
+    def _close(self, starts: np.ndarray, ends: np.ndarray) -> None:
+        st = self.stats
+        durations = ends - starts
+        st.time_in_alarm_s += float(durations.sum())
+        st.max_duration_s = max(st.max_duration_s, float(durations.max()))
+        c = self.cooldown
+        if c <= 0:
+            st.alarms += len(starts)  # 구간마다 한 번
+            return
+        # 쿨다운 중 시작한 구간은 쿨다운 종료 시각에 아직 활성이면 발생, 활성 동안 쿨다운마다 재발생
+        u = self.cooldown_until
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            r0 = s if s >= u else u
+            if r0 < e:
+                n = math.ceil((e - r0) / c)
+                st.alarms += n
+                u = r0 + n * c
+        self.cooldown_until = u
+
+
+class _ScenarioKernel:
+    def __init__(self, scenario: Any, columns: Dict[str, int], step_s: float,
+                 sweep: Optional[ThresholdSweep] = None):
+        self.scenario = scenario
+        self.conditions: List[_ConditionKernel] = []
+        for i, cond in enumerate(scenario.conditions):
+            thresholds = sweep.thresholds if sweep and i == sweep.condition_index else [cond.threshold]
+            self.conditions.append(_ConditionKernel(cond, columns[cond.tag_name], thresholds, step_s))
+        variants = list(sweep.thresholds) if sweep else [None]
+        self.k = len(variants)
+        self.active = np.zeros(self.k, dtype=bool)
+        self.tallies = [
+            _Tally(BacktestStats(scenario.scenario_id, None if t is None else float(t)), float(scenario.cooldown_seconds))
+            for t in variants
+        ]
+
+    def feed(self, t0: float, step_s: float, block: np.ndarray, flap_window_s: float) -> None:
+        n = block.shape[0]
+        if not self.conditions:
+            return  # 조건 없는 시나리오는 발생하지 않음 (스트림 평가기와 동일)
+        active = np.ones((n, self.k), dtype=bool)
+        for cond in self.conditions:
+            active &= cond.evaluate(block)
+        edges = np.diff(np.concatenate((self.active[None, :], active)).T.astype(np.int8), axis=1)
+        self.active = active[-1].copy()
+        r_var, r_idx = np.nonzero(edges == 1)
+        f_var, f_idx = np.nonzero(edges == -1)
+        r_ptr = np.searchsorted(r_var, np.arange(self.k + 1))
+        f_ptr = np.searchsorted(f_var, np.arange(self.k + 1))
+        r_ts = t0 + r_idx * step_s
+        f_ts = t0 + f_idx * step_s
+        for j, tally in enumerate(self.tallies):
+            rises = r_ts[r_ptr[j]:r_ptr[j + 1]]
+            falls = f_ts[f_ptr[j]:f_ptr[j + 1]]
+            if len(rises) or len(falls):
+                tally.add(rises, falls, flap_window_s)
+
+
+class Backtester:
+    """격자 청크를 순서대로 받아 시나리오/스윕 후보를 동시에 평가"""
+
+    def __init__(self, scenarios: Iterable[Any], sweeps: Sequence[ThresholdSweep] = (),
+                 step_s: float = 5.0, flap_window_s: float = 60.0):
+        self.scenarios = list(scenarios)
+        self.sweeps = list(sweeps)
+        self.step_s = float(step_s)
+        self.flap_window_s = float(flap_window_s)
+        self.columns: Dict[str, int] = {}
+        for scenario in self.scenarios:
+            for cond in scenario.conditions:
+                self.columns.setdefault(cond.tag_name, len(self.columns))
+        self.tags: List[str] = list(self.columns)
+
+        by_id = {s.scenario_id: s for s in self.scenarios}
+        self._kernels = [_ScenarioKernel(s, self.columns, self.step_s) for s in self.scenarios]
+        self._sweep_kernels = []
+        for sw in self.sweeps:
+            scenario = by_id.get(sw.scenario_id)
+            if scenario is None:
+                raise KeyError(f"unknown scenario: {sw.scenario_id}")
+            if not 0 <= sw.condition_index < len(scenario.conditions):
+                raise IndexError(f"{sw.scenario_id} has no condition {sw.condition_index}")
+            self._sweep_kernels.append(_ScenarioKernel(scenario, self.columns, self.step_s, sw))
+
+        self._last = np.full(len(self.tags), np.nan)  # 청크 경계 직전 값 (sample-and-hold)
+        self.start: Optional[float] = None
+        self.cursor: Optional[float] = None
+        self.samples = 0
+        self.chunks = 0
+
+    def feed(self, t0: float, block: np.ndarray) -> None:
+        """격자 행렬 (n x len(tags)), 행 i는 시각 t0 + i * step_s 의 값"""
+        if self.start is None:
+            self.start = t0
+        for kernel in self._kernels:
+            kernel.feed(t0, self.step_s, block, self.flap_window_s)
+        for kernel in self._sweep_kernels:
+            kernel.feed(t0, self.step_s, block, self.flap_window_s)
+        if len(block):
+            self._last = block[-1].copy()
+        self.cursor = t0 + len(block) * self.step_s
+        self.chunks += 1
+
+    def push_samples(self, t0: float, t1: float, ts: np.ndarray, col: np.ndarray, value: np.ndarray) -> None:
+        """[t0, t1) 격자 구간의 원시 샘플 (ts는 (t0 - step, t1 - step] 범위, 시각 순)
+
+        샘플은 그 시각 이후 첫 격자점부터 반영된다 (격자 시각의 값 = 그 시각까지의 마지막 샘플).
+        """
+        n = int(round((t1 - t0) / self.step_s))
+        grid = np.full((n + 1, len(self.tags)), np.nan)
+        grid[0] = self._last
+        if len(ts):
+            gi = np.ceil((ts - t0) / self.step_s - 1e-9).astype(np.int64)
+            keep = (gi >= 0) & (gi < n)
+            grid[gi[keep] + 1, col[keep]] = value[keep]  # 같은 격자점의 중복은 마지막 샘플
+            self.samples += int(np.count_nonzero(keep))
+        self.feed(t0, forward_fill(grid)[1:])
+
+    def result(self, end: Optional[float] = None) -> BacktestResult:
+        end = self.cursor if end is None else end
+        start = self.start if self.start is not None else end
+        period = (end or 0.0) - (start or 0.0)
+
+        def collect(kernel: _ScenarioKernel) -> List[BacktestStats]:
+            out = []
+            for tally in kernel.tallies:
+                tally.finish(end)
+                tally.stats.period_s = period
+                out.append(tally.stats)
+            return out
+
+        return BacktestResult(
+            start=start, end=end, step_s=self.step_s,
+            scenarios={k.scenario.scenario_id: collect(k)[0] for k in self._kernels},
+            sweeps=[collect(k) for k in self._sweep_kernels],
+            samples=self.samples, chunks=self.chunks,
+        )
+
+
+# ---------------------------------------------------------------- DB 재생
+def _copy_sql(source: str, value_column: str) -> str:
+    if source not in SOURCES:
+        raise ValueError(f"unsupported source: {source}")
+    ts_col, _ = SOURCES[source]
+    if source == "influx_hist":
+        value_expr, extra = "value", "AND qc = 0"  # 정상 데이터만 (실시간 조회와 동일)
+    else:
+        if value_column not in AGG_COLUMNS:
+            raise ValueError(f"unsupported aggregate column: {value_column}")
+        value_expr, extra = value_column, ""
+    return f"""
+        COPY (
+            SELECT extract(epoch FROM {ts_col})::float8,
+                   (array_position(%s::text[], tag_name) - 1)::int4,
+                   {value_expr}::float8
+            FROM public.{source}
+            WHERE tag_name = ANY(%s)
+              AND {ts_col} > %s AND {ts_col} <= %s
+              AND {value_expr} IS NOT NULL
+              {extra}
+            ORDER BY {ts_col}
+        ) TO STDOUT (FORMAT binary)
+    """
+
+
+async def fetch_chunk(conn: Any, sql: str, tags: List[str], lo: float, hi: float) -> bytes:
+    """(lo, hi] 구간 바이너리 COPY 원본 - 행 변환 없이 버퍼로 수신"""
+    parts = []
+    async with conn.cursor() as cur:
+        params = (tags, tags, datetime.fromtimestamp(lo, timezone.utc), datetime.fromtimestamp(hi, timezone.utc))
+        async with cur.copy(sql, params) as copy:
+            async for data in copy:
+                parts.append(bytes(data))
+    return b"".join(parts)
+
+
+async def run_backtest(conn: Any, scenarios: Iterable[Any], start: Any, end: Any,
+                       source: str = "influx_hist", sweeps: Sequence[ThresholdSweep] = (),
+                       chunk: timedelta = timedelta(days=1), step_s: Optional[float] = None,
+                       value_column: str = "avg", flap_window_s: float = 60.0) -> BacktestResult:
+    """
+    기간 [start, end) 를 chunk 단위로 읽어 평가 (다음 청크 수신과 현재 청크 평가를 겹침)
+
+    Args:
+        conn: psycopg AsyncConnection
+        start, end: datetime (naive는 로컬 시각) 또는 epoch 초
+        source: 'influx_hist' (qc=0 원시) 또는 'influx_agg_1m' (value_column 사용)
+        step_s: 격자 간격 (기본: influx_hist 5초, influx_agg_1m 60초)
+    """
+    started = time.perf_counter()
+    step = float(step_s or SOURCES.get(source, (None, 5.0))[1])
+    sql = _copy_sql(source, value_column)
+    bt = Backtester(scenarios, sweeps, step_s=step, flap_window_s=flap_window_s)
+    t_start, t_end = _epoch(start), _epoch(end)
+    span = max(step, round(chunk.total_seconds() / step) * step)
+
+    bounds = []
+    a = t_start
+    while a < t_end:
+        b = min(a + span, t_end)
+        bounds.append((a, b))
+        a = b
+
+    pending = None
+    if bounds:
+        a, b = bounds[0]
+        pending = asyncio.ensure_future(fetch_chunk(conn, sql, bt.tags, a - step, b - step))
+    for i, (a, b) in enumerate(bounds):
+        buf = await pending
+        if i + 1 < len(bounds):
+            na, nb = bounds[i + 1]
+            pending = asyncio.ensure_future(fetch_chunk(conn, sql, bt.tags, na - step, nb - step))
+        ts, col, value = parse_copy_binary(buf)
+        await asyncio.to_thread(bt.push_samples, a, b, ts, col, value)
+
+    result = bt.result(t_end)
+    result.source = source
+    result.elapsed_s = time.perf_counter() - started
+    return result
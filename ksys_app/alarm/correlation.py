@@ -0,0 +1,335 @@
+"""
+알람 폭주 억제 / 근본 원인 묶음
+
+통신 두절, 펌프 트립처럼 상위 장애 하나가 태그·시나리오별 이벤트 수백 건을 만들 때
+기록기/UI/알림이 모두 밀리지 않도록 이벤트를 사고(incident) 단위로 묶는다.
+
+- 그룹: influx_tag.meta 의 equipment(없으면 group) → 태그 접두어(RO1_TMP → RO1) → 태그 이름
+- 같은 그룹 이벤트가 window_s 안에 이어지면 하나의 사고로 합침 (첫 이벤트만 하류로 전달)
+- 억제 그래프: 상위(부모) 키가 활성인 동안 하위 키 이벤트는 억제하고 부모 사고에 합침
+  키는 시나리오 ID, 태그 이름, 그룹 이름 중 무엇이든 가능
+- 묶음은 알림/기록 중복만 없앰: 묶인 이벤트가 사고 레벨을 올리거나 CRITICAL 이상이면 urgent
+  (호출 측은 urgent 이벤트의 알림까지 실행, 제어 액션은 묶임 여부와 무관하게 실행)
+- 이벤트당 비용 O(1) 상각: 그룹/부모 조회는 dict, 만료는 마지막 갱신 순서 OrderedDict 앞에서만 제거
+- 그룹 정보 조회는 알람 경로 밖에서: tag_group_refresh_task (lifespan) 가 주기적으로 갱신,
+  알람 경로는 메모리의 그룹만 읽음 (조회 전/실패 시 태그 접두어)
+- 메모리 이력에서 밀려난 묶인 이벤트는 summarize_folded() 로 사고당 요약 1건만 기록
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+import weakref
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..performance.metrics import register_metrics
+
+TAG_GROUP_REFRESH_S = float(os.getenv("KSYS_ALARM_TAG_GROUP_REFRESH_S", "60"))
+
+_PREFIX = re.compile(r"^([A-Za-z]+\d*)[_\-.:]")
+
+LEVEL_RANK = {"NORMAL": 0, "INFO": 1, "NOTICE": 2, "WARNING": 3, "ERROR": 4, "CRITICAL": 4, "EMERGENCY": 5}
+URGENT_RANK = LEVEL_RANK["CRITICAL"]
+
+TAG_GROUP_SQL = """
+    SELECT tag_name, COALESCE(meta->>'equipment', meta->>'group')
+    FROM influx_tag
+    WHERE meta ? 'equipment' OR meta ? 'group'
+"""
+
+
+def tag_prefix(tag_name: str) -> str:
+    """메타데이터가 없는 태그의 그룹 (구분자 앞 설비 접두어, 없으면 태그 자체)"""
+    match = _PREFIX.match(tag_name)
+    return match.group(1) if match else tag_name
+
+
+@dataclass
+class Incident:
+    """묶인 알람 사고"""
+    incident_id: str
+    group: str
+    root_key: str
+    level: str
+    opened_at: float
+    last_at: float
+    message: str = ""
+    count: int = 1
+    suppressed: int = 0
+    keys: Set[str] = field(default_factory=set)
+    aliases: List[str] = field(default_factory=list)  # 이 사고를 찾는 그룹/키 이름
+
+    def summary(self) -> str:
+        return (f"[INCIDENT {self.incident_id}] {self.group}: 원인 {self.root_key}, "
+                f"이벤트 {self.count}건 (억제 {self.suppressed}건, 키 {len(self.keys)}개), "
+                f"{self.last_at - self.opened_at:.0f}초 - {self.message}")
+
+
+@dataclass
+class FoldedSummary:
+    """퇴출된 묶인 이벤트의 사고별 요약 (건수 / 처음·마지막 시각 / 최고 레벨)"""
+    incident_id: str
+    group: str
+    level: str
+    first_at: datetime
+    last_at: datetime
+    count: int = 1
+
+    def summary(self) -> str:
+        return (f"[INCIDENT {self.incident_id}] {self.group}: 묶인 이벤트 {self.count}건 보관 종료, "
+                f"{self.first_at.isoformat()} ~ {self.last_at.isoformat()}, 최고 {self.level}")
+
+
+def summarize_folded(members: Iterable[Tuple[str, str, str, datetime]]) -> List[FoldedSummary]:
+    """(incident_id, 그룹, 레벨, 시각) 묶인 이벤트 → 사고별 요약 (처음 나온 순서)"""
+    summaries: Dict[str, FoldedSummary] = {}
+    for incident_id, group, level, at in members:
+        entry = summaries.get(incident_id)
+        if entry is None:
+            summaries[incident_id] = FoldedSummary(incident_id, group, level, at, at)
+            continue
+        entry.count += 1
+        entry.first_at = min(entry.first_at, at)
+        entry.last_at = max(entry.last_at, at)
+        if LEVEL_RANK.get(level, 0) > LEVEL_RANK.get(entry.level, 0):
+            entry.level = level
+    return list(summaries.values())
+
+
+@dataclass
+class Correlation:
+    """이벤트 1건의 처리 결과"""
+    incident: Incident
+    status: str  # 'open' (하류로 전달) | 'fold' (기존 사고에 합침) | 'suppress' (부모 활성으로 억제)
+    level: str = ""
+    escalated: bool = False  # 묶이면서 사고 레벨을 올림
+
+    @property
+    def forward(self) -> bool:
+        return self.status == "open"
+
+    @property
+    def urgent(self) -> bool:
+        """묶였어도 알림까지 보내야 하는 이벤트 (사고 레벨 상승 / CRITICAL 이상)"""
+        return self.forward or self.escalated or LEVEL_RANK.get(self.level, 0) >= URGENT_RANK
+
+
+class AlarmCorrelator:
+    """시간 창 + 설비 그룹 + 억제 그래프 기반 알람 묶음"""
+
+    def __init__(self,
+                 window_s: float = 60.0,
+                 suppression: Optional[Dict[str, Iterable[str]]] = None,
+                 parent_hold_s: Optional[float] = None,
+                 tag_groups: Optional[Dict[str, str]] = None,
+                 refresh_s: float = 600.0,
+                 max_closed: int = 1000,
+                 dsn: str = ""):
+        """
+        Args:
+            window_s: 같은 그룹 이벤트를 한 사고로 묶는 최대 간격 (초)
+            suppression: {부모 키: [자식 키, ...]}
+            parent_hold_s: 부모 마지막 이벤트 후 자식을 억제하는 시간 (기본: window_s)
+            tag_groups: {tag_name: 설비/그룹} (기본: influx_tag 에서 로드)
+            refresh_s: influx_tag 그룹 재조회 주기
+            dsn: 그룹 조회 DB (tag_group_refresh_task 가 사용, 빈 값이면 조회 안 함)
+        """
+        self.dsn = dsn
+        self.window_s = window_s
+        self.parent_hold_s = window_s if parent_hold_s is None else parent_hold_s
+        self.tag_groups: Dict[str, str] = dict(tag_groups or {})
+        self.refresh_s = refresh_s
+        self._groups_loaded_at: Optional[float] = 0.0 if tag_groups is not None else None
+        self._parents: Dict[str, List[str]] = {}
+        self.set_suppression(suppression or {})
+
+        self._open: "OrderedDict[str, Incident]" = OrderedDict()  # incident_id → 사고 (last_at 순)
+        self._index: Dict[str, Incident] = {}  # 그룹/원인 키 → 열린 사고
+        self._active_until: Dict[str, float] = {}  # 부모 키 → 억제 유지 시각
+        self._active_order: Deque = deque()
+        self.closed: Deque[Incident] = deque(maxlen=max_closed)
+        self._seq = 0
+        self.events = 0
+        self.opened = 0
+        self.folded = 0
+        self.suppressed = 0
+        _CORRELATORS.add(self)
+
+    def set_suppression(self, suppression: Dict[str, Iterable[str]]) -> None:
+        """억제 그래프 교체 (자식 → 부모 역인덱스로 보관)"""
+        parents: Dict[str, List[str]] = {}
+        for parent, children in suppression.items():
+            for child in children:
+                if child != parent:
+                    parents.setdefault(child, []).append(parent)
+        self._parents = parents
+
+    async def load_tag_groups(self, conn) -> int:
+        """influx_tag.meta 의 equipment/group 로드"""
+        async with conn.cursor() as cur:
+            await cur.execute(TAG_GROUP_SQL)
+            rows = await cur.fetchall()
+        self.tag_groups = {tag: group for tag, group in rows if group}
+        self._groups_loaded_at = time.monotonic()
+        return len(self.tag_groups)
+
+    def needs_tag_groups(self) -> bool:
+        return self._groups_loaded_at is None or time.monotonic() - self._groups_loaded_at > self.refresh_s
+
+    async def ensure_tag_groups(self, dsn: str) -> None:
+        """그룹 정보가 없거나 오래되었으면 다시 조회 (실패 시 접두어 규칙 사용)"""
+        if not dsn or not self.needs_tag_groups():
+            return
+        import psycopg
+
+        self._groups_loaded_at = time.monotonic()  # 실패해도 refresh_s 동안 재시도 안 함
+        try:
+            async with await psycopg.AsyncConnection.connect(dsn) as conn:
+                await self.load_tag_groups(conn)
+        except Exception as e:  # noqa: BLE001
+            logging.warning(f"influx_tag 그룹 조회 실패 - 태그 접두어로 묶음: {e}")
+
+    def group_of(self, tag_name: str) -> str:
+        group = self.tag_groups.get(tag_name)
+        return group if group else tag_prefix(tag_name)
+
+    # ------------------------------------------------------------------ 입력
+    def ingest(self, key: str, tags: Sequence[str], level: str, ts: float, message: str = "") -> Correlation:
+        """
+        이벤트 1건 분류
+
+        Args:
+            key: 이벤트 원천 키 (시나리오 ID 또는 태그 이름)
+            tags: 관련 태그 (첫 태그의 그룹이 대표 그룹)
+            level: 레벨 이름 (AlarmLevel/AlertLevel .name)
+            ts: 이벤트 시각 (epoch 초)
+        """
+        self.events += 1
+        self.expire(ts)
+        groups = [self.group_of(t) for t in tags] or [tag_prefix(key)]
+        ids = [key, *tags, *groups]
+
+        # 1) 부모가 활성이면 억제 → 부모 사고에 합침
+        parent = self._active_parent(ids, ts)
+        if parent is not None:
+            incident = self._index.get(parent)
+            if incident is not None:
+                self.suppressed += 1
+                incident.suppressed += 1
+                escalated = self._touch(incident, key, level, ts)
+                return Correlation(incident, "suppress", level, escalated)
+
+        # 이 이벤트가 다른 키의 부모일 수 있으므로 활성 표시 (키/그룹 모두)
+        for node in (key, *groups):
+            self._mark_active(node, ts)
+
+        # 2) 같은 그룹의 열린 사고에 합침
+        for group in groups:
+            incident = self._index.get(group)
+            if incident is not None:
+                self.folded += 1
+                escalated = self._touch(incident, key, level, ts)
+                return Correlation(incident, "fold", level, escalated)
+
+        # 3) 새 사고 - 그룹과 원인 키로 찾을 수 있게 등록 (억제된 자식 합류용)
+        self._seq += 1
+        self.opened += 1
+        incident = Incident(f"I{int(ts)}_{self._seq}", groups[0], key, level, ts, ts, message, keys={key})
+        for name in dict.fromkeys((*groups, key)):
+            if name not in self._index:
+                self._index[name] = incident
+                incident.aliases.append(name)
+        self._open[incident.incident_id] = incident
+        return Correlation(incident, "open", level)
+
+    def expire(self, now: float) -> List[Incident]:
+        """window_s 동안 이벤트가 없던 사고 종료 (마지막 갱신 순서로 앞에서만 확인)"""
+        closed: List[Incident] = []
+        while self._open:
+            incident = next(iter(self._open.values()))
+            if now - incident.last_at <= self.window_s:
+                break
+            self._open.popitem(last=False)
+            for name in incident.aliases:
+                if self._index.get(name) is incident:
+                    del self._index[name]
+            closed.append(incident)
+        while self._active_order and self._active_order[0][0] < now:
+            until, node = self._active_order.popleft()
+            if self._active_until.get(node) == until:
+                del self._active_until[node]
+        self.closed.extend(closed)
+        return closed
+
+    def pop_closed(self) -> List[Incident]:
+        """종료된 사고 꺼내기 (요약 기록용)"""
+        closed = list(self.closed)
+        self.closed.clear()
+        return closed
+
+    def open_incidents(self) -> List[Incident]:
+        return list(self._open.values())
+
+    # ---------------------------------------------------------------- 내부
+    def _active_parent(self, ids: Sequence[str], ts: float) -> Optional[str]:
+        for node in ids:
+            for parent in self._parents.get(node, ()):
+                if self._active_until.get(parent, float("-inf")) >= ts:
+                    return parent
+        return None
+
+    def _mark_active(self, node: str, ts: float) -> None:
+        until = ts + self.parent_hold_s
+        if self._active_until.get(node) != until:
+            self._active_until[node] = until
+            self._active_order.append((until, node))
+
+    def _touch(self, incident: Incident, key: str, level: str, ts: float) -> bool:
+        incident.count += 1
+        incident.last_at = max(incident.last_at, ts)
+        incident.keys.add(key)
+        self._open.move_to_end(incident.incident_id)
+        if LEVEL_RANK.get(level, 0) > LEVEL_RANK.get(incident.level, 0):
+            incident.level = level
+            return True
+        return False
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "ksys_alarm_correlation_events_total": self.events,
+            "ksys_alarm_correlation_incidents_total": self.opened,
+            "ksys_alarm_correlation_folded_total": self.folded,
+            "ksys_alarm_correlation_suppressed_total": self.suppressed,
+            "ksys_alarm_correlation_open_incidents": len(self._open),
+        }
+
+
+_CORRELATORS: "weakref.WeakSet[AlarmCorrelator]" = weakref.WeakSet()
+
+
+async def tag_group_refresh_task(interval_s: Optional[float] = None) -> None:
+    """Lifespan task: DSN 이 있는 묶음기의 influx_tag 그룹을 refresh_s 마다 재조회 (알람 경로 밖)"""
+    interval_s = TAG_GROUP_REFRESH_S if interval_s is None else interval_s
+    if interval_s <= 0:
+        return
+    while True:
+        for correlator in list(_CORRELATORS):
+            if correlator.dsn:
+                await correlator.ensure_tag_groups(correlator.dsn)
+        await asyncio.sleep(interval_s)
+
+
+def _correlation_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for correlator in list(_CORRELATORS):
+        for name, value in correlator.metrics().items():
+            totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_correlation_metrics)
@@ -0,0 +1,217 @@
+"""
+알람 시나리오 평가 계획 (컴파일된 시나리오)
+
+시나리오/조건을 배열로 펼쳐 매 틱 전체 루프 대신 변경분만 평가한다.
+- 태그 → 조건 역색인: 값이 바뀐 태그의 조건만 비교
+- 연산자별 비교 함수 사전 바인딩 + 연산자별 조건 인덱스 (태그 간 벡터 비교)
+- 시나리오별 미충족 조건 수를 증분 갱신 → 발생 후보 = 미충족 0 & 쿨다운 종료
+- 조건 의미는 stream_evaluator와 동일: on-delay(duration), off-delay, deadband
+- 재컴파일 시 바뀌지 않은 시나리오는 carry_over() 로 조건/쿨다운 상태를 이어받음
+"""
+
+from typing import Callable, Dict, List, Set, Tuple
+
+import numpy as np
+
+# 연산자 → 벡터 비교 (values, thresholds, band) -> bool 배열
+# band: ==/!= 허용오차 (순서 비교 연산자는 미사용)
+EQ_TOL = 0.01
+OPERATORS: Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    '>': lambda v, t, b: v > t,
+    '<': lambda v, t, b: v < t,
+    '>=': lambda v, t, b: v >= t,
+    '<=': lambda v, t, b: v <= t,
+    '==': lambda v, t, b: np.abs(v - t) < b,
+    '!=': lambda v, t, b: np.abs(v - t) >= b,
+}
+
+
+def release_bounds(operator: str, threshold: float, deadband: float) -> Tuple[float, float]:
+    """발생 중(hold) 비교에 쓰는 (threshold, band) - deadband만큼 해제를 늦춤"""
+    db = max(float(deadband or 0.0), 0.0)
+    if operator in ('>', '>='):
+        return threshold - db, EQ_TOL
+    if operator in ('<', '<='):
+        return threshold + db, EQ_TOL
+    if operator == '==':
+        return threshold, EQ_TOL + db
+    if operator == '!=':
+        return threshold, max(EQ_TOL - db, 0.0)
+    return threshold, EQ_TOL
+
+
+class EvaluationPlan:
+    """시나리오 목록을 컴파일한 평가 계획 (틱 간 조건 상태 유지)"""
+
+    def __init__(self, scenarios: List["AlarmScenario"]):
+        self.scenarios = list(scenarios)
+        self.tag_index: Dict[str, int] = {}
+        cond_scen: List[int] = []
+        cond_tag: List[int] = []
+        cond_thr: List[float] = []
+        cond_dur: List[float] = []
+        cond_off: List[float] = []
+        hold_thr: List[float] = []
+        hold_band: List[float] = []
+        op_conds: Dict[str, List[int]] = {}
+        unmet: List[int] = []
+
+        for s_idx, scenario in enumerate(self.scenarios):
+            unmet.append(len(scenario.conditions))
+            for cond in scenario.conditions:
+                c_idx = len(cond_scen)
+                cond_scen.append(s_idx)
+                cond_tag.append(self.tag_index.setdefault(cond.tag_name, len(self.tag_index)))
+                cond_thr.append(float(cond.threshold))
+                cond_dur.append(float(cond.duration_seconds or 0))
+                cond_off.append(float(getattr(cond, "off_delay_seconds", 0) or 0))
+                h_thr, h_band = release_bounds(cond.operator, float(cond.threshold), getattr(cond, "deadband", 0.0))
+                hold_thr.append(h_thr)
+                hold_band.append(h_band)
+                op_conds.setdefault(cond.operator, []).append(c_idx)
+
+        n_cond = len(cond_scen)
+        # 시나리오 s 의 조건 = [scenario_ptr[s], scenario_ptr[s + 1])
+        self.scenario_ptr = np.concatenate(([0], np.cumsum(unmet))).astype(np.int64)
+        self.tags: List[str] = list(self.tag_index)
+        self.cond_scenario = np.asarray(cond_scen, dtype=np.int64)
+        self.cond_tag = np.asarray(cond_tag, dtype=np.int64)
+        self.cond_threshold = np.asarray(cond_thr, dtype=np.float64)
+        self.cond_duration = np.asarray(cond_dur, dtype=np.float64)
+        self.cond_off_delay = np.asarray(cond_off, dtype=np.float64)
+        self.hold_threshold = np.asarray(hold_thr, dtype=np.float64)
+        self.hold_band = np.asarray(hold_band, dtype=np.float64)
+
+        # 연산자 코드 (알 수 없는 연산자는 항상 False - 기존 동작)
+        op_names = [op for op in op_conds if op in OPERATORS]
+        self._ops: List[Callable] = [OPERATORS[op] for op in op_names]
+        self.cond_op = np.full(n_cond, -1, dtype=np.int64)
+        for code, op in enumerate(op_names):
+            self.cond_op[op_conds[op]] = code
+
+        # 역색인 (CSR): 태그 → 조건 인덱스
+        order = np.argsort(self.cond_tag, kind="stable")
+        counts = np.bincount(self.cond_tag, minlength=len(self.tags))
+        self._tag_conds = order
+        self._tag_ptr = np.concatenate(([0], np.cumsum(counts)))
+
+        self._duration_conds = np.flatnonzero(self.cond_duration > 0)
+        self._off_delay_conds = np.flatnonzero(self.cond_off_delay > 0)
+
+        # 틱 간 상태
+        self.values = np.full(len(self.tags), np.nan)
+        self.raw_met = np.zeros(n_cond, dtype=bool)        # 비교 결과
+        self.met = np.zeros(n_cond, dtype=bool)            # 지속시간 반영 결과
+        self.first_met = np.full(n_cond, np.nan)           # 비교 충족 시작 시각 (epoch 초)
+        self.first_unmet = np.full(n_cond, np.nan)         # 발생 중 이탈 시작 시각 (off-delay)
+        # 조건이 없는 시나리오는 기존처럼 all({}) == True → 미충족 0
+        self.unmet = np.asarray(unmet, dtype=np.int64)
+        self.cooldown = np.asarray([float(s.cooldown_seconds) for s in self.scenarios], dtype=np.float64)
+        self.cooldown_until = np.asarray(
+            [s.last_triggered.timestamp() + s.cooldown_seconds if s.last_triggered else -np.inf for s in self.scenarios],
+            dtype=np.float64,
+        )
+        self.last_reevaluated = 0  # 직전 틱에서 비교한 조건 수 (벤치마크/진단용)
+
+    def carry_over(self, old: "EvaluationPlan", keep: Set[str]) -> int:
+        """
+        이전 계획에서 keep 시나리오(같은 객체)의 조건/쿨다운 상태 이어받기 → 이어받은 시나리오 수
+
+        태그 값은 이어받지 않으므로 다음 update() 에서 모든 조건을 한 번 다시 비교한다
+        (새 조건은 처음 평가, 이어받은 조건은 충족 시작 시각 유지).
+        """
+        old_index = {id(s): i for i, s in enumerate(old.scenarios)}
+        carried = 0
+        for s_idx, scenario in enumerate(self.scenarios):
+            o_idx = old_index.get(id(scenario))
+            if o_idx is None or scenario.scenario_id not in keep:
+                continue
+            src = slice(old.scenario_ptr[o_idx], old.scenario_ptr[o_idx + 1])
+            dst = slice(self.scenario_ptr[s_idx], self.scenario_ptr[s_idx + 1])
+            if src.stop - src.start != dst.stop - dst.start:
+                continue
+            for name in ("raw_met", "met", "first_met", "first_unmet"):
+                getattr(self, name)[dst] = getattr(old, name)[src]
+            self.unmet[s_idx] = (dst.stop - dst.start) - int(self.met[dst].sum())
+            self.cooldown_until[s_idx] = old.cooldown_until[o_idx]
+            carried += 1
+        return carried
+
+    def conditions_for_tag(self, tag_name: str) -> np.ndarray:
+        t = self.tag_index.get(tag_name)
+        if t is None:
+            return np.empty(0, dtype=np.int64)
+        return self._tag_conds[self._tag_ptr[t]:self._tag_ptr[t + 1]]
+
+    def _changed_conditions(self, changed_tags: np.ndarray) -> np.ndarray:
+        if len(changed_tags) == len(self.tags):
+            return np.arange(len(self.cond_scenario))
+        parts = [self._tag_conds[self._tag_ptr[t]:self._tag_ptr[t + 1]] for t in changed_tags]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _set_met(self, conds: np.ndarray, value: bool) -> None:
+        conds = conds[self.met[conds] != value]
+        if len(conds) == 0:
+            return
+        self.met[conds] = value
+        np.add.at(self.unmet, self.cond_scenario[conds], -1 if value else 1)
+
+    def update(self, sensor_data: Dict[str, float], now: float) -> np.ndarray:
+        """센서 값 반영 후 발생 후보 시나리오 인덱스 반환 (모든 조건 충족 & 쿨다운 종료)"""
+        values = np.full(len(self.tags), np.nan)
+        index = self.tag_index
+        for tag, value in sensor_data.items():
+            t = index.get(tag)
+            if t is not None and value is not None:
+                values[t] = value
+        prev = self.values
+        changed = np.flatnonzero((values != prev) & ~(np.isnan(values) & np.isnan(prev)))
+        self.values = values
+
+        conds = self._changed_conditions(changed)
+        self.last_reevaluated = len(conds)
+        if len(conds):
+            vals = values[self.cond_tag[conds]]
+            prev_raw = self.raw_met[conds]
+            # 발생 중(해제 대기 포함)인 조건은 deadband를 반영한 해제 기준으로 비교
+            holding = self.met[conds]
+            thr = np.where(holding, self.hold_threshold[conds], self.cond_threshold[conds])
+            band = np.where(holding, self.hold_band[conds], EQ_TOL)
+            ops = self.cond_op[conds]
+            raw = np.zeros(len(conds), dtype=bool)
+            with np.errstate(invalid="ignore"):
+                for code, fn in enumerate(self._ops):
+                    sel = ops == code
+                    if sel.any():
+                        raw[sel] = fn(vals[sel], thr[sel], band[sel])
+
+            rising = conds[raw & ~prev_raw]
+            falling = conds[~raw & prev_raw]
+            self.raw_met[conds] = raw
+
+            self.first_met[rising] = now
+            self.first_unmet[rising] = np.nan  # 해제 대기 취소
+            self._set_met(rising[self.cond_duration[rising] <= 0], True)
+            self.first_met[falling] = np.nan
+            delayed = self.met[falling] & (self.cond_off_delay[falling] > 0)
+            self.first_unmet[falling[delayed]] = now
+            self._set_met(falling[~delayed], False)
+
+        # 지속시간 조건: 충족 유지 시간이 duration 이상이 된 조건
+        dc = self._duration_conds
+        if len(dc):
+            due = dc[self.raw_met[dc] & ~self.met[dc] & (now - self.first_met[dc] >= self.cond_duration[dc])]
+            self._set_met(due, True)
+
+        # 해제 지연 조건: 이탈 유지 시간이 off-delay 이상이 된 조건
+        oc = self._off_delay_conds
+        if len(oc):
+            due = oc[~self.raw_met[oc] & self.met[oc] & (now - self.first_unmet[oc] >= self.cond_off_delay[oc])]
+            self.first_unmet[due] = np.nan
+            self._set_met(due, False)
+
+        return np.flatnonzero((self.unmet == 0) & (self.cooldown_until <= now))
+
+    def mark_triggered(self, s_idx: int, now: float) -> None:
+        self.cooldown_until[s_idx] = now + self.cooldown[s_idx]
+
@@ -0,0 +1,453 @@
+"""
+알람 이벤트 배치 기록기 (공유 싱크)
+
+알람 시나리오 엔진, 가동범위 모니터, 수질 모니터의 이벤트를 한 곳에서 기록한다.
+- submit(): 제한된 메모리 큐에 넣고 즉시 반환 (알람 경로에서 DB 대기 없음)
+- 쓰기 태스크 1개가 큐를 비우며 batch_size 또는 flush_interval_s 기준으로
+  테이블별 다중 행 INSERT를 한 트랜잭션으로 실행 (연결은 재사용)
+- DB 연결 실패/큐 초과 시 로컬 저널(JSON lines, 추가 전용)에 기록하고
+  재연결되면 새 배치보다 먼저 저널을 MAX_ROWS_PER_STATEMENT 행씩 재생(배치마다 커밋)한 뒤 비움
+- 저널 파일 쓰기(fsync)/읽기/비우기는 쓰기 태스크가 스레드에서 실행 (submit 의 큐 초과분도 넘겨받아 기록)
+- 재생 중복 방지: alarm_events 행은 submit 시 uuid event_key 를 붙여 저널에 함께 저장,
+  INSERT 는 ON CONFLICT DO NOTHING (커밋 후 저널 비우기 전 중단 / 커밋 응답 유실로 다시 재생돼도 1행)
+- 큐 길이/저널 행 수/플러시 지연은 /metrics 로 노출
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import psycopg
+
+from ..performance.metrics import register_metrics
+
+MAX_ROWS_PER_STATEMENT = 1000
+DEFAULT_JOURNAL = os.getenv("KSYS_EVENT_JOURNAL", os.path.join("data", "journal", "alarm_events.jsonl"))
+
+_FLUSH = object()  # 큐 센티널: 모인 배치를 즉시 기록
+# 재연결 후 재시도할 오류 (그 외 DB 오류는 같은 입력으로 반복 실패)
+_CONNECTION_ERRORS = (psycopg.OperationalError, psycopg.InterfaceError, ConnectionError, OSError, asyncio.TimeoutError)
+
+
+@dataclass(frozen=True)
+class SinkTable:
+    """기록 대상 테이블 (컬럼 순서 = submit 행 순서, key 컬럼은 싱크가 마지막에 붙임)"""
+    name: str
+    columns: Tuple[str, ...]
+    conflict: str = ""
+    key: str = ""  # 멱등 키 컬럼 (이벤트마다 uuid)
+
+    def keyed(self, row: Sequence[Any]) -> tuple:
+        """멱등 키를 붙인 행 (이미 붙어 있으면 그대로 - 저널 재생 시 같은 키 유지)"""
+        row = tuple(row)
+        if not self.key or len(row) == len(self.columns):
+            return row
+        return (*row, uuid.uuid4().hex)
+
+    def insert_sql(self, n_rows: int) -> str:
+        row = "(" + ", ".join(["%s"] * len(self.columns)) + ")"
+        return (f"INSERT INTO {self.name} ({', '.join(self.columns)}) "
+                f"VALUES {', '.join([row] * n_rows)} {self.conflict}").rstrip()
+
+
+ALARM_HISTORY = SinkTable(
+    "alarm_history",
+    ("event_id", "scenario_id", "level", "triggered_at", "message", "sensor_data"),
+    "ON CONFLICT (event_id) DO NOTHING",
+)
+ALARM_EVENTS = SinkTable(
+    "alarm_events",
+    ("alarm_type", "alarm_level", "parameter", "value", "message", "created_at", "event_key"),
+    "ON CONFLICT (event_key) DO NOTHING",
+    key="event_key",
+)
+TABLES: Dict[str, SinkTable] = {t.name: t for t in (ALARM_HISTORY, ALARM_EVENTS)}
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    raise TypeError(f"not journal-serializable: {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    if "$d" in obj:
+        return date.fromisoformat(obj["$d"])
+    return obj
+
+
+class EventSink:
+    """제한 큐 + 단일 쓰기 태스크 + 저널 기반 이벤트 기록기"""
+
+    def __init__(self,
+                 dsn: str,
+                 journal_path: Optional[str] = None,
+                 max_queue: int = 10_000,
+                 batch_size: int = 500,
+                 flush_interval_s: float = 1.0,
+                 retry_max_s: float = 30.0,
+                 connect: Optional[Callable[[], Awaitable[Any]]] = None,
+                 tables: Optional[Dict[str, SinkTable]] = None):
+        self.dsn = dsn
+        self.journal_path = journal_path or DEFAULT_JOURNAL
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.retry_max_s = retry_max_s
+        self.tables = dict(tables or TABLES)
+        self._connect = connect or (lambda: psycopg.AsyncConnection.connect(self.dsn, autocommit=True))
+        self._conn: Any = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._overflow: List[Tuple[str, tuple]] = []  # 큐 초과분 - 쓰기 태스크가 저널로 옮김
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._retry_at = 0.0
+        self._replay_offset = 0  # 저널에서 이미 커밋한 위치 (바이트)
+        self._backoff = 1.0
+
+        # 지표
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self.last_error = ""
+        self.last_flush_s = 0.0
+        self.max_flush_s = 0.0
+        self.journal_rows = self._count_journal()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def overflow_rows(self) -> int:
+        return len(self._overflow)
+
+    # ------------------------------------------------------------------ 입력
+    def submit(self, table: str, row: Sequence[Any]) -> bool:
+        """이벤트 1행 등록 (대기 없음). 큐가 가득 차면 쓰기 태스크가 저널에 기록 → False"""
+        if table not in self.tables:
+            raise KeyError(f"unknown sink table: {table}")
+        item = (table, self.tables[table].keyed(row))
+        queue = self._ensure_writer()
+        if queue is None:
+            self._append_journal([item])  # 이벤트 루프 밖 호출: 다음 재연결 때 재생
+            return False
+        try:
+            queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self._overflow.append(item)  # 파일 쓰기는 쓰기 태스크에서 (알람 경로 대기 없음)
+            return False
+
+    def start(self) -> None:
+        """이벤트 루프 안에서 쓰기 태스크 시작 (남은 저널 재생 포함, 루프 밖이면 무시)"""
+        self._ensure_writer()
+
+    async def flush(self) -> None:
+        """지금까지 등록된 이벤트 기록(또는 저널 기록) 완료까지 대기"""
+        queue = self._ensure_writer()
+        if queue is None:
+            return
+        await queue.put(_FLUSH)
+        await queue.join()
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self._disconnect()
+
+    def _ensure_writer(self) -> Optional[asyncio.Queue]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        if self._loop is not loop or self._task is None or self._task.done():
+            old = self._queue
+            self._queue = asyncio.Queue(self.max_queue)
+            if old is not None:  # 이전 루프에서 남은 항목 이관
+                while not old.empty():
+                    item = old.get_nowait()
+                    if item is not _FLUSH:
+                        self._queue.put_nowait(item)
+            self._loop = loop
+            self._conn = None  # 연결은 루프에 묶여 있음
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    # ------------------------------------------------------------ 쓰기 태스크
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.journal_rows:
+                # 저널 대기분이 있으면 새 이벤트가 없어도 재연결 시각에 재생 시도
+                try:
+                    first = await asyncio.wait_for(queue.get(), max(self._retry_at - time.monotonic(), 0.1))
+                except asyncio.TimeoutError:
+                    await self._write([])
+                    continue
+            else:
+                first = await queue.get()
+            batch: List[Tuple[str, tuple]] = []
+            taken = 1
+            if first is not _FLUSH:
+                batch.append(first)
+                deadline = loop.time() + self.flush_interval_s
+                while len(batch) < self.batch_size:
+                    try:
+                        item = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    taken += 1
+                    if item is _FLUSH:
+                        break
+                    batch.append(item)
+            try:
+                # 큐 초과분은 저널로 → 배치 전에 재생 (이전 저널과 순서 유지)
+                overflow, self._overflow = self._overflow, []
+                await self._spill(overflow)
+                if batch or overflow:
+                    await self._write(batch)
+            except Exception as e:  # noqa: BLE001 - 쓰기 태스크는 계속 동작해야 함
+                logging.error(f"이벤트 기록 실패: {e}")
+            finally:
+                for _ in range(taken):
+                    queue.task_done()
+
+    async def _write(self, rows: List[Tuple[str, tuple]]) -> None:
+        if self._conn is None and time.monotonic() < self._retry_at:
+            await self._spill(rows)  # 재연결 대기 중
+            return
+        started = time.perf_counter()
+        stage = "replay"
+        try:
+            conn = await self._connection()
+            if self.journal_rows:
+                await self._replay(conn)  # 순서 유지: 저널 먼저
+            stage = "insert"
+            if rows:
+                await self._insert(conn, rows)
+        except _CONNECTION_ERRORS as e:
+            await self._spill(rows)
+            await self._on_failure(e)
+            return
+        except Exception as e:  # noqa: BLE001
+            # 연결 외 오류(테이블 없음, 잘못된 값 등)는 재시도해도 같으므로 버림
+            if stage == "replay":
+                await self._reject_journal(e)
+                await self._spill(rows)
+            else:
+                self.dropped += len(rows)
+                logging.error(f"이벤트 기록 불가 - {len(rows)}행 버림: {e}")
+            await self._rollback()
+            return
+        self._backoff = 1.0
+        if not rows:
+            return
+        elapsed = time.perf_counter() - started
+        self.written += len(rows)
+        self.batches += 1
+        self.last_flush_s = elapsed
+        self.max_flush_s = max(self.max_flush_s, elapsed)
+
+    async def _connection(self) -> Any:
+        if self._conn is None:
+            self._conn = await self._connect()
+        return self._conn
+
+    async def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:  # noqa: BLE001
+                pass
+
+    async def _rollback(self) -> None:
+        try:
+            if self._conn is not None and not self._conn.closed:
+                await self._conn.rollback()
+        except Exception:  # noqa: BLE001
+            await self._disconnect()
+
+    async def _on_failure(self, error: Exception) -> None:
+        self.failures += 1
+        self.last_error = str(error)
+        await self._disconnect()
+        self._retry_at = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.retry_max_s)
+        logging.warning(f"이벤트 DB 기록 실패 → 저널 기록 ({self.journal_rows}행 대기): {error}")
+
+    async def _insert(self, conn: Any, rows: List[Tuple[str, tuple]]) -> None:
+        by_table: Dict[str, List[tuple]] = {}
+        for table, row in rows:
+            by_table.setdefault(table, []).append(row)
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                for name, table_rows in by_table.items():
+                    table = self.tables[name]
+                    for i in range(0, len(table_rows), MAX_ROWS_PER_STATEMENT):
+                        part = table_rows[i:i + MAX_ROWS_PER_STATEMENT]
+                        await cur.execute(table.insert_sql(len(part)), [v for row in part for v in row])
+
+    # ------------------------------------------------------------------ 저널
+    async def _spill(self, rows: List[Tuple[str, tuple]]) -> None:
+        """저널 추가 (open/write/fsync 는 스레드에서 - 이벤트 루프를 막지 않음)"""
+        if rows:
+            await asyncio.to_thread(self._append_journal, rows)
+
+    def _append_journal(self, rows: List[Tuple[str, tuple]]) -> None:
+        if not rows:
+            return
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for table, row in rows:
+                f.write(json.dumps({"t": table, "r": list(row)}, default=_encode, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_rows += len(rows)
+        self.spilled += len(rows)
+
+    def _read_journal(self, offset: int, limit: int) -> Tuple[List[Tuple[str, tuple]], int, bool]:
+        """offset 부터 최대 limit 행 → (행, 다음 offset, 파일 끝 도달)"""
+        rows: List[Tuple[str, tuple]] = []
+        with open(self.journal_path, "rb") as f:
+            f.seek(offset)
+            while len(rows) < limit:
+                line = f.readline()
+                if not line:
+                    return rows, f.tell(), True
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line, object_hook=_decode)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue  # 기록 중단된 줄
+                table = self.tables.get(item.get("t"))
+                if table is not None:
+                    rows.append((table.name, table.keyed(item["r"])))  # 키 도입 전 저널 행도 키 부여
+            return rows, f.tell(), False
+
+    def _truncate_journal(self) -> None:
+        open(self.journal_path, "w").close()
+
+    async def _replay(self, conn: Any) -> None:
+        """
+        저널을 MAX_ROWS_PER_STATEMENT 행씩 재생 - 배치마다 커밋하고 위치 기록, 끝까지 가면 비움
+        (메모리/트랜잭션 크기는 배치 1개, 실패 시 커밋한 위치부터 재시도)
+        """
+        while True:
+            rows, offset, done = await asyncio.to_thread(
+                self._read_journal, self._replay_offset, MAX_ROWS_PER_STATEMENT)
+            if rows:
+                await self._insert(conn, rows)
+            self._replay_offset = offset
+            self.replayed += len(rows)
+            self.journal_rows = max(self.journal_rows - len(rows), 0)
+            if done:
+                break
+        await asyncio.to_thread(self._truncate_journal)
+        self._replay_offset = 0
+        self.journal_rows = 0
+
+    async def _reject_journal(self, error: Exception) -> None:
+        """재생 불가 저널은 옆으로 옮겨 보관 (이후 배치가 막히지 않도록, 이미 커밋한 행은 키로 중복 방지)"""
+        rejected = f"{self.journal_path}.rejected.{int(time.time())}"
+        await asyncio.to_thread(os.replace, self.journal_path, rejected)
+        logging.error(f"이벤트 저널 재생 실패 - {rejected} 로 이동 ({self.journal_rows}행): {error}")
+        self._replay_offset = 0
+        self.journal_rows = 0
+
+    def _count_journal(self) -> int:
+        try:
+            with open(self.journal_path, "rb") as f:
+                return sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "ksys_event_sink_queue_depth": self.queue_depth,
+            "ksys_event_sink_queue_capacity": self.max_queue,
+            "ksys_event_sink_overflow_rows": self.overflow_rows,
+            "ksys_event_sink_journal_rows": self.journal_rows,
+            "ksys_event_sink_written_total": self.written,
+            "ksys_event_sink_spilled_total": self.spilled,
+            "ksys_event_sink_replayed_total": self.replayed,
+            "ksys_event_sink_batches_total": self.batches,
+            "ksys_event_sink_flush_failures_total": self.failures,
+            "ksys_event_sink_dropped_total": self.dropped,
+            "ksys_event_sink_flush_latency_seconds": self.last_flush_s,
+            "ksys_event_sink_flush_latency_max_seconds": self.max_flush_s,
+        }
+
+
+_SINKS: Dict[str, EventSink] = {}
+
+
+def get_event_sink(dsn: str) -> Optional[EventSink]:
+    """DSN별 공유 싱크 (DSN 미설정이면 None - 기록하지 않음)"""
+    if not dsn:
+        return None
+    sink = _SINKS.get(dsn)
+    if sink is None:
+        sink = _SINKS[dsn] = EventSink(dsn)
+    sink.start()
+    return sink
+
+
+async def close_event_sinks() -> None:
+    """남은 큐 기록 후 연결 종료 (종료 시 유실 방지)"""
+    for sink in list(_SINKS.values()):
+        await sink.close()
+
+
+@contextlib.asynccontextmanager
+async def event_sink_lifespan():
+    """Lifespan task: 앱 종료 시 이벤트 싱크 비우기"""
+    try:
+        yield
+    finally:
+        await close_event_sinks()
+
+
+def _sink_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for sink in _SINKS.values():
+        for name, value in sink.stats().items():
+            if "latency" in name:
+                totals[name] = max(totals.get(name, 0.0), value)
+            else:
+                totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_sink_metrics)
@@ -0,0 +1,156 @@
+"""
+시간 인덱스 고정 용량 이력 저장소
+
+알람/이탈 이력을 리스트에 무한히 쌓지 않고 최근 capacity 건만 메모리에 유지한다.
+- 시각 배열(float64, 정렬 유지)에 searchsorted → 시간 범위 조회 O(log n) + 결과 크기
+- 태그/시나리오/레벨별 건수는 추가·퇴출 시 증감 (조회 시 스캔 없음)
+- 용량 초과분은 가장 오래된 것부터 evict 콜백으로 넘김 (DB 테이블로 기록)
+- 버퍼를 2배 크기로 잡고 가득 차면 앞쪽을 한 번에 잘라냄 → 추가 O(1) 상각
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+DEFAULT_CAPACITY = int(os.getenv("KSYS_ALARM_HISTORY_CAP", "50000"))
+
+
+def _epoch(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class HistoryStore(Generic[T]):
+    """시각 순 고정 용량 저장소 (list 처럼 append/len/반복 지원)"""
+
+    def __init__(self,
+                 time_of: Callable[[T], datetime],
+                 keys_of: Optional[Callable[[T], Iterable[Tuple[str, str]]]] = None,
+                 capacity: int = DEFAULT_CAPACITY,
+                 evict: Optional[Callable[[List[T]], None]] = None,
+                 evict_batch: int = 1000):
+        """
+        Args:
+            time_of: 항목의 시각
+            keys_of: 건수 집계 키 [(종류, 값), ...] 예: [('tag', 'TMP'), ('level', 'WARNING')]
+            capacity: 메모리 보관 최대 건수
+            evict: 퇴출 항목 처리 (오래된 순 리스트)
+            evict_batch: 한 번에 퇴출할 최대 건수 (콜백 호출 횟수 절감)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.time_of = time_of
+        self.keys_of = keys_of
+        self.capacity = capacity
+        self.evict = evict
+        self.evict_batch = max(1, min(evict_batch, capacity))
+        self._ts = np.empty(2 * capacity, dtype=np.float64)
+        self._items: List[Optional[T]] = []  # 같은 논리 위치 (_start 부터 유효)
+        self._start = 0
+        self._last_ts = float("-inf")
+        self._counts: Dict[str, Counter] = {}
+        self.total = 0
+        self.evicted = 0
+
+    # ------------------------------------------------------------------ 입력
+    def append(self, item: T) -> None:
+        ts = _epoch(self.time_of(item))
+        end = len(self._items)
+        if end == len(self._ts):
+            self._compact()
+            end = len(self._items)
+        if ts < self._last_ts and end > self._start:
+            # 늦게 도착한 항목: 정렬 위치에 삽입 (드묾)
+            pos = int(np.searchsorted(self._ts[self._start:end], ts, side="right")) + self._start
+            self._ts[pos + 1:end + 1] = self._ts[pos:end]
+            self._ts[pos] = ts
+            self._items.insert(pos, item)
+        else:
+            self._ts[end] = ts
+            self._items.append(item)
+            self._last_ts = ts
+        self.total += 1
+        if self.keys_of is not None:
+            counts = self._counts
+            for kind, value in self.keys_of(item):
+                counter = counts.get(kind)
+                if counter is None:
+                    counter = counts[kind] = Counter()
+                counter[value] += 1
+        if end + 1 - self._start > self.capacity:
+            self._evict(self.evict_batch)
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.append(item)
+
+    # ------------------------------------------------------------------ 조회
+    def __len__(self) -> int:
+        return len(self._items) - self._start
+
+    def __iter__(self) -> Iterator[T]:
+        for i in range(self._start, len(self._items)):
+            yield self._items[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._items[self._start + i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return self._items[self._start + index]
+
+    def _bounds(self, start=None, end=None) -> Tuple[int, int]:
+        ts = self._ts[self._start:len(self._items)]
+        lo = 0 if start is None else int(np.searchsorted(ts, _epoch(start), side="right"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _epoch(end), side="right"))
+        return self._start + lo, self._start + max(lo, hi)
+
+    def range(self, start=None, end=None) -> List[T]:
+        """start < 시각 <= end 항목 (시각 순)"""
+        lo, hi = self._bounds(start, end)
+        return self._items[lo:hi]
+
+    def count_range(self, start=None, end=None) -> int:
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def counts(self, kind: str) -> Dict[str, int]:
+        """보관 중인 항목의 종류별 건수 (예: counts('tag'))"""
+        return dict(self._counts.get(kind, {}))
+
+    def latest(self) -> Optional[T]:
+        return self._items[-1] if len(self) else None
+
+    # ---------------------------------------------------------------- 내부
+    def _evict(self, n: int) -> None:
+        lo = self._start
+        old = self._items[lo:lo + n]
+        for i in range(lo, lo + n):
+            self._items[i] = None  # 참조 해제 (메모리는 압축 때 반환)
+        self._start += n
+        self.evicted += n
+        if self.keys_of is not None:
+            for item in old:
+                for kind, value in self.keys_of(item):
+                    counter = self._counts[kind]
+                    counter[value] -= 1
+                    if counter[value] <= 0:
+                        del counter[value]
+        if self.evict is not None:
+            self.evict(old)
+
+    def _compact(self) -> None:
+        live = len(self._items) - self._start
+        self._ts[:live] = self._ts[self._start:len(self._items)]
+        del self._items[:self._start]
+        self._start = 0
+
+    def memory_bytes(self) -> int:
+        """버퍼 크기 (항목 객체 제외)"""
+        return self._ts.nbytes + 8 * len(self._items)
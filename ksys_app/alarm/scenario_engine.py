@@ -3,14 +3,21 @@
 TASK_009: ALARM_CREATE_SCENARIO_ENGINE
 """
 
-import asyncio
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, Iterable, List, Any, Optional, Callable, Sequence, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 import psycopg
 
+from .action_dispatcher import DEFAULT_SCHEDULE, ActionDispatcher
+from .history_store import HistoryStore
+from .correlation import AlarmCorrelator, FoldedSummary, Incident, summarize_folded
+from .backtest import BacktestResult, ThresholdSweep, run_backtest
+from .evaluation_plan import EvaluationPlan
+from .event_sink import EventSink, get_event_sink
+from .stream_evaluator import AlarmTransition, StreamEvaluator
+
 
 class AlarmLevel(Enum):
     """알람 레벨 정의"""
@@ -31,14 +38,20 @@ class ActionType(Enum):
     MAINTENANCE = "maintenance"    # 정비 요청
 
 
+# 사고에 묶인 이벤트에서 생략하는 액션 (제어 액션은 항상 실행)
+NOTIFICATION_ACTIONS = frozenset({ActionType.LOG, ActionType.NOTIFY})
+
+
 @dataclass
 class AlarmCondition:
     """알람 발생 조건"""
     tag_name: str
     operator: str  # '>', '<', '>=', '<=', '==', '!='
     threshold: float
-    duration_seconds: int = 0  # 지속 시간 조건
+    duration_seconds: int = 0  # 지속 시간 조건 (on-delay)
     description: str = ""
+    off_delay_seconds: int = 0  # 해제 지연: 조건 이탈이 이 시간 지속되어야 해제
+    deadband: float = 0.0       # 히스테리시스: 발생 후 threshold에서 이만큼 벗어나야 해제
 
 
 @dataclass
@@ -75,23 +88,50 @@ class AlarmEvent:
     actions_taken: List[str]
     sensor_values: Dict[str, float]
     message: str
+    incident_id: Optional[str] = None
+    correlation: str = "open"  # open | fold | suppress (fold/suppress 는 DB 기록을 사고 요약으로)
+    group: str = ""  # 묶인 사고의 설비 그룹
 
 
 class AlarmScenarioEngine:
     """알람 시나리오 엔진"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self,
+                 db_dsn: str,
+                 dispatcher: Optional[ActionDispatcher] = None,
+                 correlator: Optional[AlarmCorrelator] = None):
         self.db_dsn = db_dsn
         self.scenarios: Dict[str, AlarmScenario] = {}
-        self.alarm_history: List[AlarmEvent] = []
-        self.condition_cache: Dict[str, Dict] = {}  # 조건 상태 캐시
+        # 최근 이력만 메모리에 보관 (시각 인덱스), 넘친 것은 DB로
+        self.alarm_history: HistoryStore[AlarmEvent] = HistoryStore(
+            time_of=lambda e: e.triggered_at,
+            keys_of=_alarm_keys,
+            evict=self._archive_events,
+        )
         self.action_handlers: Dict[ActionType, Callable] = {}
+        # 정의 버전: 엔진의 추가/수정/삭제/로드 메서드에서만 증가, 바뀐 경우에만 평가 계획/스트림 재컴파일
+        self._definitions_version = 0
+        self._scenario_versions: Dict[str, int] = {}  # 시나리오별 마지막 변경 버전
+        self._plan: Optional[EvaluationPlan] = None
+        self._plan_version = 0
+        self._stream: Optional[StreamEvaluator] = None
+        self._stream_version = 0
+        self.event_sink: Optional[EventSink] = get_event_sink(db_dsn)
+        self.correlator = correlator or AlarmCorrelator(dsn=db_dsn)  # 가동범위 모니터와 공유 가능
+        self.correlator.dsn = self.correlator.dsn or db_dsn  # 그룹 조회는 tag_group_refresh_task
         
         # 기본 시나리오 초기화
         self._initialize_scenarios()
         
         # 액션 핸들러 등록
         self._register_action_handlers()
+
+        # 액션 실행은 디스패처 워커가 담당 (DB 없는 인스턴스는 예약 파일 미사용)
+        self.dispatcher = dispatcher or ActionDispatcher(
+            {t.value: (lambda params, t=t: self._execute_action(AlarmAction(t, params)))
+             for t in self.action_handlers},
+            schedule_path=DEFAULT_SCHEDULE if db_dsn else None,
+        )
     
     def _initialize_scenarios(self):
         """기본 알람 시나리오 정의"""
@@ -234,117 +274,203 @@ class AlarmScenarioEngine:
         self.action_handlers[ActionType.EMERGENCY_STOP] = self._action_emergency_stop
         self.action_handlers[ActionType.MAINTENANCE] = self._action_maintenance
     
-    async def check_scenarios(self, sensor_data: Dict[str, float]) -> List[AlarmEvent]:
+    def add_scenario(self, scenario: AlarmScenario) -> None:
+        """시나리오 등록 (같은 ID는 교체)"""
+        self.scenarios[scenario.scenario_id] = scenario
+        self._bump_definitions(scenario.scenario_id)
+
+    def update_scenario(self, scenario_id: str, **changes: Any) -> AlarmScenario:
+        """시나리오 필드 수정 (conditions, cooldown_seconds, enabled 등)"""
+        scenario = self.scenarios[scenario_id]
+        for name, value in changes.items():
+            if not hasattr(scenario, name):
+                raise AttributeError(f"AlarmScenario has no field '{name}'")
+            setattr(scenario, name, value)
+        self._bump_definitions(scenario_id)
+        return scenario
+
+    def remove_scenario(self, scenario_id: str) -> Optional[AlarmScenario]:
+        scenario = self.scenarios.pop(scenario_id, None)
+        if scenario is not None:
+            self._bump_definitions(scenario_id)
+        return scenario
+
+    def load_scenarios(self, scenarios: Iterable[AlarmScenario]) -> None:
+        """등록된 시나리오 전체 교체"""
+        self.scenarios = {s.scenario_id: s for s in scenarios}
+        self._bump_definitions(*self.scenarios)
+
+    def invalidate_plan(self, scenario_id: Optional[str] = None):
+        """조건/쿨다운을 제자리에서 직접 수정한 경우 호출 (scenario_id 미지정 시 전체 재컴파일)"""
+        self._bump_definitions(*([scenario_id] if scenario_id else self.scenarios))
+
+    def _bump_definitions(self, *scenario_ids: str) -> None:
+        self._definitions_version += 1
+        for scenario_id in scenario_ids:
+            self._scenario_versions[scenario_id] = self._definitions_version
+
+    def _unchanged_since(self, version: int) -> Set[str]:
+        """version 이후 정의가 바뀌지 않은 시나리오 (재컴파일 시 평가 상태 이어받기 대상)"""
+        return {sid for sid in self.scenarios if self._scenario_versions.get(sid, 0) <= version}
+
+    def _get_plan(self) -> EvaluationPlan:
+        if self._plan is None or self._plan_version != self._definitions_version:
+            plan = EvaluationPlan(list(self.scenarios.values()))
+            if self._plan is not None:
+                plan.carry_over(self._plan, self._unchanged_since(self._plan_version))
+            self._plan, self._plan_version = plan, self._definitions_version
+        return self._plan
+
+    async def check_scenarios(self,
+                              sensor_data: Dict[str, float],
+                              now: Optional[datetime] = None) -> List[AlarmEvent]:
         """
-        모든 시나리오 체크
+        모든 시나리오 체크 (컴파일된 평가 계획 사용)
+        
+        값이 바뀐 태그의 조건만 다시 비교하고, 모든 조건이 충족되고
+        쿨다운이 끝난 시나리오만 발생시킨다.
         
         Args:
             sensor_data: {'tag_name': value, ...}
+            now: 평가 시각 (기본: 현재 시각)
             
         Returns:
             발생한 알람 이벤트 리스트
         """
         events = []
-        current_time = datetime.now()
+        current_time = now or datetime.now()
+        ts = current_time.timestamp()
+        plan = self._get_plan()
         
-        for scenario in self.scenarios.values():
+        for s_idx in plan.update(sensor_data, ts):
+            scenario = plan.scenarios[s_idx]
             if not scenario.enabled:
                 continue
             
-            # 쿨다운 체크
-            if scenario.last_triggered:
-                cooldown_elapsed = (current_time - scenario.last_triggered).seconds
-                if cooldown_elapsed < scenario.cooldown_seconds:
-                    continue
+            conditions_met = {c.tag_name: True for c in scenario.conditions}
+            event = await self._trigger_alarm(scenario, sensor_data, conditions_met)
+            events.append(event)
             
-            # 조건 체크
-            conditions_met = await self._check_conditions(
-                scenario.conditions, sensor_data
-            )
-            
-            if all(conditions_met.values()):
-                # 알람 발생
-                event = await self._trigger_alarm(scenario, sensor_data, conditions_met)
-                events.append(event)
-                
-                # 시나리오 업데이트
-                scenario.last_triggered = current_time
+            # 시나리오 업데이트
+            scenario.last_triggered = current_time
+            plan.mark_triggered(s_idx, ts)
         
         return events
     
-    async def _check_conditions(self, 
-                               conditions: List[AlarmCondition], 
-                               sensor_data: Dict[str, float]) -> Dict[str, bool]:
-        """조건 체크"""
-        results = {}
+    def _get_stream(self) -> StreamEvaluator:
+        if self._stream is None or self._stream_version != self._definitions_version:
+            stream = StreamEvaluator(list(self.scenarios.values()))
+            if self._stream is not None:
+                # 바뀌지 않은 시나리오는 조건 상태/지연 타이머를 그대로 이어감
+                stream.carry_over(self._stream, self._unchanged_since(self._stream_version))
+            self._stream, self._stream_version = stream, self._definitions_version
+        return self._stream
+
+    async def process_samples(self, samples: List[tuple]) -> List[AlarmEvent]:
+        """
+        이벤트 시각 평가: (ts, tag_name, value) 샘플을 시각 순서대로 반영
         
-        for condition in conditions:
-            tag_name = condition.tag_name
-            
-            if tag_name not in sensor_data:
-                results[tag_name] = False
-                continue
-            
-            value = sensor_data[tag_name]
-            
-            # 연산자별 체크
-            if condition.operator == '>':
-                met = value > condition.threshold
-            elif condition.operator == '<':
-                met = value < condition.threshold
-            elif condition.operator == '>=':
-                met = value >= condition.threshold
-            elif condition.operator == '<=':
-                met = value <= condition.threshold
-            elif condition.operator == '==':
-                met = abs(value - condition.threshold) < 0.01
-            elif condition.operator == '!=':
-                met = abs(value - condition.threshold) >= 0.01
-            else:
-                met = False
-            
-            # 지속 시간 체크
-            if met and condition.duration_seconds > 0:
-                cache_key = f"{tag_name}_{condition.operator}_{condition.threshold}"
-                
-                if cache_key in self.condition_cache:
-                    first_met = self.condition_cache[cache_key]['first_met']
-                    duration = (datetime.now() - first_met).seconds
-                    met = duration >= condition.duration_seconds
-                else:
-                    self.condition_cache[cache_key] = {
-                        'first_met': datetime.now()
-                    }
-                    met = False
-            elif not met:
-                # 조건 미충족시 캐시 제거
-                cache_key = f"{tag_name}_{condition.operator}_{condition.threshold}"
-                self.condition_cache.pop(cache_key, None)
-            
-            results[tag_name] = met
+        지속/해제 지연·쿨다운을 데이터 시각으로 판단하므로 실시간 입력과
+        과거 데이터 재생 결과가 같다. 발생 시각은 전이가 일어난 데이터 시각.
+        
+        Returns:
+            발생한 알람 이벤트 리스트
+        """
+        stream = self._get_stream()
+        transitions = stream.run(samples)
+        if samples:
+            # 배치의 마지막 시각까지 확정 (같은 시각 샘플은 한 배치로 전달)
+            transitions.extend(stream.advance(stream.watermark))
+        events = []
+        for transition in transitions:
+            events.extend(await self._apply_transition(transition))
+        return events
+
+    async def advance_stream(self, ts: Any) -> List[AlarmEvent]:
+        """샘플 없이 시각만 진행 (지연 타이머 만료분 발생)"""
+        events = []
+        for transition in self._get_stream().advance(ts):
+            events.extend(await self._apply_transition(transition))
+        return events
+
+    async def backtest(self,
+                       start: Any,
+                       end: Any,
+                       source: str = "influx_hist",
+                       sweeps: Sequence[ThresholdSweep] = (),
+                       scenarios: Optional[List[AlarmScenario]] = None,
+                       **options) -> BacktestResult:
+        """
+        과거 데이터 백테스트 (액션 핸들러/이벤트 저장 없음)
         
-        return results
+        비활성 시나리오도 평가한다 (배포 전 시나리오/임계값 검토용).
+        
+        Args:
+            start, end: 평가 기간 [start, end)
+            source: 'influx_hist' 또는 'influx_agg_1m'
+            sweeps: 임계값 후보 (데이터 1회 통과로 함께 평가)
+            scenarios: 평가할 시나리오 (기본: 등록된 전체)
+            options: run_backtest 옵션 (chunk, step_s, value_column, flap_window_s)
+            
+        Returns:
+            시나리오별/스윕 후보별 발생 수, 지속시간, 알람 시간 비율, 채터링 비율
+        """
+        targets = list(scenarios) if scenarios is not None else list(self.scenarios.values())
+        async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+            return await run_backtest(conn, targets, start, end, source=source, sweeps=sweeps, **options)
+
+    async def _apply_transition(self, transition: AlarmTransition) -> List[AlarmEvent]:
+        scenario = self.scenarios.get(transition.scenario_id)
+        if scenario is None:
+            return []
+        # 엔진 시각 규약(naive 로컬)으로 변환
+        at = transition.at.astimezone().replace(tzinfo=None)
+        if transition.state != "raise":
+            print(f"[ALARM CLEAR] {scenario.scenario_id} {scenario.name} @ {at}")
+            return []
+        conditions_met = {c.tag_name: True for c in scenario.conditions}
+        sensor_values = {k: v for k, v in transition.values.items() if v is not None}
+        event = await self._trigger_alarm(scenario, sensor_values, conditions_met, triggered_at=at)
+        scenario.last_triggered = at
+        return [event]
     
     async def _trigger_alarm(self, 
                            scenario: AlarmScenario,
                            sensor_data: Dict[str, float],
-                           conditions_met: Dict[str, bool]) -> AlarmEvent:
+                           conditions_met: Dict[str, bool],
+                           triggered_at: Optional[datetime] = None) -> AlarmEvent:
         """알람 트리거"""
+        triggered_at = triggered_at or datetime.now()
+        event_id = f"E{triggered_at.strftime('%Y%m%d%H%M%S')}_{scenario.scenario_id}"
         
-        event_id = f"E{datetime.now().strftime('%Y%m%d%H%M%S')}_{scenario.scenario_id}"
+        # 폭주 묶음: 같은 설비 그룹의 열린 사고에 합쳐지거나 부모 알람으로 억제되면 알림/기록 생략
+        correlation = self.correlator.ingest(
+            scenario.scenario_id,
+            [c.tag_name for c in scenario.conditions],
+            scenario.level.name,
+            triggered_at.timestamp(),
+            scenario.name,
+        )
         
-        # 액션 실행
+        # 액션 등록 - 실행/지연/재시도는 디스패처가 처리하므로 대기하지 않음
+        # 묶인 이벤트도 제어 액션은 실행, 알림/로그는 사고 레벨을 올리거나 CRITICAL 이상일 때만
         actions_taken = []
         for action in scenario.actions:
-            if action.delay_seconds > 0:
-                # 지연 액션은 비동기로 실행
-                asyncio.create_task(
-                    self._execute_delayed_action(action, action.delay_seconds)
-                )
+            if action.action_type in NOTIFICATION_ACTIONS and not correlation.urgent:
+                continue
+            status = self.dispatcher.submit(
+                action.action_type.value,
+                action.parameters,
+                delay_s=action.delay_seconds,
+                scenario_id=scenario.scenario_id,
+                event_id=event_id,
+                dedupe_window_s=scenario.cooldown_seconds,
+            )
+            if status == "deduped":
+                actions_taken.append(f"{action.action_type.value} (deduped)")
+            elif action.delay_seconds > 0:
                 actions_taken.append(f"{action.action_type.value} (delayed {action.delay_seconds}s)")
             else:
-                # 즉시 실행
-                await self._execute_action(action)
                 actions_taken.append(action.action_type.value)
         
         # 이벤트 생성
@@ -352,22 +478,27 @@ class AlarmScenarioEngine:
             event_id=event_id,
             scenario_id=scenario.scenario_id,
             level=scenario.level,
-            triggered_at=datetime.now(),
+            triggered_at=triggered_at,
             conditions_met=[
                 {'tag': k, 'met': v} for k, v in conditions_met.items()
             ],
             actions_taken=actions_taken,
             sensor_values=sensor_data.copy(),
-            message=f"[{scenario.level.name}] {scenario.name}: {scenario.description}"
+            message=f"[{scenario.level.name}] {scenario.name}: {scenario.description}",
+            incident_id=correlation.incident.incident_id,
+            correlation=correlation.status,
+            group=correlation.incident.group,
         )
         
         # 이력 저장
         self.alarm_history.append(event)
         
-        # DB 저장
-        await self._save_event_to_db(event)
-        
-        print(f"[ALARM] {event.message}")
+        # DB 저장 (사고 첫 이벤트만, 묶인 이벤트는 사고 종료 시 요약 1건)
+        if correlation.forward:
+            await self._save_event_to_db(event)
+            print(f"[ALARM] {event.message}")
+        for incident in self.correlator.pop_closed():
+            self._save_incident(incident)
         
         return event
     
@@ -377,11 +508,6 @@ class AlarmScenarioEngine:
         if handler:
             await handler(action.parameters)
     
-    async def _execute_delayed_action(self, action: AlarmAction, delay: int):
-        """지연 액션 실행"""
-        await asyncio.sleep(delay)
-        await self._execute_action(action)
-    
     # 액션 핸들러들
     async def _action_log(self, params: Dict):
         """로그 기록"""
@@ -414,29 +540,68 @@ class AlarmScenarioEngine:
         print(f"[MAINTENANCE] Request: {maint_type}")
     
     async def _save_event_to_db(self, event: AlarmEvent):
-        """이벤트 DB 저장"""
-        try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute("""
-                        INSERT INTO alarm_history 
-                        (event_id, scenario_id, level, triggered_at, message, sensor_data)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (event_id) DO NOTHING
-                    """, (
-                        event.event_id,
-                        event.scenario_id,
-                        event.level.value,
-                        event.triggered_at,
-                        event.message,
-                        json.dumps(event.sensor_values)
-                    ))
-                    await conn.commit()
-        except Exception as e:
-            # 테이블이 없을 수 있음
-            pass
+        """이벤트 DB 저장 (공유 배치 기록기에 등록 - 연결/커밋은 쓰기 태스크가 일괄 처리)"""
+        if self.event_sink is None:
+            return
+        self.event_sink.submit("alarm_history", self._history_row(event))
+    
+    @staticmethod
+    def _history_row(event: AlarmEvent) -> tuple:
+        return (
+            event.event_id,
+            event.scenario_id,
+            event.level.value,
+            event.triggered_at,
+            event.message,
+            json.dumps(event.sensor_values)
+        )
+    
+    def _save_incident(self, incident: Incident):
+        """여러 이벤트가 묶인 사고의 요약 기록"""
+        if incident.count < 2 or self.event_sink is None:
+            return
+        self.event_sink.submit("alarm_events", (
+            'INCIDENT',
+            incident.level,
+            incident.group,
+            float(incident.count),
+            incident.summary(),
+            datetime.fromtimestamp(incident.last_at),
+        ))
+    
+    def _archive_events(self, events: List[AlarmEvent]):
+        """메모리 이력에서 밀려난 묶인 이벤트를 사고당 요약 1건으로 DB에 (행 단위 기록 없음)"""
+        if self.event_sink is None:
+            return
+        folded = summarize_folded(
+            (e.incident_id or e.event_id, e.group or e.scenario_id, e.level.name, e.triggered_at)
+            for e in events if e.correlation != "open"
+        )
+        for summary in folded:
+            self._save_folded(summary)
+    
+    def _save_folded(self, summary: FoldedSummary):
+        self.event_sink.submit("alarm_events", (
+            'INCIDENT',
+            summary.level,
+            summary.group,
+            float(summary.count),
+            summary.summary(),
+            summary.last_at,
+        ))
     
     def get_alarm_history(self, hours: int = 24) -> List[AlarmEvent]:
-        """알람 이력 조회"""
+        """알람 이력 조회 (시각 인덱스 이진 탐색)"""
         cutoff = datetime.now() - timedelta(hours=hours)
-        return [e for e in self.alarm_history if e.triggered_at > cutoff]
\ No newline at end of file
+        return self.alarm_history.range(cutoff)
+    
+    def get_alarm_counts(self, kind: str = "scenario") -> Dict[str, int]:
+        """보관 중인 이력의 시나리오/레벨/태그별 건수"""
+        return self.alarm_history.counts(kind)
+
+
+def _alarm_keys(event: AlarmEvent):
+    yield "scenario", event.scenario_id
+    yield "level", event.level.name
+    for tag in event.sensor_values:
+        yield "tag", tag
\ No newline at end of file
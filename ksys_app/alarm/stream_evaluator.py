@@ -0,0 +1,301 @@
+"""
+이벤트 시각 기반 알람 스트림 평가기
+
+(ts, tag, value) 샘플을 시각 순서대로 받아 조건별 상태 기계를 갱신하고
+알람 발생/해제 전이를 데이터 시각 그대로 내보낸다 (폴링 주기와 무관).
+
+- 조건 상태: OFF → PENDING_ON(on-delay) → ON → PENDING_OFF(off-delay) → OFF
+- 발생 중에는 deadband만큼 벗어나야 해제 (evaluation_plan.release_bounds)
+- 샘플 사이 값은 직전 샘플 유지(sample-and-hold): 지연 타이머는 샘플을
+  기다리지 않고 정확한 만료 시각에 전이
+- 같은 시각의 조건 전이를 모두 반영한 뒤 발생 판정 (동시 전이로 0초 발생/해제가 생기지 않음)
+- 샘플당 비용: 해당 태그 조건 수만큼 O(1) 갱신 + 만료된 타이머 처리
+- 재컴파일 시 바뀌지 않은 시나리오는 carry_over() 로 조건 상태/지연 타이머를 이어받음
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .evaluation_plan import EQ_TOL, release_bounds
+
+OFF, PENDING_ON, ON, PENDING_OFF = 0, 1, 2, 3
+
+_TIMER_CONDITION = 0
+_TIMER_COOLDOWN = 1
+
+
+def _bind(operator: str, threshold: float, band: float) -> Callable[[float], bool]:
+    """연산자/기준값을 미리 묶은 비교 함수"""
+    if operator == '>':
+        return lambda v: v > threshold
+    if operator == '<':
+        return lambda v: v < threshold
+    if operator == '>=':
+        return lambda v: v >= threshold
+    if operator == '<=':
+        return lambda v: v <= threshold
+    if operator == '==':
+        return lambda v: abs(v - threshold) < band
+    if operator == '!=':
+        return lambda v: abs(v - threshold) >= band
+    return lambda v: False
+
+
+def _epoch(ts: Any) -> float:
+    """datetime(naive는 로컬 시각, 엔진의 datetime.now()와 동일) 또는 epoch 초"""
+    if isinstance(ts, datetime):
+        return ts.timestamp()
+    return float(ts)
+
+
+@dataclass
+class AlarmTransition:
+    """알람 전이 (raise: 발생, clear: 해제) - ts는 데이터 시각 epoch 초"""
+    scenario_id: str
+    state: str
+    ts: float
+    values: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def at(self) -> datetime:
+        return datetime.fromtimestamp(self.ts, timezone.utc)
+
+
+class _Condition:
+    __slots__ = ("scenario", "tag", "on_test", "hold_test", "on_delay", "off_delay", "state", "gen")
+
+    def __init__(self, scenario: int, cond: Any):
+        self.scenario = scenario
+        self.tag = cond.tag_name
+        threshold = float(cond.threshold)
+        self.on_test = _bind(cond.operator, threshold, EQ_TOL)
+        self.hold_test = _bind(cond.operator, *release_bounds(cond.operator, threshold, getattr(cond, "deadband", 0.0)))
+        self.on_delay = float(cond.duration_seconds or 0)
+        self.off_delay = float(getattr(cond, "off_delay_seconds", 0) or 0)
+        self.state = OFF
+        self.gen = 0
+
+
+class _Scenario:
+    __slots__ = ("scenario", "n_conditions", "n_on", "raised", "cooldown", "cooldown_until", "gen")
+
+    def __init__(self, scenario: Any):
+        self.scenario = scenario
+        self.n_conditions = len(scenario.conditions)
+        self.n_on = 0
+        self.raised = False
+        self.cooldown = float(scenario.cooldown_seconds)
+        self.cooldown_until = float("-inf")
+        self.gen = 0
+
+
+class StreamEvaluator:
+    """시나리오 목록에 대한 이벤트 시각 평가기"""
+
+    def __init__(self, scenarios: Iterable[Any]):
+        self._scenarios: List[_Scenario] = []
+        self._conditions: List[List[_Condition]] = []  # 시나리오별 조건 (조건 순서)
+        self._by_tag: Dict[str, List[_Condition]] = {}
+        self._timers: List[Tuple[float, int, int, Any, int]] = []  # (만료, 종류, 순번, 대상, 세대)
+        self._seq = 0
+        self._out: List[AlarmTransition] = []
+        self._candidates: List[_Scenario] = []  # 이 시각에 모든 조건이 충족된 시나리오 (발생 판정 대기)
+        self._candidate_t = float("-inf")
+        self.values: Dict[str, float] = {}
+        self.watermark = float("-inf")
+        self.late_samples = 0
+        for idx, scenario in enumerate(scenarios):
+            self._scenarios.append(_Scenario(scenario))
+            self._conditions.append([])
+            for cond in scenario.conditions:
+                c = _Condition(idx, cond)
+                self._conditions[idx].append(c)
+                self._by_tag.setdefault(cond.tag_name, []).append(c)
+
+    def carry_over(self, old: "StreamEvaluator", keep: Set[str]) -> int:
+        """
+        이전 평가기에서 keep 시나리오(같은 객체)의 조건 상태/타이머/쿨다운 이어받기 → 이어받은 시나리오 수
+
+        태그 값과 워터마크는 모두 이어받는다. 새로 추가/변경된 시나리오는 OFF 에서 시작해
+        해당 태그의 다음 샘플부터 평가된다.
+        """
+        self.values = dict(old.values)
+        self.watermark = old.watermark
+        self.late_samples = old.late_samples
+        self._seq = old._seq
+        old_index = {id(s.scenario): i for i, s in enumerate(old._scenarios)}
+        moved: Dict[int, Any] = {}  # id(이전 상태 객체) → 새 상태 객체
+        carried = 0
+        for idx, s in enumerate(self._scenarios):
+            o_idx = old_index.get(id(s.scenario))
+            if o_idx is None or s.scenario.scenario_id not in keep:
+                continue
+            prev, prev_conds = old._scenarios[o_idx], old._conditions[o_idx]
+            if len(prev_conds) != len(self._conditions[idx]):
+                continue
+            s.n_on, s.raised, s.cooldown_until, s.gen = prev.n_on, prev.raised, prev.cooldown_until, prev.gen
+            moved[id(prev)] = s
+            carried += 1
+            for pc, c in zip(prev_conds, self._conditions[idx]):
+                c.state, c.gen = pc.state, pc.gen
+                moved[id(pc)] = c
+        # 대기 중 타이머는 같은 세대로 옮김 (세대가 같으므로 만료 처리 그대로)
+        self._timers = [(deadline, kind, seq, moved[id(obj)], gen)
+                        for deadline, kind, seq, obj, gen in old._timers if id(obj) in moved]
+        heapq.heapify(self._timers)
+        self._candidates = [moved[id(s)] for s in old._candidates if id(s) in moved]
+        self._candidate_t = old._candidate_t
+        return carried
+
+    # ------------------------------------------------------------------ 입력
+    def push(self, ts: Any, tag: str, value: float) -> List[AlarmTransition]:
+        """샘플 1개 반영 → 이 샘플 시각 이전까지 확정된 전이
+
+        같은 시각 샘플이 더 올 수 있으므로 이 시각의 전이(만료 타이머 포함)는
+        다음 push() 또는 advance()에서 확정된다.
+        """
+        t = _epoch(ts)
+        if t < self.watermark:
+            self.late_samples += 1  # 순서 역전 샘플은 버림 (결정성 유지)
+            return []
+        self._out = []
+        self._advance(t, inclusive=False)
+        self.watermark = t
+        conds = self._by_tag.get(tag)
+        if conds is not None and value is not None:
+            v = float(value)
+            self.values[tag] = v
+            for c in conds:
+                self._on_sample(c, t, v)
+        # 만료 시각과 같은 시각의 샘플(모든 태그)이 먼저 반영된 뒤 타이머 처리
+        return self._out
+
+    def advance(self, ts: Any) -> List[AlarmTransition]:
+        """샘플 없이 시각만 진행 (지연 타이머 만료 처리)"""
+        t = _epoch(ts)
+        if t < self.watermark:
+            return []
+        self._out = []
+        self._advance(t)
+        self.watermark = t
+        return self._out
+
+    def run(self, samples: Iterable[Tuple[Any, str, float]]) -> List[AlarmTransition]:
+        out: List[AlarmTransition] = []
+        for ts, tag, value in samples:
+            out.extend(self.push(ts, tag, value))
+        return out
+
+    def active(self) -> List[str]:
+        return [s.scenario.scenario_id for s in self._scenarios if s.raised]
+
+    # ------------------------------------------------------------ 상태 기계
+    def _on_sample(self, c: _Condition, t: float, v: float) -> None:
+        state = c.state
+        if state == OFF:
+            if c.on_test(v):
+                if c.on_delay <= 0:
+                    self._set_on(c, t)
+                else:
+                    c.state = PENDING_ON
+                    self._schedule(t + c.on_delay, _TIMER_CONDITION, c, c.gen)
+        elif state == PENDING_ON:
+            if not c.on_test(v):
+                c.state = OFF
+                c.gen += 1
+        elif state == ON:
+            if not c.hold_test(v):
+                if c.off_delay <= 0:
+                    self._set_off(c, t)
+                else:
+                    c.state = PENDING_OFF
+                    self._schedule(t + c.off_delay, _TIMER_CONDITION, c, c.gen)
+        elif c.hold_test(v):  # PENDING_OFF → 복귀
+            c.state = ON
+            c.gen += 1
+
+    def _set_on(self, c: _Condition, t: float) -> None:
+        c.state = ON
+        c.gen += 1
+        s = self._scenarios[c.scenario]
+        s.n_on += 1
+        if s.n_on == s.n_conditions:
+            if self._candidates and self._candidate_t < t:
+                self._flush()
+            self._candidates.append(s)
+            self._candidate_t = t
+
+    def _set_off(self, c: _Condition, t: float) -> None:
+        c.state = OFF
+        c.gen += 1
+        s = self._scenarios[c.scenario]
+        s.n_on -= 1
+        if s.n_on == s.n_conditions - 1:
+            s.gen += 1  # 대기 중인 쿨다운 재확인 취소
+            if s.raised:
+                s.raised = False
+                self._emit(s, "clear", t)
+
+    def _flush(self) -> None:
+        """같은 시각 전이를 모두 반영한 뒤에도 충족 상태인 시나리오만 발생"""
+        candidates, self._candidates = self._candidates, []
+        for s in candidates:
+            if s.n_on == s.n_conditions and not s.raised:
+                self._try_raise(s, self._candidate_t)
+
+    def _try_raise(self, s: _Scenario, t: float) -> None:
+        if not s.scenario.enabled:
+            return
+        if t < s.cooldown_until:
+            # 쿨다운 중: 종료 시각에 여전히 충족이면 발생
+            self._schedule(s.cooldown_until, _TIMER_COOLDOWN, s, s.gen)
+            return
+        s.raised = True
+        s.cooldown_until = t + s.cooldown
+        self._emit(s, "raise", t)
+        if s.cooldown > 0:
+            # 충족 유지 시 쿨다운마다 재발생 (기존 폴링 동작과 동일)
+            self._schedule(s.cooldown_until, _TIMER_COOLDOWN, s, s.gen)
+
+    def _emit(self, s: _Scenario, state: str, t: float) -> None:
+        values = {c.tag_name: self.values.get(c.tag_name) for c in s.scenario.conditions}
+        self._out.append(AlarmTransition(s.scenario.scenario_id, state, t, values))
+
+    # ---------------------------------------------------------------- 타이머
+    def _schedule(self, deadline: float, kind: int, obj: Any, gen: int) -> None:
+        self._seq += 1
+        # 같은 시각이면 조건 타이머(해제/발생 확정)를 쿨다운 재확인보다 먼저 처리
+        heapq.heappush(self._timers, (deadline, kind, self._seq, obj, gen))
+
+    def _advance(self, t: float, inclusive: bool = True) -> None:
+        timers = self._timers
+        while True:
+            # 다음 타이머보다 이른 시각의 발생 후보 먼저 확정 (발생 시 쿨다운 타이머가 추가될 수 있음)
+            if self._candidates and (inclusive or self._candidate_t < t) and \
+                    (not timers or self._candidate_t < timers[0][0]):
+                self._flush()
+                continue
+            if not timers or (timers[0][0] > t if inclusive else timers[0][0] >= t):
+                break
+            deadline, kind, _, obj, gen = heapq.heappop(timers)
+            if obj.gen != gen:
+                continue  # 취소된 타이머
+            if kind == _TIMER_CONDITION:
+                if obj.state == PENDING_ON:
+                    self._set_on(obj, deadline)
+                elif obj.state == PENDING_OFF:
+                    self._set_off(obj, deadline)
+            elif obj.n_on == obj.n_conditions:
+                self._try_raise(obj, deadline)
+
+
+def replay(scenarios: Iterable[Any], samples: Iterable[Tuple[Any, str, float]],
+           until: Optional[Any] = None) -> List[AlarmTransition]:
+    """과거 샘플 재생 - 같은 입력이면 항상 같은 전이"""
+    ev = StreamEvaluator(scenarios)
+    out = ev.run(samples)
+    # until 미지정 시 마지막 샘플 시각까지 확정
+    out.extend(ev.advance(until if until is not None else ev.watermark))
+    return out
@@ -0,0 +1,57 @@
+"""Backend HTTP endpoints mounted next to the Reflex app (`api_transformer`)."""
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from .exporters import MEDIA_TYPES, get_export_jobs, parse_time
+from .performance.metrics import render_metrics
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+async def export_start(request: Request) -> JSONResponse:
+    """POST /export?format=csv|parquet|xlsx&source=raw|1m|10m|1h|1d&start=ISO&end=ISO[&tags=A,B]"""
+    params = request.query_params
+    try:
+        tags = [t for t in params.get("tags", "").split(",") if t]
+        job = get_export_jobs().submit(
+            params.get("format", "csv"), params.get("source", "1h"),
+            parse_time(params["start"]), parse_time(params["end"]), tags or None,
+        )
+    except (KeyError, ValueError) as e:
+        return JSONResponse({"error": f"invalid export request: {e}"}, status_code=400)
+    return JSONResponse(job.to_dict(), status_code=202,
+                        headers={"Location": f"{request.url.path.rstrip('/')}/{job.job_id}"})
+
+
+async def export_status(request: Request) -> JSONResponse:
+    """GET /export/{job_id} - 진행률 / DELETE - 취소"""
+    jobs = get_export_jobs()
+    job = jobs.get(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "unknown export job"}, status_code=404)
+    if request.method == "DELETE":
+        jobs.cancel(job.job_id)
+    return JSONResponse(job.to_dict())
+
+
+async def export_download(request: Request):
+    """GET /export/{job_id}/download - 완료된 파일 (파일에서 바로 스트리밍)"""
+    job = get_export_jobs().get(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "unknown export job"}, status_code=404)
+    if job.state != "done":
+        return JSONResponse(job.to_dict(), status_code=409)
+    return FileResponse(job.path, media_type=MEDIA_TYPES[job.fmt], filename=job.filename)
+
+
+api = Starlette(routes=[
+    Route("/metrics", metrics),
+    Route("/export", export_start, methods=["POST"]),
+    Route("/export/{job_id}", export_status, methods=["GET", "DELETE"]),
+    Route("/export/{job_id}/download", export_download),
+])
@@ -36,4 +36,22 @@ QUICK_PRESETS = [
     {"label": "1M", "value": "30 days"},
     {"label": "3M", "value": "3 months"},
     {"label": "1Y", "value": "12 months"},
-]
\ No newline at end of file
+]
+
+def resolution_for_window(window: str) -> str:
+    """Aggregate resolution policy for a window label ('1m'|'10m'|'1h'|'1d')."""
+    wl = (window or "").lower()
+    if wl in {"1 min", "5 min", "10 min", "60 min"}:
+        return "1m"
+    if wl in {"12 hour", "24 hour", "48 hour"}:
+        return "10m"
+    if wl in {"7 days", "14 days", "30 days"}:
+        return "1h"
+    if wl in {"3 months", "6 months", "12 months"}:
+        return "1d"
+    # fallback
+    if "minute" in wl:
+        return "1m"
+    if "hour" in wl:
+        return "10m"
+    return "1h"
@@ -0,0 +1,208 @@
+"""
+설비 → 태그 레지스트리 (public.influx_tag 기반)
+
+펌프 진단이 `tag_name LIKE '%P101%'` 로 집계 뷰 전체를 훑고 태그 이름 부분 문자열로
+메트릭을 추정하던 것을 대체한다.
+
+- influx_tag.meta 의 equipment / metric / equipment_type 과 unit 컬럼을 한 번 읽어 메모리 인덱스 구성
+  (설비 → 메트릭 → 태그, 태그 → 바인딩)
+- meta 에 설비 정보가 없는 태그는 이름 토큰 규칙(propose_binding)으로 보충 - 이전과 같은 태그를 찾되
+  'q' 가 들어간 모든 태그를 유량으로 보던 부분 문자열 추정은 쓰지 않음
+- 진단 모듈은 여기서 얻은 정확한 태그 목록으로 tag_name = ANY(...) 조회
+- scripts/equipment_registry_migrate.py 가 같은 규칙으로 meta 채우기 제안 CSV 생성/적용
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+EQUIPMENT_TAG_SQL = """
+    SELECT tag_name,
+           meta->>'equipment',
+           meta->>'metric',
+           meta->>'equipment_type',
+           COALESCE(unit, meta->>'unit', '')
+    FROM public.influx_tag
+"""
+
+# 이름 토큰 → 메트릭 (토큰 단위 일치만)
+METRIC_TOKENS: Dict[str, str] = {
+    "FLOW": "flow", "FLW": "flow", "Q": "flow", "FT": "flow", "FIT": "flow",
+    "PRESSURE": "pressure", "PRESS": "pressure", "PRS": "pressure", "P": "pressure", "PT": "pressure",
+    "PIT": "pressure",
+    "VIBRATION": "vibration", "VIB": "vibration", "VT": "vibration",
+    "CURRENT": "current", "AMP": "current", "AMPS": "current", "CT": "current",
+    "SPEED": "speed", "RPM": "speed",
+    "TEMP": "temperature", "TT": "temperature",
+    "TMP": "tmp", "DP": "dp", "FLUX": "flux",
+    "COND": "conductivity", "TURB": "turbidity", "TDS": "tds", "PH": "ph",
+}
+
+DEFAULT_UNITS: Dict[str, str] = {
+    "flow": "m3/h", "pressure": "bar", "vibration": "mm/s", "current": "A", "speed": "rpm",
+    "temperature": "°C", "tmp": "bar", "dp": "bar", "flux": "LMH", "conductivity": "μS/cm",
+    "turbidity": "NTU", "tds": "mg/L", "ph": "pH",
+}
+
+# 설비 ID 접두어 → 설비 종류
+KIND_PREFIXES = (
+    ("PUMP", "pump"), ("HP", "pump"), ("P", "pump"),
+    ("RO", "membrane"), ("UF", "membrane"), ("MEM", "membrane"),
+)
+
+_SPLIT = re.compile(r"[_\-.:\s/]+")
+_EQUIPMENT = re.compile(r"^([A-Z]+)(\d+[A-Z]?)$")
+
+
+@dataclass(frozen=True)
+class TagBinding:
+    """태그 1개의 설비/메트릭 매핑"""
+    tag_name: str
+    equipment_id: str
+    metric: str
+    unit: str = ""
+    kind: str = ""
+    source: str = "meta"  # meta: influx_tag.meta / name: 이름 규칙 추정
+
+
+def equipment_kind(equipment_id: str) -> str:
+    """설비 ID 접두어로 종류 추정 (P101 → pump, RO1 → membrane)"""
+    match = _EQUIPMENT.match(equipment_id.upper())
+    prefix = match.group(1) if match else equipment_id.upper()
+    for head, kind in KIND_PREFIXES:
+        if prefix == head:
+            return kind
+    return ""
+
+
+def propose_binding(tag_name: str, unit: str = "") -> Optional[TagBinding]:
+    """
+    태그 이름 토큰으로 설비/메트릭 추정 (P101_FLOW, PUMP-2.VIB, RO1_TMP ...)
+
+    설비 토큰(영문+숫자)과 메트릭 토큰이 모두 있을 때만 제안한다.
+    """
+    tokens = [t for t in _SPLIT.split(tag_name.upper()) if t]
+    equipment = next((t for t in tokens if _EQUIPMENT.match(t) and t not in METRIC_TOKENS), None)
+    if equipment is None:
+        return None
+    metric = next((METRIC_TOKENS[t] for t in tokens if t in METRIC_TOKENS), None)
+    if metric is None:
+        return None
+    return TagBinding(tag_name, equipment, metric, unit or DEFAULT_UNITS.get(metric, ""),
+                      equipment_kind(equipment), "name")
+
+
+class EquipmentRegistry:
+    """설비 ↔ 태그 메모리 인덱스"""
+
+    def __init__(self, bindings: Optional[Iterable[TagBinding]] = None, refresh_s: float = 600.0):
+        """
+        Args:
+            bindings: 초기 매핑 (주면 DB 에서 읽지 않음)
+            refresh_s: influx_tag 재조회 주기
+        """
+        self.refresh_s = refresh_s
+        self._by_tag: Dict[str, TagBinding] = {}
+        self._by_equipment: Dict[str, Dict[str, List[str]]] = {}
+        self._loaded_at: Optional[float] = None
+        if bindings is not None:
+            self.replace(bindings)
+
+    def __len__(self) -> int:
+        return len(self._by_tag)
+
+    def __contains__(self, equipment_id: str) -> bool:
+        return equipment_id in self._by_equipment
+
+    # ------------------------------------------------------------------ 구성
+    def replace(self, bindings: Iterable[TagBinding]) -> None:
+        by_tag: Dict[str, TagBinding] = {}
+        by_equipment: Dict[str, Dict[str, List[str]]] = {}
+        for binding in bindings:
+            by_tag[binding.tag_name] = binding
+            by_equipment.setdefault(binding.equipment_id, {}).setdefault(binding.metric, []).append(binding.tag_name)
+        self._by_tag = by_tag
+        self._by_equipment = by_equipment
+        self._loaded_at = time.monotonic()
+
+    async def load(self, conn) -> int:
+        """influx_tag 전체를 읽어 인덱스 재구성 (meta 우선, 없으면 이름 규칙)"""
+        async with conn.cursor() as cur:
+            await cur.execute(EQUIPMENT_TAG_SQL)
+            rows = await cur.fetchall()
+        self.replace(self._bindings(rows))
+        return len(self._by_tag)
+
+    @staticmethod
+    def _bindings(rows) -> List[TagBinding]:
+        bindings = []
+        for tag_name, equipment, metric, kind, unit in rows:
+            if equipment:
+                guess = propose_binding(tag_name, unit or "")
+                metric = metric or (guess.metric if guess else tag_name)
+                bindings.append(TagBinding(tag_name, equipment, metric,
+                                           unit or DEFAULT_UNITS.get(metric, ""),
+                                           kind or equipment_kind(equipment), "meta"))
+            else:
+                guess = propose_binding(tag_name, unit or "")
+                if guess is not None:
+                    bindings.append(guess)
+        return bindings
+
+    def needs_refresh(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_s
+
+    async def ensure(self, dsn: str) -> None:
+        """인덱스가 없거나 오래되었으면 다시 조회 (실패 시 기존 인덱스 유지)"""
+        if not dsn or not self.needs_refresh():
+            return
+        import psycopg
+
+        self._loaded_at = time.monotonic()  # 실패해도 refresh_s 동안 재시도 안 함
+        try:
+            async with await psycopg.AsyncConnection.connect(dsn) as conn:
+                await self.load(conn)
+        except Exception as e:  # noqa: BLE001
+            logging.warning(f"influx_tag 설비 매핑 조회 실패 - 기존 인덱스 사용: {e}")
+
+    # ------------------------------------------------------------------ 조회
+    def tags(self, equipment_id: str, metrics: Optional[Sequence[str]] = None) -> List[str]:
+        """설비의 태그 이름 (metrics 를 주면 해당 메트릭만)"""
+        per_metric = self._by_equipment.get(equipment_id, {})
+        wanted = per_metric if metrics is None else metrics
+        return [t for m in wanted for t in per_metric.get(m, ())]
+
+    def metrics(self, equipment_id: str) -> Dict[str, List[str]]:
+        """설비의 {메트릭: [태그]}"""
+        return {m: list(tags) for m, tags in self._by_equipment.get(equipment_id, {}).items()}
+
+    def binding(self, tag_name: str) -> Optional[TagBinding]:
+        return self._by_tag.get(tag_name)
+
+    def metric_of(self, tag_name: str) -> Optional[str]:
+        binding = self._by_tag.get(tag_name)
+        return binding.metric if binding else None
+
+    def equipments(self, kind: Optional[str] = None) -> List[str]:
+        """등록된 설비 ID (kind 를 주면 해당 종류만, 이름순)"""
+        out = []
+        for equipment_id, per_metric in self._by_equipment.items():
+            if kind is not None:
+                first = next(iter(per_metric.values()))[0]
+                if self._by_tag[first].kind != kind:
+                    continue
+            out.append(equipment_id)
+        return sorted(out)
+
+
+_SHARED: Dict[str, EquipmentRegistry] = {}
+
+
+def get_equipment_registry(db_dsn: str) -> EquipmentRegistry:
+    """DSN 별 공유 레지스트리"""
+    registry = _SHARED.get(db_dsn)
+    if registry is None:
+        registry = _SHARED[db_dsn] = EquipmentRegistry()
+    return registry
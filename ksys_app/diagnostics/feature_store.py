@@ -0,0 +1,386 @@
+"""
+진단 공용 피처 저장소
+
+막오염/막파손/펌프 진단과 RO 수명 예측이 메서드마다 연결을 열고 같은 구간
+(7일 TMP, 30일 기준값 ...)의 influx_agg_1h/influx_agg_1m 을 반복 조회하던 것을 한곳에 모은다.
+
+- 각 진단 모듈은 필요한 (뷰, 태그/패턴, 구간) 을 FeatureSpec 으로 선언
+- 뷰별로 태그마다 가장 긴 구간만 남겨 unnest(태그, 시작) JOIN 한 번으로 조회
+  → 전체 플랜트 진단: 패턴 해석 1회 + 뷰당 1회
+- 결과는 태그 × 버킷 정렬 NumPy 프레임(avg/min/max/n, 빈 버킷 NaN)으로 보관하고 쓰기 금지
+- 구간 끝은 뷰 버킷 경계(완료된 버킷까지) - 경계가 넘어가면 해당 뷰 프레임만 무효화
+- 진단 모듈에는 구간에 맞게 자른 읽기 전용 뷰(FeatureView)를 넘김 (복사 없음)
+"""
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..performance.metrics import register_metrics
+
+# 뷰 이름 → (테이블, 버킷 초)
+VIEWS: Dict[str, Tuple[str, int]] = {
+    "1m": ("influx_agg_1m", 60),
+    "1h": ("influx_agg_1h", 3600),
+}
+
+FIELDS = ("avg", "min", "max", "n")
+
+FEATURE_SQL = """
+    SELECT a.tag_name, extract(epoch FROM a.bucket)::float8, a.avg, a.min, a.max, a.n
+    FROM {table} a
+    JOIN unnest(%s::text[], %s::float8[]) AS w(tag_name, since) ON a.tag_name = w.tag_name
+    WHERE a.bucket >= to_timestamp(w.since)
+      AND a.bucket >= to_timestamp(%s)
+      AND a.bucket < to_timestamp(%s)
+"""
+
+TAG_PATTERN_SQL = """
+    SELECT p.pattern, t.tag_name
+    FROM influx_tag t
+    JOIN unnest(%s::text[]) AS p(pattern) ON t.tag_name LIKE p.pattern
+"""
+
+DAY = 86400
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """
+    진단 모듈이 필요로 하는 구간 선언
+
+    구간: [경계 - lag_s - lookback_s, 경계 - lag_s)
+    tags 는 정확한 태그 이름, patterns 는 influx_tag 에 대한 LIKE 패턴
+    """
+    name: str
+    view: str
+    lookback_s: int
+    tags: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+    lag_s: int = 0
+
+    @property
+    def span_s(self) -> int:
+        return self.lookback_s + self.lag_s
+
+
+class FeatureFrame:
+    """한 번의 조회로 채운 태그 × 버킷 정렬 배열 (읽기 전용)"""
+
+    def __init__(self, view: str, tags: Sequence[str], start: float, end: float, step: int):
+        self.view = view
+        self.tags = list(tags)
+        self.row = {t: i for i, t in enumerate(self.tags)}
+        self.start = start
+        self.end = end
+        self.step = step
+        n_cols = int(round((end - start) / step))
+        self.data = {f: np.full((len(self.tags), n_cols), np.nan) for f in FIELDS}
+
+    @property
+    def n_cols(self) -> int:
+        return self.data["avg"].shape[1]
+
+    def fill(self, rows: np.ndarray, ts: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        cols = np.floor((ts - self.start) / self.step).astype(np.intp)
+        ok = (cols >= 0) & (cols < self.n_cols)
+        for f in FIELDS:
+            self.data[f][rows[ok], cols[ok]] = values[f][ok]
+
+    def freeze(self) -> None:
+        for array in self.data.values():
+            array.setflags(write=False)
+
+    def columns(self, w_start: float, w_end: float) -> slice:
+        lo = int(round((w_start - self.start) / self.step))
+        hi = int(round((w_end - self.start) / self.step))
+        return slice(max(lo, 0), max(min(hi, self.n_cols), 0))
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.data.values())
+
+
+class FeatureView:
+    """FeatureSpec 하나에 대한 읽기 전용 창 (프레임 배열의 슬라이스)"""
+
+    def __init__(self, spec: FeatureSpec, start: float, end: float, step: int,
+                 parts: Dict[str, Tuple[FeatureFrame, int, slice]]):
+        self.spec = spec
+        self.start = start
+        self.end = end
+        self.step = step
+        self._parts = parts
+
+    @property
+    def tags(self) -> List[str]:
+        return list(self._parts)
+
+    def __contains__(self, tag_name: str) -> bool:
+        return tag_name in self._parts
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    def times(self) -> np.ndarray:
+        """버킷 시작 시각 (epoch 초)"""
+        return self.start + self.step * np.arange(int(round((self.end - self.start) / self.step)))
+
+    def series(self, tag_name: str, field: str = "avg") -> np.ndarray:
+        """태그 1개 시계열 (빈 버킷 NaN, 읽기 전용 뷰)"""
+        part = self._parts.get(tag_name)
+        if part is None:
+            return np.full(len(self.times()), np.nan)
+        frame, row, cols = part
+        return frame.data[field][row, cols]
+
+    def present(self, tag_name: str, field: str = "avg") -> Tuple[np.ndarray, np.ndarray]:
+        """값이 있는 버킷만 (시각, 값) - 기존 ORDER BY bucket 조회 결과와 같은 순서"""
+        values = self.series(tag_name, field)
+        ok = ~np.isnan(values)
+        return self.times()[ok], values[ok]
+
+    def matrix(self, field: str = "avg", tag_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """태그 × 버킷 정렬 행렬 (태그 순서는 tag_names 또는 self.tags)"""
+        names = self.tags if tag_names is None else list(tag_names)
+        if not names:
+            return np.empty((0, len(self.times())))
+        out = np.stack([self.series(t, field) for t in names])
+        out.setflags(write=False)
+        return out
+
+    def stats(self, tag_name: str) -> Optional[Dict[str, float]]:
+        """
+        구간 집계 (GROUP BY tag_name 의 AVG(avg)/MIN(min)/MAX(max)/STDDEV(avg) 와 같음)
+
+        Returns:
+            데이터가 없으면 None
+        """
+        avg = self.series(tag_name, "avg")
+        ok = ~np.isnan(avg)
+        count = int(ok.sum())
+        if not count:
+            return None
+        mins = self.series(tag_name, "min")
+        maxs = self.series(tag_name, "max")
+        return {
+            "avg": float(avg[ok].mean()),
+            "min": float(np.nanmin(mins)) if not np.isnan(mins).all() else float("nan"),
+            "max": float(np.nanmax(maxs)) if not np.isnan(maxs).all() else float("nan"),
+            "std": float(avg[ok].std(ddof=1)) if count > 1 else float("nan"),
+            "count": count,
+        }
+
+
+class FeatureStore:
+    """진단 주기별 피처 캐시"""
+
+    def __init__(self, db_dsn: str = "", clock: Callable[[], float] = time.time,
+                 tag_refresh_s: float = 3600.0):
+        self.db_dsn = db_dsn
+        self.clock = clock
+        self.tag_refresh_s = tag_refresh_s
+        self.specs: Dict[str, FeatureSpec] = {}
+        self._patterns: Dict[str, Tuple[float, Tuple[str, ...]]] = {}
+        self._where: Dict[Tuple[str, str], Tuple[FeatureFrame, int]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.queries = 0
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        _STORES.add(self)
+
+    # ------------------------------------------------------------------ 선언
+    def declare(self, *specs: FeatureSpec) -> None:
+        """구간 선언 (같은 이름은 덮어씀)"""
+        for spec in specs:
+            if spec.view not in VIEWS:
+                raise ValueError(f"unknown view: {spec.view}")
+            self.specs[spec.name] = spec
+
+    def boundary(self, view: str, now: Optional[float] = None) -> float:
+        """뷰의 최근 완료 버킷 경계"""
+        step = VIEWS[view][1]
+        now = self.clock() if now is None else now
+        return float(np.floor(now / step) * step)
+
+    def tags_of(self, spec: FeatureSpec) -> List[str]:
+        tags = list(spec.tags)
+        for pattern in spec.patterns:
+            tags.extend(self._patterns.get(pattern, (0.0, ()))[1])
+        return list(dict.fromkeys(tags))
+
+    # ------------------------------------------------------------------ 조회
+    async def get(self, name: str, conn=None) -> FeatureView:
+        """선언된 구간의 읽기 전용 뷰 (필요하면 선언 전체를 한 번에 갱신)"""
+        spec = self.specs[name]
+        if self._stale([spec]):
+            self.misses += 1
+            await self.refresh(conn)
+        else:
+            self.hits += 1
+        return self._view(spec)
+
+    async def refresh(self, conn=None) -> int:
+        """
+        오래되었거나 빠진 선언 구간을 뷰당 한 번씩 조회
+
+        Returns:
+            실행한 쿼리 수
+        """
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:  # 이벤트 루프마다 잠금 새로 (asyncio.run 반복 호출)
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            if not self._stale(self.specs.values()):
+                return 0
+            if conn is not None:
+                return await self._refresh(conn)
+            import psycopg
+
+            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+                return await self._refresh(conn)
+
+    async def _refresh(self, conn) -> int:
+        before = self.queries
+        now = self.clock()
+        pending = [p for s in self.specs.values() for p in s.patterns if self._pattern_stale(p, now)]
+        if pending:
+            await self._resolve(conn, list(dict.fromkeys(pending)), now)
+        for view, wanted in self._missing(now).items():
+            await self._fetch(conn, view, wanted, self.boundary(view, now))
+        return self.queries - before
+
+    async def _resolve(self, conn, patterns: List[str], now: float) -> None:
+        async with conn.cursor() as cur:
+            await cur.execute(TAG_PATTERN_SQL, (patterns,))
+            records = await cur.fetchall()
+        self.queries += 1
+        found: Dict[str, List[str]] = {p: [] for p in patterns}
+        for pattern, tag_name in records:
+            found[pattern].append(tag_name)
+        for pattern, tags in found.items():
+            self._patterns[pattern] = (now, tuple(sorted(tags)))
+
+    async def _fetch(self, conn, view: str, wanted: Dict[str, int], end: float) -> None:
+        table, step = VIEWS[view]
+        tags = list(wanted)
+        since = [end - wanted[t] for t in tags]
+        async with conn.cursor() as cur:
+            await cur.execute(FEATURE_SQL.format(table=table), (tags, since, min(since), end))
+            records = await cur.fetchall()
+        self.queries += 1
+        self.rows += len(records)
+
+        # 같은 구간 길이끼리 프레임 하나
+        groups: Dict[int, List[str]] = {}
+        for tag_name in tags:
+            groups.setdefault(wanted[tag_name], []).append(tag_name)
+        frames = {span: FeatureFrame(view, names, end - span, end, step) for span, names in groups.items()}
+        owner = {t: (frames[wanted[t]], frames[wanted[t]].row[t]) for t in tags}
+
+        if records:
+            names = [r[0] for r in records]
+            ts = np.array([r[1] for r in records], dtype=np.float64)
+            values = {f: np.array([np.nan if r[2 + k] is None else float(r[2 + k]) for r in records])
+                      for k, f in enumerate(FIELDS)}
+            frame_of = np.array([id(owner[n][0]) for n in names])
+            rows = np.fromiter((owner[n][1] for n in names), dtype=np.intp, count=len(names))
+            for frame in frames.values():
+                sel = frame_of == id(frame)
+                frame.fill(rows[sel], ts[sel], {f: v[sel] for f, v in values.items()})
+        for frame in frames.values():
+            frame.freeze()
+        for tag_name in tags:
+            self._where[(view, tag_name)] = owner[tag_name]
+
+    # ------------------------------------------------------------------ 캐시 판정
+    def _pattern_stale(self, pattern: str, now: float) -> bool:
+        entry = self._patterns.get(pattern)
+        return entry is None or now - entry[0] >= self.tag_refresh_s
+
+    def _wanted(self, specs: Iterable[FeatureSpec]) -> Dict[str, Dict[str, int]]:
+        """뷰 → 태그 → 필요한 가장 긴 구간"""
+        wanted: Dict[str, Dict[str, int]] = {}
+        for spec in specs:
+            per_view = wanted.setdefault(spec.view, {})
+            for tag_name in self.tags_of(spec):
+                per_view[tag_name] = max(per_view.get(tag_name, 0), spec.span_s)
+        return wanted
+
+    def _missing(self, now: float, specs: Optional[Iterable[FeatureSpec]] = None) -> Dict[str, Dict[str, int]]:
+        missing: Dict[str, Dict[str, int]] = {}
+        for view, per_tag in self._wanted(self.specs.values() if specs is None else specs).items():
+            end = self.boundary(view, now)
+            for tag_name, span in per_tag.items():
+                entry = self._where.get((view, tag_name))
+                if entry is None or entry[0].end != end or entry[0].start > end - span:
+                    missing.setdefault(view, {})[tag_name] = span
+        return missing
+
+    def _stale(self, specs: Iterable[FeatureSpec]) -> bool:
+        specs = list(specs)
+        now = self.clock()
+        if any(self._pattern_stale(p, now) for s in specs for p in s.patterns):
+            return True
+        return bool(self._missing(now, specs))
+
+    def _view(self, spec: FeatureSpec) -> FeatureView:
+        step = VIEWS[spec.view][1]
+        end = self.boundary(spec.view) - spec.lag_s
+        start = end - spec.lookback_s
+        parts = {}
+        for tag_name in self.tags_of(spec):
+            entry = self._where.get((spec.view, tag_name))
+            if entry is not None:
+                frame, row = entry
+                parts[tag_name] = (frame, row, frame.columns(start, end))
+        return FeatureView(spec, start, end, step, parts)
+
+    # ------------------------------------------------------------------ 상태
+    def invalidate(self) -> None:
+        """캐시 전체 비우기 (다음 get 에서 다시 조회)"""
+        self._where.clear()
+        self._patterns.clear()
+
+    def memory_bytes(self) -> int:
+        frames = {id(f): f for f, _ in self._where.values()}
+        return sum(f.nbytes() for f in frames.values())
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "ksys_feature_store_queries_total": self.queries,
+            "ksys_feature_store_rows_total": self.rows,
+            "ksys_feature_store_hits_total": self.hits,
+            "ksys_feature_store_misses_total": self.misses,
+            "ksys_feature_store_bytes": self.memory_bytes(),
+        }
+
+
+_STORES: "weakref.WeakSet[FeatureStore]" = weakref.WeakSet()
+
+
+def _feature_store_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for store in list(_STORES):
+        for name, value in store.metrics().items():
+            totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_feature_store_metrics)
+
+
+_SHARED: Dict[str, FeatureStore] = {}
+
+
+def get_feature_store(db_dsn: str) -> FeatureStore:
+    """DSN 별 공유 저장소 - 진단 모듈을 따로 만들어도 같은 주기 캐시를 씀"""
+    store = _SHARED.get(db_dsn)
+    if store is None:
+        store = _SHARED[db_dsn] = FeatureStore(db_dsn)
+    return store
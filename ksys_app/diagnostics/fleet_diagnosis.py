@@ -0,0 +1,272 @@
+"""
+전체 설비 진단 (플랜트 건전성 표)
+
+단일 설비용 diagnose_pump / diagnose_membrane / diagnose_fouling / predict_lifetime 을
+설비 레지스트리의 전체 설비에 대해 한 번에 돌린다.
+
+- 설비 목록: EquipmentRegistry 의 pump + 플랜트 막 1행 "RO"
+  (막 진단/오염/수명 커널은 플랜트 태그 TMP, COND_IN ... 만 읽음 - 계열별로 돌리면 같은 행이 계열 수만큼
+  나오므로 한 번만 계산하고, 등록된 막 계열은 detail['trains'] 로 표시)
+- 데이터: 모든 설비 구간을 먼저 선언하고 FeatureStore.refresh 한 번으로 일괄 조회
+- 계산: 설비별 진단을 세마포어로 동시 실행 수를 제한해 병렬 수행, 막 수명은 predict_fleet 1회
+- 결과: 점수(0 나쁨 ~ 100 양호) 오름차순 건전성 표
+- 캐시: 설비별 결과를 1시간 버킷 경계와 함께 보관 - 새 시간 버킷이 생기기 전까지는
+  대시보드 갱신마다 다시 계산하지 않고 캐시된 표를 돌려줌
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..maintenance.ro_lifetime_predictor import ROLifetimePredictor
+from ..performance.metrics import register_metrics
+from .equipment_registry import EquipmentRegistry, get_equipment_registry
+from .feature_store import FeatureStore, get_feature_store
+from .fouling_diagnostics import FoulingDiagnostics
+from .membrane_diagnostics import MembraneDamageDiagnostics, MembraneStatus
+
+DEFAULT_CONCURRENCY = int(os.getenv("KSYS_FLEET_CONCURRENCY", "8"))
+PLANT_MEMBRANE = "RO"  # 플랜트 막 진단 행 (커널이 읽는 태그가 플랜트 단위)
+
+# 막 점수 감점
+URGENCY_PENALTY = {"immediate": 30.0, "soon": 15.0, "scheduled": 0.0}
+LIFETIME_PENALTY_DAYS = ((30, 30.0), (90, 15.0))
+
+
+@dataclass
+class HealthRow:
+    """건전성 표 1행"""
+    asset_id: str
+    kind: str                       # pump / membrane
+    score: Optional[float]          # 0 ~ 100 (None: 데이터 없음)
+    status: str
+    findings: List[str]
+    computed_at: datetime
+    bucket: float                   # 계산 기준 1시간 버킷 경계 (epoch 초)
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'asset_id': self.asset_id,
+            'kind': self.kind,
+            'score': self.score,
+            'status': self.status,
+            'findings': list(self.findings),
+            'computed_at': self.computed_at.isoformat(),
+            'detail': dict(self.detail),
+        }
+
+
+def rank(rows: Sequence[HealthRow]) -> List[HealthRow]:
+    """점수 낮은 순 (데이터 없는 설비는 맨 뒤)"""
+    return sorted(rows, key=lambda r: (r.score is None, r.score or 0.0, r.kind, r.asset_id))
+
+
+class FleetDiagnostics:
+    """전체 설비 진단 오케스트레이터"""
+
+    def __init__(self, db_dsn: str,
+                 feature_store: Optional[FeatureStore] = None,
+                 registry: Optional[EquipmentRegistry] = None,
+                 max_concurrency: int = DEFAULT_CONCURRENCY,
+                 pumps=None, membranes=None, fouling=None, lifetime=None):
+        """
+        Args:
+            feature_store / registry: 공유 저장소 (기본: DSN 별 공유 인스턴스)
+            max_concurrency: 동시에 진단하는 설비 수
+            pumps / membranes / fouling / lifetime: 진단 모듈 (기본: 같은 저장소로 생성)
+        """
+        self.db_dsn = db_dsn
+        self.feature_store = feature_store or get_feature_store(db_dsn)
+        self.registry = registry or get_equipment_registry(db_dsn)
+        self.max_concurrency = max(1, int(max_concurrency))
+        if pumps is None:
+            from .pump_diagnostics import PumpFailureDiagnostics
+
+            pumps = PumpFailureDiagnostics(db_dsn, self.feature_store, self.registry)
+        self.pumps = pumps
+        self.membranes = membranes or MembraneDamageDiagnostics(db_dsn, self.feature_store)
+        self.fouling = fouling or FoulingDiagnostics(db_dsn, self.feature_store)
+        self.lifetime = lifetime or ROLifetimePredictor(db_dsn, self.feature_store)
+
+        self._cache: Dict[Tuple[str, str], HealthRow] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.sweeps = 0
+        self.computed = 0
+        self.cache_hits = 0
+        self.last_sweep_s = 0.0
+        _FLEETS.add(self)
+
+    # ------------------------------------------------------------------ 설비
+    async def assets(self) -> List[Tuple[str, str]]:
+        """(종류, 설비 ID) 목록"""
+        await self.registry.ensure(self.db_dsn)
+        pumps = self.registry.equipments("pump")
+        return [("pump", p) for p in pumps] + [("membrane", PLANT_MEMBRANE)]
+
+    # ------------------------------------------------------------------ 진단
+    async def health(self, force: bool = False, conn=None) -> List[HealthRow]:
+        """
+        전체 설비 건전성 표 (점수 낮은 순)
+
+        새 1시간 버킷이 생긴 뒤 처음 호출될 때만 다시 계산한다.
+
+        Args:
+            force: 캐시 무시하고 전체 재계산
+            conn: 일괄 조회에 쓸 연결 (기본: 저장소가 DSN 으로 연결)
+        """
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:  # 대시보드 동시 갱신 시 한 번만 계산
+            return await self._sweep(force, conn)
+
+    async def _sweep(self, force: bool, conn) -> List[HealthRow]:
+        started = time.perf_counter()
+        bucket = self.feature_store.boundary("1h")
+        assets = await self.assets()
+        stale = [a for a in assets if force or a not in self._cache or self._cache[a].bucket != bucket]
+        self.cache_hits += len(assets) - len(stale)
+
+        if stale:
+            # 모든 대상 설비 구간을 선언한 뒤 한 번에 조회
+            declare = getattr(self.pumps, "declare_features", None)
+            if declare is not None:
+                await declare([a for kind, a in stale if kind == "pump"])
+            await self.feature_store.refresh(conn)
+
+            # 막 수명: 입력 일괄 조회 + 몬테카를로 1회
+            membranes = [a for kind, a in stale if kind == "membrane"]
+            lifetimes = await self.lifetime.predict_fleet(membranes, conn=conn) if membranes else {}
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def bounded(kind: str, asset_id: str) -> HealthRow:
+                async with semaphore:
+                    return await self.diagnose(kind, asset_id, bucket, lifetimes)
+
+            rows = await asyncio.gather(*(bounded(kind, a) for kind, a in stale))
+            for asset, row in zip(stale, rows):
+                self._cache[asset] = row
+            self.computed += len(rows)
+
+        current = set(assets)
+        for asset in [a for a in self._cache if a not in current]:
+            del self._cache[asset]
+        plant = self._cache.get(("membrane", PLANT_MEMBRANE))
+        if plant is not None:
+            self._with_trains(plant)  # 캐시된 행도 현재 등록 계열로
+        self.sweeps += 1
+        self.last_sweep_s = time.perf_counter() - started
+        return rank(self._cache.values())
+
+    async def diagnose(self, kind: str, asset_id: str, bucket: Optional[float] = None,
+                       lifetimes: Optional[Dict[str, Any]] = None) -> HealthRow:
+        """설비 1개 진단 → 표 1행 (lifetimes: predict_fleet 결과, 없으면 이 막만 예측)"""
+        bucket = self.feature_store.boundary("1h") if bucket is None else bucket
+        try:
+            if kind == "pump":
+                return self._pump_row(asset_id, await self.pumps.diagnose_pump(asset_id), bucket)
+            if lifetimes is None:
+                lifetimes = await self.lifetime.predict_fleet([asset_id])
+            membrane, fouling = await asyncio.gather(
+                self.membranes.diagnose_membrane(asset_id),
+                self.fouling.diagnose_fouling(asset_id),
+            )
+            return self._with_trains(
+                self._membrane_row(asset_id, membrane, fouling, lifetimes.get(asset_id), bucket))
+        except Exception as e:
+            print(f"[ERROR] Fleet diagnosis failed for {kind} {asset_id}: {e}")
+            return HealthRow(asset_id, kind, None, "error", [str(e)], datetime.now(), bucket)
+
+    def _with_trains(self, row: HealthRow) -> HealthRow:
+        """플랜트 막 행이 대표하는 등록 막 계열"""
+        trains = self.registry.equipments("membrane")
+        if trains:
+            row.detail['trains'] = list(trains)
+        else:
+            row.detail.pop('trains', None)
+        return row
+
+    @staticmethod
+    def _pump_row(pump_id: str, result, bucket: float) -> HealthRow:
+        if result is None:
+            return HealthRow(pump_id, "pump", None, "no_data", [], datetime.now(), bucket)
+        return HealthRow(
+            pump_id, "pump", round((1.0 - result.failure_probability) * 100, 1), result.status.value,
+            list(result.symptoms) + list(result.root_causes), datetime.now(), bucket,
+            {'failure_probability': result.failure_probability, 'confidence': result.confidence,
+             'recommendations': list(result.recommendations)},
+        )
+
+    @staticmethod
+    def _membrane_row(membrane_id: str, membrane, fouling, lifetime, bucket: float) -> HealthRow:
+        if membrane is None and fouling is None and lifetime is None:
+            return HealthRow(membrane_id, "membrane", None, "no_data", [], datetime.now(), bucket)
+
+        score = 100.0
+        status = "normal"
+        findings: List[str] = []
+        detail: Dict[str, Any] = {}
+        if membrane is not None:
+            score -= membrane.damage_probability * 100
+            detail['damage_probability'] = membrane.damage_probability
+            detail['salt_rejection_rate'] = membrane.salt_rejection_rate
+            if membrane.status != MembraneStatus.INTACT:
+                status = membrane.status.value
+            findings.extend(membrane.recommendations)
+        if fouling is not None:
+            score -= URGENCY_PENALTY.get(fouling.cleaning_urgency, 0.0)
+            detail['fouling_type'] = fouling.fouling_type.value
+            detail['cleaning_urgency'] = fouling.cleaning_urgency
+            if status == "normal" and fouling.cleaning_urgency != "scheduled":
+                status = f"cleaning_{fouling.cleaning_urgency}"
+            findings.extend(fouling.recommendations)
+        if lifetime is not None:
+            detail['remaining_days'] = lifetime.remaining_days
+            if lifetime.interval is not None:
+                detail['remaining_p10'] = round(lifetime.interval.remaining_p10)
+                detail['remaining_p90'] = round(lifetime.interval.remaining_p90)
+            for days, penalty in LIFETIME_PENALTY_DAYS:
+                if lifetime.remaining_days <= days:
+                    score -= penalty
+                    findings.append(f"잔여 수명 {lifetime.remaining_days}일 - 교체 준비")
+                    break
+        return HealthRow(membrane_id, "membrane", round(max(score, 0.0), 1), status,
+                         list(dict.fromkeys(findings)), datetime.now(), bucket, detail)
+
+    # ------------------------------------------------------------------ 상태
+    def invalidate(self, asset_id: Optional[str] = None) -> None:
+        """설비 캐시 삭제 (기본: 전체)"""
+        if asset_id is None:
+            self._cache.clear()
+        else:
+            for key in [k for k in self._cache if k[1] == asset_id]:
+                del self._cache[key]
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "ksys_fleet_sweeps_total": self.sweeps,
+            "ksys_fleet_assets_computed_total": self.computed,
+            "ksys_fleet_cache_hits_total": self.cache_hits,
+            "ksys_fleet_assets": len(self._cache),
+            "ksys_fleet_last_sweep_seconds": self.last_sweep_s,
+        }
+
+
+_FLEETS: "weakref.WeakSet[FleetDiagnostics]" = weakref.WeakSet()
+
+
+def _fleet_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for fleet in list(_FLEETS):
+        for name, value in fleet.metrics().items():
+            totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_fleet_metrics)
@@ -7,9 +7,30 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
-import psycopg
+import math
 import numpy as np
 
+from .feature_store import DAY, FeatureSpec, FeatureStore, get_feature_store
+from .trend_state import DEFAULT_STATE, HOUR, FoulingTrendTracker
+
+# 추세 상태 시계열 → (태그, 창 길이)
+TREND_SERIES = {
+    'tmp': ('TMP', 7 * DAY),
+    'tmp_before_cip': ('TMP_BEFORE_CIP', 30 * DAY),
+    'tmp_after_cip': ('TMP_AFTER_CIP', 30 * DAY),
+    'tmp_initial': ('TMP_INITIAL', 30 * DAY),
+}
+FLUX_PATTERN = "%FLUX%"
+FLUX_WINDOW_S = 7 * DAY
+BACKFILL_S = 30 * DAY       # 상태가 없을 때 한 번 읽는 구간
+SYNC_WINDOW_S = 6 * HOUR    # 평소 주기마다 읽는 최근 구간 (늦게 들어온 버킷 여유)
+
+
+def sync_spec(lookback_s: float) -> FeatureSpec:
+    """추세 상태 갱신용 구간 (influx_agg_1h)"""
+    return FeatureSpec("fouling.sync", "1h", int(lookback_s),
+                       tags=tuple(tag for tag, _ in TREND_SERIES.values()), patterns=(FLUX_PATTERN,))
+
 
 class FoulingType(Enum):
     """막오염 타입"""
@@ -37,8 +58,17 @@ class FoulingDiagnosisResult:
 class FoulingDiagnostics:
     """막오염 진단 시스템"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self, db_dsn: str, feature_store: Optional[FeatureStore] = None,
+                 trends: Optional[FoulingTrendTracker] = None):
         self.db_dsn = db_dsn
+        self.feature_store = feature_store or get_feature_store(db_dsn)
+        
+        # 막별 증분 추세 상태 (DB 가 없으면 파일 저장 안 함)
+        windows = {key: window for key, (_, window) in TREND_SERIES.items()}
+        windows['flux'] = FLUX_WINDOW_S
+        self.trends = trends or FoulingTrendTracker(windows, DEFAULT_STATE if db_dsn else None)
+        self._synced: Dict[str, float] = {}
+        self.feature_store.declare(sync_spec(self._sync_lookback(self.trends.state)))
         
         # 오염 진단 임계값
         self.thresholds = {
@@ -96,40 +126,59 @@ class FoulingDiagnostics:
             print(f"[ERROR] Fouling diagnosis failed: {e}")
             return None
     
+    def _sync_lookback(self, membrane_ids) -> float:
+        """마지막 반영 시각 이후만 읽는 구간 길이 (값이 있는 막이 없으면 BACKFILL_S)"""
+        boundary = self.feature_store.boundary("1h")
+        lasts = [t for t in (self.trends.last_t(m) for m in membrane_ids) if t is not None]
+        if not lasts:
+            return BACKFILL_S
+        gap = boundary - min(lasts)
+        return min(max(SYNC_WINDOW_S, math.ceil(gap / HOUR) * HOUR), BACKFILL_S)
+    
+    async def _sync_trends(self, membrane_id: str) -> None:
+        """새 1시간 버킷만 추세 상태에 반영 (같은 버킷 경계에서는 한 번만)"""
+        boundary = self.feature_store.boundary("1h")
+        if self._synced.get(membrane_id) == boundary:
+            return
+        
+        self.feature_store.declare(sync_spec(self._sync_lookback([membrane_id])))
+        view = await self.feature_store.get("fouling.sync")
+        for key, (tag, _) in TREND_SERIES.items():
+            times, values = view.present(tag)
+            self.trends.ingest(membrane_id, key, zip(times, values))
+        
+        # 플럭스 태그 전체를 시각 정렬 후 버킷별 평균
+        flux_tags = [t for t in view.tags if t not in {tag for tag, _ in TREND_SERIES.values()}]
+        matrix = view.matrix("avg", flux_tags)
+        if len(matrix):
+            filled = ~np.isnan(matrix).all(axis=0)
+            if filled.any():
+                self.trends.ingest(membrane_id, 'flux',
+                                   zip(view.times()[filled], np.nanmean(matrix[:, filled], axis=0)))
+        
+        self.trends.save()
+        self._synced[membrane_id] = boundary
+        # 다음 주기는 최근 구간만
+        self.feature_store.declare(sync_spec(SYNC_WINDOW_S))
+    
     async def _analyze_tmp_trend(self, membrane_id: str) -> Dict:
         """TMP 상승 트렌드 분석"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 최근 7일 TMP 데이터
-                    await cur.execute("""
-                        SELECT 
-                            bucket,
-                            avg_val as tmp_value
-                        FROM influx_agg_1h
-                        WHERE tag_name = 'TMP'
-                        AND bucket >= NOW() - INTERVAL '7 days'
-                        ORDER BY bucket
-                    """)
-                    
-                    rows = await cur.fetchall()
-                    
-                    if len(rows) < 24:  # 최소 1일 데이터
-                        return {'increase_rate': 0, 'current_tmp': 1.5}
-                    
-                    # 선형 회귀로 상승률 계산
-                    times = np.arange(len(rows))
-                    values = np.array([float(row[1]) for row in rows])
-                    
-                    # 선형 회귀
-                    coeffs = np.polyfit(times, values, 1)
-                    increase_rate = coeffs[0] * 24  # bar/day
-                    
-                    return {
-                        'increase_rate': increase_rate,
-                        'current_tmp': values[-1],
-                        'initial_tmp': values[0]
-                    }
+            # 최근 7일 TMP 추세 상태
+            await self._sync_trends(membrane_id)
+            trend = self.trends.series(membrane_id, 'tmp')
+            
+            slope = trend.slope()
+            if trend.count < 24 or slope is None:  # 최소 1일 데이터
+                return {'increase_rate': 0, 'current_tmp': 1.5}
+            
+            ew_slope = trend.ew_slope()
+            return {
+                'increase_rate': slope * 24,  # bar/day
+                'ew_increase_rate': ew_slope * 24 if ew_slope is not None else None,
+                'current_tmp': trend.last[1],
+                'initial_tmp': trend.first[1]
+            }
                     
         except Exception as e:
             print(f"[ERROR] TMP trend analysis failed: {e}")
@@ -138,40 +187,28 @@ class FoulingDiagnostics:
     async def _analyze_flux_decline(self, membrane_id: str) -> Dict:
         """플럭스 감소 분석"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 플럭스 데이터
-                    await cur.execute("""
-                        SELECT 
-                            bucket,
-                            avg_val as flux_value
-                        FROM influx_agg_1h
-                        WHERE tag_name LIKE '%FLUX%'
-                        AND bucket >= NOW() - INTERVAL '7 days'
-                        ORDER BY bucket
-                    """)
-                    
-                    rows = await cur.fetchall()
-                    
-                    if len(rows) < 24:
-                        return {'decline_rate': 0, 'current_flux': 100}
-                    
-                    values = np.array([float(row[1]) for row in rows])
-                    
-                    # 감소율 계산
-                    initial_flux = np.mean(values[:24])  # 첫날 평균
-                    current_flux = np.mean(values[-24:])  # 마지막날 평균
-                    
-                    if initial_flux > 0:
-                        decline_rate = (1 - current_flux/initial_flux) * 100 / 7  # %/day
-                    else:
-                        decline_rate = 0
-                    
-                    return {
-                        'decline_rate': decline_rate,
-                        'current_flux': current_flux,
-                        'initial_flux': initial_flux
-                    }
+            await self._sync_trends(membrane_id)
+            trend = self.trends.series(membrane_id, 'flux')
+            
+            if trend.count < 24:
+                return {'decline_rate': 0, 'current_flux': 100}
+            
+            # 첫날/마지막날 평균 → 적합 직선의 각 하루 중앙값
+            initial_flux = trend.level_at(trend.first[0] + 11.5 * HOUR)
+            current_flux = trend.level_at(trend.last[0] - 11.5 * HOUR)
+            if initial_flux is None:
+                return {'decline_rate': 0, 'current_flux': 100}
+            
+            if initial_flux > 0:
+                decline_rate = (1 - current_flux/initial_flux) * 100 / 7  # %/day
+            else:
+                decline_rate = 0
+            
+            return {
+                'decline_rate': decline_rate,
+                'current_flux': current_flux,
+                'initial_flux': initial_flux
+            }
                     
         except Exception as e:
             print(f"[ERROR] Flux decline analysis failed: {e}")
@@ -180,32 +217,19 @@ class FoulingDiagnostics:
     async def _calculate_cip_efficiency(self, membrane_id: str) -> float:
         """CIP 효율 계산"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 최근 CIP 전후 데이터
-                    await cur.execute("""
-                        SELECT 
-                            AVG(CASE WHEN tag_name = 'TMP_BEFORE_CIP' THEN avg_val END) as tmp_before,
-                            AVG(CASE WHEN tag_name = 'TMP_AFTER_CIP' THEN avg_val END) as tmp_after,
-                            AVG(CASE WHEN tag_name = 'TMP_INITIAL' THEN avg_val END) as tmp_initial
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('TMP_BEFORE_CIP', 'TMP_AFTER_CIP', 'TMP_INITIAL')
-                        AND bucket >= NOW() - INTERVAL '30 days'
-                    """)
-                    
-                    result = await cur.fetchone()
-                    
-                    if result and result[0] and result[1] and result[2]:
-                        tmp_before = float(result[0])
-                        tmp_after = float(result[1])
-                        tmp_initial = float(result[2])
-                        
-                        # CIP 효율 = (회복된 TMP) / (증가했던 TMP)
-                        if tmp_before > tmp_initial:
-                            efficiency = (tmp_before - tmp_after) / (tmp_before - tmp_initial)
-                            return min(max(efficiency, 0), 1)
-                    
-                    return 0.8  # 기본값
+            # 최근 CIP 전후 데이터 (30일 평균)
+            await self._sync_trends(membrane_id)
+            tmp_before = self.trends.series(membrane_id, 'tmp_before_cip').mean
+            tmp_after = self.trends.series(membrane_id, 'tmp_after_cip').mean
+            tmp_initial = self.trends.series(membrane_id, 'tmp_initial').mean
+            
+            if tmp_before and tmp_after and tmp_initial:
+                # CIP 효율 = (회복된 TMP) / (증가했던 TMP)
+                if tmp_before > tmp_initial:
+                    efficiency = (tmp_before - tmp_after) / (tmp_before - tmp_initial)
+                    return min(max(efficiency, 0), 1)
+            
+            return 0.8  # 기본값
                     
         except Exception as e:
             print(f"[ERROR] CIP efficiency calculation failed: {e}")
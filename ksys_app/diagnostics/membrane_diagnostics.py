@@ -8,7 +8,16 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
-import psycopg
+import numpy as np
+
+from .feature_store import DAY, FeatureSpec, FeatureStore, get_feature_store
+
+# 진단에 필요한 구간 (최근값: influx_agg_1m, 기준값: influx_agg_1h)
+FEATURES = (
+    FeatureSpec("membrane.quality_1h", "1m", 3600,
+                tags=("COND_IN", "COND_OUT", "TURB_IN", "TURB_OUT", "TDS_IN", "TDS_OUT")),
+    FeatureSpec("membrane.baseline_7d", "1h", 6 * DAY, tags=("COND_OUT", "TURB_OUT"), lag_s=DAY),
+)
 
 
 class MembraneStatus(Enum):
@@ -37,8 +46,10 @@ class MembraneDiagnosisResult:
 class MembraneDamageDiagnostics:
     """막파손 진단 시스템"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self, db_dsn: str, feature_store: Optional[FeatureStore] = None):
         self.db_dsn = db_dsn
+        self.feature_store = feature_store or get_feature_store(db_dsn)
+        self.feature_store.declare(*FEATURES)
         
         # 진단 임계값
         self.thresholds = {
@@ -99,52 +110,29 @@ class MembraneDamageDiagnostics:
     async def _collect_water_quality_data(self, membrane_id: str) -> Dict[str, Any]:
         """수질 데이터 수집"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 최근 데이터 조회
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            AVG(avg_val) as current_avg,
-                            MAX(max_val) as peak_value,
-                            MIN(min_val) as min_value
-                        FROM influx_agg_1m
-                        WHERE tag_name IN ('COND_IN', 'COND_OUT', 'TURB_IN', 'TURB_OUT', 'TDS_IN', 'TDS_OUT')
-                        AND bucket >= NOW() - INTERVAL '1 hour'
-                        GROUP BY tag_name
-                    """)
-                    
-                    rows = await cur.fetchall()
-                    
-                    data = {}
-                    for row in rows:
-                        tag = row[0]
-                        data[tag] = {
-                            'avg': float(row[1]) if row[1] else 0,
-                            'peak': float(row[2]) if row[2] else 0,
-                            'min': float(row[3]) if row[3] else 0
-                        }
-                    
-                    # 이전 기준값 조회
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            AVG(avg_val) as baseline
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('COND_OUT', 'TURB_OUT')
-                        AND bucket >= NOW() - INTERVAL '7 days'
-                        AND bucket <= NOW() - INTERVAL '1 day'
-                        GROUP BY tag_name
-                    """)
-                    
-                    baseline_rows = await cur.fetchall()
-                    
-                    for row in baseline_rows:
-                        tag = row[0]
-                        if tag in data:
-                            data[tag]['baseline'] = float(row[1]) if row[1] else 0
-                    
-                    return data
+            # 최근 1시간 데이터
+            recent = await self.feature_store.get("membrane.quality_1h")
+            
+            data = {}
+            for tag in recent.tags:
+                stats = recent.stats(tag)
+                if stats is None:
+                    continue
+                data[tag] = {
+                    'avg': stats['avg'] or 0,
+                    'peak': 0 if np.isnan(stats['max']) else stats['max'],
+                    'min': 0 if np.isnan(stats['min']) else stats['min']
+                }
+            
+            # 이전 기준값 (7일 전 ~ 1일 전)
+            baseline = await self.feature_store.get("membrane.baseline_7d")
+            
+            for tag in baseline.tags:
+                stats = baseline.stats(tag)
+                if tag in data and stats is not None:
+                    data[tag]['baseline'] = stats['avg'] or 0
+            
+            return data
                     
         except Exception as e:
             print(f"[ERROR] Data collection failed: {e}")
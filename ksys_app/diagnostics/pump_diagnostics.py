@@ -4,14 +4,25 @@ TASK_010: DIAG_IMPLEMENT_PUMP_FAILURE
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 import numpy as np
-import psycopg
 from ksys_app.ai_engine.w5h1_formatter import W5H1Response, W5H1Formatter
 
+from .equipment_registry import EquipmentRegistry, get_equipment_registry
+from .feature_store import DAY, FeatureSpec, FeatureStore, get_feature_store
+
+
+def pump_features(pump_id: str, tags: Sequence[str]) -> Tuple[FeatureSpec, ...]:
+    """펌프별 구간 선언 (레지스트리에 등록된 펌프 태그)"""
+    tags = tuple(tags)
+    return (
+        FeatureSpec(f"pump.recent_1h:{pump_id}", "1m", 3600, tags=tags),
+        FeatureSpec(f"pump.baseline_30d:{pump_id}", "1h", 23 * DAY, tags=tags, lag_s=7 * DAY),
+    )
+
 
 class PumpStatus(Enum):
     """펌프 상태"""
@@ -39,8 +50,11 @@ class PumpDiagnosisResult:
 class PumpFailureDiagnostics:
     """펌프 고장 진단 시스템"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self, db_dsn: str, feature_store: Optional[FeatureStore] = None,
+                 registry: Optional[EquipmentRegistry] = None):
         self.db_dsn = db_dsn
+        self.feature_store = feature_store or get_feature_store(db_dsn)
+        self.registry = registry or get_equipment_registry(db_dsn)
         self.w5h1_formatter = W5H1Formatter()
         
         # 진단 임계값
@@ -161,86 +175,75 @@ class PumpFailureDiagnostics:
             print(f"[ERROR] Pump diagnosis failed: {e}")
             return None
     
+    async def declare_features(self, pump_ids: Sequence[str]) -> List[str]:
+        """
+        여러 펌프의 구간을 한 번에 선언 (다음 refresh 에서 함께 조회)
+
+        Returns:
+            태그가 등록된 펌프 ID
+        """
+        await self.registry.ensure(self.db_dsn)
+        declared = []
+        for pump_id in pump_ids:
+            tags = self.registry.tags(pump_id)
+            if tags:
+                self.feature_store.declare(*pump_features(pump_id, tags))
+                declared.append(pump_id)
+        return declared
+    
     async def _collect_pump_data(self, pump_id: str) -> Dict[str, Any]:
         """펌프 관련 데이터 수집"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 최근 1시간 데이터
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            AVG(avg_val) as avg_value,
-                            MIN(min_val) as min_value,
-                            MAX(max_val) as max_value,
-                            STDDEV(avg_val) as std_dev
-                        FROM influx_agg_1m
-                        WHERE tag_name LIKE %s
-                        AND bucket >= NOW() - INTERVAL '1 hour'
-                        GROUP BY tag_name
-                    """, (f"%{pump_id}%",))
-                    
-                    rows = await cur.fetchall()
-                    
-                    data = {
-                        'pump_id': pump_id,
-                        'timestamp': datetime.now(),
-                        'metrics': {}
-                    }
-                    
-                    for row in rows:
-                        tag_name = row[0]
-                        metric_type = self._extract_metric_type(tag_name)
-                        
-                        data['metrics'][metric_type] = {
-                            'avg': float(row[1]) if row[1] else 0,
-                            'min': float(row[2]) if row[2] else 0,
-                            'max': float(row[3]) if row[3] else 0,
-                            'std': float(row[4]) if row[4] else 0
-                        }
-                    
-                    # 기준값 조회 (정상 운전 시)
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            AVG(avg_val) as baseline
-                        FROM influx_agg_1h
-                        WHERE tag_name LIKE %s
-                        AND bucket >= NOW() - INTERVAL '30 days'
-                        AND bucket <= NOW() - INTERVAL '7 days'
-                        GROUP BY tag_name
-                    """, (f"%{pump_id}%",))
-                    
-                    baseline_rows = await cur.fetchall()
-                    
-                    data['baseline'] = {}
-                    for row in baseline_rows:
-                        tag_name = row[0]
-                        metric_type = self._extract_metric_type(tag_name)
-                        data['baseline'][metric_type] = float(row[1]) if row[1] else 0
-                    
-                    return data
+            # 설비 레지스트리에서 펌프 태그를 찾아 정확한 태그로 조회
+            await self.registry.ensure(self.db_dsn)
+            tags = self.registry.tags(pump_id)
+            if not tags:
+                print(f"[WARN] No tags registered for pump {pump_id}")
+                return {}
+            self.feature_store.declare(*pump_features(pump_id, tags))
+            
+            # 최근 1시간 데이터
+            recent = await self.feature_store.get(f"pump.recent_1h:{pump_id}")
+            
+            data = {
+                'pump_id': pump_id,
+                'timestamp': datetime.now(),
+                'metrics': {}
+            }
+            
+            for tag_name in recent.tags:
+                stats = recent.stats(tag_name)
+                if stats is None:
+                    continue
+                metric_type = self._extract_metric_type(tag_name)
+                
+                data['metrics'][metric_type] = {
+                    'avg': stats['avg'] or 0,
+                    'min': 0 if np.isnan(stats['min']) else stats['min'],
+                    'max': 0 if np.isnan(stats['max']) else stats['max'],
+                    'std': 0 if np.isnan(stats['std']) else stats['std']
+                }
+            
+            # 기준값 조회 (정상 운전 시: 30일 전 ~ 7일 전)
+            baseline = await self.feature_store.get(f"pump.baseline_30d:{pump_id}")
+            
+            data['baseline'] = {}
+            for tag_name in baseline.tags:
+                stats = baseline.stats(tag_name)
+                if stats is None:
+                    continue
+                metric_type = self._extract_metric_type(tag_name)
+                data['baseline'][metric_type] = stats['avg'] or 0
+            
+            return data
                     
         except Exception as e:
             print(f"[ERROR] Data collection failed: {e}")
             return {}
     
     def _extract_metric_type(self, tag_name: str) -> str:
-        """태그명에서 메트릭 타입 추출"""
-        tag_lower = tag_name.lower()
-        
-        if 'flow' in tag_lower or 'q' in tag_lower:
-            return 'flow'
-        elif 'pressure' in tag_lower or 'p' in tag_lower:
-            return 'pressure'
-        elif 'vibration' in tag_lower or 'vib' in tag_lower:
-            return 'vibration'
-        elif 'current' in tag_lower or 'amp' in tag_lower:
-            return 'current'
-        elif 'speed' in tag_lower or 'rpm' in tag_lower:
-            return 'speed'
-        else:
-            return tag_name
+        """태그명 → 메트릭 타입 (설비 레지스트리)"""
+        return self.registry.metric_of(tag_name) or tag_name
     
     def _diagnose_flow_pattern(self, pump_data: Dict) -> Dict[str, Any]:
         """유량 패턴 진단"""
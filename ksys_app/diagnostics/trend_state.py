@@ -0,0 +1,239 @@
+"""
+막오염 추세 증분 상태
+
+7일 TMP/플럭스, 30일 CIP 기준값을 호출마다 다시 읽어 np.polyfit 하던 것을
+시계열별 누적합 상태로 바꾼다. 새 influx_agg_1h 버킷이 들어올 때만 갱신하고
+조회(기울기/평균/적합값)는 O(1).
+
+- SlidingTrend: 시간 창(window_s) 안 점들의 n, Σx, Σy, Σx², Σxy
+  새 점 추가 + 창 밖 점 제거로 유지 (x = 기준 시각부터의 시간(h))
+  지수가중 변형: 같은 합을 exp(-dt/tau) 로 감쇠시키며 누적 (창 없이 최근 가중)
+- 누적 오차: 창 길이만큼 갱신할 때마다 버퍼로 합을 다시 계산, 기준 시각은 창 단위로 이동
+- FoulingTrendTracker: 막 ID × 시계열 상태, JSON 파일로 원자적 저장(재시작 후 이어서 갱신)
+"""
+
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+DEFAULT_STATE = os.getenv("KSYS_FOULING_STATE", os.path.join("data", "journal", "fouling_trend.json"))
+
+HOUR = 3600.0
+
+
+class SlidingTrend:
+    """시간 창 최소제곱 (누적합) + 지수가중 최소제곱"""
+
+    def __init__(self, window_s: float, tau_s: Optional[float] = None):
+        """
+        Args:
+            window_s: 창 길이 (초) - 마지막 점 시각 기준 (t_last - window_s, t_last]
+            tau_s: 지수가중 시간 상수 (초, 기본: window_s / 3)
+        """
+        self.window_s = float(window_s)
+        self.tau_s = float(tau_s) if tau_s else self.window_s / 3
+        self.points: Deque[Tuple[float, float]] = deque()
+        self.origin: Optional[float] = None
+        self.last_t: Optional[float] = None
+        self._s = [0.0] * 5    # n, Σx, Σy, Σx², Σxy
+        self._w = [0.0] * 5    # 지수가중 합 (같은 순서)
+        self._since_exact = 0
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    # ------------------------------------------------------------------ 갱신
+    def push(self, t: float, y: float) -> bool:
+        """점 추가 (마지막 점보다 늦은 점만, NaN 무시) → 반영 여부"""
+        if y is None or math.isnan(y) or (self.last_t is not None and t <= self.last_t):
+            return False
+        if self.origin is None:
+            self.origin = t
+        elif t - self.origin > 2 * self.window_s:
+            self._rebase(self.points[0][0] if self.points else t)
+
+        if self.last_t is not None:
+            decay = math.exp(-(t - self.last_t) / self.tau_s)
+            self._w = [v * decay for v in self._w]
+        x = (t - self.origin) / HOUR
+        for sums in (self._s, self._w):
+            sums[0] += 1.0
+            sums[1] += x
+            sums[2] += y
+            sums[3] += x * x
+            sums[4] += x * y
+        self.points.append((t, y))
+        self.last_t = t
+
+        limit = t - self.window_s
+        while self.points and self.points[0][0] <= limit:
+            t_old, y_old = self.points.popleft()
+            x_old = (t_old - self.origin) / HOUR
+            s = self._s
+            s[0] -= 1.0
+            s[1] -= x_old
+            s[2] -= y_old
+            s[3] -= x_old * x_old
+            s[4] -= x_old * y_old
+            self._since_exact += 1
+        if self._since_exact > max(len(self.points), 16):
+            self._recompute()
+        return True
+
+    def extend(self, points: Iterable[Tuple[float, float]]) -> int:
+        return sum(self.push(t, y) for t, y in points)
+
+    def _rebase(self, origin: float) -> None:
+        """기준 시각 이동 - 합을 x' = x - d 로 변환"""
+        d = (origin - self.origin) / HOUR
+        for sums in (self._s, self._w):
+            n, sx, sy, sxx, sxy = sums
+            sums[:] = [n, sx - d * n, sy, sxx - 2 * d * sx + d * d * n, sxy - d * sy]
+        self.origin = origin
+        self._recompute()
+
+    def _recompute(self) -> None:
+        """버퍼로 창 합 다시 계산 (누적 오차 제거)"""
+        s = [0.0] * 5
+        for t, y in self.points:
+            x = (t - self.origin) / HOUR
+            s[0] += 1.0
+            s[1] += x
+            s[2] += y
+            s[3] += x * x
+            s[4] += x * y
+        self._s = s
+        self._since_exact = 0
+
+    # ------------------------------------------------------------------ 조회
+    @staticmethod
+    def _fit(sums) -> Optional[Tuple[float, float]]:
+        n, sx, sy, sxx, sxy = sums
+        det = n * sxx - sx * sx
+        if n < 2 or det <= 1e-12 * max(n * sxx, 1.0):
+            return None
+        slope = (n * sxy - sx * sy) / det
+        return (sy - slope * sx) / n, slope
+
+    @property
+    def count(self) -> int:
+        return len(self.points)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._s[2] / self._s[0] if self.points else None
+
+    @property
+    def first(self) -> Optional[Tuple[float, float]]:
+        return self.points[0] if self.points else None
+
+    @property
+    def last(self) -> Optional[Tuple[float, float]]:
+        return self.points[-1] if self.points else None
+
+    def slope(self) -> Optional[float]:
+        """창 최소제곱 기울기 (단위/시간)"""
+        fit = self._fit(self._s)
+        return fit[1] if fit else None
+
+    def ew_slope(self) -> Optional[float]:
+        """지수가중 최소제곱 기울기 (단위/시간)"""
+        fit = self._fit(self._w)
+        return fit[1] if fit else None
+
+    def level_at(self, t: float) -> Optional[float]:
+        """창 적합 직선의 t 시각 값"""
+        fit = self._fit(self._s)
+        if fit is None:
+            return None
+        return fit[0] + fit[1] * (t - self.origin) / HOUR
+
+    # ------------------------------------------------------------------ 저장
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window_s': self.window_s,
+            'tau_s': self.tau_s,
+            'origin': self.origin,
+            'last_t': self.last_t,
+            'points': [list(p) for p in self.points],
+            'ew': list(self._w),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SlidingTrend":
+        trend = cls(data['window_s'], data.get('tau_s'))
+        trend.origin = data.get('origin')
+        trend.last_t = data.get('last_t')
+        trend.points = deque((float(t), float(y)) for t, y in data.get('points', ()))
+        trend._w = [float(v) for v in data.get('ew', [0.0] * 5)]
+        if trend.origin is not None:
+            trend._recompute()
+        return trend
+
+
+class FoulingTrendTracker:
+    """막 ID × 시계열 추세 상태 (파일 저장)"""
+
+    def __init__(self, windows: Dict[str, float], path: Optional[str] = DEFAULT_STATE):
+        """
+        Args:
+            windows: {시계열 키: 창 길이 (초)}
+            path: 상태 파일 (None 이면 저장 안 함)
+        """
+        self.windows = dict(windows)
+        self.path = path
+        self.state: Dict[str, Dict[str, SlidingTrend]] = {}
+        self._dirty = False
+        self.load()
+
+    def series(self, membrane_id: str, key: str) -> SlidingTrend:
+        per = self.state.setdefault(membrane_id, {})
+        trend = per.get(key)
+        if trend is None:
+            trend = per[key] = SlidingTrend(self.windows[key])
+        return trend
+
+    def last_t(self, membrane_id: str) -> Optional[float]:
+        """
+        동기화 워터마크 - 값이 있는 시계열의 마지막 시각 중 가장 최근 (값이 하나도 없으면 None)
+
+        시계열은 한 조회로 함께 갱신되므로 가장 최근 시계열까지 읽은 것. CIP 처럼 드문 시계열이나
+        한 번도 값이 없던 시계열(빈 상태로 생성됨)은 조회 구간을 늘리지 않음
+        """
+        per = self.state.get(membrane_id, {})
+        times = [per[k].last_t for k in self.windows if k in per and per[k].last_t is not None]
+        return max(times) if times else None
+
+    def ingest(self, membrane_id: str, key: str, points: Iterable[Tuple[float, float]]) -> int:
+        """새 버킷 반영 → 반영된 점 수"""
+        added = self.series(membrane_id, key).extend(points)
+        self._dirty = self._dirty or added > 0
+        return added
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({m: {k: t.to_dict() for k, t in per.items()} for m, per in self.state.items()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.state = {m: {k: SlidingTrend.from_dict(v) for k, v in per.items() if k in self.windows}
+                          for m, per in data.items()}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logging.error(f"막오염 추세 상태 읽기 실패 ({self.path}): {e}")
@@ -0,0 +1,395 @@
+"""
+원본/집계 시계열 스트리밍 내보내기 (CSV.gz / Parquet / XLSX)
+
+기간 전체를 메모리에 올리지 않는다.
+
+- 서버 측 커서(DECLARE)에서 chunk_rows 행씩 fetchmany → 형식별 기록기에 바로 기록
+  → 메모리는 청크 1개 + 기록기 버퍼로 고정 (기간 길이와 무관)
+- CSV: gzip 스트림에 청크 단위 기록
+- Parquet: 청크 = 행 그룹 1개 (pyarrow, 선택 의존성)
+- XLSX: xlsxwriter constant_memory (행 단위로 임시 파일에 흘려 씀, 선택 의존성)
+  시트 최대 행 수를 넘으면 다음 시트로
+- ExportJobs: 백엔드 API 용 작업 관리 (진행률 = 정렬 기준 시각 위치, 완료 파일 보관 기간 후 삭제)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import csv
+import gzip
+import io
+import os
+import tempfile
+import time
+import uuid
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .performance.metrics import register_metrics
+
+CHUNK_ROWS = int(os.getenv("KSYS_EXPORT_CHUNK_ROWS", "50000"))
+EXPORT_DIR = os.getenv("KSYS_EXPORT_DIR", "") or os.path.join(tempfile.gettempdir(), "ksys_exports")
+EXPORT_TTL_S = int(os.getenv("KSYS_EXPORT_TTL_S", "3600"))     # 완료 파일 보관
+MAX_JOBS = int(os.getenv("KSYS_EXPORT_MAX_JOBS", "2"))          # 동시 실행 (나머지는 대기)
+
+GZIP_LEVEL = int(os.getenv("KSYS_EXPORT_GZIP_LEVEL", "6"))
+XLSX_MAX_ROWS = 1_048_576
+
+# 소스 → (테이블, 시각 열, 값 열) - 정렬은 (시각, 태그) = 기본키/버킷 순서
+SOURCES: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "raw": ("influx_hist", "ts", ("value",)),
+    "1m": ("influx_agg_1m", "bucket", ("avg", "min", "max", "n")),
+    "10m": ("influx_agg_10m", "bucket", ("avg", "min", "max", "n")),
+    "1h": ("influx_agg_1h", "bucket", ("avg", "min", "max", "n")),
+    "1d": ("influx_agg_1d", "bucket", ("avg", "min", "max", "n")),
+}
+
+SERIES_SQL = """
+    SELECT {time_col}, tag_name, {value_cols}
+    FROM public.{table}
+    WHERE {time_col} >= %s AND {time_col} < %s
+      AND (%s::text[] IS NULL OR tag_name = ANY(%s::text[]))
+    ORDER BY {time_col}, tag_name
+"""
+
+FORMATS = {"csv": ".csv.gz", "parquet": ".parquet", "xlsx": ".xlsx"}
+MEDIA_TYPES = {
+    "csv": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+Batch = List[tuple]
+
+
+def columns_of(source: str) -> Tuple[str, ...]:
+    _, time_col, value_cols = SOURCES[source]
+    return (time_col, "tag_name") + value_cols
+
+
+def series_sql(source: str) -> str:
+    table, time_col, value_cols = SOURCES[source]
+    return SERIES_SQL.format(table=table, time_col=time_col, value_cols=", ".join(value_cols))
+
+
+# ---------------------------------------------------------------------- 기록기
+class CsvGzipWriter:
+    """gzip CSV - 청크마다 압축 스트림에 기록"""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self._gz = gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+        self._text = io.TextIOWrapper(self._gz, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(columns)
+        self._last = (None, "")
+
+    def _iso(self, ts) -> str:
+        # (시각, 태그) 순이라 같은 시각이 태그 수만큼 연속 - 마지막 변환 재사용
+        if ts is not self._last[0] and ts != self._last[0]:
+            self._last = (ts, ts.isoformat() if isinstance(ts, datetime) else str(ts))
+        return self._last[1]
+
+    def write(self, rows: Batch) -> None:
+        iso = self._iso
+        self._csv.writerows([(iso(r[0]), *r[1:]) for r in rows])
+
+    def close(self) -> None:
+        self._text.close()
+
+
+class ParquetWriter:
+    """Parquet - 청크 1개 = 행 그룹 1개"""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("parquet export requires pyarrow") from e
+        self._pa = pa
+        fields = [pa.field(columns[0], pa.timestamp("us", tz="UTC")), pa.field("tag_name", pa.string())]
+        fields += [pa.field(c, pa.int64() if c == "n" else pa.float64()) for c in columns[2:]]
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows: Batch) -> None:
+        pa = self._pa
+        arrays = [pa.array([r[k] for r in rows], type=f.type) for k, f in enumerate(self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema), row_group_size=len(rows))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class XlsxWriter:
+    """XLSX - constant_memory 통합 문서 (행 순서대로만 기록, 시트당 최대 행 수 넘으면 새 시트)"""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        try:
+            import xlsxwriter
+        except ImportError as e:
+            raise RuntimeError("xlsx export requires xlsxwriter") from e
+        self._book = xlsxwriter.Workbook(path, {"constant_memory": True, "tmpdir": os.path.dirname(path) or None,
+                                                "remove_timezone": True})
+        self._time_format = self._book.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        self._columns = list(columns)
+        self._sheet = None
+        self._row = XLSX_MAX_ROWS
+
+    def _next_sheet(self) -> None:
+        self._sheet = self._book.add_worksheet()
+        self._sheet.set_column(0, 0, 20)
+        self._sheet.write_row(0, 0, self._columns)
+        self._row = 1
+
+    def write(self, rows: Batch) -> None:
+        for r in rows:
+            if self._row >= XLSX_MAX_ROWS:
+                self._next_sheet()
+            ts = r[0].astimezone() if isinstance(r[0], datetime) and r[0].tzinfo else r[0]
+            self._sheet.write_datetime(self._row, 0, ts, self._time_format)
+            self._sheet.write_row(self._row, 1, r[1:])
+            self._row += 1
+
+    def close(self) -> None:
+        if self._sheet is None:
+            self._next_sheet()
+        self._book.close()
+
+
+WRITERS = {"csv": CsvGzipWriter, "parquet": ParquetWriter, "xlsx": XlsxWriter}
+
+
+# ---------------------------------------------------------------------- 스트리밍
+async def stream_series(conn, source: str, start: datetime, end: datetime,
+                        tags: Optional[Sequence[str]] = None,
+                        chunk_rows: int = CHUNK_ROWS) -> AsyncIterator[Batch]:
+    """서버 측 커서로 [start, end) 를 (시각, 태그) 순 chunk_rows 행씩"""
+    tag_list = list(tags) if tags else None
+    async with conn.cursor(name=f"ksys_export_{uuid.uuid4().hex[:8]}") as cur:
+        cur.itersize = chunk_rows
+        await cur.execute(series_sql(source), (start, end, tag_list, tag_list))
+        while True:
+            rows = await cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+
+
+async def write_batches(batches: AsyncIterator[Batch], fmt: str, path: str, columns: Sequence[str],
+                        progress: Optional[Callable[[int, Batch], None]] = None) -> int:
+    """
+    청크 스트림 → 파일 (임시 이름으로 기록 후 교체 - 실패/취소 시 부분 파일 남기지 않음)
+
+    Returns:
+        기록한 행 수
+    """
+    tmp = f"{path}.part"
+    writer = WRITERS[fmt](tmp, columns)
+    rows = 0
+    try:
+        async for batch in batches:
+            # 기록(압축/직렬화)은 CPU 작업 - 이벤트 루프를 막지 않게 스레드에서
+            await asyncio.to_thread(writer.write, batch)
+            rows += len(batch)
+            _TOTALS["rows"] += len(batch)
+            if progress is not None:
+                progress(rows, batch)
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        with contextlib.suppress(Exception):
+            writer.close()
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return rows
+
+
+async def export_series(conn, fmt: str, path: str, source: str, start: datetime, end: datetime,
+                        tags: Optional[Sequence[str]] = None, chunk_rows: int = CHUNK_ROWS,
+                        progress: Optional[Callable[[int, Batch], None]] = None) -> int:
+    """원본/집계 시계열 [start, end) 를 fmt 파일로 (행 수 반환)"""
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format: {fmt}")
+    if source not in SOURCES:
+        raise ValueError(f"unknown export source: {source}")
+    return await write_batches(stream_series(conn, source, start, end, tags, chunk_rows),
+                               fmt, path, columns_of(source), progress)
+
+
+# ---------------------------------------------------------------------- 작업 관리
+@dataclass
+class ExportJob:
+    """내보내기 작업 상태"""
+    job_id: str
+    fmt: str
+    source: str
+    start: datetime
+    end: datetime
+    tags: Optional[Tuple[str, ...]]
+    path: str
+    state: str = "queued"          # queued / running / done / failed / cancelled
+    rows: int = 0
+    position: Optional[datetime] = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def progress(self) -> float:
+        """0 ~ 1 (마지막으로 기록한 행의 시각 위치)"""
+        if self.state == "done":
+            return 1.0
+        if self.position is None:
+            return 0.0
+        span = (self.end - self.start).total_seconds()
+        return min(max((self.position - self.start).total_seconds() / span, 0.0), 1.0) if span > 0 else 0.0
+
+    @property
+    def filename(self) -> str:
+        return f"{self.source}_{self.start:%Y%m%d}_{self.end:%Y%m%d}{FORMATS[self.fmt]}"
+
+    def to_dict(self) -> Dict:
+        size = os.path.getsize(self.path) if self.state == "done" and os.path.exists(self.path) else None
+        return {
+            "job_id": self.job_id, "format": self.fmt, "source": self.source,
+            "start": self.start.isoformat(), "end": self.end.isoformat(),
+            "state": self.state, "rows": self.rows, "progress": round(self.progress, 4),
+            "bytes": size, "error": self.error,
+        }
+
+
+class ExportJobs:
+    """백엔드 내보내기 작업 (동시 실행 MAX_JOBS, 완료 파일 EXPORT_TTL_S 후 삭제)"""
+
+    def __init__(self, dsn: str = "", directory: str = EXPORT_DIR, max_jobs: int = MAX_JOBS,
+                 ttl_s: float = EXPORT_TTL_S, connect: Optional[Callable] = None):
+        self.dsn = dsn
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self.ttl_s = ttl_s
+        self._connect = connect
+        self.jobs: Dict[str, ExportJob] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        _MANAGERS.add(self)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_jobs), loop
+        return self._slots
+
+    async def _open(self):
+        if self._connect is not None:
+            return await self._connect()
+        import psycopg
+
+        # 서버 측 커서는 트랜잭션 안에서만 - 풀(autocommit) 대신 전용 연결
+        return await psycopg.AsyncConnection.connect(self.dsn or os.environ.get("TS_DSN", ""))
+
+    def submit(self, fmt: str, source: str, start: datetime, end: datetime,
+               tags: Optional[Iterable[str]] = None) -> ExportJob:
+        if fmt not in WRITERS:
+            raise ValueError(f"unknown export format: {fmt}")
+        if source not in SOURCES:
+            raise ValueError(f"unknown export source: {source}")
+        if start >= end:
+            raise ValueError("start must be before end")
+        self.cleanup()
+        os.makedirs(self.directory, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        job = ExportJob(job_id, fmt, source, start, end, tuple(tags) if tags else None,
+                        os.path.join(self.directory, job_id + FORMATS[fmt]))
+        self.jobs[job_id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    async def _run(self, job: ExportJob) -> None:
+        def progress(rows: int, batch: Batch) -> None:
+            job.rows = rows
+            job.position = batch[-1][0]
+
+        try:
+            async with self._semaphore():
+                job.state = "running"
+                async with await self._open() as conn:
+                    job.rows = await export_series(conn, job.fmt, job.path, job.source, job.start, job.end,
+                                                   job.tags, progress=progress)
+            job.state = "done"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:  # noqa: BLE001
+            job.state, job.error = "failed", str(e)
+            _TOTALS["failed"] += 1
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        if job.state == "queued":  # 시작 전 취소는 _run 이 실행되지 않음
+            job.state, job.finished_at = "cancelled", time.time()
+        return True
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """보관 기간이 지난 작업과 파일 삭제"""
+        now = time.time() if now is None else now
+        expired = [j for j in self.jobs.values() if j.finished_at is not None and now - j.finished_at >= self.ttl_s]
+        for job in expired:
+            with contextlib.suppress(OSError):
+                os.remove(job.path)
+            del self.jobs[job.job_id]
+        return len(expired)
+
+    def metrics(self) -> Dict[str, float]:
+        states = [j.state for j in self.jobs.values()]
+        return {
+            "ksys_export_jobs_running": states.count("running"),
+            "ksys_export_jobs_queued": states.count("queued"),
+        }
+
+
+_TOTALS = {"rows": 0, "failed": 0}
+_MANAGERS: "weakref.WeakSet[ExportJobs]" = weakref.WeakSet()
+
+
+def _export_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {
+        "ksys_export_rows_total": _TOTALS["rows"],
+        "ksys_export_failed_total": _TOTALS["failed"],
+    }
+    for manager in list(_MANAGERS):
+        for name, value in manager.metrics().items():
+            totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_export_metrics)
+
+
+_SHARED: Optional[ExportJobs] = None
+
+
+def get_export_jobs() -> ExportJobs:
+    """프로세스 공유 작업 관리자 (백엔드 API)"""
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = ExportJobs()
+    return _SHARED
+
+
+def parse_time(text: str) -> datetime:
+    """ISO 시각 (시간대 없으면 로컬)"""
+    dt = datetime.fromisoformat(text)
+    return dt if dt.tzinfo else dt.astimezone()
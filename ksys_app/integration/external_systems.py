@@ -3,16 +3,19 @@
 TASK_018: INTEG_CONNECT_EXTERNAL_SYSTEMS
 """
 
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
-import aiohttp
 import json
-import psycopg
 from abc import ABC, abstractmethod
 
+from .hist_ingest import QUALITY_QC, HistIngest
+
+if TYPE_CHECKING:
+    import aiohttp  # HTTP 커넥터(날씨/전력 요금)만 사용 - SCADA 적재 경로는 aiohttp 없이 동작
+
 
 class SystemType(Enum):
     """외부 시스템 타입"""
@@ -88,11 +91,12 @@ class WeatherAPIConnector(ExternalSystemConnector):
         self.api_key = api_key
         self.location = location
         self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional["aiohttp.ClientSession"] = None
     
     async def connect(self) -> bool:
         """API 연결"""
         try:
+            import aiohttp
             self.session = aiohttp.ClientSession()
             # 연결 테스트
             async with self.session.get(
@@ -170,7 +174,7 @@ class PowerRateAPIConnector(ExternalSystemConnector):
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.kepco.co.kr/v1"  # 예시 URL
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional["aiohttp.ClientSession"] = None
         
         # 시간대별 요금 테이블 (예시)
         self.rate_table = {
@@ -193,6 +197,7 @@ class PowerRateAPIConnector(ExternalSystemConnector):
     
     async def connect(self) -> bool:
         """API 연결"""
+        import aiohttp
         self.session = aiohttp.ClientSession()
         return True
     
@@ -257,6 +262,7 @@ class SCADAInterface:
         self.db_dsn = db_dsn
         self.protocol = "OPC-UA"  # or Modbus, DNP3, IEC 61850
         self.connected = False
+        self.ingest = HistIngest(db_dsn)  # influx_hist 배치 적재 (크기/시간 기준 플러시)
         
         # SCADA 태그 매핑
         self.tag_mapping = {
@@ -301,7 +307,7 @@ class SCADAInterface:
                 
                 internal_tag = self.tag_mapping[scada_tag]
                 data[internal_tag] = SCADAData(
-                    timestamp=datetime.now(),
+                    timestamp=datetime.now(timezone.utc),  # influx_hist.ts 는 timestamptz
                     tag_name=internal_tag,
                     value=value,
                     quality='Good',
@@ -341,28 +347,12 @@ class SCADAInterface:
         pass
     
     async def sync_to_database(self, data: Dict[str, SCADAData]):
-        """데이터베이스 동기화"""
+        """데이터베이스 동기화 - influx_hist 적재 버퍼에 추가 (최신값은 influx_latest 뷰가 influx_hist 에서 계산)"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    for tag_name, scada_data in data.items():
-                        # influx_latest 테이블 업데이트
-                        await cur.execute("""
-                            INSERT INTO influx_latest (tag_name, value, ts)
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (tag_name) 
-                            DO UPDATE SET value = %s, ts = %s
-                        """, (
-                            tag_name,
-                            scada_data.value,
-                            scada_data.timestamp,
-                            scada_data.value,
-                            scada_data.timestamp
-                        ))
-                    
-                    await conn.commit()
-                    print(f"[INFO] Synced {len(data)} tags to database")
-                    
+            await self.ingest.add(
+                (scada_data.timestamp, tag_name, scada_data.value, QUALITY_QC.get(scada_data.quality, 2))
+                for tag_name, scada_data in data.items()
+            )
         except Exception as e:
             print(f"[ERROR] Database sync failed: {e}")
     
@@ -371,6 +361,7 @@ class SCADAInterface:
         # if self.client:
         #     await self.client.disconnect()
         self.connected = False
+        await self.ingest.close()  # 남은 버퍼 적재
 
 
 class ExternalSystemIntegrator:
@@ -0,0 +1,282 @@
+"""
+시계열 원본(influx_hist) 배치 적재기
+
+SCADA 폴링 값을 행 단위 INSERT 대신 모아서 적재한다.
+- add(): 메모리 버퍼에 추가, batch_rows 이상이면 바로 / 아니면 flush_interval_s 뒤 플러시
+- 플러시: 풀 연결 1개에서 세션 임시 스테이징 테이블로 바이너리 COPY → 한 문장으로 병합
+  (배치 안 중복은 마지막 값, 기존 (ts, tag_name) 행은 값이 다를 때만 갱신)
+- 연결 실패 시 배치를 버퍼 앞에 되돌려 다음 플러시에 재시도 (max_buffer 초과분은 오래된 것부터 버림)
+- 인코딩 불가 행은 격리: add() 에서 naive 시각은 로컬 시각으로 보정, 값 없음 등은 quarantine 으로,
+  그 밖의 연결 외 오류 배치는 반씩 나눠 다시 써서 실패하는 행만 격리 (같은 행으로 무한 재시도 없음)
+- 적재 행 수/버퍼/플러시 지연은 /metrics 로 노출
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import psycopg
+
+from ..performance.metrics import register_metrics
+
+BATCH_ROWS = int(os.getenv("KSYS_INGEST_BATCH_ROWS", "5000"))
+FLUSH_INTERVAL_S = float(os.getenv("KSYS_INGEST_FLUSH_S", "30"))
+MAX_BUFFER = int(os.getenv("KSYS_INGEST_MAX_BUFFER", "500000"))
+QUARANTINE_ROWS = int(os.getenv("KSYS_INGEST_QUARANTINE_ROWS", "1000"))
+
+# 재연결 후 재시도할 오류 (그 외 오류는 같은 행으로 반복 실패 → 격리)
+_CONNECTION_ERRORS = (psycopg.OperationalError, psycopg.InterfaceError, ConnectionError, OSError, asyncio.TimeoutError)
+
+# SCADA 품질 → influx_hist.qc (0 = 정상, 조회/집계는 qc = 0 만 사용)
+QUALITY_QC = {"Good": 0, "Uncertain": 1, "Bad": 2}
+
+STAGE_TABLE = "influx_hist_stage"
+# 세션 임시 테이블 - 풀 연결마다 1회 생성, 커밋 시 비워짐 (seq: 배치 안 중복은 나중 행 우선)
+STAGE_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+        ts timestamptz NOT NULL, tag_name text NOT NULL, value float8 NOT NULL, qc int2 NOT NULL,
+        seq bigint GENERATED ALWAYS AS IDENTITY
+    ) ON COMMIT DELETE ROWS
+"""
+COPY_SQL = f"COPY {STAGE_TABLE} (ts, tag_name, value, qc) FROM STDIN (FORMAT BINARY)"
+COPY_TYPES = ("timestamptz", "text", "float8", "int2")
+
+
+def merge_sql(table: str) -> str:
+    return f"""
+    INSERT INTO {table} AS h (ts, tag_name, value, qc)
+    SELECT DISTINCT ON (ts, tag_name) ts, tag_name, value, qc
+    FROM {STAGE_TABLE}
+    ORDER BY ts, tag_name, seq DESC
+    ON CONFLICT (ts, tag_name) DO UPDATE SET value = EXCLUDED.value, qc = EXCLUDED.qc
+    WHERE (h.value, h.qc) IS DISTINCT FROM (EXCLUDED.value, EXCLUDED.qc)
+"""
+
+
+Row = Tuple[datetime, str, float, int]
+
+
+def normalize_row(row: Any) -> Optional[Row]:
+    """바이너리 COPY 로 인코딩 가능한 행으로 정리 (naive 시각 = 로컬 시각), 불가능하면 None"""
+    try:
+        ts, tag_name, value, qc = row
+        if not isinstance(ts, datetime) or not tag_name or value is None:
+            return None
+        return (ts if ts.tzinfo is not None else ts.astimezone()), str(tag_name), float(value), int(qc)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+_INGESTS: "weakref.WeakSet[HistIngest]" = weakref.WeakSet()
+
+
+class HistIngest:
+    """크기/시간 기준 플러시 + 바이너리 COPY 스테이징 병합 적재기"""
+
+    def __init__(self,
+                 dsn: str,
+                 table: str = "public.influx_hist",
+                 batch_rows: int = BATCH_ROWS,
+                 flush_interval_s: float = FLUSH_INTERVAL_S,
+                 max_buffer: int = MAX_BUFFER,
+                 connection: Optional[Callable[[], AsyncContextManager[Any]]] = None):
+        self.dsn = dsn
+        self.table = table
+        self.batch_rows = batch_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self._connection = connection
+        self._merge_sql = merge_sql(table)
+        self._buffer: List[Row] = []
+        self.quarantine: Deque[Any] = deque(maxlen=QUARANTINE_ROWS)  # 최근 격리 행 (확인용)
+        self._pool: Any = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 지표
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self.quarantined = 0
+        self.last_error = ""
+        self.last_flush_s = 0.0
+        self.max_flush_s = 0.0
+        _INGESTS.add(self)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    # ------------------------------------------------------------------ 입력
+    async def add(self, rows: Iterable[Row]) -> None:
+        """(ts, tag_name, value, qc) 행 추가 - batch_rows 이상 모이면 이 호출에서 플러시"""
+        self._bind_loop()
+        rejected = []
+        for row in rows:
+            clean = normalize_row(row)
+            if clean is None:
+                rejected.append(row)
+            else:
+                self._buffer.append(clean)
+        if rejected:
+            self._quarantine(rejected, "인코딩 불가 (시각/태그/값)")
+        self._trim()
+        if len(self._buffer) >= self.batch_rows:
+            await self.flush()
+        elif self._buffer and self._timer is None:
+            self._timer = self._loop.call_later(self.flush_interval_s, self._on_timer)
+
+    async def flush(self) -> int:
+        """버퍼 전체 적재 (실패하면 버퍼에 유지) → 적재한 행 수"""
+        self._bind_loop()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            written = 0
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.batch_rows], self._buffer[self.batch_rows:]
+                started = time.perf_counter()
+                try:
+                    await self._write(batch)
+                    done, connected = len(batch), True
+                except _CONNECTION_ERRORS as e:
+                    self._requeue(batch, e)
+                    break
+                except Exception as e:  # noqa: BLE001 - 폴링 루프는 계속 동작해야 함
+                    logging.warning(f"influx_hist 배치 적재 오류 - 실패 행 격리: {e}")
+                    done, connected = await self._isolate(batch)
+                elapsed = time.perf_counter() - started
+                self.written += done
+                self.batches += 1
+                self.last_flush_s = elapsed
+                self.max_flush_s = max(self.max_flush_s, elapsed)
+                written += done
+                if not connected:
+                    break
+            return written
+
+    async def close(self) -> None:
+        """남은 버퍼 적재 후 풀 종료"""
+        if self._loop is not None:
+            await self.flush()
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._timer_task = self._loop.create_task(self.flush())
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Lock / 타이머 / 풀 연결은 이벤트 루프에 묶여 있음
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._timer = None
+            self._pool = None
+
+    def _requeue(self, rows: List[Row], error: BaseException) -> None:
+        self._buffer[:0] = rows
+        self._trim()
+        self.failures += 1
+        self.last_error = str(error)
+        logging.warning(f"influx_hist 적재 실패 ({len(self._buffer)}행 대기): {error}")
+
+    async def _isolate(self, rows: List[Row]) -> Tuple[int, bool]:
+        """연결 외 오류 배치를 반씩 나눠 다시 적재 - 끝까지 실패하는 행만 격리 → (적재 행 수, 연결 유지)"""
+        written = 0
+        parts = [rows[:len(rows) // 2], rows[len(rows) // 2:]]
+        while parts:
+            part = parts.pop(0)
+            if not part:
+                continue
+            try:
+                await self._write(part)
+            except _CONNECTION_ERRORS as e:
+                # 남은 행은 다음 플러시에 재시도
+                self._requeue([row for p in (part, *parts) for row in p], e)
+                return written, False
+            except Exception as e:  # noqa: BLE001
+                if len(part) == 1:
+                    self._quarantine(part, e)
+                else:
+                    parts[:0] = [part[:len(part) // 2], part[len(part) // 2:]]
+                continue
+            written += len(part)
+        return written, True
+
+    def _quarantine(self, rows: List[Any], reason: Any) -> None:
+        self.quarantine.extend(rows)
+        self.quarantined += len(rows)
+        self.last_error = str(reason)
+        logging.error(f"influx_hist 적재 불가 - {len(rows)}행 격리: {reason} (예: {rows[0]!r})")
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_buffer
+        if excess > 0:
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    # ------------------------------------------------------------------ 쓰기
+    def _connect(self) -> AsyncContextManager[Any]:
+        if self._connection is not None:
+            return self._connection()
+        if self._pool is None:
+            from psycopg_pool import AsyncConnectionPool
+            self._pool = AsyncConnectionPool(self.dsn, min_size=1, max_size=2, open=False)
+        return _pooled(self._pool)
+
+    async def _write(self, rows: List[Row]) -> None:
+        async with self._connect() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
+                    await cur.execute(STAGE_SQL)
+                    async with cur.copy(COPY_SQL) as copy:
+                        copy.set_types(COPY_TYPES)
+                        for row in rows:
+                            await copy.write_row(row)
+                    await cur.execute(self._merge_sql)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "ksys_ingest_buffered_rows": self.buffered,
+            "ksys_ingest_written_total": self.written,
+            "ksys_ingest_batches_total": self.batches,
+            "ksys_ingest_flush_failures_total": self.failures,
+            "ksys_ingest_dropped_total": self.dropped,
+            "ksys_ingest_quarantined_total": self.quarantined,
+            "ksys_ingest_flush_latency_seconds": self.last_flush_s,
+            "ksys_ingest_flush_latency_max_seconds": self.max_flush_s,
+        }
+
+
+@contextlib.asynccontextmanager
+async def _pooled(pool):
+    """풀을 처음 쓸 때 열고(이미 열려 있으면 그대로) 연결 1개 대여"""
+    await pool.open()
+    async with pool.connection() as conn:
+        yield conn
+
+
+def _ingest_metrics() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for ingest in list(_INGESTS):
+        for name, value in ingest.stats().items():
+            if "latency" in name:
+                totals[name] = max(totals.get(name, 0.0), value)
+            else:
+                totals[name] = totals.get(name, 0.0) + value
+    return totals
+
+
+register_metrics(_ingest_metrics)
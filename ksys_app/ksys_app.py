@@ -78,7 +78,12 @@ from .components.gauge import radial_gauge
 from .components.features_table import features_table
 from .components.indicators_table import indicators_table
 from .components.trend_enhanced import clean_area_chart, metric_card, time_range_pills, sensor_info_header
-from .states.dashboard import DashboardState as D
+from .states.dashboard import DashboardState as D, preset_snapshot_task
+from .alarm.correlation import tag_group_refresh_task
+from .alarm.event_sink import event_sink_lifespan
+from .states.session_memory import session_sweep_task
+from .water_quality.quality_monitor import wq_rollup_task
+from .api import api
 from .pages.ai_insights import ai_insights_page
 from .pages.communication import communication_page
 
@@ -448,6 +453,21 @@ def index() -> rx.Component:
         rx.script("console.log('페이지 로드됨, 데이터 로딩 시작')"),
         shell( 
             rx.vstack(
+                # 프리셋 스냅샷 기준 시각 (공유 스냅샷에서 로딩한 경우만 표시)
+                rx.cond(
+                    D.snapshot_at_s,
+                    rx.text(f"스냅샷 기준: {D.snapshot_at_s}", class_name="text-xs text-gray-400 px-4 pt-2"),
+                ),
+                # 유휴 세션: 대용량 데이터를 비운 상태 - 다시 보면 재로딩
+                rx.cond(
+                    D.evicted,
+                    rx.button(
+                        "장시간 미사용으로 데이터를 비웠습니다 - 다시 불러오기",
+                        on_click=D.load,
+                        variant="soft",
+                        class_name="mx-4 mt-2",
+                    ),
+                ),
                 
                 # 로딩/에러 상태 표시 (디버깅 정보 포함)
                 rx.cond(
@@ -535,7 +555,18 @@ def index() -> rx.Component:
     )
 
 
-app = rx.App(theme=rx.theme(appearance="light"), stylesheets=["/styles.css"])
+# /metrics (세션 상태 메모리 등) 는 Reflex 백엔드와 같은 포트로 제공
+app = rx.App(theme=rx.theme(appearance="light"), stylesheets=["/styles.css"], api_transformer=api)
+# 프리셋 구간 스냅샷 사전 계산 (CAGG 갱신 시점마다 재생성)
+app.register_lifespan_task(preset_snapshot_task)
+# 알람/이탈 이벤트 배치 기록기: 종료 시 큐에 남은 이벤트 기록
+app.register_lifespan_task(event_sink_lifespan)
+# 알람 묶음용 설비 그룹(influx_tag.meta) 주기 재조회 - 알람 경로는 캐시만 읽음
+app.register_lifespan_task(tag_group_refresh_task)
+# 유휴/예산 초과 세션 표시 (비움은 세션별 idle_watch/실시간 루프가 상태 잠금 안에서 수행)
+app.register_lifespan_task(session_sweep_task)
+# 수질 준수율 시간별 집계 갱신 (조회 경로는 읽기만)
+app.register_lifespan_task(wq_rollup_task)
 app.add_page(index, route="/")
 
 # Trend page (moved controls + series chart + measurement table)
@@ -733,11 +764,11 @@ def trend_page() -> rx.Component:
             width="100%",
             class_name="p-4"
         ),
-        # 트렌드 페이지 - 데이터 로딩 없음 (메인에서 관리)
         active_route="/trend",
     )
 
-app.add_page(trend_page, route="/trend")
+# 페이지별 로더: 선택 태그 시리즈 + 태그 목록만 조회
+app.add_page(trend_page, route="/trend", on_load=D.load)
 # Tech Indicator page
 def tech_page() -> rx.Component:
     return shell(
@@ -933,11 +964,11 @@ def tech_page() -> rx.Component:
             width="100%",
             class_name="p-4"
         ),
-        # 트렌드 페이지 - 데이터 로딩 없음 (메인에서 관리)
         active_route="/tech",
     )
 
-app.add_page(tech_page, route="/tech")
+# 페이지별 로더: 선택 태그 기술지표 + 태그 목록만 조회
+app.add_page(tech_page, route="/tech", on_load=D.load)
 app.add_page(ai_insights_page, route="/ai")  # AI Chat interface
 app.add_page(communication_page, route="/comm")
 
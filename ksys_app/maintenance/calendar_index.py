@@ -0,0 +1,154 @@
+"""
+정비 캘린더 인덱스
+
+정비 스케줄러가 작업마다 전체 정지 기간/날짜를 훑던 것을 구간 트리 두 개로 바꾼다.
+
+- 일별 잔여 작업 시간: 날짜 순 최대값 트리 → "d 이후 잔여 h 시간 이상인 첫 날" O(log 일수)
+- 정지 기간: 시작 시각 순 정렬 + min(기간 길이, 해당 날짜 잔여 시간) 최대값 트리
+  → "t 이후 시작, 데드라인 전, h 시간 들어가는 첫 정지 기간" O(log 기간 수)
+- 예약(book)하면 해당 날짜와 그 날짜의 정지 기간 값만 갱신 - 일 최대 작업 시간을 넘지 않음
+"""
+
+import bisect
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NEG = float("-inf")
+
+
+class FirstFitTree:
+    """최대값 구간 트리 - 구간 안에서 값이 x 이상인 첫 위치"""
+
+    def __init__(self, values: Sequence[float]):
+        self.n = len(values)
+        size = 1
+        while size < max(self.n, 1):
+            size *= 2
+        self.size = size
+        self.tree = [NEG] * (2 * size)
+        self.tree[size:size + self.n] = [float(v) for v in values]
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def __getitem__(self, i: int) -> float:
+        return self.tree[self.size + i]
+
+    def __setitem__(self, i: int, value: float) -> None:
+        i += self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def first_at_least(self, x: float, lo: int = 0, hi: Optional[int] = None) -> Optional[int]:
+        """lo <= i < hi 중 값 >= x 인 가장 작은 i (없으면 None)"""
+        hi = self.n if hi is None else min(hi, self.n)
+        if lo >= hi:
+            return None
+        return self._find(1, 0, self.size, lo, hi, x)
+
+    def _find(self, node: int, left: int, right: int, lo: int, hi: int, x: float) -> Optional[int]:
+        if right <= lo or left >= hi or self.tree[node] < x:
+            return None
+        if right - left == 1:
+            return left
+        mid = (left + right) // 2
+        found = self._find(2 * node, left, mid, lo, hi, x)
+        if found is None:
+            found = self._find(2 * node + 1, mid, right, lo, hi, x)
+        return found
+
+
+class MaintenanceCalendar:
+    """계획 기간의 일별 잔여 작업 시간 + 정지 기간 인덱스"""
+
+    def __init__(self, start_date: datetime, end_date: datetime,
+                 windows: Sequence[Tuple[datetime, datetime]], max_daily_hours: float):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.max_daily_hours = float(max_daily_hours)
+        self.first_day = start_date.date().toordinal()
+        n_days = max(end_date.date().toordinal() - self.first_day + 1, 0)
+        self.days = FirstFitTree([self.max_daily_hours] * n_days)
+
+        self.windows = sorted(windows)
+        self.window_starts = [w[0] for w in self.windows]
+        self.window_hours = [(e - s).total_seconds() / 3600 for s, e in self.windows]
+        self._windows_of_day: Dict[int, List[int]] = {}
+        for k, (s, _) in enumerate(self.windows):
+            self._windows_of_day.setdefault(self._day_index(s), []).append(k)
+        self.slots = FirstFitTree([self._window_value(k) for k in range(len(self.windows))])
+
+    # ------------------------------------------------------------------ 조회
+    def _day_index(self, when) -> int:
+        day = when.date() if isinstance(when, datetime) else when
+        return day.toordinal() - self.first_day
+
+    def _window_value(self, k: int) -> float:
+        i = self._day_index(self.window_starts[k])
+        if not 0 <= i < self.days.n:
+            return NEG
+        return min(self.window_hours[k], self.days[i])
+
+    def remaining(self, day: date) -> float:
+        i = self._day_index(day)
+        return self.days[i] if 0 <= i < self.days.n else 0.0
+
+    def earliest_day(self, release: datetime, hours: float) -> Optional[date]:
+        """release 날짜 이후 잔여 시간이 hours 이상인 첫 날"""
+        i = self.days.first_at_least(hours, max(self._day_index(release), 0))
+        return None if i is None else date.fromordinal(self.first_day + i)
+
+    def earliest_window(self, release: datetime, hours: float,
+                        deadline: Optional[datetime] = None) -> Optional[datetime]:
+        """release 이후 시작하고 deadline 전에 시작하는, hours 가 들어가는 첫 정지 기간 시작 시각"""
+        lo = bisect.bisect_left(self.window_starts, release)
+        hi = bisect.bisect_right(self.window_starts, deadline) if deadline is not None else None
+        k = self.slots.first_at_least(hours, lo, hi)
+        return None if k is None else self.window_starts[k]
+
+    # ------------------------------------------------------------------ 예약
+    def book(self, day: date, hours: float) -> None:
+        i = self._day_index(day)
+        if not 0 <= i < self.days.n:
+            raise ValueError(f"{day} is outside the planning horizon")
+        left = self.days[i] - hours
+        if left < -1e-9:
+            raise ValueError(f"{day}: {hours}h exceeds remaining {self.days[i]}h")
+        self.days[i] = max(left, 0.0)
+        for k in self._windows_of_day.get(i, ()):
+            self.slots[k] = self._window_value(k)
+
+    def booked(self) -> Dict[date, float]:
+        """날짜별 예약 시간 (예약 있는 날만)"""
+        out = {}
+        for i in range(self.days.n):
+            used = self.max_daily_hours - self.days[i]
+            if used > 1e-9:
+                out[date.fromordinal(self.first_day + i)] = used
+        return out
+
+
+def shutdown_windows(start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    계획 정지 기간 (기존 날짜 순회와 같은 결과, 날짜 계산으로 바로 생성)
+
+    - 매주 토요일 06:00 ~ 18:00
+    - 매월 첫째 일요일 00:00 ~ 23:59
+    """
+    windows = []
+    # start_date 의 시각을 유지한 날짜 목록 중 end_date 전인 날
+    n_days = (end_date - start_date) // timedelta(days=1) + (1 if (end_date - start_date) % timedelta(days=1) else 0)
+
+    first_sat = (5 - start_date.weekday()) % 7
+    for k in range(first_sat, n_days, 7):
+        day = start_date + timedelta(days=k)
+        windows.append((day.replace(hour=6, minute=0), day.replace(hour=18, minute=0)))
+
+    first_sun = (6 - start_date.weekday()) % 7
+    for k in range(first_sun, n_days, 7):
+        day = start_date + timedelta(days=k)
+        if day.day <= 7:
+            windows.append((day.replace(hour=0, minute=0), day.replace(hour=23, minute=59)))
+    return windows
@@ -1,14 +1,88 @@
 """
 RO 멤브레인 수명 예측 시스템
 TASK_013: MAINT_PREDICT_RO_LIFETIME
+
+- 입력 수집: 운전 이력 / CIP 횟수 / TMP 추세 / 성능 4개 구간을 FeatureStore 갱신 한 번으로 일괄 조회
+- 몬테카를로: TMP 증가율(회귀 표준오차), CIP 빈도(감마 사후분포), 성능(염제거율 표준오차)
+  불확실성을 NumPy 로 막 × 표본 배열에 한 번에 샘플링 → 수명/잔여 수명 P10/P50/P90
 """
 
-from typing import Dict, List, Optional
+import asyncio
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
-import psycopg
 import numpy as np
 
+from ..diagnostics.feature_store import DAY, FeatureSpec, FeatureStore, get_feature_store
+
+# 예측에 필요한 구간 (influx_agg_1h)
+FEATURES = (
+    FeatureSpec("ro.tmp_3y", "1h", 3 * 365 * DAY, tags=("TMP",)),
+    FeatureSpec("ro.cip_3y", "1h", 3 * 365 * DAY, tags=("CIP_EVENT",)),
+    FeatureSpec("ro.tmp_6mo", "1h", 183 * DAY, tags=("TMP",)),
+    FeatureSpec("ro.cond_24h", "1h", DAY, tags=("COND_IN", "COND_OUT")),
+)
+
+
+DEFAULT_SAMPLES = int(os.getenv("KSYS_LIFETIME_SAMPLES", "100000"))
+MAX_BLOCK_ELEMENTS = 4_000_000  # 한 번에 만드는 표본 배열 크기 (float64 32MB)
+
+# 데이터가 없을 때 쓰는 기본값과 불확실성
+DEFAULT_TMP_RATE = (0.05, 0.05)      # bar/month, 표준편차
+DEFAULT_PERFORMANCE = (0.8, 0.1)
+DEFAULT_CIP_COUNT = 10
+MIN_LIFETIME_DAYS, MAX_LIFETIME_DAYS = 180, 1825
+
+
+def _local_days(epoch: np.ndarray) -> np.ndarray:
+    """epoch 초 → 로컬 날짜 (DATE(bucket))"""
+    return np.array([datetime.fromtimestamp(t).toordinal() for t in epoch])
+
+
+def _local_months(epoch: np.ndarray) -> np.ndarray:
+    """epoch 초 → 로컬 연월 (DATE_TRUNC('month', bucket))"""
+    return np.array([(d.year * 12 + d.month - 1) for d in map(datetime.fromtimestamp, epoch)])
+
+
+@dataclass
+class LifetimeInputs:
+    """수명 예측 입력 (점 추정 + 불확실성)"""
+    membrane_id: str
+    operation_data: Dict
+    cip_count: int
+    tmp_rate: float              # bar/month
+    tmp_rate_std: float
+    performance: float           # 0.0 ~ 1.0
+    performance_std: float
+
+    @property
+    def operating_hours(self) -> float:
+        # 일평균 20시간 운전 가정
+        return self.operation_data.get('operating_days', 0) * 20
+
+    @property
+    def days_used(self) -> int:
+        installation_date = self.operation_data.get('installation_date', datetime.now() - timedelta(days=365))
+        return (datetime.now() - installation_date).days
+
+
+@dataclass
+class LifetimeInterval:
+    """몬테카를로 수명 분포 요약 (일)"""
+    lifetime_p10: float
+    lifetime_p50: float
+    lifetime_p90: float
+    remaining_p10: float
+    remaining_p50: float
+    remaining_p90: float
+    n_samples: int
+
+    @property
+    def relative_width(self) -> float:
+        """(P90 - P10) / P50"""
+        return (self.lifetime_p90 - self.lifetime_p10) / max(self.lifetime_p50, 1.0)
+
 
 @dataclass
 class ROLifetimePrediction:
@@ -24,13 +98,66 @@ class ROLifetimePrediction:
     replacement_date: datetime
     confidence: float
     factors: Dict[str, float]    # 영향 요인별 점수
+    interval: Optional[LifetimeInterval] = None  # 몬테카를로 P10/P50/P90
+
+
+def simulate_lifetimes(inputs: Sequence[LifetimeInputs], factors: Dict[str, float],
+                       n_samples: int = DEFAULT_SAMPLES, seed: Optional[int] = None) -> Dict[str, LifetimeInterval]:
+    """
+    막 전체 몬테카를로 수명 분포 (막 × 표본 배열 한 번에 계산)
+
+    _calculate_lifetime 과 같은 가산 모델에 입력 표본을 넣는다.
+    - TMP 증가율 ~ N(추정값, 회귀 표준오차)
+    - CIP 횟수 ~ Gamma(관측 횟수 + 0.5, 1)  (관측 기간 CIP 빈도의 제프리스 사후분포 × 기간)
+    - 성능 ~ N(추정값, 표준오차), [0, 1] 로 자름
 
+    Args:
+        factors: ROLifetimePredictor.lifetime_factors
+        seed: 고정하면 같은 결과 (테스트용)
+    """
+    if not inputs:
+        return {}
+    rng = np.random.default_rng(seed)
+    n = int(n_samples)
+    block = max(1, MAX_BLOCK_ELEMENTS // n)  # 막 묶음당 배열 크기 제한
+    life_q = np.hstack([_lifetime_quantiles(rng, inputs[k:k + block], factors, n)
+                        for k in range(0, len(inputs), block)])
+    days_used = np.array([i.days_used for i in inputs], dtype=np.float64)
+    remaining_q = np.maximum(life_q - days_used, 0.0)
+    return {
+        i.membrane_id: LifetimeInterval(*life_q[:, k].tolist(), *remaining_q[:, k].tolist(), n)
+        for k, i in enumerate(inputs)
+    }
+
+
+def _lifetime_quantiles(rng: np.random.Generator, inputs: Sequence[LifetimeInputs],
+                        factors: Dict[str, float], n: int) -> np.ndarray:
+    """막 묶음 수명 표본 → (3, 막 수) P10/P50/P90"""
+    m = len(inputs)
+
+    def col(values) -> np.ndarray:
+        return np.asarray(values, dtype=np.float64)[:, None]
+
+    tmp_rate = col([i.tmp_rate for i in inputs]) + col([i.tmp_rate_std for i in inputs]) * rng.standard_normal((m, n))
+    cip = rng.standard_gamma(col([i.cip_count + 0.5 for i in inputs]), size=(m, n))
+    perf = col([i.performance for i in inputs]) + col([i.performance_std for i in inputs]) * rng.standard_normal((m, n))
+    np.clip(perf, 0.0, 1.0, out=perf)
+    avg_tmp = col([i.operation_data.get('avg_tmp', 1.5) for i in inputs])
+
+    lifetime = factors['base_lifetime_days'] + factors['cip_impact'] * cip
+    lifetime += tmp_rate * (12 * factors['tmp_impact'] * 10)
+    lifetime -= np.maximum(0.9 - perf, 0.0) * 1000
+    lifetime -= np.maximum(avg_tmp - 2.0, 0.0) * 100
+    np.clip(lifetime, MIN_LIFETIME_DAYS, MAX_LIFETIME_DAYS, out=lifetime)
+    return np.percentile(lifetime, (10, 50, 90), axis=1)
 
 class ROLifetimePredictor:
     """RO 멤브레인 수명 예측"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self, db_dsn: str, feature_store: Optional[FeatureStore] = None):
         self.db_dsn = db_dsn
+        self.feature_store = feature_store or get_feature_store(db_dsn)
+        self.feature_store.declare(*FEATURES)
         
         # 수명 영향 계수
         self.lifetime_factors = {
@@ -41,185 +168,169 @@ class ROLifetimePredictor:
             'temp_impact': -3            # 고온 운전시 -3일/°C
         }
     
-    async def predict_lifetime(self, membrane_id: str) -> Optional[ROLifetimePrediction]:
+    async def predict_lifetime(self, membrane_id: str, n_samples: int = DEFAULT_SAMPLES,
+                               seed: Optional[int] = None) -> Optional[ROLifetimePrediction]:
         """RO 멤브레인 수명 예측"""
+        predictions = await self.predict_fleet([membrane_id], n_samples, seed)
+        return predictions.get(membrane_id)
+    
+    async def predict_fleet(self, membrane_ids: Sequence[str], n_samples: int = DEFAULT_SAMPLES,
+                            seed: Optional[int] = None, conn=None) -> Dict[str, ROLifetimePrediction]:
+        """
+        여러 막 수명 예측 (입력 일괄 조회 + 몬테카를로 1회)
+        
+        Returns:
+            {막 ID: 예측} - 데이터 수집에 실패한 막은 빠짐
+        """
         try:
-            # 운전 데이터 수집
-            operation_data = await self._collect_operation_data(membrane_id)
-            
-            if not operation_data:
-                return None
-            
-            # 운전 시간 계산
-            operating_hours = self._calculate_operating_hours(operation_data)
-            
-            # CIP 횟수 계산
-            cip_count = await self._count_cip_cycles(membrane_id)
-            
-            # TMP 증가율 분석
-            tmp_rate = await self._analyze_tmp_trend(membrane_id)
-            
-            # 현재 성능 평가
-            current_performance = await self._evaluate_performance(membrane_id)
-            
-            # 수명 계산
-            lifetime_days, factors = self._calculate_lifetime(
-                operating_hours,
-                cip_count,
-                tmp_rate,
-                current_performance,
-                operation_data
-            )
-            
-            # 잔여 수명
-            installation_date = operation_data.get('installation_date', 
-                                                  datetime.now() - timedelta(days=365))
-            days_used = (datetime.now() - installation_date).days
-            remaining_days = max(lifetime_days - days_used, 0)
-            
-            replacement_date = datetime.now() + timedelta(days=remaining_days)
-            
-            return ROLifetimePrediction(
-                membrane_id=membrane_id,
-                installation_date=installation_date,
-                operating_hours=operating_hours,
-                cip_count=cip_count,
-                current_performance=current_performance,
-                tmp_increase_rate=tmp_rate,
-                estimated_lifetime_days=lifetime_days,
-                remaining_days=remaining_days,
-                replacement_date=replacement_date,
-                confidence=self._calculate_confidence(operation_data),
-                factors=factors
-            )
+            inputs = await self.collect_inputs(membrane_ids, conn)
+            intervals = simulate_lifetimes(inputs, self.lifetime_factors, n_samples, seed) if n_samples else {}
+            return {i.membrane_id: self._prediction(i, intervals.get(i.membrane_id)) for i in inputs}
             
         except Exception as e:
             print(f"[ERROR] Lifetime prediction failed: {e}")
+            return {}
+    
+    async def collect_inputs(self, membrane_ids: Sequence[str], conn=None) -> List[LifetimeInputs]:
+        """4개 입력 구간을 한 번에 갱신한 뒤 막별 입력 계산"""
+        await self.feature_store.refresh(conn)
+        rows = await asyncio.gather(*(self._collect_inputs(m) for m in membrane_ids))
+        return [r for r in rows if r is not None]
+    
+    async def _collect_inputs(self, membrane_id: str) -> Optional[LifetimeInputs]:
+        operation_data, cip_count, (tmp_rate, tmp_std), (performance, perf_std) = await asyncio.gather(
+            self._collect_operation_data(membrane_id),
+            self._count_cip_cycles(membrane_id),
+            self._analyze_tmp_trend(membrane_id),
+            self._evaluate_performance(membrane_id),
+        )
+        if not operation_data:
             return None
+        return LifetimeInputs(membrane_id, operation_data, cip_count, tmp_rate, tmp_std, performance, perf_std)
+    
+    def _prediction(self, inputs: LifetimeInputs,
+                    interval: Optional[LifetimeInterval]) -> ROLifetimePrediction:
+        # 점 추정 수명
+        lifetime_days, factors = self._calculate_lifetime(
+            inputs.operating_hours,
+            inputs.cip_count,
+            inputs.tmp_rate,
+            inputs.performance,
+            inputs.operation_data
+        )
+        
+        # 잔여 수명
+        installation_date = inputs.operation_data.get('installation_date',
+                                                      datetime.now() - timedelta(days=365))
+        remaining_days = max(lifetime_days - inputs.days_used, 0)
+        replacement_date = datetime.now() + timedelta(days=remaining_days)
+        
+        return ROLifetimePrediction(
+            membrane_id=inputs.membrane_id,
+            installation_date=installation_date,
+            operating_hours=inputs.operating_hours,
+            cip_count=inputs.cip_count,
+            current_performance=inputs.performance,
+            tmp_increase_rate=inputs.tmp_rate,
+            estimated_lifetime_days=lifetime_days,
+            remaining_days=remaining_days,
+            replacement_date=replacement_date,
+            confidence=self._calculate_confidence(inputs.operation_data, interval),
+            factors=factors,
+            interval=interval
+        )
     
     async def _collect_operation_data(self, membrane_id: str) -> Dict:
         """운전 데이터 수집"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 운전 이력 조회
-                    await cur.execute("""
-                        SELECT 
-                            MIN(bucket) as start_date,
-                            MAX(bucket) as end_date,
-                            COUNT(DISTINCT DATE(bucket)) as operating_days,
-                            AVG(avg_val) as avg_tmp,
-                            MAX(max_val) as max_tmp
-                        FROM influx_agg_1h
-                        WHERE tag_name = 'TMP'
-                        AND bucket >= NOW() - INTERVAL '3 years'
-                    """)
-                    
-                    result = await cur.fetchone()
-                    
-                    if result:
-                        return {
-                            'installation_date': result[0] if result[0] else datetime.now() - timedelta(days=365),
-                            'last_date': result[1],
-                            'operating_days': result[2] if result[2] else 0,
-                            'avg_tmp': float(result[3]) if result[3] else 1.5,
-                            'max_tmp': float(result[4]) if result[4] else 2.5
-                        }
-                    
-                    return {}
+            # 운전 이력 (최근 3년 TMP)
+            view = await self.feature_store.get("ro.tmp_3y")
+            times, values = view.present("TMP")
+            
+            if not len(times):
+                return {
+                    'installation_date': datetime.now() - timedelta(days=365),
+                    'last_date': None,
+                    'operating_days': 0,
+                    'avg_tmp': 1.5,
+                    'max_tmp': 2.5
+                }
+            
+            max_values = view.series("TMP", "max")
+            return {
+                'installation_date': datetime.fromtimestamp(times[0]),
+                'last_date': datetime.fromtimestamp(times[-1]),
+                'operating_days': len(np.unique(_local_days(times))),
+                'avg_tmp': float(values.mean()) or 1.5,
+                'max_tmp': float(np.nanmax(max_values)) if not np.isnan(max_values).all() else 2.5
+            }
                     
         except Exception as e:
             print(f"[ERROR] Data collection failed: {e}")
             return {}
     
-    def _calculate_operating_hours(self, operation_data: Dict) -> float:
-        """운전 시간 계산"""
-        operating_days = operation_data.get('operating_days', 0)
-        # 일평균 20시간 운전 가정
-        return operating_days * 20
-    
     async def _count_cip_cycles(self, membrane_id: str) -> int:
         """CIP 횟수 카운트"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # CIP 이벤트 카운트 (간단한 로직)
-                    await cur.execute("""
-                        SELECT COUNT(*)
-                        FROM influx_agg_1h
-                        WHERE tag_name = 'CIP_EVENT'
-                        AND avg_val > 0
-                    """)
-                    
-                    result = await cur.fetchone()
-                    return result[0] if result and result[0] else 10  # 기본값 10회
+            # CIP 이벤트 카운트 (간단한 로직)
+            view = await self.feature_store.get("ro.cip_3y")
+            events = view.series("CIP_EVENT")
+            count = int(np.count_nonzero(events > 0))  # NaN 비교는 False
+            return count if count else DEFAULT_CIP_COUNT  # 기본값 10회
                     
         except Exception as e:
             # 예상값으로 대체
-            return 10
+            return DEFAULT_CIP_COUNT
     
-    async def _analyze_tmp_trend(self, membrane_id: str) -> float:
-        """TMP 증가율 분석 (bar/month)"""
+    async def _analyze_tmp_trend(self, membrane_id: str) -> Tuple[float, float]:
+        """TMP 증가율 분석 (bar/month, 기울기 표준오차)"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 월별 TMP 평균
-                    await cur.execute("""
-                        SELECT 
-                            DATE_TRUNC('month', bucket) as month,
-                            AVG(avg_val) as monthly_avg
-                        FROM influx_agg_1h
-                        WHERE tag_name = 'TMP'
-                        AND bucket >= NOW() - INTERVAL '6 months'
-                        GROUP BY month
-                        ORDER BY month
-                    """)
-                    
-                    rows = await cur.fetchall()
-                    
-                    if len(rows) >= 3:
-                        values = [float(row[1]) for row in rows]
-                        # 선형 회귀
-                        x = np.arange(len(values))
-                        coeffs = np.polyfit(x, values, 1)
-                        return coeffs[0]  # bar/month
-                    
-                    return 0.05  # 기본값
+            # 월별 TMP 평균
+            view = await self.feature_store.get("ro.tmp_6mo")
+            times, values = view.present("TMP")
+            
+            if len(times):
+                months, month_index = np.unique(_local_months(times), return_inverse=True)
+                monthly_avg = np.bincount(month_index, values) / np.bincount(month_index)
+                
+                if len(months) >= 3:
+                    # 선형 회귀
+                    x = np.arange(len(monthly_avg))
+                    coeffs = np.polyfit(x, monthly_avg, 1)
+                    residual = monthly_avg - np.polyval(coeffs, x)
+                    std = np.sqrt(residual @ residual / (len(x) - 2) / np.sum((x - x.mean()) ** 2))
+                    return float(coeffs[0]), float(std)  # bar/month
+            
+            return DEFAULT_TMP_RATE  # 기본값
                     
         except Exception as e:
-            return 0.05
+            return DEFAULT_TMP_RATE
     
-    async def _evaluate_performance(self, membrane_id: str) -> float:
-        """현재 성능 평가 (0.0 ~ 1.0)"""
+    async def _evaluate_performance(self, membrane_id: str) -> Tuple[float, float]:
+        """현재 성능 평가 (0.0 ~ 1.0, 표준오차)"""
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 염제거율 조회
-                    await cur.execute("""
-                        SELECT 
-                            AVG(CASE WHEN tag_name = 'COND_IN' THEN avg_val END) as cond_in,
-                            AVG(CASE WHEN tag_name = 'COND_OUT' THEN avg_val END) as cond_out
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('COND_IN', 'COND_OUT')
-                        AND bucket >= NOW() - INTERVAL '24 hours'
-                    """)
-                    
-                    result = await cur.fetchone()
-                    
-                    if result and result[0] and result[1]:
-                        cond_in = float(result[0])
-                        cond_out = float(result[1])
-                        
-                        if cond_in > 0:
-                            rejection = 1 - (cond_out / cond_in)
-                            # 95% 이상이면 1.0, 90% 이하면 0.0
-                            performance = min(max((rejection - 0.90) / 0.05, 0), 1)
-                            return performance
+            # 염제거율 (최근 24시간)
+            view = await self.feature_store.get("ro.cond_24h")
+            cond_in = view.stats('COND_IN')
+            cond_out = view.stats('COND_OUT')
+            
+            if cond_in and cond_out and cond_in['avg'] and cond_out['avg']:
+                if cond_in['avg'] > 0:
+                    rejection = 1 - (cond_out['avg'] / cond_in['avg'])
+                    # 95% 이상이면 1.0, 90% 이하면 0.0
+                    performance = min(max((rejection - 0.90) / 0.05, 0), 1)
                     
-                    return 0.8  # 기본값
+                    # 시간별 염제거율 표준오차 → 성능 단위
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        hourly = 1 - view.series('COND_OUT') / view.series('COND_IN')
+                    hourly = hourly[np.isfinite(hourly)]
+                    std = hourly.std(ddof=1) / np.sqrt(len(hourly)) / 0.05 if len(hourly) > 1 else DEFAULT_PERFORMANCE[1]
+                    return performance, float(std)
+            
+            return DEFAULT_PERFORMANCE  # 기본값
                     
         except Exception as e:
-            return 0.8
+            return DEFAULT_PERFORMANCE
     
     def _calculate_lifetime(self, 
                            operating_hours: float,
@@ -272,12 +383,13 @@ class ROLifetimePredictor:
         ])
         
         # 최소 180일, 최대 1825일(5년)
-        total_lifetime = min(max(total_lifetime, 180), 1825)
+        total_lifetime = min(max(total_lifetime, MIN_LIFETIME_DAYS), MAX_LIFETIME_DAYS)
         
         return int(total_lifetime), factors
     
-    def _calculate_confidence(self, operation_data: Dict) -> float:
-        """예측 신뢰도 계산"""
+    def _calculate_confidence(self, operation_data: Dict,
+                              interval: Optional[LifetimeInterval] = None) -> float:
+        """예측 신뢰도 계산 (데이터 기간 + 몬테카를로 구간 폭)"""
         confidence = 1.0
         
         # 데이터 기간이 짧으면 신뢰도 감소
@@ -289,4 +401,8 @@ class ROLifetimePredictor:
         elif operating_days < 180:
             confidence -= 0.1
         
+        # P10~P90 폭이 P50 의 절반이면 0.75
+        if interval is not None:
+            confidence = min(confidence, 1.0 - interval.relative_width / 2)
+        
         return max(confidence, 0.3)
\ No newline at end of file
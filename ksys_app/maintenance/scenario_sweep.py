@@ -0,0 +1,292 @@
+"""
+정비 계획 what-if 시나리오 일괄 평가
+
+가중치(cost/downtime/resource/risk), 정비 인원, 정지 기간 캘린더를 바꾼 여러 설정으로
+optimize_schedule 을 프로세스 풀에서 병렬 실행하고 비용 / 정지 시간 / 위험도 파레토 전선을 돌려준다.
+
+- 작업 목록은 NumPy 배열 + 문자열 목록(TaskArrays)으로 묶어 워커 초기화 때 한 번만 전달
+  (시나리오마다 다시 피클하지 않음 - 시나리오에는 설정만 실림)
+- 워커는 시나리오마다 배열에서 작업을 새로 만들어 최적화 (optimize_schedule 이 작업을 수정하므로)
+- 진행 콜백 (완료 수, 전체 수, 결과), cancel() 또는 threading.Event 로 남은 시나리오 취소
+- 가중치는 배치 결과를 바꾸지 않고 optimization_score 만 바꾼다 (배치는 인원/캘린더가 결정)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .schedule_optimizer import (
+    MaintenanceScheduleOptimizer, MaintenanceTask, MaintenanceType, OptimizedSchedule,
+)
+
+DEFAULT_WORKERS = int(os.getenv("KSYS_SWEEP_WORKERS", "0")) or None  # None: CPU 수
+CREW_HOURS = 8.0  # 정비 인원 1명(조)당 일 작업 시간 (기본 2명 = 16시간)
+
+EPOCH = datetime(1970, 1, 1)
+TYPES = list(MaintenanceType)
+
+Window = Tuple[datetime, datetime]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """what-if 설정 1개 (None 이면 최적화기 기본값)"""
+    name: str
+    weights: Optional[Dict[str, float]] = None
+    crew_size: Optional[int] = None                    # 일 최대 작업 시간 = crew_size × CREW_HOURS
+    shutdown_windows: Optional[Tuple[Window, ...]] = None
+
+    def constraints(self) -> Dict:
+        constraints = {}
+        if self.crew_size is not None:
+            constraints['max_daily_hours'] = self.crew_size * CREW_HOURS
+        if self.shutdown_windows is not None:
+            constraints['shutdown_windows'] = list(self.shutdown_windows)
+        return constraints
+
+
+@dataclass
+class ScenarioResult:
+    """시나리오 평가 결과 (목표값은 모두 낮을수록 좋음)"""
+    index: int
+    name: str
+    cost: float               # 배치된 작업 비용 합
+    downtime_hours: float     # 배치된 정비 시간 합
+    risk: float               # 우선순위 × 데드라인 초과 일수 (미배치는 계획 기간 전체)
+    optimization_score: float
+    scheduled: int
+    unscheduled: int
+    elapsed_s: float
+
+    @property
+    def objectives(self) -> Tuple[float, float, float]:
+        return self.cost, self.downtime_hours, self.risk
+
+
+@dataclass
+class SweepResult:
+    """일괄 평가 결과"""
+    results: List[ScenarioResult]             # 완료된 시나리오 (index 순)
+    frontier: List[ScenarioResult]            # 파레토 전선 (비용 순)
+    cancelled: bool = False
+    elapsed_s: float = 0.0
+    failed: Dict[int, str] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------- 작업 배열
+def _us(dt: datetime) -> int:
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+def _dt(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(us))
+
+
+@dataclass
+class TaskArrays:
+    """작업 목록의 압축 표현 (워커에 한 번 전달)"""
+    task_id: List[str]
+    task_name: List[str]
+    equipment_id: List[str]
+    required_parts: List[Tuple[str, ...]]
+    type_code: np.ndarray        # int8 - TYPES 인덱스
+    priority: np.ndarray         # int8
+    duration: np.ndarray         # float64 시간
+    lead_time: np.ndarray        # int32 일
+    cost: np.ndarray             # float64
+    scheduled_us: np.ndarray     # int64 (1970-01-01 기준 μs, 시간대 없음)
+    deadline_us: np.ndarray
+
+    @classmethod
+    def pack(cls, tasks: Sequence[MaintenanceTask]) -> "TaskArrays":
+        return cls(
+            task_id=[t.task_id for t in tasks],
+            task_name=[t.task_name for t in tasks],
+            equipment_id=[t.equipment_id for t in tasks],
+            required_parts=[tuple(t.required_parts) for t in tasks],
+            type_code=np.array([TYPES.index(t.maintenance_type) for t in tasks], dtype=np.int8),
+            priority=np.array([t.priority for t in tasks], dtype=np.int8),
+            duration=np.array([t.estimated_duration_hours for t in tasks], dtype=np.float64),
+            lead_time=np.array([t.lead_time_days for t in tasks], dtype=np.int32),
+            cost=np.array([t.cost_estimate for t in tasks], dtype=np.float64),
+            scheduled_us=np.array([_us(t.scheduled_date) for t in tasks], dtype=np.int64),
+            deadline_us=np.array([_us(t.deadline) for t in tasks], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.task_id)
+
+    def unpack(self) -> List[MaintenanceTask]:
+        """새 작업 객체 목록 (시나리오마다 독립)"""
+        columns = zip(self.task_id, self.task_name, self.equipment_id, self.type_code.tolist(),
+                      self.priority.tolist(), self.duration.tolist(), self.required_parts,
+                      self.lead_time.tolist(), self.cost.tolist(), self.scheduled_us.tolist(),
+                      self.deadline_us.tolist())
+        return [
+            MaintenanceTask(tid, name, eq, TYPES[code], prio, dur, list(parts), lead, cost, _dt(sch), _dt(dl))
+            for tid, name, eq, code, prio, dur, parts, lead, cost, sch, dl in columns
+        ]
+
+
+# ---------------------------------------------------------------------- 평가
+def evaluate(tasks: TaskArrays, scenario: Scenario, start_date: datetime, end_date: datetime,
+             part_inventory: Optional[Dict] = None, index: int = 0) -> Tuple[ScenarioResult, OptimizedSchedule]:
+    """시나리오 1개 최적화 + 목표값"""
+    started = time.perf_counter()
+    optimizer = MaintenanceScheduleOptimizer()
+    optimizer.part_inventory = dict(part_inventory or {})
+    if scenario.weights:
+        optimizer.weights = {**optimizer.weights, **scenario.weights}
+    schedule = optimizer.optimize_schedule(tasks.unpack(), start_date, end_date, scenario.constraints())
+
+    horizon_days = max((end_date - start_date).days, 1)
+    risk = sum(t.priority * max((t.scheduled_date - t.deadline) / timedelta(days=1), 0.0) for t in schedule.tasks)
+    risk += sum(t.priority * horizon_days for t in schedule.unscheduled)
+    result = ScenarioResult(
+        index=index,
+        name=scenario.name,
+        cost=schedule.total_cost,
+        downtime_hours=schedule.total_duration_hours,
+        risk=risk,
+        optimization_score=schedule.optimization_score,
+        scheduled=len(schedule.tasks),
+        unscheduled=len(schedule.unscheduled),
+        elapsed_s=time.perf_counter() - started,
+    )
+    return result, schedule
+
+
+def pareto_front(points: np.ndarray) -> np.ndarray:
+    """
+    비지배 점 인덱스 (모든 목표 최소화)
+
+    Args:
+        points: (n, 목표 수)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if not len(points):
+        return np.array([], dtype=np.int64)
+    le = (points[:, None, :] <= points[None, :, :]).all(axis=2)   # i 가 j 이하
+    lt = (points[:, None, :] < points[None, :, :]).any(axis=2)    # i 가 j 보다 하나라도 작음
+    dominated = (le & lt).any(axis=0)                              # j 를 지배하는 i 존재
+    return np.flatnonzero(~dominated)
+
+
+# ---------------------------------------------------------------------- 워커
+_WORKER: Dict = {}
+
+
+def _init_worker(tasks: TaskArrays, start_date: datetime, end_date: datetime, part_inventory: Dict) -> None:
+    _WORKER.update(tasks=tasks, start=start_date, end=end_date, parts=part_inventory)
+
+
+def _run_in_worker(index: int, scenario: Scenario) -> ScenarioResult:
+    result, _ = evaluate(_WORKER['tasks'], scenario, _WORKER['start'], _WORKER['end'], _WORKER['parts'], index)
+    return result
+
+
+class ScenarioSweep:
+    """여러 what-if 시나리오 병렬 평가"""
+
+    def __init__(self, tasks: Sequence[MaintenanceTask], start_date: datetime, end_date: datetime,
+                 part_inventory: Optional[Dict] = None, max_workers: Optional[int] = DEFAULT_WORKERS):
+        """
+        Args:
+            tasks: 정비 작업 (원본은 수정하지 않음)
+            max_workers: 프로세스 수 (0: 현재 프로세스에서 순차 실행, None: CPU 수)
+        """
+        self.tasks = TaskArrays.pack(tasks)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.part_inventory = dict(part_inventory or {})
+        self.max_workers = max_workers
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """실행 중인 run() 의 남은 시나리오 취소 (실행 중인 시나리오는 끝까지)"""
+        self._cancel.set()
+
+    def schedule(self, scenario: Scenario) -> OptimizedSchedule:
+        """시나리오 1개의 전체 스케줄 (전선에서 고른 안 확인용)"""
+        return evaluate(self.tasks, scenario, self.start_date, self.end_date, self.part_inventory)[1]
+
+    def run(self, scenarios: Sequence[Scenario],
+            progress: Optional[Callable[[int, int, ScenarioResult], None]] = None,
+            cancel: Optional[threading.Event] = None) -> SweepResult:
+        """
+        시나리오 일괄 평가
+
+        Args:
+            progress: 시나리오 하나가 끝날 때마다 (완료 수, 전체 수, 결과)
+            cancel: 설정되면 남은 시나리오 취소 (cancel() 과 같음)
+        """
+        started = time.perf_counter()
+        self._cancel.clear()
+
+        def cancelled() -> bool:
+            return self._cancel.is_set() or (cancel is not None and cancel.is_set())
+
+        results: List[ScenarioResult] = []
+        failed: Dict[int, str] = {}
+        total = len(scenarios)
+
+        def done(result: ScenarioResult) -> None:
+            results.append(result)
+            if progress is not None:
+                progress(len(results), total, result)
+
+        if self.max_workers == 0:
+            for index, scenario in enumerate(scenarios):
+                if cancelled():
+                    break
+                try:
+                    done(evaluate(self.tasks, scenario, self.start_date, self.end_date,
+                                  self.part_inventory, index)[0])
+                except Exception as e:
+                    failed[index] = str(e)
+        else:
+            with ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                     initargs=(self.tasks, self.start_date, self.end_date,
+                                               self.part_inventory)) as pool:
+                pending = {pool.submit(_run_in_worker, i, s): i for i, s in enumerate(scenarios)}
+                while pending:
+                    finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = pending.pop(future)
+                        if future.cancelled():
+                            continue
+                        try:
+                            done(future.result())
+                        except Exception as e:
+                            failed[index] = str(e)
+                    if cancelled():
+                        for future in pending:
+                            future.cancel()
+                        pool.shutdown(wait=True, cancel_futures=True)
+                        for future, index in pending.items():
+                            if future.done() and not future.cancelled() and future.exception() is None:
+                                done(future.result())
+                        break
+
+        results.sort(key=lambda r: r.index)
+        return SweepResult(
+            results=results,
+            frontier=self.frontier(results),
+            cancelled=cancelled() and len(results) + len(failed) < total,
+            elapsed_s=time.perf_counter() - started,
+            failed=failed,
+        )
+
+    @staticmethod
+    def frontier(results: Sequence[ScenarioResult]) -> List[ScenarioResult]:
+        """비용 / 정지 시간 / 위험도 파레토 전선 (비용 순)"""
+        if not results:
+            return []
+        front = pareto_front(np.array([r.objectives for r in results]))
+        return sorted((results[i] for i in front), key=lambda r: r.objectives)
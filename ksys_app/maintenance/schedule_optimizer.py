@@ -1,14 +1,27 @@
 """
 정비 스케줄 최적화 시스템
 TASK_014: MAINT_OPTIMIZE_SCHEDULE
+
+- 작업 순서: (우선순위, 데드라인, 유형) 키 힙에서 하나씩 꺼냄
+- 배치: MaintenanceCalendar 에서 부품 도착 이후 잔여 시간이 되는 첫 날
+  (정지 필요 작업은 데드라인 전 첫 정지 기간) → 작업당 O(log n)
+- 일 최대 작업 시간은 배치 시점에 보장 (밀린 작업이 다음 날을 넘치게 하지 않음)
+- 하루 최대 작업 시간보다 긴 작업, 기간 안에 자리가 없는 작업은 unscheduled 로 따로 반환
 """
 
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass, field
 from enum import Enum
+import bisect
+import heapq
 import json
 
+from .calendar_index import MaintenanceCalendar, shutdown_windows
+
+MAX_DAILY_HOURS = 16  # 일 최대 작업 시간
+MERGE_DAYS = 7        # 같은 장비 작업 병합 간격
+
 
 class MaintenanceType(Enum):
     """정비 유형"""
@@ -46,15 +59,67 @@ class OptimizedSchedule:
     total_cost: float
     resource_utilization: float
     optimization_score: float
+    unscheduled: List[MaintenanceTask] = field(default_factory=list)  # 기간 안에 배치 못한 작업
+
+
+# 같은 우선순위/데드라인일 때 유형 순서
+TYPE_PRIORITY = {
+    MaintenanceType.CORRECTIVE: 0,
+    MaintenanceType.PREDICTIVE: 1,
+    MaintenanceType.PREVENTIVE: 2,
+    MaintenanceType.ROUTINE: 3,
+    MaintenanceType.OVERHAUL: 4
+}
+
+# 설비 정지가 필요한 정비 유형
+SHUTDOWN_TYPES = (MaintenanceType.OVERHAUL, MaintenanceType.CORRECTIVE)
+
+
+def priority_key(task: MaintenanceTask) -> Tuple:
+    return (
+        -task.priority,  # 높은 우선순위 먼저
+        task.deadline,   # 빠른 데드라인 먼저
+        TYPE_PRIORITY.get(task.maintenance_type, 5)
+    )
+
+
+def validate_schedule(schedule: OptimizedSchedule,
+                      max_daily_hours: float = MAX_DAILY_HOURS,
+                      windows: Optional[List[Tuple[datetime, datetime]]] = None) -> List[str]:
+    """
+    스케줄 검증 → 위반 목록 (빈 목록이면 유효)
+
+    - 날짜별 작업 시간 합 <= max_daily_hours
+    - 모든 작업이 계획 기간 안
+    - windows 를 주면 정지 기간에 배치된 작업이 기간 안에 끝나는지
+    """
+    violations = []
+    daily: Dict[date, float] = {}
+    for task in schedule.tasks:
+        day = task.scheduled_date.date()
+        daily[day] = daily.get(day, 0.0) + task.estimated_duration_hours
+        if not schedule.start_date <= task.scheduled_date <= schedule.end_date:
+            violations.append(f"{task.task_id}: {task.scheduled_date} outside plan")
+    for day, hours in sorted(daily.items()):
+        if hours > max_daily_hours + 1e-9:
+            violations.append(f"{day}: {hours:.2f}h > {max_daily_hours}h")
+    if windows:
+        by_start = dict(windows)
+        for task in schedule.tasks:
+            end = by_start.get(task.scheduled_date)
+            if end is not None and task.scheduled_date + timedelta(hours=task.estimated_duration_hours) > end:
+                violations.append(f"{task.task_id}: exceeds shutdown window at {task.scheduled_date}")
+    return violations
 
 
 class MaintenanceScheduleOptimizer:
     """정비 스케줄 최적화"""
     
-    def __init__(self):
+    def __init__(self, max_daily_hours: float = MAX_DAILY_HOURS):
         self.operational_schedule = {}  # 운전 스케줄
         self.resource_availability = {}  # 인력 가용성
         self.part_inventory = {}  # 부품 재고
+        self.max_daily_hours = max_daily_hours  # 일 최대 작업 시간
         
         # 최적화 가중치
         self.weights = {
@@ -76,29 +141,32 @@ class MaintenanceScheduleOptimizer:
             tasks: 정비 작업 리스트
             start_date: 시작일
             end_date: 종료일
-            constraints: 제약 조건
+            constraints: 제약 조건 (max_daily_hours, shutdown_windows)
         """
+        constraints = constraints or {}
+        max_daily_hours = constraints.get('max_daily_hours', self.max_daily_hours)
+        windows = constraints.get('shutdown_windows')
+        if windows is None:
+            windows = self._find_shutdown_windows(start_date, end_date)
         
-        # 1. 우선순위 정렬
-        sorted_tasks = self._sort_by_priority(tasks)
-        
-        # 2. 부품 리드타임 고려
-        tasks_with_parts = self._check_part_availability(sorted_tasks)
+        # 1. 부품 리드타임 고려
+        tasks_with_parts = self._check_part_availability(tasks)
         
-        # 3. 운전 스케줄 연동
-        scheduled_tasks = self._align_with_operations(tasks_with_parts, start_date, end_date)
+        # 2. 캘린더 인덱스 (일별 잔여 시간 + 정지 기간)
+        calendar = MaintenanceCalendar(start_date, end_date, windows, max_daily_hours)
         
-        # 4. 자원 배분 최적화
-        optimized_tasks = self._optimize_resources(scheduled_tasks)
+        # 3. 우선순위 힙 순서로 배치 (운전 정지 기간 + 자원 제약)
+        scheduled_tasks, unscheduled = self._list_schedule(tasks_with_parts, calendar)
         
-        # 5. 비용 최적화
-        cost_optimized = self._optimize_cost(optimized_tasks)
+        # 4. 비용 최적화
+        cost_optimized = self._optimize_cost(scheduled_tasks)
         
-        # 6. 최종 스케줄 생성
+        # 5. 최종 스케줄 생성
         final_schedule = self._create_final_schedule(
             cost_optimized,
             start_date,
-            end_date
+            end_date,
+            unscheduled
         )
         
         return final_schedule
@@ -106,21 +174,7 @@ class MaintenanceScheduleOptimizer:
     def _sort_by_priority(self, tasks: List[MaintenanceTask]) -> List[MaintenanceTask]:
         """우선순위별 정렬"""
         # 우선순위, 데드라인, 유형별 정렬
-        def sort_key(task):
-            type_priority = {
-                MaintenanceType.CORRECTIVE: 0,
-                MaintenanceType.PREDICTIVE: 1,
-                MaintenanceType.PREVENTIVE: 2,
-                MaintenanceType.ROUTINE: 3,
-                MaintenanceType.OVERHAUL: 4
-            }
-            return (
-                -task.priority,  # 높은 우선순위 먼저
-                task.deadline,   # 빠른 데드라인 먼저
-                type_priority.get(task.maintenance_type, 5)
-            )
-        
-        return sorted(tasks, key=sort_key)
+        return sorted(tasks, key=priority_key)
     
     def _check_part_availability(self, tasks: List[MaintenanceTask]) -> List[MaintenanceTask]:
         """부품 가용성 확인 및 조정"""
@@ -147,111 +201,69 @@ class MaintenanceScheduleOptimizer:
         
         return adjusted_tasks
     
-    def _align_with_operations(self, 
-                              tasks: List[MaintenanceTask],
-                              start_date: datetime,
-                              end_date: datetime) -> List[MaintenanceTask]:
-        """운전 스케줄과 정렬"""
-        aligned_tasks = []
-        
-        # 계획 정지 기간 찾기
-        planned_shutdowns = self._find_shutdown_windows(start_date, end_date)
-        
-        for task in tasks:
-            # 정지가 필요한 작업
-            if task.maintenance_type in [MaintenanceType.OVERHAUL, MaintenanceType.CORRECTIVE]:
-                # 가장 가까운 정지 기간에 배치
-                best_window = self._find_best_shutdown_window(
-                    task,
-                    planned_shutdowns
-                )
-                if best_window:
-                    task.scheduled_date = best_window
-            
-            aligned_tasks.append(task)
-        
-        return aligned_tasks
-    
-    def _find_shutdown_windows(self, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
-        """계획 정지 기간 찾기"""
-        windows = []
+    def _list_schedule(self,
+                       tasks: List[MaintenanceTask],
+                       calendar: MaintenanceCalendar) -> Tuple[List[MaintenanceTask], List[MaintenanceTask]]:
+        """
+        우선순위 힙 리스트 스케줄링
         
-        # 주말 정비 시간 (토요일 오전)
-        current = start_date
-        while current < end_date:
-            if current.weekday() == 5:  # 토요일
-                window_start = current.replace(hour=6, minute=0)
-                window_end = current.replace(hour=18, minute=0)
-                windows.append((window_start, window_end))
-            current += timedelta(days=1)
+        우선순위가 높은 작업부터 꺼내 부품 도착 이후 가장 이른 자리에 배치한다.
+        - 정지 필요 작업: 데드라인 전 정지 기간 중 기간 길이와 그날 잔여 시간이 모두 되는 첫 기간
+          (없으면 일반 작업처럼 배치)
+        - 일반 작업: 잔여 시간이 되는 첫 날, 같은 장비 작업이 MERGE_DAYS 안에 있고 그날 자리가 있으면 그날
         
-        # 월간 정비 시간 (매월 첫째 일요일)
-        current = start_date
-        while current < end_date:
-            if current.day <= 7 and current.weekday() == 6:  # 첫째 일요일
-                window_start = current.replace(hour=0, minute=0)
-                window_end = current.replace(hour=23, minute=59)
-                windows.append((window_start, window_end))
-            current += timedelta(days=1)
+        Returns:
+            (배치된 작업, 배치 못한 작업)
+        """
+        heap = [(priority_key(t), seq, t) for seq, t in enumerate(tasks)]
+        heapq.heapify(heap)
         
-        return windows
-    
-    def _find_best_shutdown_window(self, 
-                                  task: MaintenanceTask,
-                                  windows: List[Tuple[datetime, datetime]]) -> Optional[datetime]:
-        """최적 정지 기간 찾기"""
-        best_window = None
-        min_delay = float('inf')
+        placed: List[MaintenanceTask] = []
+        unscheduled: List[MaintenanceTask] = []
+        equipment_days: Dict[str, List[date]] = {}
         
-        for window_start, window_end in windows:
-            # 작업 시간이 윈도우에 맞는지 확인
-            window_duration = (window_end - window_start).total_seconds() / 3600
+        while heap:
+            _, _, task = heapq.heappop(heap)
+            hours = task.estimated_duration_hours
+            release = max(task.scheduled_date, calendar.start_date)
             
-            if window_duration >= task.estimated_duration_hours:
-                # 데드라인 전이고 가장 가까운 윈도우
-                if window_start <= task.deadline:
-                    delay = (window_start - task.scheduled_date).days
-                    if 0 <= delay < min_delay:
-                        min_delay = delay
-                        best_window = window_start
-        
-        return best_window
-    
-    def _optimize_resources(self, tasks: List[MaintenanceTask]) -> List[MaintenanceTask]:
-        """자원 최적화"""
-        # 날짜별 작업 그룹화
-        tasks_by_date = {}
-        for task in tasks:
-            date_key = task.scheduled_date.date()
-            if date_key not in tasks_by_date:
-                tasks_by_date[date_key] = []
-            tasks_by_date[date_key].append(task)
-        
-        # 일별 작업 부하 평준화
-        optimized = []
-        max_daily_hours = 16  # 일 최대 작업 시간
-        
-        for date, daily_tasks in tasks_by_date.items():
-            total_hours = sum(t.estimated_duration_hours for t in daily_tasks)
+            when = None
+            if task.maintenance_type in SHUTDOWN_TYPES:
+                when = calendar.earliest_window(release, hours, task.deadline)
+            if when is None:
+                day = self._merge_day(calendar, equipment_days.get(task.equipment_id, ()), release, hours)
+                day = day or calendar.earliest_day(release, hours)
+                if day is not None:
+                    when = datetime.combine(day, release.time()) if day != release.date() else release
+                    when = min(when, calendar.end_date)
             
-            if total_hours > max_daily_hours:
-                # 초과 작업을 다음 날로 이동
-                current_hours = 0
-                deferred = []
-                
-                for task in daily_tasks:
-                    if current_hours + task.estimated_duration_hours <= max_daily_hours:
-                        optimized.append(task)
-                        current_hours += task.estimated_duration_hours
-                    else:
-                        task.scheduled_date += timedelta(days=1)
-                        deferred.append(task)
-                
-                optimized.extend(deferred)
-            else:
-                optimized.extend(daily_tasks)
+            if when is None or when.date() > calendar.end_date.date():
+                unscheduled.append(task)
+                continue
+            
+            calendar.book(when.date(), hours)
+            task.scheduled_date = when
+            bisect.insort(equipment_days.setdefault(task.equipment_id, []), when.date())
+            placed.append(task)
         
-        return optimized
+        return placed, unscheduled
+    
+    @staticmethod
+    def _merge_day(calendar: MaintenanceCalendar, days: List[date],
+                   release: datetime, hours: float) -> Optional[date]:
+        """release 이후 MERGE_DAYS 안에 같은 장비 작업이 있고 자리가 남은 날"""
+        first = release.date()
+        k = bisect.bisect_left(days, first)
+        while k < len(days) and (days[k] - first).days <= MERGE_DAYS:
+            if calendar.remaining(days[k]) >= hours:
+                return days[k]
+            k += 1
+        return None
+    
+    def _find_shutdown_windows(self, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+        """계획 정지 기간 찾기"""
+        # 주말 정비 시간 (토요일 06~18시) + 월간 정비 시간 (매월 첫째 일요일)
+        return shutdown_windows(start_date, end_date)
     
     def _optimize_cost(self, tasks: List[MaintenanceTask]) -> List[MaintenanceTask]:
         """비용 최적화"""
@@ -266,7 +278,7 @@ class MaintenanceScheduleOptimizer:
         
         for equipment_id, group_tasks in equipment_groups.items():
             if len(group_tasks) > 1:
-                # 가까운 날짜의 작업들을 병합
+                # 가까운 날짜의 작업들 (배치 단계에서 같은 날로 모음 - 날짜는 옮기지 않음)
                 group_tasks.sort(key=lambda x: x.scheduled_date)
                 
                 for i in range(len(group_tasks) - 1):
@@ -276,15 +288,10 @@ class MaintenanceScheduleOptimizer:
                     days_apart = (next_task.scheduled_date - current.scheduled_date).days
                     
                     # 7일 이내면 병합 고려
-                    if days_apart <= 7:
+                    if days_apart <= MERGE_DAYS:
                         # 병합 시 비용 절감 (고정비 10% 절감)
                         current.cost_estimate *= 0.95
                         next_task.cost_estimate *= 0.95
-                        
-                        # 날짜 조정 (중간 날짜로)
-                        mid_date = current.scheduled_date + timedelta(days=days_apart//2)
-                        current.scheduled_date = mid_date
-                        next_task.scheduled_date = mid_date
             
             optimized.extend(group_tasks)
         
@@ -293,7 +300,8 @@ class MaintenanceScheduleOptimizer:
     def _create_final_schedule(self,
                               tasks: List[MaintenanceTask],
                               start_date: datetime,
-                              end_date: datetime) -> OptimizedSchedule:
+                              end_date: datetime,
+                              unscheduled: Optional[List[MaintenanceTask]] = None) -> OptimizedSchedule:
         """최종 스케줄 생성"""
         
         # 기간 내 작업만 필터링
@@ -301,6 +309,10 @@ class MaintenanceScheduleOptimizer:
             t for t in tasks 
             if start_date <= t.scheduled_date <= end_date
         ]
+        unscheduled = list(unscheduled or []) + [
+            t for t in tasks
+            if not start_date <= t.scheduled_date <= end_date
+        ]
         
         # 날짜순 정렬
         scheduled_tasks.sort(key=lambda x: x.scheduled_date)
@@ -329,7 +341,8 @@ class MaintenanceScheduleOptimizer:
             total_duration_hours=total_duration,
             total_cost=total_cost,
             resource_utilization=utilization,
-            optimization_score=optimization_score
+            optimization_score=optimization_score,
+            unscheduled=unscheduled
         )
     
     def _calculate_optimization_score(self,
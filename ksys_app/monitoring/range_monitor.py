@@ -4,12 +4,26 @@ TASK_007: MONITOR_IMPLEMENT_RANGE_CHECK
 """
 
 import asyncio
+import logging
+import os
+import time
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
 import psycopg
 
+from ..alarm.correlation import AlarmCorrelator, FoldedSummary, Incident, summarize_folded
+from ..alarm.event_sink import get_event_sink
+from ..alarm.history_store import HistoryStore
+from .trend_predictor import FleetTrendPredictor, TrendRow
+from .threshold_table import (
+    CRITICAL, RULE_FINGERPRINT_SQL, RULE_HASH_SQL, RULE_ROWS_SQL, RangeCheck, ThresholdTable,
+)
+
+RULE_REFRESH_S = float(os.getenv("KSYS_QC_RULE_REFRESH_S", "60"))
+
 
 class AlertLevel(Enum):
     """알람 레벨"""
@@ -44,19 +58,41 @@ class RangeViolation:
     deviation_percentage: float
     timestamp: datetime
     predicted_time_to_critical: Optional[float] = None  # 분 단위
+    recorded: bool = False  # alarm_events 기록 여부 (사고에 묶인 이탈은 퇴출 시 사고 요약으로)
+    incident_id: Optional[str] = None
+    group: str = ""
 
 
 class RangeMonitor:
     """가동범위 실시간 모니터링"""
     
-    def __init__(self, db_dsn: str):
+    def __init__(self, db_dsn: str, correlator: Optional[AlarmCorrelator] = None):
         self.db_dsn = db_dsn
         self.thresholds = {}  # tag_name: ThresholdConfig
-        self.violation_history = []  # 이탈 이력
+        # 이탈 이력: 최근 것만 메모리에 (시각 인덱스), 밀려난 미기록분은 DB로
+        self.violation_history: HistoryStore[RangeViolation] = HistoryStore(
+            time_of=lambda v: v.timestamp,
+            keys_of=lambda v: (("tag", v.tag_name), ("level", v.alert_level.name)),
+            evict=self._archive_violations,
+        )
         self.trend_data = {}  # 트렌드 데이터 캐시
+        self.event_sink = get_event_sink(db_dsn)  # 알람 엔진/수질 모니터와 공유하는 배치 기록기
+        self.correlator = correlator or AlarmCorrelator(dsn=db_dsn)  # 같은 설비 이탈은 사고 1건으로 기록
+        self.correlator.dsn = self.correlator.dsn or db_dsn  # 그룹 조회는 tag_group_refresh_task
         
-        # 담수화 플랜트 주요 센서 임계값 설정
+        # 담수화 플랜트 주요 센서 임계값 설정 (influx_qc_rule 로드 전 기본값)
         self._initialize_thresholds()
+        
+        # 판정용 정렬 배열 - influx_qc_rule 규칙이 같은 태그 기본값을 덮어씀
+        self.table = ThresholdTable()
+        for config in self.thresholds.values():
+            self._upsert_table(config)
+        self._rule_hashes: Dict[str, int] = {}
+        self._rule_fingerprint: Optional[Tuple[int, int]] = None
+        self._rules_checked_at: Optional[float] = None
+        
+        # 태그별 추세 상태 (실시간 샘플로 O(1) 갱신)
+        self.predictor = FleetTrendPredictor()
     
     def _initialize_thresholds(self):
         """임계값 초기화 - 담수화 플랜트 기준"""
@@ -133,165 +169,139 @@ class RangeMonitor:
         Returns:
             (AlertLevel, RangeViolation or None)
         """
-        if tag_name not in self.thresholds:
+        row = self.table.index.get(tag_name)
+        if row is None:
             return AlertLevel.NORMAL, None
         
-        threshold = self.thresholds[tag_name]
-        
-        # Critical 체크
-        if value < threshold.crit_min:
-            deviation = abs((value - threshold.crit_min) / threshold.crit_min * 100)
-            violation = RangeViolation(
-                tag_name=tag_name,
-                current_value=value,
-                threshold_type='min',
-                threshold_value=threshold.crit_min,
-                alert_level=AlertLevel.CRITICAL,
-                deviation_percentage=deviation,
-                timestamp=datetime.now()
-            )
-            return AlertLevel.CRITICAL, violation
-        
-        if value > threshold.crit_max:
-            deviation = abs((value - threshold.crit_max) / threshold.crit_max * 100)
-            violation = RangeViolation(
-                tag_name=tag_name,
-                current_value=value,
-                threshold_type='max',
-                threshold_value=threshold.crit_max,
-                alert_level=AlertLevel.CRITICAL,
-                deviation_percentage=deviation,
-                timestamp=datetime.now()
-            )
-            return AlertLevel.CRITICAL, violation
-        
-        # Warning 체크
-        if value < threshold.warn_min:
-            deviation = abs((value - threshold.warn_min) / threshold.warn_min * 100)
-            violation = RangeViolation(
-                tag_name=tag_name,
-                current_value=value,
-                threshold_type='min',
-                threshold_value=threshold.warn_min,
-                alert_level=AlertLevel.WARNING,
-                deviation_percentage=deviation,
-                timestamp=datetime.now()
-            )
-            return AlertLevel.WARNING, violation
-        
-        if value > threshold.warn_max:
-            deviation = abs((value - threshold.warn_max) / threshold.warn_max * 100)
-            violation = RangeViolation(
-                tag_name=tag_name,
-                current_value=value,
-                threshold_type='max',
-                threshold_value=threshold.warn_max,
-                alert_level=AlertLevel.WARNING,
-                deviation_percentage=deviation,
-                timestamp=datetime.now()
-            )
-            return AlertLevel.WARNING, violation
-        
-        return AlertLevel.NORMAL, None
+        result = self.table.check(np.array([float(value)]), np.array([row]))
+        if not len(result):
+            return AlertLevel.NORMAL, None
+        violation = self._violation(result, 0, datetime.now())
+        return violation.alert_level, violation
     
     async def check_all_ranges(self, sensor_data: List[Dict[str, Any]]) -> List[RangeViolation]:
         """
-        모든 센서 범위 체크
+        모든 센서 범위 체크 (배치 전체를 임계값 배열과 한 번에 비교)
         
         Args:
             sensor_data: [{'tag_name': str, 'value': float}, ...]
             
         Returns:
-            위반 사항 리스트
+            위반 사항 리스트 (입력 순서)
         """
         violations = []
+        await self.ensure_rules()
         
+        tags = []
+        values = []
+        feed = []  # 시각이 있는 샘플은 추세 상태 갱신
         for data in sensor_data:
             tag_name = data.get('tag_name')
             value = data.get('value')
-            
             if tag_name and value is not None:
-                level, violation = await self.check_range(tag_name, float(value))
-                if violation:
-                    violations.append(violation)
-                    self.violation_history.append(violation)
+                tags.append(tag_name)
+                values.append(float(value))
+                ts = data.get('ts')
+                if ts is not None:
+                    feed.append((tag_name, ts.timestamp() if isinstance(ts, datetime) else float(ts), float(value)))
+        if feed:
+            names, stamps, vals = zip(*feed)
+            self.predictor.update_many(names, np.array(stamps), np.array(vals))
+        
+        rows = self.table.positions(tags)
+        known = np.flatnonzero(rows >= 0)
+        batch = np.asarray(values, dtype=np.float64)[known]
+        result = self.table.check(batch, rows[known])
+        now = datetime.now()  # 배치 단위 시각 1회
+        
+        for k in range(len(result)):
+            violation = self._violation(result, k, now)
+            violations.append(violation)
+            self.violation_history.append(violation)
+            correlation = self.correlator.ingest(
+                violation.tag_name, [violation.tag_name], violation.alert_level.name, now.timestamp()
+            )
+            violation.incident_id = correlation.incident.incident_id
+            violation.group = correlation.incident.group
+            if correlation.forward:
+                self._record_violation(violation)
+                violation.recorded = True
+        
+        self.correlator.expire(now.timestamp())
+        for incident in self.correlator.pop_closed():
+            self._record_incident(incident)
         
         return violations
     
+    def check_vector(self, values: np.ndarray) -> RangeCheck:
+        """
+        테이블 순서의 최신값 벡터 전체 판정 (self.table.vector(latest) 로 생성)
+        
+        Returns:
+            위반 행 위치/레벨/경계값/이탈률 (위반한 것만)
+        """
+        return self.table.check(values)
+    
+    def _violation(self, result: RangeCheck, k: int, timestamp: datetime) -> RangeViolation:
+        return RangeViolation(
+            tag_name=self.table.tags[result.index[k]],
+            current_value=float(result.value[k]),
+            threshold_type='max' if result.is_max[k] else 'min',
+            threshold_value=float(result.threshold[k]),
+            alert_level=AlertLevel.CRITICAL if result.level[k] == CRITICAL else AlertLevel.WARNING,
+            deviation_percentage=float(result.deviation[k]),
+            timestamp=timestamp
+        )
+    
     async def predict_deviation(self, tag_name: str, history_minutes: int = 60) -> Optional[float]:
         """
         이탈 예측 - 트렌드 분석 기반
         
+        실시간 샘플로 갱신 중인 추세 상태가 있으면 바로 계산하고(O(1)),
+        없거나 history_minutes 보다 오래되었으면 해당 태그 1분 집계를 읽어 적합한다.
+        
         Returns:
             예상 임계값 도달 시간 (분)
         """
+        if tag_name not in self.table:
+            return None
         try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 최근 데이터 조회
-                    await cur.execute("""
-                        SELECT 
-                            bucket,
-                            avg_val
-                        FROM influx_agg_1m
-                        WHERE tag_name = %s
-                        AND bucket >= NOW() - INTERVAL '%s minutes'
-                        ORDER BY bucket
-                    """, (tag_name, history_minutes))
-                    
-                    rows = await cur.fetchall()
-                    
-                    if len(rows) < 10:  # 최소 10개 데이터 필요
-                        return None
-                    
-                    # 선형 회귀로 트렌드 계산
-                    times = list(range(len(rows)))
-                    values = [float(row[1]) for row in rows]
-                    
-                    # 기울기 계산 (간단한 선형 회귀)
-                    n = len(times)
-                    sum_x = sum(times)
-                    sum_y = sum(values)
-                    sum_xy = sum(x * y for x, y in zip(times, values))
-                    sum_x2 = sum(x * x for x in times)
-                    
-                    if n * sum_x2 - sum_x * sum_x == 0:
-                        return None
-                    
-                    slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-                    current_value = values[-1]
-                    
-                    if tag_name not in self.thresholds:
-                        return None
-                    
-                    threshold = self.thresholds[tag_name]
-                    
-                    # 예측 시간 계산
-                    if slope > 0:  # 상승 추세
-                        # 상한 경고값까지 시간
-                        time_to_warn = (threshold.warn_max - current_value) / slope if slope != 0 else float('inf')
-                        # 상한 위험값까지 시간
-                        time_to_crit = (threshold.crit_max - current_value) / slope if slope != 0 else float('inf')
-                    elif slope < 0:  # 하락 추세
-                        # 하한 경고값까지 시간
-                        time_to_warn = (threshold.warn_min - current_value) / slope if slope != 0 else float('inf')
-                        # 하한 위험값까지 시간
-                        time_to_crit = (threshold.crit_min - current_value) / slope if slope != 0 else float('inf')
-                    else:
-                        return None
-                    
-                    # 가장 가까운 임계값까지의 시간 반환 (분 단위)
-                    if time_to_warn > 0 and time_to_warn < float('inf'):
-                        return time_to_warn
-                    elif time_to_crit > 0 and time_to_crit < float('inf'):
-                        return time_to_crit
-                    
-                    return None
-                    
+            if not self._trend_fresh(tag_name, history_minutes):
+                async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+                    await self.predictor.load(conn, [tag_name], history_minutes)
+            return self.predictor.predict(tag_name, self.table)
         except Exception as e:
             print(f"[ERROR] Prediction failed for {tag_name}: {e}")
             return None
     
+    async def predict_fleet(self,
+                            tag_names: Optional[List[str]] = None,
+                            history_minutes: int = 60,
+                            conn=None) -> List[TrendRow]:
+        """
+        전체 태그 경고/위험 도달 시간 표 (UI 용)
+        
+        influx_agg_1m 을 tag_name = ANY 한 번으로 조회해 모든 태그를 일괄 적합한다.
+        
+        Returns:
+            TrendRow 리스트 (도달 예상이 빠른 순)
+        """
+        tags = list(tag_names) if tag_names is not None else list(self.table.tags)
+        stale = [t for t in tags if t in self.table and not self._trend_fresh(t, history_minutes)]
+        if stale:
+            if conn is None:
+                async with await psycopg.AsyncConnection.connect(self.db_dsn) as own:
+                    await self.predictor.load(own, stale, history_minutes)
+            else:
+                await self.predictor.load(conn, stale, history_minutes)
+        return self.predictor.table(self.table, tags)
+    
+    def _trend_fresh(self, tag_name: str, history_minutes: int) -> bool:
+        row = self.predictor.index.get(tag_name)
+        if row is None or self.predictor.count[row] < self.predictor.min_points:
+            return False
+        return time.time() / 60.0 - self.predictor.t_ref[row] <= history_minutes
+    
     async def get_current_status(self) -> Dict[str, Any]:
         """현재 모니터링 상태 조회"""
         try:
@@ -304,11 +314,17 @@ class RangeMonitor:
                             value,
                             ts
                         FROM influx_latest
-                        WHERE tag_name IN %s
-                    """, (tuple(self.thresholds.keys()),))
+                        WHERE tag_name = ANY(%s)
+                    """, (list(self.thresholds.keys()),))
                     
                     rows = await cur.fetchall()
                     
+                    # 추세 예측: 전체 태그 1회 조회/일괄 적합 (태그별 연결 없음)
+                    trends = {
+                        t.tag_name: t
+                        for t in await self.predict_fleet([row[0] for row in rows], conn=conn)
+                    }
+                    
                     status = {
                         'timestamp': datetime.now().isoformat(),
                         'sensors': [],
@@ -337,7 +353,8 @@ class RangeMonitor:
                         }
                         
                         # 예측 추가
-                        prediction = await self.predict_deviation(tag_name)
+                        trend = trends.get(tag_name)
+                        prediction = trend.minutes if trend else None
                         if prediction:
                             sensor_status['prediction_minutes'] = prediction
                         
@@ -376,14 +393,125 @@ class RangeMonitor:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def _record_violation(self, violation: RangeViolation):
+        """이탈 이벤트 기록 (공유 싱크 큐에 등록만 하고 반환)"""
+        if self.event_sink is None:
+            return
+        self.event_sink.submit("alarm_events", (
+            'RANGE',
+            violation.alert_level.value.upper(),
+            violation.tag_name,
+            violation.current_value,
+            f"{violation.tag_name} {violation.threshold_type} 기준 {violation.threshold_value} 이탈 "
+            f"({violation.deviation_percentage:.1f}%)",
+            violation.timestamp
+        ))
+    
+    def _record_incident(self, incident: Incident):
+        """묶인 이탈 사고 요약 기록 (단건 사고는 첫 이탈로 이미 기록됨)"""
+        if incident.count < 2 or self.event_sink is None:
+            return
+        self.event_sink.submit("alarm_events", (
+            'INCIDENT',
+            incident.level,
+            incident.group,
+            float(incident.count),
+            incident.summary(),
+            datetime.fromtimestamp(incident.last_at)
+        ))
+    
     def set_custom_threshold(self, tag_name: str, config: ThresholdConfig):
         """커스텀 임계값 설정"""
         self.thresholds[tag_name] = config
+        self._upsert_table(config)
+    
+    def _upsert_table(self, config: ThresholdConfig, enabled: bool = True):
+        self.table.upsert(config.tag_name, config.warn_min, config.warn_max, config.crit_min, config.crit_max,
+                          enabled)
+    
+    async def ensure_rules(self) -> None:
+        """refresh 주기가 지났으면 influx_qc_rule 변경분 반영 (실패 시 기존 임계값 유지)"""
+        if not self.db_dsn:
+            return
+        now = time.monotonic()
+        if self._rules_checked_at is not None and now - self._rules_checked_at < RULE_REFRESH_S:
+            return
+        self._rules_checked_at = now
+        try:
+            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+                await self.refresh_rules(conn)
+        except Exception as e:  # noqa: BLE001
+            logging.warning(f"influx_qc_rule 임계값 갱신 실패 - 기존 값 사용: {e}")
+    
+    async def refresh_rules(self, conn) -> int:
+        """
+        influx_qc_rule 증분 반영
+        
+        테이블 지문(행 수 + 행 해시 합)이 같으면 바로 반환하고, 다르면 행 해시를 비교해
+        바뀐/추가된 태그만 다시 읽는다. 삭제된 규칙은 테이블에서 제거.
+        
+        Returns:
+            반영한 태그 수 (추가/변경/삭제)
+        """
+        async with conn.cursor() as cur:
+            await cur.execute(RULE_FINGERPRINT_SQL)
+            count, total = await cur.fetchone()
+            fingerprint = (int(count), int(total))
+            if fingerprint == self._rule_fingerprint:
+                return 0
+            
+            await cur.execute(RULE_HASH_SQL)
+            hashes = {tag: h for tag, h in await cur.fetchall()}
+            changed = [tag for tag, h in hashes.items() if self._rule_hashes.get(tag) != h]
+            removed = [tag for tag in self._rule_hashes if tag not in hashes]
+            
+            rows = []
+            if changed:
+                await cur.execute(RULE_ROWS_SQL, (changed,))
+                rows = await cur.fetchall()
+        
+        for tag, enabled, min_val, max_val, warn_min, warn_max, crit_min, crit_max, unit, description in rows:
+            config = ThresholdConfig(tag, min_val, max_val, warn_min, warn_max, crit_min, crit_max,
+                                     unit or "", description or "")
+            self.thresholds[tag] = config
+            self._upsert_table(config, enabled)
+        for tag in removed:
+            self.thresholds.pop(tag, None)
+        self.table.remove(removed)
+        
+        self._rule_hashes = hashes
+        self._rule_fingerprint = fingerprint
+        return len(rows) + len(removed)
+    
+    def _archive_violations(self, violations: List[RangeViolation]):
+        """메모리 이력에서 밀려난 미기록 이탈을 사고당 요약 1건으로 DB에 (행 단위 기록 없음)"""
+        if self.event_sink is None:
+            return
+        folded = summarize_folded(
+            (v.incident_id or v.tag_name, v.group or v.tag_name, v.alert_level.name, v.timestamp)
+            for v in violations if not v.recorded
+        )
+        for summary in folded:
+            self._record_folded(summary)
+    
+    def _record_folded(self, summary: FoldedSummary):
+        self.event_sink.submit("alarm_events", (
+            'INCIDENT',
+            summary.level,
+            summary.group,
+            float(summary.count),
+            summary.summary(),
+            summary.last_at
+        ))
     
     def get_violation_history(self, hours: int = 24) -> List[RangeViolation]:
-        """이탈 이력 조회"""
+        """이탈 이력 조회 (시각 인덱스 이진 탐색)"""
         cutoff_time = datetime.now() - timedelta(hours=hours)
-        return [v for v in self.violation_history if v.timestamp > cutoff_time]
+        return self.violation_history.range(cutoff_time)
+    
+    def get_violation_counts(self, kind: str = "tag") -> Dict[str, int]:
+        """보관 중인 이탈의 태그/레벨별 건수"""
+        return self.violation_history.counts(kind)
 
 
 # 알람 트리거 설정
@@ -0,0 +1,178 @@
+"""
+태그별 가동범위 임계값 테이블 (NumPy 정렬 배열)
+
+public.influx_qc_rule 의 warn/crit(없으면 min_val/max_val) 기준을 태그 순서에 맞춘
+float64 배열로 보관하고, 최신값 벡터 전체를 한 번의 비교로 판정한다.
+- 경계값이 NULL 이면 NaN → 비교 결과가 항상 False (해당 방향 검사 안 함)
+- 판정 순서는 기존 check_range 와 같음: 위험 하한 → 위험 상한 → 경고 하한 → 경고 상한
+- 규칙 변경은 행 해시(hashtext)를 비교해 바뀐 태그만 다시 읽어 해당 위치만 갱신
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 판정 코드 (AlertLevel 순서)
+NORMAL, WARNING, CRITICAL = 0, 1, 2
+
+RULE_FINGERPRINT_SQL = """
+    SELECT count(*), COALESCE(sum(hashtext(r::text)::bigint), 0)
+    FROM public.influx_qc_rule r
+"""
+
+RULE_HASH_SQL = """
+    SELECT tag_name, hashtext(r::text)
+    FROM public.influx_qc_rule r
+"""
+
+RULE_ROWS_SQL = """
+    SELECT tag_name,
+           COALESCE(enabled, true),
+           min_val, max_val,
+           warn_min, warn_max,
+           COALESCE(crit_min, min_val), COALESCE(crit_max, max_val),
+           COALESCE(meta->>'unit', ''), COALESCE(meta->>'description', '')
+    FROM public.influx_qc_rule
+    WHERE tag_name = ANY(%s)
+"""
+
+
+@dataclass
+class RangeCheck:
+    """벡터 판정 결과 (위반 위치만)"""
+    index: np.ndarray       # 테이블 행 위치
+    value: np.ndarray       # 판정한 값
+    level: np.ndarray       # WARNING / CRITICAL
+    is_max: np.ndarray      # True: 상한 이탈, False: 하한 이탈
+    threshold: np.ndarray   # 이탈한 경계값
+    deviation: np.ndarray   # 경계값 대비 이탈률 (%)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class ThresholdTable:
+    """태그 → 행 위치 인덱스 + 경계값 배열"""
+
+    def __init__(self, capacity: int = 64):
+        self.tags: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._bounds = np.full((4, capacity), np.nan)
+        self._enabled = np.zeros(capacity, dtype=bool)
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, tag_name: str) -> bool:
+        return tag_name in self.index
+
+    @property
+    def warn_min(self) -> np.ndarray:
+        return self._bounds[0, :len(self.tags)]
+
+    @property
+    def warn_max(self) -> np.ndarray:
+        return self._bounds[1, :len(self.tags)]
+
+    @property
+    def crit_min(self) -> np.ndarray:
+        return self._bounds[2, :len(self.tags)]
+
+    @property
+    def crit_max(self) -> np.ndarray:
+        return self._bounds[3, :len(self.tags)]
+
+    # ------------------------------------------------------------------ 갱신
+    def upsert(self, tag_name: str, warn_min=None, warn_max=None, crit_min=None, crit_max=None,
+               enabled: bool = True) -> int:
+        """행 추가/갱신 → 행 위치"""
+        i = self.index.get(tag_name)
+        if i is None:
+            i = len(self.tags)
+            if i == self._bounds.shape[1]:
+                grow = max(64, i)
+                self._bounds = np.concatenate([self._bounds, np.full((4, grow), np.nan)], axis=1)
+                self._enabled = np.concatenate([self._enabled, np.zeros(grow, dtype=bool)])
+            self.tags.append(tag_name)
+            self.index[tag_name] = i
+        self._bounds[:, i] = [np.nan if v is None else float(v) for v in (warn_min, warn_max, crit_min, crit_max)]
+        self._enabled[i] = bool(enabled)
+        self.version += 1
+        return i
+
+    def remove(self, tag_names: Iterable[str]) -> None:
+        """행 삭제 (마지막 행을 빈자리로 옮겨 배열을 연속으로 유지)"""
+        for tag_name in tag_names:
+            i = self.index.pop(tag_name, None)
+            if i is None:
+                continue
+            last = len(self.tags) - 1
+            if i != last:
+                moved = self.tags[last]
+                self.tags[i] = moved
+                self.index[moved] = i
+                self._bounds[:, i] = self._bounds[:, last]
+                self._enabled[i] = self._enabled[last]
+            self.tags.pop()
+            self._bounds[:, last] = np.nan
+            self._enabled[last] = False
+            self.version += 1
+
+    # ------------------------------------------------------------------ 판정
+    def positions(self, tag_names: Sequence[str]) -> np.ndarray:
+        """태그 이름 → 행 위치 (없는 태그 -1)"""
+        get = self.index.get
+        return np.fromiter((get(t, -1) for t in tag_names), dtype=np.intp, count=len(tag_names))
+
+    def vector(self, latest: Dict[str, float]) -> np.ndarray:
+        """{tag: value} → 테이블 순서 값 벡터 (없는 태그 NaN)"""
+        values = np.full(len(self.tags), np.nan)
+        get = self.index.get
+        for tag_name, value in latest.items():
+            i = get(tag_name)
+            if i is not None and value is not None:
+                values[i] = value
+        return values
+
+    def check(self, values: np.ndarray, rows: Optional[np.ndarray] = None) -> RangeCheck:
+        """
+        값 벡터 일괄 판정
+
+        Args:
+            values: rows 가 없으면 테이블 순서 전체 벡터, 있으면 rows 와 같은 길이
+            rows: 값이 해당하는 행 위치 (부분 배치)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if rows is None:
+            n = len(self.tags)
+            w_lo, w_hi, c_lo, c_hi = self._bounds[:, :n]
+            enabled = self._enabled[:n]
+        else:
+            w_lo, w_hi, c_lo, c_hi = self._bounds[:, rows]
+            enabled = self._enabled[rows]
+        with np.errstate(invalid="ignore"):
+            below_c = values < c_lo
+            above_c = values > c_hi
+            below_w = values < w_lo
+            above_w = values > w_hi
+        crit = below_c | above_c
+        hit = (crit | below_w | above_w) & enabled
+        idx = np.flatnonzero(hit)
+        if not len(idx):
+            empty = np.empty(0)
+            return RangeCheck(np.empty(0, dtype=np.intp), empty, np.empty(0, dtype=np.int8), empty.astype(bool),
+                              empty, empty)
+
+        v = values[idx]
+        c = crit[idx]
+        # 우선순위: 위험 하한 > 위험 상한 > 경고 하한 > 경고 상한
+        is_max = np.where(c, ~below_c[idx], ~below_w[idx])
+        threshold = np.where(c, np.where(is_max, c_hi[idx], c_lo[idx]), np.where(is_max, w_hi[idx], w_lo[idx]))
+        scale = np.abs(threshold)
+        deviation = np.abs(v - threshold) / np.where(scale > 0, scale, 1.0) * 100
+        level = np.where(c, CRITICAL, WARNING).astype(np.int8)
+        rows_out = idx if rows is None else np.asarray(rows)[idx]
+        return RangeCheck(rows_out, v, level, is_max, threshold, deviation)
+
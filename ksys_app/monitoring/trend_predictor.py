@@ -0,0 +1,254 @@
+"""
+전체 태그 추세 예측 (경고/위험 도달 시간)
+
+- 초기화: influx_agg_1m 을 tag_name = ANY(...) 한 번으로 조회하고,
+  태그별 2x2 정규방정식을 쌓아 np.linalg.solve 한 번으로 선형 추세를 적합
+- 실시간: 태그별 재귀 최소제곱(RLS) 상태 [수준, 기울기] + 공분산 P 를 샘플마다 O(1) 갱신
+  기준 시각을 새 샘플 시각으로 옮기고(F = [[1, dt], [0, 1]]) 시간 기반 망각(exp(-dt/tau)) 적용
+- 출력: 태그별 현재 수준/기울기(분당)와 경고·위험 도달까지 남은 분 (UI 표)
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+FLEET_TREND_SQL = """
+    SELECT tag_name, extract(epoch FROM bucket)::float8, avg
+    FROM influx_agg_1m
+    WHERE tag_name = ANY(%s)
+      AND bucket >= NOW() - make_interval(mins => %s)
+      AND avg IS NOT NULL
+    ORDER BY tag_name, bucket
+"""
+
+MIN_POINTS = 10  # 기존 predict_deviation 과 같은 최소 데이터 수
+
+
+@dataclass
+class TrendRow:
+    """UI 표 1행"""
+    tag_name: str
+    value: float
+    slope_per_min: float
+    minutes_to_warning: Optional[float]
+    minutes_to_critical: Optional[float]
+    updated_at: datetime
+
+    @property
+    def minutes(self) -> Optional[float]:
+        """가장 가까운 임계값까지 (경고 우선, 기존 predict_deviation 반환값)"""
+        return self.minutes_to_warning if self.minutes_to_warning is not None else self.minutes_to_critical
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'tag_name': self.tag_name,
+            'value': self.value,
+            'slope_per_min': self.slope_per_min,
+            'minutes_to_warning': self.minutes_to_warning,
+            'minutes_to_critical': self.minutes_to_critical,
+            'updated_at': self.updated_at.isoformat(),
+        }
+
+
+def fit_stacked(rows: np.ndarray, t_min: np.ndarray, y: np.ndarray, n_tags: int, t_ref: np.ndarray):
+    """
+    태그별 선형 회귀 일괄 적합 (y = level + slope * (t - t_ref))
+
+    Args:
+        rows: 샘플의 태그 위치
+        t_min: 샘플 시각 (분)
+        y: 값
+        t_ref: 태그별 기준 시각 (분) - 보통 마지막 샘플 시각
+    Returns:
+        (theta (k, 2), 정규행렬 A (k, 2, 2), 샘플 수 (k,))
+    """
+    x = t_min - t_ref[rows]
+    count = np.bincount(rows, minlength=n_tags).astype(np.float64)
+    sx = np.bincount(rows, x, n_tags)
+    sxx = np.bincount(rows, x * x, n_tags)
+    sy = np.bincount(rows, y, n_tags)
+    sxy = np.bincount(rows, x * y, n_tags)
+    A = np.empty((n_tags, 2, 2))
+    A[:, 0, 0], A[:, 0, 1], A[:, 1, 0], A[:, 1, 1] = count, sx, sx, sxx
+    b = np.stack([sy, sxy], axis=1)
+    det = count * sxx - sx * sx
+    ok = (count >= 2) & (det > 1e-12 * np.maximum(count * sxx, 1.0))
+    theta = np.full((n_tags, 2), np.nan)
+    if ok.any():
+        theta[ok] = np.linalg.solve(A[ok], b[ok][..., None])[..., 0]
+    return theta, A, count
+
+
+class FleetTrendPredictor:
+    """태그별 RLS 추세 상태 (배열로 보관)"""
+
+    def __init__(self, tau_min: float = 30.0, min_points: int = MIN_POINTS):
+        """
+        Args:
+            tau_min: 망각 시간 상수 (분) - 약 tau_min 분 이전 데이터의 가중치가 1/e
+            min_points: 예측에 필요한 최소 샘플 수
+        """
+        self.tau_min = tau_min
+        self.min_points = min_points
+        self.tags: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.theta = np.zeros((0, 2))
+        self.P = np.zeros((0, 2, 2))
+        self.t_ref = np.zeros(0)   # 분 (epoch / 60)
+        self.count = np.zeros(0)
+
+    def _rows(self, tag_names: Sequence[str]) -> np.ndarray:
+        new = [t for t in dict.fromkeys(tag_names) if t not in self.index]
+        if new:
+            k = len(new)
+            for tag in new:
+                self.index[tag] = len(self.tags)
+                self.tags.append(tag)
+            self.theta = np.concatenate([self.theta, np.zeros((k, 2))])
+            self.P = np.concatenate([self.P, np.zeros((k, 2, 2))])
+            self.t_ref = np.concatenate([self.t_ref, np.full(k, np.nan)])
+            self.count = np.concatenate([self.count, np.zeros(k)])
+        return np.fromiter((self.index[t] for t in tag_names), dtype=np.intp, count=len(tag_names))
+
+    # ------------------------------------------------------------------ 초기화
+    async def load(self, conn, tag_names: Sequence[str], history_minutes: int = 60) -> int:
+        """최근 history_minutes 분 1분 집계를 한 번에 조회해 전체 태그 일괄 적합"""
+        async with conn.cursor() as cur:
+            await cur.execute(FLEET_TREND_SQL, (list(tag_names), int(history_minutes)))
+            records = await cur.fetchall()
+        return self.fit([r[0] for r in records],
+                        np.array([r[1] for r in records], dtype=np.float64),
+                        np.array([r[2] for r in records], dtype=np.float64))
+
+    def fit(self, tag_names: Sequence[str], ts: np.ndarray, values: np.ndarray) -> int:
+        """
+        샘플 (tag, epoch 초, 값) 일괄 적합 → 태그별 RLS 상태 초기화
+
+        Returns:
+            적합된 태그 수
+        """
+        if not len(tag_names):
+            return 0
+        rows = self._rows(tag_names)
+        t_min = np.asarray(ts, dtype=np.float64) / 60.0
+        y = np.asarray(values, dtype=np.float64)
+        n = len(self.tags)
+        t_last = np.full(n, -np.inf)
+        np.maximum.at(t_last, rows, t_min)
+        theta, A, count = fit_stacked(rows, t_min, y, n, np.where(np.isfinite(t_last), t_last, 0.0))
+
+        fitted = np.flatnonzero(~np.isnan(theta[:, 0]))
+        self.theta[fitted] = theta[fitted]
+        self.P[fitted] = np.linalg.inv(A[fitted])
+        self.t_ref[fitted] = t_last[fitted]
+        self.count[fitted] = count[fitted]
+        return len(fitted)
+
+    # ------------------------------------------------------------------ 실시간
+    def update(self, tag_name: str, ts: float, value: float) -> None:
+        """실시간 샘플 1건 반영 (O(1))"""
+        self.update_many([tag_name], np.array([ts], dtype=np.float64), np.array([value], dtype=np.float64))
+
+    def update_many(self, tag_names: Sequence[str], ts: np.ndarray, values: np.ndarray) -> None:
+        """
+        샘플 묶음 반영 - 태그별로 시각 순 처리, 서로 다른 태그는 한 번에 벡터 갱신
+
+        첫 샘플이면 [값, 0] 으로 시작하고 P 는 큰 값(1e6)으로 둔다.
+        """
+        rows = self._rows(tag_names)
+        t_min = np.asarray(ts, dtype=np.float64) / 60.0
+        y = np.asarray(values, dtype=np.float64)
+        order = np.lexsort((t_min, rows))
+        rows, t_min, y = rows[order], t_min[order], y[order]
+        # 같은 태그의 k 번째 샘플끼리 한 번에 처리
+        starts = np.r_[0, np.flatnonzero(np.diff(rows)) + 1]
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        for r in range(int(rank.max()) + 1 if len(rank) else 0):
+            sel = rank == r
+            self._rls_step(rows[sel], t_min[sel], y[sel])
+
+    def _rls_step(self, rows: np.ndarray, t: np.ndarray, y: np.ndarray) -> None:
+        fresh = np.isnan(self.t_ref[rows])
+        if fresh.any():
+            fr = rows[fresh]
+            self.theta[fr] = np.stack([y[fresh], np.zeros(fresh.sum())], axis=1)
+            self.P[fr] = np.eye(2) * 1e6
+            self.t_ref[fr] = t[fresh]
+            self.count[fr] = 1
+        rows, t, y = rows[~fresh], t[~fresh], y[~fresh]
+        if not len(rows):
+            return
+
+        dt = np.maximum(t - self.t_ref[rows], 0.0)
+        theta = self.theta[rows]
+        P = self.P[rows]
+        # 기준 시각 이동: level += slope * dt, P = F P F^T
+        theta[:, 0] += theta[:, 1] * dt
+        p00, p01, p11 = P[:, 0, 0], P[:, 0, 1], P[:, 1, 1]
+        p00 = p00 + 2 * dt * p01 + dt * dt * p11
+        p01 = p01 + dt * p11
+        # 시간 기반 망각 (dt = 0 이면 망각 없음)
+        lam = np.exp(-dt / self.tau_min)
+        # 관측 x = [1, 0] (기준 시각 = 샘플 시각) → 이득 k = P[:, 0] / (lam + p00)
+        denom = lam + p00
+        k0, k1 = p00 / denom, p01 / denom
+        err = y - theta[:, 0]
+        theta[:, 0] += k0 * err
+        theta[:, 1] += k1 * err
+        P[:, 0, 0] = (p00 - k0 * p00) / lam
+        P[:, 0, 1] = P[:, 1, 0] = (p01 - k0 * p01) / lam
+        P[:, 1, 1] = (p11 - k1 * p01) / lam
+
+        self.theta[rows] = theta
+        self.P[rows] = P
+        self.t_ref[rows] = t
+        self.count[rows] += 1
+
+    # ------------------------------------------------------------------ 출력
+    def table(self, thresholds, tag_names: Optional[Sequence[str]] = None) -> List[TrendRow]:
+        """
+        경고/위험 도달 시간 표 (도달 예상이 빠른 순)
+
+        Args:
+            thresholds: ThresholdTable (warn/crit 경계 배열)
+            tag_names: 대상 태그 (기본: 상태가 있는 전체)
+        """
+        names = [t for t in (tag_names if tag_names is not None else self.tags)
+                 if t in self.index and t in thresholds.index]
+        if not names:
+            return []
+        rows = np.fromiter((self.index[t] for t in names), dtype=np.intp, count=len(names))
+        trow = thresholds.positions(names)
+        level, slope = self.theta[rows, 0], self.theta[rows, 1]
+        ready = (self.count[rows] >= self.min_points) & ~np.isnan(self.t_ref[rows])
+
+        flat = 1e-9 * np.maximum(np.abs(level), 1.0)  # 수치 오차 수준 기울기는 추세 없음
+        up, down = slope > flat, slope < -flat
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_warn = np.where(up, (thresholds.warn_max[trow] - level) / slope,
+                               np.where(down, (thresholds.warn_min[trow] - level) / slope, np.nan))
+            to_crit = np.where(up, (thresholds.crit_max[trow] - level) / slope,
+                               np.where(down, (thresholds.crit_min[trow] - level) / slope, np.nan))
+        to_warn = np.where(ready & (to_warn > 0) & np.isfinite(to_warn), to_warn, np.nan)
+        to_crit = np.where(ready & (to_crit > 0) & np.isfinite(to_crit), to_crit, np.nan)
+
+        out = []
+        for j, tag in enumerate(names):
+            if not ready[j]:
+                continue
+            r = rows[j]
+            out.append(TrendRow(
+                tag, float(level[j]), float(slope[j]),
+                None if np.isnan(to_warn[j]) else float(to_warn[j]),
+                None if np.isnan(to_crit[j]) else float(to_crit[j]),
+                datetime.fromtimestamp(self.t_ref[r] * 60.0),
+            ))
+        out.sort(key=lambda row: (row.minutes is None, row.minutes or 0.0))
+        return out
+
+    def predict(self, tag_name: str, thresholds) -> Optional[float]:
+        """단일 태그 도달 예상 시간 (분) - 저장된 상태로 O(1)"""
+        rows = self.table(thresholds, [tag_name])
+        return rows[0].minutes if rows else None
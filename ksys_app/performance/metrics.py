@@ -0,0 +1,38 @@
+"""
+프로세스 메트릭 레지스트리
+모듈별 수집 함수를 등록하고 /metrics 에서 Prometheus 텍스트 형식으로 노출
+"""
+
+import logging
+from typing import Callable, Dict, List
+
+MetricsProvider = Callable[[], Dict[str, float]]
+
+_PROVIDERS: List[MetricsProvider] = []
+
+
+def register_metrics(provider: MetricsProvider) -> MetricsProvider:
+    """수집 함수 등록 (데코레이터로도 사용 가능)"""
+    if provider not in _PROVIDERS:
+        _PROVIDERS.append(provider)
+    return provider
+
+
+def collect_metrics() -> Dict[str, float]:
+    """등록된 모든 수집 함수 실행 - 실패한 수집기는 건너뜀"""
+    values: Dict[str, float] = {}
+    for provider in list(_PROVIDERS):
+        try:
+            values.update(provider())
+        except Exception as e:  # noqa: BLE001
+            logging.error(f"메트릭 수집 실패 ({getattr(provider, '__name__', provider)}): {e}")
+    return values
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition format (gauge)"""
+    lines = []
+    for name, value in sorted(collect_metrics().items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {float(value):g}")
+    return "\n".join(lines) + "\n"
@@ -37,6 +37,19 @@ def _auto_view(window: str) -> str:
     return "public.influx_agg_1h"
 
 
+def series_view(window: str, resolution: Optional[str] = None) -> str:
+    """Continuous aggregate read by `timeseries` for a window/resolution pair."""
+    if resolution in {"1m", "1min", "1minute", "1 minute"}:
+        return "public.influx_agg_1m"
+    if resolution in {"10m", "10min", "10 minutes", "10 minute"}:
+        return "public.influx_agg_10m"
+    if resolution in {"1h", "1hour", "1 hour"}:
+        return "public.influx_agg_1h"
+    if resolution in {"1d", "1day", "1 day"}:
+        return "public.influx_agg_1d"
+    return _auto_view(window)
+
+
 async def timeseries(
     window: str,
     tag_name: Optional[str],
@@ -49,16 +62,7 @@ async def timeseries(
     Returns all standard columns: n, avg, sum, min, max, last, first, diff.
     Ordered by time ascending for stable charting.
     """
-    if resolution in {"1m", "1min", "1minute", "1 minute"}:
-        view = "public.influx_agg_1m"
-    elif resolution in {"10m", "10min", "10 minutes", "10 minute"}:
-        view = "public.influx_agg_10m"
-    elif resolution in {"1h", "1hour", "1 hour"}:
-        view = "public.influx_agg_1h"
-    elif resolution in {"1d", "1day", "1 day"}:
-        view = "public.influx_agg_1d"
-    else:
-        view = _auto_view(window)
+    view = series_view(window, resolution)
 
     if start_iso and end_iso:
         limit = _calculate_dynamic_limit(window or "7 days")
@@ -16,4 +16,12 @@ async def tags_list() -> List[Dict[str, Any]]:
     return await q(sql, ())
 
 
-
+async def tag_metadata() -> List[Dict[str, Any]]:
+    """Tag master data (unit/type/meta) from public.influx_tag."""
+    sql = (
+        "SELECT tag_name, tag_type, unit, meta "
+        "FROM public.influx_tag "
+        "ORDER BY tag_name "
+        "LIMIT 1000"
+    )
+    return await q(sql, ())
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict
+
+from ..db import q
+
+
+async def cagg_watermarks() -> Dict[str, datetime]:
+    """Last successful refresh per continuous aggregate ('public.influx_agg_1m' -> ts).
+
+    Reads the refresh-policy job stats, so the result only moves when a policy run
+    has actually materialized new buckets. Plain views (no TimescaleDB) yield {}.
+    """
+    sql = """
+        SELECT ca.view_schema || '.' || ca.view_name AS view_name,
+               js.last_successful_finish AS refreshed_at
+        FROM timescaledb_information.continuous_aggregates ca
+        JOIN timescaledb_information.jobs j
+          ON j.hypertable_schema = ca.materialization_hypertable_schema
+         AND j.hypertable_name = ca.materialization_hypertable_name
+        JOIN timescaledb_information.job_stats js ON js.job_id = j.job_id
+        WHERE j.proc_name = 'policy_refresh_continuous_aggregate'
+    """
+    rows = await q(sql, ())
+    return {
+        str(r["view_name"]): r["refreshed_at"]
+        for r in rows
+        if r.get("refreshed_at") is not None
+    }
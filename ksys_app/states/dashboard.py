@@ -6,15 +6,14 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import reflex as rx
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
-
-from ..queries.metrics import timeseries
-from ..queries.latest import latest_snapshot
-from ..queries.features import features_5m
-from ..queries.indicators import tech_indicators_1m, tech_indicators_adaptive
-from ..queries.tags import tags_list
-from ..queries.qc import qc_rules
+
+from ..config.time_ranges import resolution_for_window
+from ..queries.metrics import series_view, timeseries
 from ..queries.realtime import get_sliding_window_data, realtime_data
+from ..utils.time_axis import CHART_LABELS, LOCAL_LABELS, SHORT_LABELS, TIME_LABELS, to_epoch
+from .page_loaders import PAGE_LOADER, LoadParams
+from .session_memory import HEAVY_FIELDS, SESSION_MEMORY, SHARED_DATASETS, SWEEP_INTERVAL_S, deep_sizeof, sweep
+from .snapshots import PresetSnapshot, PresetSnapshotStore
 # Alarm queries removed - not used in current implementation
 # 캐시 시스템 제거됨 - 실시간 데이터가 더 중요
 
@@ -93,74 +92,38 @@ def _norm_window(w: str) -> str:
     return mapping.get(w, "24 hours")
 
 
-SEOUL_TZ = ZoneInfo("Asia/Seoul")
-
-
-def _fmt_ts_local(s: Optional[str]) -> str:
+def _fmt_ts_local(s: Any) -> str:
     if not s:
         return ""
-    try:
-        txt = str(s)
-        if txt.endswith("Z"):
-            txt = txt.replace("Z", "+00:00")
-        dt = datetime.fromisoformat(txt)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        local = dt.astimezone(SEOUL_TZ)
-        z = local.strftime("%z")
-        z = z[:3] + ":" + z[3:]
-        return local.strftime("%Y-%m-%d %H:%M:%S") + z
-    except Exception:  # noqa: BLE001
-        return str(s)
+    epoch = to_epoch(s)
+    return LOCAL_LABELS.label(epoch) if epoch is not None else str(s)
 
 
-def _fmt_ts_short(s: Optional[str]) -> str:
+def _fmt_ts_short(s: Any) -> str:
     if not s:
         return ""
-    try:
-        txt = str(s)
-        if txt.endswith("Z"):
-            txt = txt.replace("Z", "+00:00")
-        dt = datetime.fromisoformat(txt)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        local = dt.astimezone(SEOUL_TZ)
-        return local.strftime("%Y-%m-%d %H:%M:%S")
-    except Exception:  # noqa: BLE001
-        return str(s)
+    epoch = to_epoch(s)
+    return SHORT_LABELS.label(epoch) if epoch is not None else str(s)
+
 
-def _fmt_ts_time_only(s: Optional[str]) -> str:
+def _fmt_ts_time_only(s: Any) -> str:
     """시분초만 표시하는 타임스탬프 포매터"""
     if not s:
         return ""
-    try:
-        txt = str(s)
-        if txt.endswith("Z"):
-            txt = txt.replace("Z", "+00:00")
-        dt = datetime.fromisoformat(txt)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        local = dt.astimezone(SEOUL_TZ)
-        return local.strftime("%H:%M:%S")  # 시분초만 표시
-    except Exception:  # noqa: BLE001
+    epoch = to_epoch(s)
+    if epoch is None:
         return str(s)[-8:] if len(str(s)) >= 8 else str(s)
+    return TIME_LABELS.label(epoch)  # 시분초만 표시
 
 
-def _fmt_ts_short_chart(s: Optional[str]) -> str:
+def _fmt_ts_short_chart(s: Any) -> str:
     """차트 X축용 타임스탬프 포맷터 (년-월-일 시:분)"""
     if not s:
         return ""
-    try:
-        txt = str(s)
-        if txt.endswith("Z"):
-            txt = txt.replace("Z", "+00:00")
-        dt = datetime.fromisoformat(txt)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        local = dt.astimezone(SEOUL_TZ)
-        return local.strftime("%Y-%m-%d %H:%M")  # 년-월-일 시:분 형식
-    except Exception:  # noqa: BLE001
+    epoch = to_epoch(s)
+    if epoch is None:
         return str(s)[:16] if len(str(s)) >= 16 else str(s)
+    return CHART_LABELS.label(epoch)  # 년-월-일 시:분 형식
 
 
 def _mean_safe(values: List[Optional[float]]) -> Optional[float]:
@@ -224,6 +187,450 @@ def _compute_indicators_fallback(rows: List[Dict[str, Any]]) -> List[Dict[str, A
     return result
 
 
+def _label_rows(rows: List[Dict[str, Any]], key: str, table: Any, always: bool = False) -> None:
+    """Fill `key` for a whole row array from `bucket_epoch` via a memoized label table."""
+    labels = table.format_many(r.get("bucket_epoch") for r in rows)
+    for r, label in zip(rows, labels):
+        if always or r.get("bucket") is not None:
+            r[key] = label
+
+
+def _fallback_indicator_rows(data: List[Dict[str, Any]], sel_tag: Optional[str]) -> List[Dict[str, Any]]:
+    """Indicator rows derived from series `avg` for the selected tag (DB indicators missing)."""
+    # Use series rows for the selected tag to derive indicators
+    base_rows = [
+        {"bucket": _to_str(r.get("bucket")), "tag_name": r.get("tag_name"), "avg": _to_float(r.get("avg"))}
+        for r in data if (sel_tag is None or r.get("tag_name") == sel_tag)
+    ]
+    base_rows.sort(key=lambda r: (r.get("bucket") or ""))  # ASC
+    fb = _compute_indicators_fallback(base_rows)
+    inds: List[Dict[str, Any]] = []
+    for r in fb:
+        row = dict(r)
+        if row.get("bucket") is not None:
+            row["bucket_epoch"] = to_epoch(row["bucket"])
+            row["bucket"] = _to_str(row["bucket"])
+        row["avg_s"] = _fmt_s(row.get("avg"), 2)
+        row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
+        row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
+        row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
+        row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
+        row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
+        inds.append(row)
+    _label_rows(inds, "bucket_formatted", CHART_LABELS)
+    _label_rows(inds, "bucket_s", LOCAL_LABELS, always=True)
+    return inds
+
+
+def _build_dashboard_view(
+    data_raw: List[Dict[str, Any]],
+    feats: List[Dict[str, Any]],
+    last: List[Dict[str, Any]],
+    inds_raw: List[Dict[str, Any]],
+    tags_rows: List[Any],
+    qc_rows: List[Dict[str, Any]],
+    sel_tag: Optional[str],
+    win: str,
+    resolution: Optional[str],
+    with_fallback: bool = True,
+    tag_meta: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Shape raw query rows into everything `load()` assigns to the state.
+
+    Pure function (no DB, no state) so the same shaping can be done once per
+    preset by the snapshot builder and shared between sessions.
+    """
+    # Safe copies and normalization
+    data: List[Dict[str, Any]] = []
+    for r in data_raw or []:
+        row = dict(r)
+        row["avg"] = _to_float(row.get("avg"))
+        row["min"] = _to_float(row.get("min"))
+        row["max"] = _to_float(row.get("max"))
+        row["last"] = _to_float(row.get("last"))
+        row["first"] = _to_float(row.get("first"))
+        row["n"] = _to_int(row.get("n"))
+        if row.get("bucket") is not None:
+            row["bucket_epoch"] = to_epoch(row["bucket"])
+            row["bucket"] = _to_str(row["bucket"])
+        # formatted strings for table rendering (avoid client JS expressions)
+        row["avg_s"] = _fmt_s(row.get("avg"), 2)
+        row["min_s"] = _fmt_s(row.get("min"), 2)
+        row["max_s"] = _fmt_s(row.get("max"), 2)
+        row["last_s"] = _fmt_s(row.get("last"), 2)
+        row["first_s"] = _fmt_s(row.get("first"), 2)
+        row["n_s"] = _fmt_s_int(row.get("n"))
+        data.append(row)
+    # X축용 포맷된 타임스탬프 (년-월-일 시:분) - 고유 버킷당 1회만 포맷
+    _label_rows(data, "bucket_formatted", CHART_LABELS)
+
+    inds: List[Dict[str, Any]] = []
+    for r in inds_raw or []:
+        row = dict(r)
+        for k in ("avg", "sma_10", "sma_60", "bb_top", "bb_bot", "slope_60"):
+            row[k] = _to_float(row.get(k))
+        if row.get("bucket") is not None:
+            row["bucket_epoch"] = to_epoch(row["bucket"])
+            row["bucket"] = _to_str(row["bucket"])
+        # formatted strings for table rendering
+        row["avg_s"] = _fmt_s(row.get("avg"), 2)
+        row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
+        row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
+        row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
+        row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
+        row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
+        inds.append(row)
+    _label_rows(inds, "bucket_formatted", CHART_LABELS)
+    _label_rows(inds, "bucket_s", LOCAL_LABELS, always=True)
+
+    # If no indicator rows for the selected tag, compute a safe fallback from series
+    has_for_sel = any((r.get("tag_name") == sel_tag) for r in inds) if sel_tag else bool(inds)
+    if with_fallback and not has_for_sel:
+        inds = _fallback_indicator_rows(data, sel_tag)
+
+    ind_index: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {
+        (row.get("bucket"), row.get("tag_name")): row for row in inds
+    }
+
+    merged: List[Dict[str, Any]] = []
+    for r in data:
+        key = (r.get("bucket"), r.get("tag_name"))
+        ind = ind_index.get(key)
+        row = dict(r)
+        if ind:
+            row.update({
+                "sma_10": ind.get("sma_10"),
+                "sma_60": ind.get("sma_60"),
+                "bb_top": ind.get("bb_top"),
+                "bb_bot": ind.get("bb_bot"),
+                "slope_60": ind.get("slope_60"),
+            })
+            bt, bb = row.get("bb_top"), row.get("bb_bot")
+            row["bb_range"] = (bt - bb) if (bt is not None and bb is not None) else None
+        # ensure formatted strings exist after merge as well (for table use)
+        row["avg_s"] = _fmt_s(row.get("avg"), 2)
+        row["min_s"] = _fmt_s(row.get("min"), 2)
+        row["max_s"] = _fmt_s(row.get("max"), 2)
+        row["last_s"] = _fmt_s(row.get("last"), 2)
+        row["first_s"] = _fmt_s(row.get("first"), 2)
+        row["n_s"] = _fmt_s_int(row.get("n"))
+        if ind:
+            row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
+            row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
+            row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
+            row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
+            row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
+        merged.append(row)
+
+    merged.sort(key=lambda r: ((r.get("tag_name") or ""), (r.get("bucket") or "")))
+    inds.sort(key=lambda r: ((r.get("tag_name") or ""), (r.get("bucket") or "")))
+
+    tag_values: List[str] = []
+    for t in tags_rows or []:
+        if isinstance(t, dict) and "tag_name" in t:
+            tag_values.append(str(t["tag_name"]))
+        else:
+            tag_values.append(str(t))
+
+    # Build percentile map for alarm evaluation (latest features per tag)
+    perc_map: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    for f in (feats or []):
+        t = f.get("tag_name")
+        b = _to_str(f.get("bucket")) or ""
+        key = (t, b)
+        if t is None:
+            continue
+        # keep highest bucket per tag
+        if t not in perc_map or b > (perc_map[t][2] if len(perc_map[t]) > 2 else ""):
+            p10 = _to_float(f.get("p10_5m"))
+            p90 = _to_float(f.get("p90_5m"))
+            perc_map[t] = (p10, p90, b)  # store bucket for comparison
+    # Process latest rows with Comm/Alarm
+    processed_latest: List[Dict[str, Any]] = []
+    # infer bucket seconds from resolution/window
+    res = resolution or ("1m" if win in {"1 hour", "4 hours", "24 hours"} else "1h")
+    bucket_seconds = 60 if res == "1m" else (600 if res == "10m" else 3600)
+    # Ensure timezone-aware subtraction
+    now_ts = datetime.now(ts_dt.tzinfo) if ("ts_dt" in locals() and ts_dt.tzinfo) else datetime.now()
+    for r in (last or []):
+        row = dict(r)
+        ts_raw = r.get("ts")
+        try:
+            ts_dt = datetime.fromisoformat(str(ts_raw))
+        except Exception:  # noqa: BLE001
+            ts_dt = now_ts - timedelta(days=365)
+        # Recompute now_ts with tz of ts_dt to avoid naive/aware mismatch
+        now_local = datetime.now(ts_dt.tzinfo) if ts_dt.tzinfo else datetime.now()
+        age = (now_local - ts_dt).total_seconds()
+        comm_ok = age <= bucket_seconds * 2
+        comm_label = "OK" if comm_ok else "STALE"
+        p = perc_map.get(r.get("tag_name", ""), (None, None, ""))
+        p10 = p[0]
+        p90 = p[1]
+        val = _to_float(r.get("value"))
+        alarm = False
+        if val is None or not comm_ok:
+            alarm = True
+        elif p10 is not None and p90 is not None and (val < p10 or val > p90):
+            alarm = True
+        row["comm_label"] = comm_label
+        row["alarm_label"] = "Alarm" if alarm else "-"
+        processed_latest.append(row)
+
+    # 최신 스냅샷도 시간 내림차순 정렬
+    try:
+        processed_latest.sort(key=lambda r: str(r.get("ts") or ""), reverse=True)
+    except Exception:  # noqa: BLE001
+        pass
+
+    # Build KPI rows for all tags
+    rows_by_tag: Dict[str, List[Dict[str, Any]]] = {}
+    for r in merged:
+        t = str(r.get("tag_name") or "")
+        if not t:
+            continue
+        rows_by_tag.setdefault(t, []).append(r)
+    latest_by_tag: Dict[str, Any] = {}
+    for r in processed_latest:
+        latest_by_tag[str(r.get("tag_name"))] = r
+    # QC map
+    qc_by_tag: Dict[str, Dict[str, Any]] = {}
+    for r in qc_rows or []:
+        try:
+            qc_by_tag[str(r.get("tag_name"))] = dict(r)
+        except Exception:  # noqa: BLE001
+            continue
+    # 태그 메타 (단위)
+    unit_by_tag: Dict[str, str] = {
+        str(r.get("tag_name")): str(r.get("unit") or "") for r in tag_meta or []
+    }
+    krows: List[Dict[str, Any]] = []
+
+    # 미니 차트 데이터 준비 (윈도우에 따른 적절한 개수)
+    mini_data: Dict[str, List[Dict[str, Any]]] = {}
+    for tag in rows_by_tag.keys():
+        tag_rows = rows_by_tag[tag]
+        # 시간 순서로 정렬 (모든 데이터 사용)
+        sorted_rows = sorted(tag_rows, key=lambda x: str(x.get("bucket") or ""))
+
+        # 미니 차트용 데이터 형식으로 변환 (avg 필드 사용)
+        chart_data = []
+        for row in sorted_rows:
+            avg_val = row.get("avg")
+            if avg_val is not None:
+                chart_data.append({
+                    "bucket": SHORT_LABELS.label(row.get("bucket_epoch")),
+                    "avg": float(avg_val),
+                    "bucket_full": row.get("bucket")  # 디버깅용 전체 타임스탬프
+                })
+        mini_data[tag] = chart_data
+
+    for t in sorted(rows_by_tag.keys()):
+        try:
+            arr = rows_by_tag[t]
+            arr_sorted = sorted(arr, key=lambda x: str(x.get("bucket") or ""))
+            avgs = [v.get("avg") for v in arr if isinstance(v.get("avg"), (int, float))]
+            mins = [v.get("min") for v in arr if isinstance(v.get("min"), (int, float))]
+            maxs = [v.get("max") for v in arr if isinstance(v.get("max"), (int, float))]
+            cnt = len(arr)
+            latest_ts = latest_by_tag.get(t, {}).get("ts")
+            # window first/last (시계열 내 첫/마지막 버킷의 first/last 컬럼)
+            first_in_win = _to_float(arr_sorted[0].get("first")) if arr_sorted else None
+            last_in_win = _to_float(arr_sorted[-1].get("last")) if arr_sorted else None
+            prev_last_in_win = _to_float(arr_sorted[-2].get("last")) if len(arr_sorted) >= 2 else None
+            # delta: 최근 두 버킷의 last 변화율(%) - 실제 계산
+            delta_pct: float = 0.0
+            try:
+                if last_in_win is not None and prev_last_in_win not in (None, 0):
+                    delta_pct = (float(last_in_win - prev_last_in_win) / abs(float(prev_last_in_win))) * 100.0
+            except Exception:
+                delta_pct = 0.0
+            # gauge percent: 값에 기반한 간단한 계산 (100을 기준으로 정규화)
+            gauge_pct: float = 0.0
+            qc = qc_by_tag.get(t, {})
+            def _fv(x):
+                try:
+                    return float(x) if x is not None else None
+                except Exception:
+                    return None
+            warn_min = _fv(qc.get("warn_min"))
+            warn_max = _fv(qc.get("warn_max"))
+            crit_min = _fv(qc.get("crit_min"))
+            crit_max = _fv(qc.get("crit_max"))
+            hard_min = _fv(qc.get("min_val"))
+            hard_max = _fv(qc.get("max_val"))
+
+            # 게이지 퍼센트: 실제 데이터 기반 동적 계산
+            gauge_pct: float = 0.0
+            try:
+                # QC 범위가 있으면 QC 기준으로 계산
+                if (
+                    last_in_win is not None and
+                    hard_min is not None and
+                    hard_max is not None and
+                    hard_max > hard_min
+                ):
+                    pos = (float(last_in_win) - hard_min) / (hard_max - hard_min)
+                    gauge_pct = max(0.0, min(100.0, pos * 100.0))
+                # QC 범위가 없으면 윈도우 범위 기준으로 계산
+                elif last_in_win is not None:
+                    win_min = float(min(mins)) if mins else None
+                    win_max = float(max(maxs)) if maxs else None
+                    if (
+                        win_min is not None and
+                        win_max is not None and
+                        win_max > win_min
+                    ):
+                        pos = (float(last_in_win) - win_min) / (win_max - win_min)
+                        gauge_pct = max(0.0, min(100.0, pos * 100.0))
+                    else:
+                        # 범위를 구할 수 없으면 절대값 기준으로 계산
+                        if float(last_in_win) >= 0:
+                            gauge_pct = min(100.0, abs(float(last_in_win)) / 200.0 * 100.0)
+                        else:
+                            gauge_pct = max(0.0, 100.0 - abs(float(last_in_win)) / 50.0 * 100.0)
+            except Exception:
+                gauge_pct = 50.0  # 기본값
+
+            # severity by qc ranges
+            severity = 0
+            if last_in_win is not None:
+                if (hard_min is not None and last_in_win < hard_min) or (hard_max is not None and last_in_win > hard_max):
+                    severity = 2
+                elif (crit_min is not None and last_in_win < crit_min) or (crit_max is not None and last_in_win > crit_max):
+                    severity = 2
+                elif (warn_min is not None and last_in_win < warn_min) or (warn_max is not None and last_in_win > warn_max):
+                    severity = 1
+
+            status_level = 0 if severity == 0 else (1 if severity == 1 else 2)
+
+            # 테스트용 임시 알람 상태 (gauge_pct 기준)
+            if severity == 0:
+                # 특별 케이스: 음수값은 항상 위험 (최우선)
+                if last_in_win is not None and last_in_win < 0:
+                    status_level = 2
+                elif gauge_pct >= 90:  # 90% 이상 → 위험 (빨강)
+                    status_level = 2
+                elif gauge_pct >= 70:  # 70% 이상 → 경고 (노랑)
+                    status_level = 1
+            qc_label_s = (
+                (f"{hard_min:.1f} ~ {hard_max:.1f}" if (hard_min is not None and hard_max is not None) else (f"{win_min:.1f} ~ {win_max:.1f}" if (win_min is not None and win_max is not None) else ""))
+            )
+            # 통신 상태 가져오기
+            latest_tag_data = latest_by_tag.get(t, {})
+            comm_status = latest_tag_data.get("is_comm_ok", True)
+            comm_text = "OK" if comm_status else "ERR"
+
+            krows.append({
+                "tag_name": t,
+                # 메인 표시는 마지막 값
+                "value_s": _fmt_s(last_in_win if last_in_win is not None else _to_float(latest_by_tag.get(t, {}).get("value")), 1),
+                "ts_s": _fmt_ts_short(latest_ts),
+                "avg_s": _fmt_s((sum(avgs) / len(avgs)) if avgs else 0.0, 1),
+                "count_s": _fmt_s_int(cnt),
+                "min_s": _fmt_s(min(mins) if mins else 0.0, 1),
+                "max_s": _fmt_s(max(maxs) if maxs else 0.0, 1),
+                "first_s": _fmt_s(first_in_win, 1) if first_in_win is not None else "0.0",
+                "last_s": _fmt_s(last_in_win, 1) if last_in_win is not None else "0.0",
+                "delta_pct": round(delta_pct, 1),
+                "delta_s": f"{delta_pct:+.1f}%",
+                "gauge_pct": round(gauge_pct, 1),
+                "status_level": status_level,
+                "range_label": qc_label_s,
+                "mini_chart_data": mini_data.get(t, []),
+                "comm_status": comm_status,
+                "comm_text": comm_text,
+                "qc_min": hard_min,
+                "qc_max": hard_max,
+                "unit": unit_by_tag.get(t, ""),
+            })
+        except Exception:
+            krows.append({
+                "tag_name": t,
+                "value_s": "Error",
+                "ts_s": "",
+                "avg_s": "0.0",
+                "count_s": "0",
+                "min_s": "0.0",
+                "max_s": "0.0",
+                "first_s": "0.0",
+                "last_s": "0.0",
+                "delta_pct": 0.0,
+                "delta_s": "±0.0%",
+                "gauge_pct": 0.0,
+                "status_level": 2,  # Indicate error status
+                "range_label": "Error",
+                "mini_chart_data": [],
+                "unit": unit_by_tag.get(t, ""),
+            })
+
+    return {
+        "series": merged,
+        "indicators": inds,
+        "features": list(feats or []),
+        "latest": processed_latest,
+        "tags": tag_values,
+        "qc": list(qc_rows or []),
+        "kpi_rows": krows,
+        "mini_data": mini_data,
+    }
+
+
+def _view_from_snapshot(snap: PresetSnapshot, path: str, sel_tag: Optional[str]) -> Dict[str, Any]:
+    """Session view over a shared preset snapshot (shallow copies, shared rows).
+
+    Follows the page's PageSpec like `_build_dashboard_view`: the indicator
+    fallback only when the page loads indicators, features for all tags.
+    """
+    inds = list(snap.indicators)
+    loaded = PAGE_LOADER.resolve(PAGE_LOADER.page(path).datasets)
+    if "indicators" in loaded and sel_tag and not any(r.get("tag_name") == sel_tag for r in inds):
+        inds = _fallback_indicator_rows(list(snap.series), sel_tag)
+    return {
+        "series": list(snap.series),
+        "indicators": inds,
+        "features": list(snap.features),
+        "latest": list(snap.latest),
+        "tags": list(snap.tags),
+        "qc": list(snap.qc),
+        # 실시간 차트 데이터가 행에 기록되므로 KPI 행은 세션별 사본
+        "kpi_rows": [dict(r) for r in snap.kpi_rows],
+        "mini_data": dict(snap.mini_data),
+    }
+
+
+def _session_view(shared: Dict[str, Any]) -> Dict[str, Any]:
+    """Session view over a shared load result (lists are per session, rows shared)."""
+    view = {k: list(v) if isinstance(v, (list, tuple)) else v for k, v in shared.items()}
+    view["kpi_rows"] = [dict(r) for r in shared["kpi_rows"]]
+    view["mini_data"] = dict(shared["mini_data"])
+    return view
+
+
+def _preset_sources(window: str, resolution: Optional[str]) -> Tuple[str, ...]:
+    """Aggregates whose refresh watermark invalidates a preset snapshot."""
+    return (series_view(_norm_window(window), resolution),)
+
+
+async def _build_preset_snapshot(window: str, resolution: Optional[str]) -> Dict[str, Any]:
+    """All-tag dashboard view for one preset (the `/` page loader with no tag)."""
+    win = _norm_window(window)
+    ds = await PAGE_LOADER.load("/", LoadParams(win, resolution))
+    return _build_dashboard_view(
+        ds.get("series", []), ds.get("features", []), ds.get("latest", []),
+        ds.get("indicators", []), ds.get("tags", []), ds.get("qc", []),
+        None, win, resolution, with_fallback=False, tag_meta=ds.get("tag_meta", []),
+    )
+
+
+PRESET_SNAPSHOTS = PresetSnapshotStore(_build_preset_snapshot, _preset_sources)
+
+
+async def preset_snapshot_task():
+    """Lifespan task: keep the preset snapshots fresh for all sessions."""
+    await PRESET_SNAPSHOTS.run_forever()
+
+
 class DashboardState(rx.State):
     tag_name: Optional[str] = None
     window: str = "5 min"
@@ -300,8 +707,13 @@ class DashboardState(rx.State):
     # Real-time loop control (중복 실행 방지)
     _realtime_loop_id: Optional[str] = None  # 현재 실행 중인 실시간 루프 ID
     _realtime_loop_running: bool = False     # 실시간 루프 실행 상태 플래그
+    _idle_watch_running: bool = False        # 유휴 감시 이벤트 실행 상태 플래그
     # Manual refresh token
     reload_token: int = 0
+    # 프리셋 스냅샷 기준 시각 (스냅샷에서 로딩한 경우에만 표시)
+    snapshot_at_s: str = ""
+    # 유휴/예산 초과로 대용량 필드를 비운 상태 (다음 load()에서 재로딩)
+    evicted: bool = False
     
     # Checkbox toggle methods for composed mode
     def toggle_trend_composed_item(self, value: str, checked: bool):
@@ -419,8 +831,9 @@ class DashboardState(rx.State):
     async def load(self):
         # 트렌드 페이지 감지를 먼저 수행 (전체 함수에서 사용)
         is_trend_page = False
+        current_path = "/"
         try:
-            current_path = self.router.url.path
+            current_path = self.router.url.path or "/"
             is_trend_page = (current_path == "/trend")
         except:
             pass
@@ -428,6 +841,11 @@ class DashboardState(rx.State):
         async with self:
             self.loading = True
             self.error = None
+            # 사용자 조회 = 세션 활동 (유휴 상태였다면 여기서 재로딩)
+            session_id = self._session_id()
+            sweep()
+            SESSION_MEMORY.touch(session_id)
+            self.evicted = False
             # 차트 원래 시리즈(Avg/Min/Max/Last/First) 기본 표시 강제
             self.show_avg = True
             self.show_min = True
@@ -443,193 +861,57 @@ class DashboardState(rx.State):
             start_iso = self.start_iso
             end_iso = self.end_iso
             
-            # 캐시 시스템 제거 - 실시간 데이터 우선으로 직접 쿼리 실행
-            if not is_trend_page:
-                data_coro = timeseries(win, None, self.resolution, start_iso, end_iso)  # for Dashboard KPIs we need all tags
-                feats_coro = features_5m(win, self.tag_name)
-                last_coro = latest_snapshot(None)
-                qc_coro = qc_rules(None)
+            # 프리셋 구간(1H/1D/1W/1M/3M/1Y)은 백그라운드 스냅샷을 공유 - DB 조회 없음
+            snap = None
+            if current_path == "/" and not (start_iso and end_iso):
+                snap = PRESET_SNAPSHOTS.get(self.window, self.resolution)
+
+            if snap is not None:
+                # 스냅샷 행은 공유 저장소에 참조 등록 (세션 메모리 계산에서 제외)
+                key = ("preset", snap.window, snap.resolution, snap.built_at)
+                if SHARED_DATASETS.get(key, max_age_s=float("inf")) is None:
+                    SHARED_DATASETS.acquire(session_id, key, {
+                        "series": snap.series, "indicators": snap.indicators,
+                        "features": snap.features, "latest": snap.latest,
+                    })
+                else:
+                    SHARED_DATASETS.acquire(session_id, key)
+                view = _view_from_snapshot(snap, current_path, self.tag_name)
+                snapshot_at_s = _fmt_ts_short(snap.built_at)
             else:
-                # 트렌드 페이지에서는 선택된 태그만 로딩
-                data_coro = timeseries(win, self.tag_name, self.resolution, start_iso, end_iso)
-                feats_coro = asyncio.create_task(asyncio.sleep(0, result=[]))
-                last_coro = asyncio.create_task(asyncio.sleep(0, result=[]))
-                qc_coro = asyncio.create_task(asyncio.sleep(0, result=[]))
-            
-            # 기술지표도 시간 범위에 따른 적응적 해상도 사용
-            inds_coro = tech_indicators_adaptive(win, self.tag_name)
-            tags_coro = tags_list()
+                # 같은 조건의 최근 결과가 있으면 세션 간 공유 (갱신 주기 내)
+                sel_tag = None if current_path == "/" else self.tag_name
+                key = (current_path, win, self.resolution, sel_tag, start_iso, end_iso)
+                shared = SHARED_DATASETS.get(key)
+                if shared is None:
+                    # 페이지가 렌더링하는 데이터셋만 조회 (태그/QC/메타는 프로세스 캐시)
+                    ds = await PAGE_LOADER.load(
+                        current_path,
+                        LoadParams(win, self.resolution, sel_tag, start_iso, end_iso),
+                    )
+                    shared = SHARED_DATASETS.acquire(session_id, key, _build_dashboard_view(
+                        ds.get("series", []), ds.get("features", []), ds.get("latest", []),
+                        ds.get("indicators", []), ds.get("tags", []), ds.get("qc", []),
+                        sel_tag, win, self.resolution,
+                        with_fallback="indicators" in ds,
+                        tag_meta=ds.get("tag_meta", []),
+                    ))
+                else:
+                    SHARED_DATASETS.acquire(session_id, key)
+                view = _session_view(shared)
+                snapshot_at_s = ""
 
-            data_raw, feats, last, inds_raw, tags_rows, qc_rows = await asyncio.gather(
-                data_coro, feats_coro, last_coro, inds_coro, tags_coro, qc_coro
-            )
-            
             # Alarm data (not implemented yet, set to empty)
             alarms_raw, alarm_summary_raw, recent_anomalies_raw = [], {}, []
 
-            # Safe copies and normalization
-            data: List[Dict[str, Any]] = []
-            for r in data_raw or []:
-                row = dict(r)
-                row["avg"] = _to_float(row.get("avg"))
-                row["min"] = _to_float(row.get("min"))
-                row["max"] = _to_float(row.get("max"))
-                row["last"] = _to_float(row.get("last"))
-                row["first"] = _to_float(row.get("first"))
-                row["n"] = _to_int(row.get("n"))
-                if row.get("bucket") is not None:
-                    row["bucket"] = _to_str(row["bucket"])
-                    # X축용 포맷된 타임스탬프 (년-월-일 시:분)
-                    row["bucket_formatted"] = _fmt_ts_short_chart(row.get("bucket"))
-                # formatted strings for table rendering (avoid client JS expressions)
-                row["avg_s"] = _fmt_s(row.get("avg"), 2)
-                row["min_s"] = _fmt_s(row.get("min"), 2)
-                row["max_s"] = _fmt_s(row.get("max"), 2)
-                row["last_s"] = _fmt_s(row.get("last"), 2)
-                row["first_s"] = _fmt_s(row.get("first"), 2)
-                row["n_s"] = _fmt_s_int(row.get("n"))
-                data.append(row)
-
-            inds: List[Dict[str, Any]] = []
-            for r in inds_raw or []:
-                row = dict(r)
-                for k in ("avg", "sma_10", "sma_60", "bb_top", "bb_bot", "slope_60"):
-                    row[k] = _to_float(row.get(k))
-                if row.get("bucket") is not None:
-                    row["bucket"] = _to_str(row["bucket"])
-                    # X축용 포맷된 타임스탬프 (년-월-일 시:분)
-                    row["bucket_formatted"] = _fmt_ts_short_chart(row.get("bucket"))
-                row["bucket_s"] = _fmt_ts_local(row.get("bucket"))
-                # formatted strings for table rendering
-                row["avg_s"] = _fmt_s(row.get("avg"), 2)
-                row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
-                row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
-                row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
-                row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
-                row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
-                inds.append(row)
-
-            # If no indicator rows for the selected tag, compute a safe fallback from series
-            sel_tag = self.tag_name
-            has_for_sel = any((r.get("tag_name") == sel_tag) for r in inds) if sel_tag else bool(inds)
-            if not has_for_sel:
-                # Use series rows for the selected tag to derive indicators
-                base_rows = [
-                    {"bucket": _to_str(r.get("bucket")), "tag_name": r.get("tag_name"), "avg": _to_float(r.get("avg"))}
-                    for r in data if (sel_tag is None or r.get("tag_name") == sel_tag)
-                ]
-                base_rows.sort(key=lambda r: (r.get("bucket") or ""))  # ASC
-                fb = _compute_indicators_fallback(base_rows)
-                inds = []
-                for r in fb:
-                    row = dict(r)
-                    if row.get("bucket") is not None:
-                        row["bucket"] = _to_str(row["bucket"])
-                        # X축용 포맷된 타임스탬프 (년-월-일 시:분)
-                        row["bucket_formatted"] = _fmt_ts_short_chart(row.get("bucket"))
-                    row["bucket_s"] = _fmt_ts_local(row.get("bucket"))
-                    row["avg_s"] = _fmt_s(row.get("avg"), 2)
-                    row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
-                    row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
-                    row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
-                    row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
-                    row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
-                    inds.append(row)
-
-            ind_index: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {
-                (row.get("bucket"), row.get("tag_name")): row for row in inds
-            }
-
-            merged: List[Dict[str, Any]] = []
-            for r in data:
-                key = (r.get("bucket"), r.get("tag_name"))
-                ind = ind_index.get(key)
-                row = dict(r)
-                if ind:
-                    row.update({
-                        "sma_10": ind.get("sma_10"),
-                        "sma_60": ind.get("sma_60"),
-                        "bb_top": ind.get("bb_top"),
-                        "bb_bot": ind.get("bb_bot"),
-                        "slope_60": ind.get("slope_60"),
-                    })
-                    bt, bb = row.get("bb_top"), row.get("bb_bot")
-                    row["bb_range"] = (bt - bb) if (bt is not None and bb is not None) else None
-                # ensure formatted strings exist after merge as well (for table use)
-                row["avg_s"] = _fmt_s(row.get("avg"), 2)
-                row["min_s"] = _fmt_s(row.get("min"), 2)
-                row["max_s"] = _fmt_s(row.get("max"), 2)
-                row["last_s"] = _fmt_s(row.get("last"), 2)
-                row["first_s"] = _fmt_s(row.get("first"), 2)
-                row["n_s"] = _fmt_s_int(row.get("n"))
-                if ind:
-                    row["sma_10_s"] = _fmt_s(row.get("sma_10"), 2)
-                    row["sma_60_s"] = _fmt_s(row.get("sma_60"), 2)
-                    row["bb_top_s"] = _fmt_s(row.get("bb_top"), 2)
-                    row["bb_bot_s"] = _fmt_s(row.get("bb_bot"), 2)
-                    row["slope_60_s"] = _fmt_s(row.get("slope_60"), 2)
-                merged.append(row)
-
-            merged.sort(key=lambda r: ((r.get("tag_name") or ""), (r.get("bucket") or "")))
-            inds.sort(key=lambda r: ((r.get("tag_name") or ""), (r.get("bucket") or "")))
-
-            tag_values: List[str] = []
-            for t in tags_rows or []:
-                if isinstance(t, dict) and "tag_name" in t:
-                    tag_values.append(str(t["tag_name"]))
-                else:
-                    tag_values.append(str(t))
-
-            # Build percentile map for alarm evaluation (latest features per tag)
-            perc_map: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
-            for f in (feats or []):
-                t = f.get("tag_name")
-                b = _to_str(f.get("bucket")) or ""
-                key = (t, b)
-                if t is None:
-                    continue
-                # keep highest bucket per tag
-                if t not in perc_map or b > (perc_map[t][2] if len(perc_map[t]) > 2 else ""):
-                    p10 = _to_float(f.get("p10_5m"))
-                    p90 = _to_float(f.get("p90_5m"))
-                    perc_map[t] = (p10, p90, b)  # store bucket for comparison
-            # Process latest rows with Comm/Alarm
-            processed_latest: List[Dict[str, Any]] = []
-            # infer bucket seconds from resolution/window
-            res = self.resolution or ("1m" if win in {"1 hour", "4 hours", "24 hours"} else "1h")
-            bucket_seconds = 60 if res == "1m" else (600 if res == "10m" else 3600)
-            # Ensure timezone-aware subtraction
-            now_ts = datetime.now(ts_dt.tzinfo) if ("ts_dt" in locals() and ts_dt.tzinfo) else datetime.now()
-            for r in (last or []):
-                row = dict(r)
-                ts_raw = r.get("ts")
-                try:
-                    ts_dt = datetime.fromisoformat(str(ts_raw))
-                except Exception:  # noqa: BLE001
-                    ts_dt = now_ts - timedelta(days=365)
-                # Recompute now_ts with tz of ts_dt to avoid naive/aware mismatch
-                now_local = datetime.now(ts_dt.tzinfo) if ts_dt.tzinfo else datetime.now()
-                age = (now_local - ts_dt).total_seconds()
-                comm_ok = age <= bucket_seconds * 2
-                comm_label = "OK" if comm_ok else "STALE"
-                p = perc_map.get(r.get("tag_name", ""), (None, None, ""))
-                p10 = p[0]
-                p90 = p[1]
-                val = _to_float(r.get("value"))
-                alarm = False
-                if val is None or not comm_ok:
-                    alarm = True
-                elif p10 is not None and p90 is not None and (val < p10 or val > p90):
-                    alarm = True
-                row["comm_label"] = comm_label
-                row["alarm_label"] = "Alarm" if alarm else "-"
-                processed_latest.append(row)
-
-            # 최신 스냅샷도 시간 내림차순 정렬
-            try:
-                processed_latest.sort(key=lambda r: str(r.get("ts") or ""), reverse=True)
-            except Exception:  # noqa: BLE001
-                pass
+            merged = view["series"]
+            inds = view["indicators"]
+            feats = view["features"]
+            processed_latest = view["latest"]
+            tag_values = view["tags"]
+            qc_rows = view["qc"]
+            krows = view["kpi_rows"]
+            mini_data = view["mini_data"]
 
             async with self:
                 # 최초 기동 시: 선택 태그가 없으면 목록의 첫 번째 태그로 자동 설정
@@ -675,187 +957,12 @@ class DashboardState(rx.State):
                 self.active_alarms = list(alarms_raw or [])
                 self.alarm_summary = alarm_summary_raw or {}
                 self.recent_anomalies = list(recent_anomalies_raw or [])
-                # Build KPI rows for all tags
-                rows_by_tag: Dict[str, List[Dict[str, Any]]] = {}
-                for r in merged:
-                    t = str(r.get("tag_name") or "")
-                    if not t:
-                        continue
-                    rows_by_tag.setdefault(t, []).append(r)
-                latest_by_tag: Dict[str, Any] = {}
-                for r in processed_latest:
-                    latest_by_tag[str(r.get("tag_name"))] = r
-                # QC map
-                qc_by_tag: Dict[str, Dict[str, Any]] = {}
-                for r in qc_rows or []:
-                    try:
-                        qc_by_tag[str(r.get("tag_name"))] = dict(r)
-                    except Exception:  # noqa: BLE001
-                        continue
-                krows: List[Dict[str, Any]] = []
-                
-                # 미니 차트 데이터 준비 (윈도우에 따른 적절한 개수)
-                mini_data: Dict[str, List[Dict[str, Any]]] = {}
-                for tag in rows_by_tag.keys():
-                    tag_rows = rows_by_tag[tag]
-                    # 시간 순서로 정렬 (모든 데이터 사용)
-                    sorted_rows = sorted(tag_rows, key=lambda x: str(x.get("bucket") or ""))
-                    
-                    # 미니 차트용 데이터 형식으로 변환 (avg 필드 사용)
-                    chart_data = []
-                    for row in sorted_rows:
-                        avg_val = row.get("avg")
-                        if avg_val is not None:
-                            chart_data.append({
-                                "bucket": _fmt_ts_short(row.get("bucket")),
-                                "avg": float(avg_val),
-                                "bucket_full": row.get("bucket")  # 디버깅용 전체 타임스탬프
-                            })
-                    mini_data[tag] = chart_data
-                
-                for t in sorted(rows_by_tag.keys()):
-                    try:
-                        arr = rows_by_tag[t]
-                        arr_sorted = sorted(arr, key=lambda x: str(x.get("bucket") or ""))
-                        avgs = [v.get("avg") for v in arr if isinstance(v.get("avg"), (int, float))]
-                        mins = [v.get("min") for v in arr if isinstance(v.get("min"), (int, float))]
-                        maxs = [v.get("max") for v in arr if isinstance(v.get("max"), (int, float))]
-                        cnt = len(arr)
-                        latest_ts = latest_by_tag.get(t, {}).get("ts")
-                        # window first/last (시계열 내 첫/마지막 버킷의 first/last 컬럼)
-                        first_in_win = _to_float(arr_sorted[0].get("first")) if arr_sorted else None
-                        last_in_win = _to_float(arr_sorted[-1].get("last")) if arr_sorted else None
-                        prev_last_in_win = _to_float(arr_sorted[-2].get("last")) if len(arr_sorted) >= 2 else None
-                        # delta: 최근 두 버킷의 last 변화율(%) - 실제 계산
-                        delta_pct: float = 0.0
-                        try:
-                            if last_in_win is not None and prev_last_in_win not in (None, 0):
-                                delta_pct = (float(last_in_win - prev_last_in_win) / abs(float(prev_last_in_win))) * 100.0
-                        except Exception:
-                            delta_pct = 0.0
-                        # gauge percent: 값에 기반한 간단한 계산 (100을 기준으로 정규화)
-                        gauge_pct: float = 0.0
-                        qc = qc_by_tag.get(t, {})
-                        def _fv(x):
-                            try:
-                                return float(x) if x is not None else None
-                            except Exception:
-                                return None
-                        warn_min = _fv(qc.get("warn_min"))
-                        warn_max = _fv(qc.get("warn_max"))
-                        crit_min = _fv(qc.get("crit_min"))
-                        crit_max = _fv(qc.get("crit_max"))
-                        hard_min = _fv(qc.get("min_val"))
-                        hard_max = _fv(qc.get("max_val"))
-                        
-                        # 게이지 퍼센트: 실제 데이터 기반 동적 계산
-                        gauge_pct: float = 0.0
-                        try:
-                            # QC 범위가 있으면 QC 기준으로 계산
-                            if (
-                                last_in_win is not None and
-                                hard_min is not None and
-                                hard_max is not None and
-                                hard_max > hard_min
-                            ):
-                                pos = (float(last_in_win) - hard_min) / (hard_max - hard_min)
-                                gauge_pct = max(0.0, min(100.0, pos * 100.0))
-                            # QC 범위가 없으면 윈도우 범위 기준으로 계산
-                            elif last_in_win is not None:
-                                win_min = float(min(mins)) if mins else None
-                                win_max = float(max(maxs)) if maxs else None
-                                if (
-                                    win_min is not None and
-                                    win_max is not None and
-                                    win_max > win_min
-                                ):
-                                    pos = (float(last_in_win) - win_min) / (win_max - win_min)
-                                    gauge_pct = max(0.0, min(100.0, pos * 100.0))
-                                else:
-                                    # 범위를 구할 수 없으면 절대값 기준으로 계산
-                                    if float(last_in_win) >= 0:
-                                        gauge_pct = min(100.0, abs(float(last_in_win)) / 200.0 * 100.0)
-                                    else:
-                                        gauge_pct = max(0.0, 100.0 - abs(float(last_in_win)) / 50.0 * 100.0)
-                        except Exception:
-                            gauge_pct = 50.0  # 기본값
-                        
-                        # severity by qc ranges
-                        severity = 0
-                        if last_in_win is not None:
-                            if (hard_min is not None and last_in_win < hard_min) or (hard_max is not None and last_in_win > hard_max):
-                                severity = 2
-                            elif (crit_min is not None and last_in_win < crit_min) or (crit_max is not None and last_in_win > crit_max):
-                                severity = 2
-                            elif (warn_min is not None and last_in_win < warn_min) or (warn_max is not None and last_in_win > warn_max):
-                                severity = 1
-
-                        status_level = 0 if severity == 0 else (1 if severity == 1 else 2)
-                        
-                        # 테스트용 임시 알람 상태 (gauge_pct 기준)
-                        if severity == 0:
-                            # 특별 케이스: 음수값은 항상 위험 (최우선)
-                            if last_in_win is not None and last_in_win < 0:
-                                status_level = 2
-                            elif gauge_pct >= 90:  # 90% 이상 → 위험 (빨강)
-                                status_level = 2
-                            elif gauge_pct >= 70:  # 70% 이상 → 경고 (노랑)
-                                status_level = 1
-                        qc_label_s = (
-                            (f"{hard_min:.1f} ~ {hard_max:.1f}" if (hard_min is not None and hard_max is not None) else (f"{win_min:.1f} ~ {win_max:.1f}" if (win_min is not None and win_max is not None) else ""))
-                        )
-                        # 통신 상태 가져오기
-                        latest_tag_data = latest_by_tag.get(t, {})
-                        comm_status = latest_tag_data.get("is_comm_ok", True)
-                        comm_text = "OK" if comm_status else "ERR"
-                        
-                        krows.append({
-                            "tag_name": t,
-                            # 메인 표시는 마지막 값
-                            "value_s": _fmt_s(last_in_win if last_in_win is not None else _to_float(latest_by_tag.get(t, {}).get("value")), 1),
-                            "ts_s": _fmt_ts_short(str(latest_ts) if latest_ts is not None else None),
-                            "avg_s": _fmt_s((sum(avgs) / len(avgs)) if avgs else 0.0, 1),
-                            "count_s": _fmt_s_int(cnt),
-                            "min_s": _fmt_s(min(mins) if mins else 0.0, 1),
-                            "max_s": _fmt_s(max(maxs) if maxs else 0.0, 1),
-                            "first_s": _fmt_s(first_in_win, 1) if first_in_win is not None else "0.0",
-                            "last_s": _fmt_s(last_in_win, 1) if last_in_win is not None else "0.0",
-                            "delta_pct": round(delta_pct, 1),
-                            "delta_s": f"{delta_pct:+.1f}%",
-                            "gauge_pct": round(gauge_pct, 1),
-                            "status_level": status_level,
-                            "range_label": qc_label_s,
-                            "mini_chart_data": mini_data.get(t, []),
-                            "comm_status": comm_status,
-                            "comm_text": comm_text,
-                            "qc_min": hard_min,
-                            "qc_max": hard_max,
-                            "unit": "",  # 나중에 테이블에서 가져올 예정
-                        })
-                    except Exception:
-                        krows.append({
-                            "tag_name": t,
-                            "value_s": "Error",
-                            "ts_s": "",
-                            "avg_s": "0.0",
-                            "count_s": "0",
-                            "min_s": "0.0",
-                            "max_s": "0.0",
-                            "first_s": "0.0",
-                            "last_s": "0.0",
-                            "delta_pct": 0.0,
-                            "delta_s": "±0.0%",
-                            "gauge_pct": 0.0,
-                            "status_level": 2,  # Indicate error status
-                            "range_label": "Error",
-                            "mini_chart_data": [],
-                            "unit": "",
-                        })
+                self.snapshot_at_s = snapshot_at_s
                 # 실시간 모드일 경우 각 행에 5초 간격 실시간 차트 데이터 추가
                 if self.realtime_mode:
                     # 모든 태그에 대해 5초 간격 실시간 데이터 가져오기
                     realtime_tasks = []
-                    for tag in rows_by_tag.keys():
+                    for tag in mini_data.keys():
                         realtime_tasks.append(realtime_data(tag, window_seconds=300, interval_seconds=5))   # 5분 범위, 5초 간격
                     
                     try:
@@ -865,7 +972,7 @@ class DashboardState(rx.State):
                             tag_name = krow.get("tag_name")
                             if tag_name:
                                 # 해당 태그의 실시간 데이터 찾기
-                                tag_idx = list(rows_by_tag.keys()).index(tag_name) if tag_name in rows_by_tag else -1
+                                tag_idx = list(mini_data.keys()).index(tag_name) if tag_name in mini_data else -1
                                 if 0 <= tag_idx < len(realtime_results):
                                     rt_raw = realtime_results[tag_idx]
                                     if not isinstance(rt_raw, Exception):
@@ -936,6 +1043,9 @@ class DashboardState(rx.State):
                     # 트렌드 페이지에서는 KPI 행 생성 스킵 (성능 최적화)
                     self.kpi_rows = []
                     print(f"⚡ 트렌드 페이지: KPI 행 생성 스킵 - 성능 최적화")
+                # 세션 메모리 기록 - 예산 초과 시 가장 오래 쉬고 있는 세션부터 비움 요청
+                SESSION_MEMORY.record(session_id, self._state_bytes())
+                SESSION_MEMORY.enforce_budget()
                 
                 # extract qc for selected tag
                 sel_qc = None
@@ -1075,13 +1185,63 @@ class DashboardState(rx.State):
         
         if self.realtime_mode and not self._realtime_loop_running and is_main_page:
             print(f"🚀 메인 페이지 로드 완료 - 실시간 모드 시작")
-            return DashboardState.start_realtime
+            return [DashboardState.idle_watch, DashboardState.start_realtime]
         elif self.realtime_mode and self._realtime_loop_running:
             print(f"✅ 페이지 로드 완료 - 실시간 루프 이미 실행 중 (ID: {self._realtime_loop_id})")
         elif self.realtime_mode and not is_main_page:
             print(f"🔄 페이지 로드 완료 - 메인 페이지가 아니므로 실시간 루프 시작 스킵 (경로: {current_path})")
         else:
             print(f"⚠️ 페이지 로드 완료 - 실시간 모드가 비활성화됨")
+        return DashboardState.idle_watch
+
+    def _session_id(self) -> str:
+        try:
+            return self.router.session.client_token or str(id(self))
+        except Exception:  # noqa: BLE001
+            return str(id(self))
+
+    def _state_bytes(self) -> int:
+        """세션 고유 메모리 (공유 저장소의 행은 제외)"""
+        return deep_sizeof([getattr(self, f) for f in HEAVY_FIELDS], skip=SHARED_DATASETS.is_shared)
+
+    def _evict_heavy(self):
+        """대용량 필드 비우기 - 화면 설정(윈도우/태그/토글)은 유지"""
+        session_id = self._session_id()
+        SHARED_DATASETS.release(session_id)
+        self.series = []
+        self.indicators = []
+        self.features = []
+        self.latest = []
+        self.kpi_rows = []
+        self.mini_chart_data = {}
+        self.realtime_data = {}
+        self.evicted = True
+        SESSION_MEMORY.mark_evicted(session_id, self._state_bytes())
+
+    @rx.event(background=True)
+    async def idle_watch(self):
+        """유휴 감시 - 정리 루프가 표시한 세션을 상태 잠금 안에서 비움 (세션당 1개, 비운 뒤 종료)"""
+        async with self:
+            if self._idle_watch_running:
+                return
+            self._idle_watch_running = True
+            session_id = self._session_id()
+        try:
+            while SESSION_MEMORY.usage(session_id) is not None:
+                await asyncio.sleep(SWEEP_INTERVAL_S)
+                if not SESSION_MEMORY.should_evict(session_id):
+                    continue
+                async with self:
+                    # 잠금 획득 사이 재조회/로딩이 있었을 수 있음 - 재확인 (실시간 루프는 스스로 비움)
+                    if self.evicted:
+                        break
+                    if self.loading or self._realtime_loop_running or not SESSION_MEMORY.should_evict(session_id):
+                        continue
+                    self._evict_heavy()
+                    break
+        finally:
+            async with self:
+                self._idle_watch_running = False
 
     @rx.event
     def toggle_overlay(self, value: object):
@@ -1098,25 +1258,7 @@ class DashboardState(rx.State):
         self.range_mode = "relative"
         self.window = value or "5 min"
         # 요구 정책 매핑
-        wl = (self.window or "").lower()
-        if wl in {"1 min", "5 min", "10 min", "60 min"}:
-            self.resolution = "1m"
-        elif wl in {"12 hour", "24 hour", "48 hour"}:
-            self.resolution = "10m"
-        elif wl in {"7 days", "14 days", "30 days"}:
-            self.resolution = "1h"
-        elif wl in {"3 months", "6 months", "12 months"}:
-            self.resolution = "1d"
-        else:
-            # fallback
-            if "minute" in wl:
-                self.resolution = "1m"
-            elif "hour" in wl:
-                self.resolution = "10m"
-            elif "day" in wl:
-                self.resolution = "1h"
-            else:
-                self.resolution = "1h"
+        self.resolution = resolution_for_window(self.window)
 
     # removed absolute picker handlers and apply logic
 
@@ -1338,6 +1480,7 @@ class DashboardState(rx.State):
                 return
                 
             # 새 루프 ID 생성 및 상태 업데이트 (원자적 연산)
+            session_id = self._session_id()
             loop_id = str(uuid.uuid4())[:8]
             self._realtime_loop_id = loop_id
             self._realtime_loop_running = True
@@ -1355,6 +1498,13 @@ class DashboardState(rx.State):
                     # 루프 상태 재확인 (다른 루프가 시작되었거나 중단되었을 수 있음)
                     if not self.realtime_mode or not self._realtime_loop_running or self._realtime_loop_id != loop_id:
                         break
+
+                    # 유휴 세션(또는 메모리 예산 초과 요청): 데이터 비우고 루프 종료
+                    if SESSION_MEMORY.should_evict(session_id):
+                        async with self:
+                            self._evict_heavy()
+                        print(f"💤 [{loop_id}] 유휴 세션 - 대용량 상태 비움, 실시간 루프 종료")
+                        break
                         
                     loop_count += 1
                     current_time = time.strftime("%H:%M:%S")
@@ -1412,6 +1562,8 @@ class DashboardState(rx.State):
             if not self.loading and self.realtime_mode:
                 import time
                 current_time = time.strftime("%H:%M:%S")
+                # 연결된 클라이언트가 처리한 실시간 틱 = 활동 (보기만 하는 상황판도 유휴 아님)
+                SESSION_MEMORY.heartbeat(self._session_id())
                 
                 # influx_hist에서 모든 태그의 5초 간격 실시간 데이터 가져오기
                 from ..queries.realtime import get_all_tags_latest_realtime
@@ -1425,6 +1577,7 @@ class DashboardState(rx.State):
                         
                         # 시리즈 데이터에도 최신 실시간 데이터를 추가 (큰 차트용)
                         self._update_series_with_realtime(realtime_data)
+                        SESSION_MEMORY.record(self._session_id(), self._state_bytes())
                     
                     print(f"📊 {current_time} - 실시간 데이터 기반 KPI+차트 통합 업데이트 완료 ({len(realtime_data)}개 태그)")
                     
@@ -1551,7 +1704,7 @@ class DashboardState(rx.State):
                         # 1. 기본 값과 타임스탬프 업데이트
                         updated_row["value_s"] = f"{float(current_value):.1f}"
                         updated_row["last_s"] = f"{float(current_value):.1f}"
-                        updated_row["ts_s"] = _fmt_ts_short(str(current_ts))
+                        updated_row["ts_s"] = _fmt_ts_short(current_ts)
                         
                         # 2. 변화율 계산 (기존 값과 비교)
                         prev_value = kpi_row.get("last_s")
@@ -1657,7 +1810,7 @@ class DashboardState(rx.State):
                     
                     # 새 데이터 포인트 생성
                     new_point = {
-                        "bucket": _fmt_ts_time_only(str(current_ts)),
+                        "bucket": _fmt_ts_time_only(current_ts),
                         "value": float(current_value),
                         "ts": str(current_ts)
                     }
@@ -1697,6 +1850,8 @@ class DashboardState(rx.State):
             # 현재 시간을 새로운 버킷으로 사용
             current_time = datetime.now(timezone.utc)
             bucket_str = current_time.isoformat()
+            bucket_epoch = int(current_time.timestamp())
+            bucket_formatted = CHART_LABELS.label(bucket_epoch)
             
             # realtime_data를 tag_name으로 인덱싱
             realtime_by_tag = {}
@@ -1714,7 +1869,8 @@ class DashboardState(rx.State):
                     # 새 시리즈 데이터 포인트 생성
                     new_point = {
                         "bucket": bucket_str,
-                        "bucket_formatted": _fmt_ts_short_chart(bucket_str),
+                        "bucket_epoch": bucket_epoch,
+                        "bucket_formatted": bucket_formatted,
                         "tag_name": tag_name,
                         "avg": float(current_value),
                         "min": float(current_value),
@@ -0,0 +1,190 @@
+"""Per-page data loaders with a declared dataset dependency graph.
+
+`DashboardState.load` serves `/`, `/trend` and `/tech`. Each page declares the
+datasets it renders; the loader resolves their dependencies, fetches independent
+datasets concurrently and serves rarely-changing ones from a process-wide cache.
+
+- Dataset: one query (or a derived bundle with no fetch of its own)
+- `deps`: datasets that must be loaded together with this one
+- `fallback`: dataset to load as well when this one comes back empty
+- `ttl_s`: None = fetched on every refresh; number = process-wide cache
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..queries.features import features_5m
+from ..queries.indicators import tech_indicators_adaptive
+from ..queries.latest import latest_snapshot
+from ..queries.metrics import timeseries
+from ..queries.qc import qc_rules
+from ..queries.tags import tag_metadata, tags_list
+
+
+Rows = List[Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class LoadParams:
+    """Inputs of a page load (window is already normalized, e.g. '24 hours')."""
+    window: str
+    resolution: Optional[str] = None
+    tag_name: Optional[str] = None
+    start_iso: Optional[str] = None
+    end_iso: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    fetch: Optional[Callable[[LoadParams], Awaitable[Rows]]] = None
+    deps: Tuple[str, ...] = ()
+    fallback: Optional[str] = None
+    ttl_s: Optional[float] = None
+    cache_key: Callable[[LoadParams], Tuple[Any, ...]] = lambda p: ()
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    path: str
+    datasets: Tuple[str, ...]
+    all_tags: bool = False  # 대시보드: 전체 태그 / 트렌드·기술지표: 선택 태그만
+
+
+class ProcessCache:
+    """Process-wide TTL cache with single-flight fetches (one query per key at a time)."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[Any, ...], Tuple[float, Rows]] = {}
+        self._inflight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+
+    async def get_or_fetch(self, key: Tuple[Any, ...], ttl_s: float, fetch: Callable[[], Awaitable[Rows]]) -> Rows:
+        hit = self._entries.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            rows = list(await fetch() or [])
+            self._entries[key] = (time.monotonic() + ttl_s, rows)
+            fut.set_result(rows)
+            return rows
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # 대기자가 없어도 'never retrieved' 경고 방지
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, prefix: Optional[str] = None) -> None:
+        if prefix is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k and k[0] == prefix]:
+            self._entries.pop(key, None)
+
+
+class PageLoader:
+    """Resolve a page's datasets against the graph and fetch them."""
+
+    def __init__(self, datasets: Iterable[Dataset], pages: Iterable[PageSpec], cache: Optional[ProcessCache] = None):
+        self.datasets: Dict[str, Dataset] = {d.name: d for d in datasets}
+        self.pages: Dict[str, PageSpec] = {p.path: p for p in pages}
+        self.cache = cache or ProcessCache()
+        for d in self.datasets.values():
+            for dep in d.deps + ((d.fallback,) if d.fallback else ()):
+                if dep not in self.datasets:
+                    raise ValueError(f"dataset '{d.name}' depends on unknown dataset '{dep}'")
+
+    def page(self, path: str) -> PageSpec:
+        return self.pages.get(path) or self.pages["/"]
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """Datasets plus transitive deps, dependencies first."""
+        order: List[str] = []
+        seen: Dict[str, bool] = {}
+
+        def visit(name: str) -> None:
+            state = seen.get(name)
+            if state is True:
+                return
+            if state is False:
+                raise ValueError(f"dataset dependency cycle at '{name}'")
+            seen[name] = False
+            for dep in self.datasets[name].deps:
+                visit(dep)
+            seen[name] = True
+            order.append(name)
+
+        for n in names:
+            visit(n)
+        return order
+
+    async def _fetch(self, ds: Dataset, params: LoadParams) -> Rows:
+        if ds.fetch is None:
+            return []
+        if ds.ttl_s is None:
+            return list(await ds.fetch(params) or [])
+        key = (ds.name,) + tuple(ds.cache_key(params))
+        return await self.cache.get_or_fetch(key, ds.ttl_s, lambda: ds.fetch(params))
+
+    async def _fetch_all(self, names: List[str], params: LoadParams) -> Dict[str, Rows]:
+        rows = await asyncio.gather(*(self._fetch(self.datasets[n], params) for n in names))
+        return dict(zip(names, rows))
+
+    async def load(self, path: str, params: LoadParams) -> Dict[str, Rows]:
+        """Fetch everything the page renders. Fetches are independent, so run them together."""
+        spec = self.page(path)
+        if spec.all_tags:
+            params = LoadParams(params.window, params.resolution, None, params.start_iso, params.end_iso)
+        names = self.resolve(spec.datasets)
+        result = await self._fetch_all(names, params)
+        extra = [
+            self.datasets[n].fallback for n in names
+            if self.datasets[n].fallback and not result[n] and self.datasets[n].fallback not in result
+        ]
+        if extra:
+            result.update(await self._fetch_all(self.resolve(dict.fromkeys(extra)), params))
+        return result
+
+
+DATASETS: Tuple[Dataset, ...] = (
+    Dataset(
+        "series",
+        fetch=lambda p: timeseries(p.window, p.tag_name, p.resolution, p.start_iso, p.end_iso),
+    ),
+    Dataset(
+        "indicators",
+        fetch=lambda p: tech_indicators_adaptive(p.window, p.tag_name),
+        fallback="series",  # DB 지표가 없으면 시리즈 avg로 계산
+    ),
+    Dataset("latest", fetch=lambda p: latest_snapshot(None), deps=("features",)),
+    # 5분 집계 - 버킷 주기만큼 캐시 (latest 알람 라벨의 p10/p90)
+    Dataset(
+        "features",
+        fetch=lambda p: features_5m(p.window, p.tag_name),
+        ttl_s=300.0,
+        cache_key=lambda p: (p.window, p.tag_name),
+    ),
+    # 거의 바뀌지 않는 데이터 - 프로세스 전역 1회 조회
+    Dataset("tags", fetch=lambda p: tags_list(), ttl_s=600.0),
+    Dataset("qc", fetch=lambda p: qc_rules(None), ttl_s=600.0),
+    Dataset("tag_meta", fetch=lambda p: tag_metadata(), ttl_s=3600.0),
+    # KPI 카드 = 시리즈 + 최신값 + QC + 태그 메타 (자체 조회 없음)
+    Dataset("kpi", deps=("series", "latest", "qc", "tag_meta")),
+)
+
+PAGES: Tuple[PageSpec, ...] = (
+    PageSpec("/", ("kpi", "tags"), all_tags=True),
+    PageSpec("/trend", ("series", "tags")),
+    PageSpec("/tech", ("indicators", "tags")),
+)
+
+PAGE_LOADER = PageLoader(DATASETS, PAGES)
@@ -0,0 +1,338 @@
+"""Per-session memory accounting and a shared, reference-counted view store.
+
+Each `DashboardState` instance used to hold private copies of the heavy row
+lists. Now:
+
+- `SharedDatasetStore`: one shaped view per (page, window, resolution, tag, range)
+  held server-side; sessions keep shallow lists that point at the shared row
+  dicts, and the entry lives while at least one session references it
+- `SessionMemoryRegistry`: bytes per session (shared rows excluded), last
+  activity (user loads and realtime ticks from a connected client), and a process
+  budget; the `session_sweep_task` lifespan loop only marks idle or over-budget
+  sessions, and each session clears its own heavy fields under its state lock
+  (realtime loop / `idle_watch` background event), rehydrating on the next `load()`
+
+Budget/idle threshold come from `KSYS_STATE_BUDGET_MB` / `KSYS_SESSION_IDLE_S`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from ..performance.metrics import register_metrics
+
+
+# 세션별로 복사되던 대용량 필드 (유휴 시 비움)
+HEAVY_FIELDS: Tuple[str, ...] = (
+    "series", "indicators", "features", "latest", "kpi_rows", "mini_chart_data", "realtime_data",
+)
+
+
+def deep_sizeof(obj: Any, skip: Optional[Callable[[Any], bool]] = None) -> int:
+    """Approximate retained size of nested dict/list/tuple/set data.
+
+    Objects are counted once (by id); objects for which `skip(obj)` is true are
+    not counted at all (e.g. rows owned by the shared store).
+    """
+    seen: Set[int] = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        o = getattr(o, "__wrapped__", o)  # Reflex MutableProxy → 원본 객체
+        oid = id(o)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        if skip is not None and skip(o):
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
+
+
+@dataclass
+class _Entry:
+    key: Hashable
+    view: Dict[str, Any]
+    created: float
+    nbytes: int
+    row_ids: Set[int]
+    owners: Set[Hashable] = field(default_factory=set)
+
+
+class SharedDatasetStore:
+    """Shaped views shared between sessions, reference-counted by owner.
+
+    A view for a key is reused by other sessions for `fresh_s` seconds (one
+    refresh interval); after that the next load builds a new generation and
+    sessions still holding the old one keep it alive until they move on.
+    """
+
+    def __init__(self, fresh_s: float = 10.0):
+        self.fresh_s = fresh_s
+        self._latest: Dict[Hashable, _Entry] = {}
+        self._held: Dict[Hashable, _Entry] = {}  # owner -> entry
+        self._entries: Dict[int, _Entry] = {}    # id(entry) -> entry (all generations)
+        self._row_ids: Dict[int, int] = {}       # id(row) -> live entries containing it
+
+    def get(
+        self, key: Hashable, now: Optional[float] = None, max_age_s: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fresh shared view for `key`, if any (read-only)."""
+        entry = self._latest.get(key)
+        now = time.monotonic() if now is None else now
+        max_age_s = self.fresh_s if max_age_s is None else max_age_s
+        if entry is None or now - entry.created > max_age_s:
+            return None
+        return entry.view
+
+    def acquire(
+        self,
+        owner: Hashable,
+        key: Hashable,
+        view: Optional[Dict[str, Any]] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Reference the view for `key` (publishing `view` as a new generation if given)."""
+        now = time.monotonic() if now is None else now
+        if view is not None:
+            entry = self._publish(key, view, now)
+        else:
+            entry = self._latest[key]
+        held = self._held.get(owner)
+        if held is not entry:
+            if held is not None:
+                self._drop_owner(owner, held)
+            entry.owners.add(owner)
+            self._held[owner] = entry
+        return entry.view
+
+    def release(self, owner: Hashable) -> None:
+        held = self._held.get(owner)
+        if held is not None:
+            self._drop_owner(owner, held)
+            self._held.pop(owner, None)
+
+    def is_shared(self, obj: Any) -> bool:
+        return id(obj) in self._row_ids
+
+    def refcount(self, key: Hashable) -> int:
+        entry = self._latest.get(key)
+        return len(entry.owners) if entry else 0
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop stale, unreferenced latest generations."""
+        now = time.monotonic() if now is None else now
+        for entry in list(self._latest.values()):
+            if not entry.owners and now - entry.created > self.fresh_s:
+                self._forget(entry)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "ksys_shared_views": len(self._entries),
+            "ksys_shared_view_refs": len(self._held),
+            "ksys_shared_view_bytes": self.nbytes,
+        }
+
+    def _publish(self, key: Hashable, view: Dict[str, Any], now: float) -> _Entry:
+        old = self._latest.get(key)
+        rows = [r for v in view.values() if isinstance(v, (list, tuple)) for r in v]
+        entry = _Entry(key, view, now, deep_sizeof(view), {id(r) for r in rows})
+        self._latest[key] = entry
+        self._entries[id(entry)] = entry
+        for rid in entry.row_ids:
+            self._row_ids[rid] = self._row_ids.get(rid, 0) + 1
+        if old is not None and not old.owners:
+            self._forget(old)
+        return entry
+
+    def _drop_owner(self, owner: Hashable, entry: _Entry) -> None:
+        entry.owners.discard(owner)
+        if not entry.owners and self._latest.get(entry.key) is not entry:
+            self._forget(entry)  # 이전 세대: 마지막 참조 해제 시 제거
+
+    def _forget(self, entry: _Entry) -> None:
+        if self._entries.pop(id(entry), None) is None:
+            return
+        if self._latest.get(entry.key) is entry:
+            del self._latest[entry.key]
+        for rid in entry.row_ids:
+            n = self._row_ids.get(rid, 0) - 1
+            if n > 0:
+                self._row_ids[rid] = n
+            else:
+                self._row_ids.pop(rid, None)
+
+
+@dataclass
+class SessionUsage:
+    session_id: Hashable
+    last_active: float
+    state_bytes: int = 0
+    evicted: bool = False
+    evict_requested: bool = False
+
+
+class SessionMemoryRegistry:
+    """Per-session state bytes, activity and the process-wide budget."""
+
+    def __init__(self, budget_bytes: int, idle_s: float, forget_s: float = 7200.0):
+        self.budget_bytes = budget_bytes
+        self.idle_s = idle_s
+        self.forget_s = forget_s
+        self.evictions = 0
+        self._sessions: Dict[Hashable, SessionUsage] = {}
+
+    def touch(self, session_id: Hashable, now: Optional[float] = None) -> SessionUsage:
+        """User activity (page view / selection): session is live again."""
+        now = time.monotonic() if now is None else now
+        usage = self._sessions.get(session_id)
+        if usage is None:
+            usage = self._sessions[session_id] = SessionUsage(session_id, now)
+        usage.last_active = now
+        usage.evicted = False
+        usage.evict_requested = False
+        return usage
+
+    def heartbeat(self, session_id: Hashable, now: Optional[float] = None) -> None:
+        """Passive activity (realtime tick delivered to a connected client).
+
+        Keeps a watched display from being judged idle, but does not cancel a
+        pending over-budget eviction request or rehydrate an evicted session.
+        """
+        usage = self._sessions.get(session_id)
+        if usage is not None and not usage.evicted:
+            usage.last_active = time.monotonic() if now is None else now
+
+    def record(self, session_id: Hashable, state_bytes: int) -> None:
+        usage = self._sessions.get(session_id)
+        if usage is None:
+            usage = self.touch(session_id)
+        usage.state_bytes = state_bytes
+
+    def should_evict(self, session_id: Hashable, now: Optional[float] = None) -> bool:
+        usage = self._sessions.get(session_id)
+        if usage is None or usage.evicted:
+            return False
+        now = time.monotonic() if now is None else now
+        return usage.evict_requested or now - usage.last_active > self.idle_s
+
+    def mark_evicted(self, session_id: Hashable, state_bytes: int) -> None:
+        usage = self._sessions.get(session_id)
+        if usage is None:
+            return
+        usage.evicted = True
+        usage.evict_requested = False
+        usage.state_bytes = state_bytes
+        self.evictions += 1
+
+    def mark_idle(self, now: Optional[float] = None) -> List[Hashable]:
+        """Request eviction of idle sessions.
+
+        Only marks them: the state itself is cleared by the session's own event
+        under its state lock (`should_evict` → `_evict_heavy`), never from here.
+        """
+        now = time.monotonic() if now is None else now
+        marked = []
+        for sid, usage in self._sessions.items():
+            if not usage.evicted and not usage.evict_requested and now - usage.last_active > self.idle_s:
+                usage.evict_requested = True
+                marked.append(sid)
+        return marked
+
+    def enforce_budget(self) -> List[Hashable]:
+        """Over budget: request eviction of least-recently-active sessions."""
+        excess = self.total_bytes - self.budget_bytes
+        requested = []
+        if excess <= 0:
+            return requested
+        live = [u for u in self._sessions.values() if not u.evicted and not u.evict_requested]
+        for usage in sorted(live, key=lambda u: u.last_active)[:-1]:  # 방금 활동한 세션은 제외
+            usage.evict_requested = True
+            requested.append(usage.session_id)
+            excess -= usage.state_bytes
+            if excess <= 0:
+                break
+        return requested
+
+    def prune(self, now: Optional[float] = None) -> List[Hashable]:
+        """Forget sessions whose state has expired (no activity for `forget_s`)."""
+        now = time.monotonic() if now is None else now
+        expired = [s for s, u in self._sessions.items() if now - u.last_active > self.forget_s]
+        for sid in expired:
+            del self._sessions[sid]
+        return expired
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(u.state_bytes for u in self._sessions.values())
+
+    def usage(self, session_id: Hashable) -> Optional[SessionUsage]:
+        return self._sessions.get(session_id)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "ksys_state_sessions": len(self._sessions),
+            "ksys_state_sessions_evicted": sum(1 for u in self._sessions.values() if u.evicted),
+            "ksys_state_memory_bytes": self.total_bytes,
+            "ksys_state_memory_budget_bytes": self.budget_bytes,
+            "ksys_state_evictions_total": self.evictions,
+        }
+
+
+SHARED_DATASETS = SharedDatasetStore()
+SESSION_MEMORY = SessionMemoryRegistry(
+    budget_bytes=int(float(os.getenv("KSYS_STATE_BUDGET_MB", "128")) * 1024 * 1024),
+    idle_s=float(os.getenv("KSYS_SESSION_IDLE_S", "900")),
+)
+
+
+SWEEP_INTERVAL_S = float(os.getenv("KSYS_SESSION_SWEEP_S", "60"))
+
+
+def sweep(mark: bool = False) -> None:
+    """Drop expired sessions and their shared-view references (and mark idle ones)."""
+    if mark:
+        SESSION_MEMORY.enforce_budget()
+        SESSION_MEMORY.mark_idle()
+    for sid in SESSION_MEMORY.prune():
+        SHARED_DATASETS.release(sid)
+    SHARED_DATASETS.prune()
+
+
+async def session_sweep_task(interval_s: Optional[float] = None) -> None:
+    """Lifespan task: mark idle / over-budget sessions for eviction."""
+    interval_s = SWEEP_INTERVAL_S if interval_s is None else interval_s
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            sweep(mark=True)
+        except Exception as e:  # noqa: BLE001
+            logging.error(f"세션 정리 루프 오류: {e}", exc_info=True)
+
+
+def _memory_metrics() -> Dict[str, float]:
+    sweep()
+    stats = dict(SESSION_MEMORY.stats())
+    stats.update(SHARED_DATASETS.stats())
+    # 전체 상태 메모리 = 세션 고유분 + 공유 뷰(1회)
+    stats["ksys_state_memory_total_bytes"] = stats["ksys_state_memory_bytes"] + stats["ksys_shared_view_bytes"]
+    return stats
+
+
+register_metrics(_memory_metrics)
@@ -0,0 +1,183 @@
+"""Precomputed dashboard snapshots for the standard time-range presets.
+
+Almost every dashboard request uses one of the `QUICK_PRESETS` windows. Instead of
+every session re-running the same all-tag queries and row shaping, a background
+task builds one snapshot per preset and `DashboardState.load` serves it directly.
+
+- One snapshot per (window, resolution) preset, shared by all sessions
+- Rows are frozen into tuples of `FrozenRow` with interned strings (compact, read-only:
+  every session points at the same row objects, so mutation raises instead of leaking)
+- Rebuilt when the refresh watermark of a source continuous aggregate moves,
+  or when the snapshot is older than `max_age_s` (views without a watermark)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config.time_ranges import QUICK_PRESETS, resolution_for_window
+from ..queries.watermarks import cagg_watermarks
+
+
+Row = Dict[str, Any]
+SnapshotKey = Tuple[str, Optional[str]]
+
+
+class FrozenRow(dict):
+    """Read-only row shared by every session (still a dict for serialization)."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("snapshot rows are shared between sessions; copy with dict(row) before editing")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenRow, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _freeze_rows(rows: Optional[List[Row]]) -> Tuple[Row, ...]:
+    """Compact read-only copy: repeated strings (tags, buckets, labels) are interned."""
+    frozen = []
+    for r in rows or []:
+        frozen.append(FrozenRow((k, sys.intern(v) if type(v) is str else v) for k, v in r.items()))
+    return tuple(frozen)
+
+
+@dataclass
+class PresetSnapshot:
+    """All-tag dashboard data for one preset window."""
+    window: str
+    resolution: Optional[str]
+    sources: Tuple[str, ...]
+    built_at: datetime
+    watermarks: Dict[str, datetime]
+    series: Tuple[Row, ...]
+    indicators: Tuple[Row, ...]
+    features: Tuple[Row, ...]
+    latest: Tuple[Row, ...]
+    tags: Tuple[str, ...]
+    qc: Tuple[Row, ...]
+    kpi_rows: Tuple[Row, ...]
+    mini_data: Dict[str, Tuple[Row, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def from_view(
+        cls,
+        window: str,
+        resolution: Optional[str],
+        sources: Tuple[str, ...],
+        view: Dict[str, Any],
+        watermarks: Dict[str, datetime],
+        built_at: Optional[datetime] = None,
+    ) -> "PresetSnapshot":
+        return cls(
+            window=window,
+            resolution=resolution,
+            sources=sources,
+            built_at=built_at or datetime.now(timezone.utc),
+            watermarks={s: watermarks[s] for s in sources if s in watermarks},
+            series=_freeze_rows(view.get("series")),
+            indicators=_freeze_rows(view.get("indicators")),
+            features=_freeze_rows(view.get("features")),
+            latest=_freeze_rows(view.get("latest")),
+            tags=tuple(sys.intern(str(t)) for t in (view.get("tags") or [])),
+            qc=_freeze_rows(view.get("qc")),
+            kpi_rows=_freeze_rows(view.get("kpi_rows")),
+            mini_data={
+                sys.intern(str(t)): _freeze_rows(rows)
+                for t, rows in (view.get("mini_data") or {}).items()
+            },
+        )
+
+    def is_stale(self, watermarks: Dict[str, datetime], now: datetime, max_age_s: float) -> bool:
+        """A source aggregate refreshed after this snapshot, or it simply aged out."""
+        for src in self.sources:
+            mark = watermarks.get(src)
+            if mark is not None and mark != self.watermarks.get(src):
+                return True
+        return (now - self.built_at).total_seconds() >= max_age_s
+
+
+class PresetSnapshotStore:
+    """Process-wide snapshot cache, refreshed by `run_forever` on a background task."""
+
+    def __init__(
+        self,
+        build: Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]],
+        sources: Callable[[str, Optional[str]], Tuple[str, ...]],
+        presets: Optional[List[Dict[str, str]]] = None,
+        watermarks: Callable[[], Awaitable[Dict[str, datetime]]] = cagg_watermarks,
+        poll_interval_s: float = 30.0,
+        max_age_s: float = 900.0,
+    ):
+        self._build = build
+        self._sources = sources
+        self._watermarks = watermarks
+        self.poll_interval_s = poll_interval_s
+        self.max_age_s = max_age_s
+        self.presets: List[SnapshotKey] = [
+            (p["value"], resolution_for_window(p["value"]))
+            for p in (presets if presets is not None else QUICK_PRESETS)
+        ]
+        self._snapshots: Dict[SnapshotKey, PresetSnapshot] = {}
+
+    def get(self, window: str, resolution: Optional[str]) -> Optional[PresetSnapshot]:
+        """Snapshot for the session's window/resolution, if it is a built preset."""
+        return self._snapshots.get((window, resolution))
+
+    def invalidate(self) -> None:
+        self._snapshots.clear()
+
+    async def _read_watermarks(self) -> Dict[str, datetime]:
+        try:
+            return await self._watermarks()
+        except Exception as e:  # noqa: BLE001
+            # 워터마크 조회 불가(TimescaleDB 아님 등) → max_age 기준으로만 갱신
+            logging.debug(f"CAGG 워터마크 조회 실패: {e}")
+            return {}
+
+    async def refresh(self, now: Optional[datetime] = None) -> List[SnapshotKey]:
+        """Rebuild every preset whose sources moved (or that aged out). Returns rebuilt keys."""
+        watermarks = await self._read_watermarks()
+        now = now or datetime.now(timezone.utc)
+        rebuilt: List[SnapshotKey] = []
+        for window, resolution in self.presets:
+            current = self._snapshots.get((window, resolution))
+            if current is not None and not current.is_stale(watermarks, now, self.max_age_s):
+                continue
+            try:
+                view = await self._build(window, resolution)
+            except Exception as e:  # noqa: BLE001
+                # 이전 스냅샷은 유지 (stale이라도 빈 화면보다 낫다)
+                logging.error(f"프리셋 스냅샷 생성 실패 - {window}/{resolution}: {e}", exc_info=True)
+                continue
+            self._snapshots[(window, resolution)] = PresetSnapshot.from_view(
+                window, resolution, self._sources(window, resolution), view, watermarks, now
+            )
+            rebuilt.append((window, resolution))
+        return rebuilt
+
+    async def run_forever(self) -> None:
+        """Background loop: poll watermarks and rebuild on each refresh boundary."""
+        while True:
+            try:
+                rebuilt = await self.refresh()
+                if rebuilt:
+                    logging.info(f"프리셋 스냅샷 갱신: {', '.join(w for w, _ in rebuilt)}")
+            except Exception as e:  # noqa: BLE001
+                logging.error(f"프리셋 스냅샷 루프 오류: {e}", exc_info=True)
+            await asyncio.sleep(self.poll_interval_s)
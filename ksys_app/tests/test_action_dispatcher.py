@@ -0,0 +1,230 @@
+"""
+알람 액션 디스패처 단위 테스트
+비차단 등록 / 동시 실행 제한 / 대상별 속도 제한 / 중복 억제 / 재시도 / 예약 파일 복원
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from ksys_app.alarm.action_dispatcher import ActionDispatcher, ActionPolicy, StubTarget, _dispatcher_metrics
+
+
+def _dispatcher(handlers, tmp_path=None, **policies):
+    path = str(tmp_path / "schedule.json") if tmp_path is not None else None
+    return ActionDispatcher(handlers, policies=policies, schedule_path=path)
+
+
+class TestActionDispatcher:
+    """ActionDispatcher 테스트"""
+
+    def test_slow_notify_does_not_block_other_types(self):
+        notify = StubTarget(latency_s=0.3)
+        stop = StubTarget()
+
+        async def run():
+            d = _dispatcher({"notify": notify, "stop": stop})
+            start = time.perf_counter()
+            assert d.submit("notify", {"target": "operator"}) == "queued"
+            assert d.submit("stop", {"system": "RO"}) == "queued"
+            submit_s = time.perf_counter() - start
+            await asyncio.sleep(0.05)
+            stopped_early = len(stop.delivered)
+            await d.drain()
+            await d.close()
+            return submit_s, stopped_early
+
+        submit_s, stopped_early = asyncio.run(run())
+
+        assert submit_s < 0.05
+        assert stopped_early == 1  # 느린 알림과 무관하게 정지 액션 실행
+        assert len(notify.delivered) == 1
+
+    def test_concurrency_bound_per_type(self):
+        target = StubTarget(latency_s=0.02)
+
+        async def run():
+            d = _dispatcher({"adjust": target}, adjust=ActionPolicy(concurrency=1),
+                            notify=ActionPolicy(concurrency=8))
+            for i in range(5):
+                d.submit("adjust", {"step": i})
+            await d.drain()
+            await d.close()
+            return d
+
+        d = asyncio.run(run())
+
+        assert target.max_active == 1
+        assert [p["step"] for _, p in target.delivered] == [0, 1, 2, 3, 4]  # 제어 액션 순서 유지
+        assert d.stats.max_in_flight["adjust"] == 1
+
+    def test_parallel_workers(self):
+        target = StubTarget(latency_s=0.05)
+
+        async def run():
+            d = _dispatcher({"notify": target}, notify=ActionPolicy(concurrency=8))
+            start = time.perf_counter()
+            for i in range(16):
+                d.submit("notify", {"target": f"op{i}"})
+            await d.drain()
+            await d.close()
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(run())
+
+        assert target.max_active == 8
+        assert elapsed < 0.4  # 순차 실행이면 0.8초
+
+    def test_rate_limit_per_target(self):
+        target = StubTarget()
+
+        async def run():
+            d = _dispatcher({"notify": target}, notify=ActionPolicy(concurrency=4, rate_per_s=20, burst=2))
+            for i in range(5):
+                d.submit("notify", {"target": "operator", "n": i})
+            d.submit("notify", {"target": "manager", "n": 99})
+            await d.drain()
+            await d.close()
+            return d
+
+        d = asyncio.run(run())
+
+        times = {p["n"]: t for t, p in target.delivered}
+        assert sorted(times) == [0, 1, 2, 3, 4, 99]
+        # operator: 2개 즉시(burst), 이후 0.05초 간격
+        assert times[2] - times[0] >= 0.045
+        assert times[4] - times[0] >= 0.145
+        assert times[99] - times[0] < 0.03  # 다른 대상은 제한 없음
+        assert d.stats.rate_limited == 3
+
+    def test_dedupe_window(self):
+        target = StubTarget()
+
+        async def run():
+            d = _dispatcher({"notify": target})
+            statuses = [
+                d.submit("notify", {"target": "operator", "method": "sms"}, scenario_id="S001", dedupe_window_s=600),
+                d.submit("notify", {"method": "sms", "target": "operator"}, scenario_id="S001", dedupe_window_s=600),
+                d.submit("notify", {"target": "operator", "method": "sms"}, scenario_id="S002", dedupe_window_s=600),
+            ]
+            await d.drain()
+            await d.close()
+            return statuses
+
+        assert asyncio.run(run()) == ["queued", "deduped", "queued"]
+        assert len(target.delivered) == 2
+
+    def test_dedupe_keys_expire(self):
+        """창이 지난 dedupe 키는 다음 등록 때 제거 (키마다 파라미터가 달라도 맵이 커지지 않음)"""
+        now = [0.0]
+        d = ActionDispatcher({"notify": StubTarget()}, schedule_path=None, clock=lambda: now[0])
+        for i in range(1000):
+            now[0] = float(i)
+            assert d.submit("notify", {"value": i}, scenario_id="S001", dedupe_window_s=10) != "deduped"
+        assert len(d._last_sent) == len(d._dedupe_expiry) == 10
+
+        # 짧은 창으로 다시 등록된 키는 예전 만료 항목에 지워지지 않음
+        now[0] = 2000.0
+        d.submit("notify", {"target": "operator"}, scenario_id="S002", dedupe_window_s=3)
+        now[0] = 2002.0
+        assert d.submit("notify", {"target": "operator"}, scenario_id="S002", dedupe_window_s=2) != "deduped"
+        now[0] = 2003.5
+        assert d.submit("notify", {"target": "operator"}, scenario_id="S002", dedupe_window_s=5) == "deduped"
+        assert d.metrics()["ksys_action_dedupe_keys"] == 1
+
+    def test_retry_with_backoff(self):
+        flaky = StubTarget(fail_first=2)
+        dead = StubTarget(fail_first=100)
+
+        async def run():
+            d = _dispatcher({"notify": flaky, "stop": dead},
+                            notify=ActionPolicy(max_attempts=4, backoff_s=0.02),
+                            stop=ActionPolicy(concurrency=1, max_attempts=2, backoff_s=0.01))
+            d.submit("notify", {"target": "operator"})
+            d.submit("stop", {"system": "RO"})
+            await d.drain()
+            await d.close()
+            return d
+
+        d = asyncio.run(run())
+
+        calls = [t for t, _ in flaky.calls]
+        assert len(calls) == 3 and len(flaky.delivered) == 1
+        assert calls[1] - calls[0] >= 0.015 and calls[2] - calls[1] >= 0.035  # 지수 백오프
+        assert len(dead.calls) == 2 and d.stats.failed == 1
+        assert d.stats.retried == 3 and d.stats.executed == 1
+
+    def test_delayed_schedule_survives_restart(self, tmp_path):
+        target = StubTarget()
+        now = [1000.0]
+
+        async def first():
+            d = ActionDispatcher({"stop": target}, schedule_path=str(tmp_path / "schedule.json"), clock=lambda: now[0])
+            assert d.submit("stop", {"system": "RO"}, delay_s=60, scenario_id="S002", event_id="E1") == "scheduled"
+            await asyncio.sleep(0.01)
+            await d.close()
+
+        asyncio.run(first())
+
+        saved = json.loads((tmp_path / "schedule.json").read_text())
+        assert [(j["action_type"], j["due"], j["event_id"]) for j in saved] == [("stop", 1060.0, "E1")]
+        assert target.calls == []
+
+        now[0] = 2000.0  # 재시작 시점에는 이미 실행 시각 경과 → 즉시 실행
+
+        async def second():
+            d = ActionDispatcher({"stop": target}, schedule_path=str(tmp_path / "schedule.json"), clock=lambda: now[0])
+            assert len(d.pending()) == 1
+            await d.drain()
+            await d.close()
+
+        asyncio.run(second())
+
+        assert [p for _, p in target.delivered] == [{"system": "RO"}]
+        assert json.loads((tmp_path / "schedule.json").read_text()) == []
+
+    def test_metrics_registered(self):
+        d = _dispatcher({"notify": StubTarget()})
+        d.submit("notify", {})  # 이벤트 루프 밖 등록 → 예약으로 보관
+
+        metrics = _dispatcher_metrics()
+
+        assert metrics["ksys_action_submitted_total"] >= 1
+        assert metrics["ksys_action_scheduled"] >= 1
+
+
+class TestEngineDispatch:
+    """AlarmScenarioEngine._trigger_alarm 연동"""
+
+    def test_trigger_returns_before_slow_action(self):
+        from ksys_app.alarm.scenario_engine import AlarmScenarioEngine
+
+        notify = StubTarget(latency_s=0.5)
+        adjust = StubTarget()
+
+        async def run():
+            dispatcher = ActionDispatcher({"notify": notify, "adjust": adjust}, schedule_path=None)
+            engine = AlarmScenarioEngine("", dispatcher=dispatcher)
+            at = datetime(2026, 1, 1, 9, 0, 0)
+            start = time.perf_counter()
+            event = await engine._trigger_alarm(engine.scenarios["S001"], {"TMP": 3.0}, {"TMP": True}, at)
+            # 상관 창(60초) 이후, 쿨다운(300초) 이내 재발생 → 액션 중복 억제
+            later = at + timedelta(seconds=120)
+            again = await engine._trigger_alarm(engine.scenarios["S001"], {"TMP": 3.0}, {"TMP": True}, later)
+            elapsed = time.perf_counter() - start
+            pending = dispatcher.pending()
+            await dispatcher.close()
+            return event, again, elapsed, pending
+
+        event, again, elapsed, pending = asyncio.run(run())
+
+        assert elapsed < 0.1
+        assert event.actions_taken == ["notify", "adjust (delayed 30s)"]
+        assert again.actions_taken == ["notify (deduped)", "adjust (deduped)"]
+        assert [(j.action_type, j.scenario_id) for j in pending] == [("adjust", "S001")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""
+알람 백테스트 단위 테스트
+스트림 평가기와 동일성 / 청크 경계 / 임계값 스윕 / 바이너리 COPY 파싱
+"""
+import asyncio
+import random
+import struct
+
+import numpy as np
+import pytest
+
+from ksys_app.alarm.backtest import Backtester, ThresholdSweep, parse_copy_binary, run_backtest
+from ksys_app.alarm.scenario_engine import AlarmCondition, AlarmLevel, AlarmScenario
+from ksys_app.alarm.stream_evaluator import replay
+
+STEP = 5.0
+
+
+def _scenario(sid, conditions, cooldown=0):
+    return AlarmScenario(sid, sid, AlarmLevel.WARNING, conditions, [], cooldown_seconds=cooldown)
+
+
+def _random_samples(rng, tags, n_steps):
+    """격자 시각의 (ts, tag, value) - 태그마다 가끔 값이 바뀜"""
+    samples = []
+    for i in range(n_steps):
+        for tag in tags:
+            if i == 0 or rng.random() < 0.3:
+                samples.append((i * STEP, tag, float(rng.randrange(10))))
+    return samples
+
+
+def _run(scenarios, samples, n_steps, chunk_steps, sweeps=()):
+    bt = Backtester(scenarios, sweeps, step_s=STEP)
+    samples = [s for s in samples if s[1] in bt.columns]
+    ts = np.asarray([s[0] for s in samples])
+    col = np.asarray([bt.columns[s[1]] for s in samples])
+    val = np.asarray([s[2] for s in samples])
+    for a in range(0, n_steps, chunk_steps):
+        b = min(a + chunk_steps, n_steps)
+        sel = (ts > (a - 1) * STEP) & (ts <= (b - 1) * STEP)
+        bt.push_samples(a * STEP, b * STEP, ts[sel], col[sel], val[sel])
+    return bt.result(n_steps * STEP)
+
+
+def _random_scenarios(rng, n):
+    return [
+        _scenario(
+            f"S{i}",
+            [
+                AlarmCondition(f"T{rng.randrange(3)}", rng.choice([">", "<", ">=", "<=", "==", "!="]), rng.randrange(10),
+                               duration_seconds=rng.choice([0, 10, 25]),
+                               off_delay_seconds=rng.choice([0, 0, 15]))
+                for _ in range(rng.randint(1, 2))
+            ],
+            cooldown=rng.choice([0, 0, 30, 47]),
+        )
+        for i in range(n)
+    ]
+
+
+class TestBacktester:
+    """벡터 평가 결과 검증"""
+
+    def test_matches_stream_evaluator(self):
+        """격자 시각 샘플이면 발생 수/구간/알람 시간이 이벤트 시각 평가와 동일"""
+        rng = random.Random(5)
+        scenarios = _random_scenarios(rng, 60)
+        n_steps = 400
+        samples = _random_samples(rng, ["T0", "T1", "T2"], n_steps)
+        end = n_steps * STEP
+
+        result = _run(scenarios, samples, n_steps, chunk_steps=37)
+
+        transitions = replay(scenarios, samples, until=end - 1e-6)
+        for s in scenarios:
+            mine = [t for t in transitions if t.scenario_id == s.scenario_id]
+            raises = [t.ts for t in mine if t.state == "raise"]
+            stats = result.scenarios[s.scenario_id]
+            assert stats.alarms == len(raises), s.scenario_id
+            if s.cooldown_seconds == 0:
+                clears = [t.ts for t in mine if t.state == "clear"] + [end]
+                assert stats.episodes == len(raises)
+                assert stats.time_in_alarm_s == pytest.approx(sum(c - r for r, c in zip(raises, clears)))
+        assert sum(s.alarms for s in result.scenarios.values()) > 0
+
+    def test_chunk_size_independent(self):
+        rng = random.Random(9)
+        scenarios = _random_scenarios(rng, 30)
+        samples = _random_samples(rng, ["T0", "T1", "T2"], 300)
+
+        whole = _run(scenarios, samples, 300, chunk_steps=300)
+        chunked = _run(scenarios, samples, 300, chunk_steps=7)
+
+        assert {k: v.to_dict() for k, v in whole.scenarios.items()} == \
+               {k: v.to_dict() for k, v in chunked.scenarios.items()}
+
+    def test_sweep_matches_individual_runs(self):
+        """임계값 그리드 1회 평가 == 임계값별 개별 백테스트"""
+        rng = random.Random(2)
+        samples = _random_samples(rng, ["TMP", "FLOW"], 500)
+        base = _scenario("A", [AlarmCondition("FLOW", "<", 5), AlarmCondition("TMP", ">", 5, duration_seconds=10,
+                                                                              off_delay_seconds=10, deadband=1.0)],
+                         cooldown=60)
+        grid = [2.0, 4.5, 6.0, 8.0]
+
+        result = _run([base], samples, 500, chunk_steps=64, sweeps=[ThresholdSweep("A", grid, condition_index=1)])
+
+        for stats, thr in zip(result.sweeps[0], grid):
+            single = _scenario("A", [base.conditions[0], AlarmCondition("TMP", ">", thr, duration_seconds=10,
+                                                                      off_delay_seconds=10, deadband=1.0)],
+                               cooldown=60)
+            expected = _run([single], samples, 500, chunk_steps=500).scenarios["A"]
+            assert stats.threshold == thr
+            assert stats.to_dict() | {"threshold": None} == expected.to_dict()
+
+    def test_flapping_and_durations(self):
+        sc = _scenario("A", [AlarmCondition("DP", ">", 1.2)])
+        # 0~20초 발생, 30초 재발생(해제 후 10초) ~ 40초, 200초 재발생 ~ 끝
+        samples = [(0, "DP", 1.5), (20, "DP", 1.0), (30, "DP", 1.5), (40, "DP", 1.0), (200, "DP", 1.5)]
+
+        stats = _run([sc], samples, 60, chunk_steps=13).scenarios["A"]
+
+        assert stats.episodes == 3
+        assert stats.flapping_episodes == 1
+        assert stats.time_in_alarm_s == pytest.approx(20 + 10 + 100)
+        assert stats.max_duration_s == pytest.approx(100)
+        assert stats.time_in_alarm_pct == pytest.approx(100 * 130 / 300)
+
+    def test_unknown_sweep_condition(self):
+        sc = _scenario("A", [AlarmCondition("DP", ">", 1.2)])
+        with pytest.raises(IndexError):
+            Backtester([sc], [ThresholdSweep("A", [1.0], condition_index=3)])
+
+
+def _copy_buffer(rows):
+    out = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+    for ts, col, value in rows:
+        out += struct.pack(">hidiiid", 3, 8, ts, 4, col, 8, value)
+    return out + struct.pack(">h", -1)
+
+
+class _FakeCopy:
+    def __init__(self, data):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        async def gen():
+            yield self.data[:50]
+            yield self.data[50:]
+        return gen()
+
+
+class _FakeConn:
+    """COPY 호출마다 (lo, hi] 구간의 행을 돌려주는 연결"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def cursor(self):
+        conn = self
+
+        class _Cur:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def copy(self, sql, params):
+                lo, hi = params[2].timestamp(), params[3].timestamp()
+                conn.calls.append((lo, hi))
+                return _FakeCopy(_copy_buffer([r for r in conn.rows if lo < r[0] <= hi]))
+
+        return _Cur()
+
+
+class TestCopyReplay:
+    """바이너리 COPY 수신 → 청크 평가"""
+
+    def test_parse_copy_binary(self):
+        ts, col, value = parse_copy_binary(_copy_buffer([(1.5, 2, 3.25), (6.5, 0, -1.0)]))
+
+        assert ts.tolist() == [1.5, 6.5]
+        assert col.tolist() == [2, 0]
+        assert value.tolist() == [3.25, -1.0]
+        assert len(parse_copy_binary(_copy_buffer([]))[0]) == 0
+
+    def test_run_backtest_chunks(self):
+        from datetime import timedelta
+
+        sc = _scenario("A", [AlarmCondition("DP", ">", 1.2, duration_seconds=10)], cooldown=0)
+        rows = [(float(t), 0, 1.5 if 100 <= t < 400 else 1.0) for t in range(0, 1000, 5)]
+        conn = _FakeConn(rows)
+
+        result = asyncio.run(run_backtest(conn, [sc], 0, 1000, chunk=timedelta(seconds=120)))
+
+        assert len(conn.calls) == 9
+        assert conn.calls[0] == (-5.0, 115.0)
+        stats = result.scenarios["A"]
+        assert (stats.episodes, stats.alarms) == (1, 1)
+        assert stats.time_in_alarm_s == pytest.approx(290)
+        assert result.samples == len(rows)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
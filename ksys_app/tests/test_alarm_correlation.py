@@ -0,0 +1,300 @@
+"""
+알람 폭주 억제 / 근본 원인 묶음 단위 테스트
+설비 그룹 묶음 / influx_tag 메타데이터 / 억제 그래프 / 만료 / 모니터 연동
+"""
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from ksys_app.alarm.correlation import AlarmCorrelator, tag_prefix
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = None
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.sql = sql
+
+    async def fetchall(self):
+        return self.rows
+
+
+class _Conn(_FakeConn):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Recorder:
+    """event_sink 대체: 등록된 행 기록"""
+
+    def __init__(self):
+        self.rows = []
+
+    def submit(self, table, row):
+        self.rows.append((table, row))
+        return True
+
+
+class TestAlarmCorrelator:
+    """AlarmCorrelator 테스트"""
+
+    def test_tag_prefix(self):
+        assert tag_prefix("RO1_TMP") == "RO1"
+        assert tag_prefix("P-101.RUN") == "P"
+        assert tag_prefix("TMP") == "TMP"
+
+    def test_flood_collapses_to_one_incident(self):
+        c = AlarmCorrelator(window_s=30)
+        statuses = [c.ingest(f"RO1_T{i:03d}", [f"RO1_T{i:03d}"], "WARNING", 1000 + i * 0.01).status
+                    for i in range(1000)]
+
+        assert statuses.count("open") == 1 and statuses.count("fold") == 999
+        incident = c.open_incidents()[0]
+        assert incident.root_key == "RO1_T000" and incident.count == 1000 and len(incident.keys) == 1000
+
+        closed = c.expire(1100)
+        assert closed == [incident] and c.open_incidents() == []
+
+    def test_window_is_sliding_and_level_escalates(self):
+        c = AlarmCorrelator(window_s=10)
+        c.ingest("RO1_A", ["RO1_A"], "WARNING", 0)
+        c.ingest("RO1_B", ["RO1_B"], "CRITICAL", 8)
+        assert c.ingest("RO1_C", ["RO1_C"], "WARNING", 16).status == "fold"  # 마지막 이벤트 기준 창
+        assert c.ingest("RO1_D", ["RO1_D"], "WARNING", 40).status == "open"
+
+        first = c.pop_closed()[0]
+        assert first.count == 3 and first.level == "CRITICAL"
+
+    def test_equipment_from_influx_tag_meta(self):
+        c = AlarmCorrelator(window_s=30)
+        conn = _FakeConn([("FT101", "PUMP-1"), ("PT202", "PUMP-1"), ("AT301", None)])
+
+        assert asyncio.run(c.load_tag_groups(conn)) == 2
+        assert "influx_tag" in conn.sql
+
+        assert c.ingest("S010", ["FT101"], "WARNING", 0).status == "open"
+        assert c.ingest("S011", ["PT202"], "WARNING", 1).status == "fold"
+        assert c.ingest("S012", ["AT301"], "WARNING", 2).status == "open"  # 메타데이터 없음 → 태그 자체
+
+    def test_suppression_graph(self):
+        c = AlarmCorrelator(window_s=30, suppression={"COMM_LOSS": ["RO1", "RO2"], "S004": ["S001"]})
+
+        root = c.ingest("COMM_LOSS", ["PLC1_COMM"], "CRITICAL", 0)
+        children = [c.ingest(f"{eq}_T{i}", [f"{eq}_T{i}"], "WARNING", 1 + i * 0.1)
+                    for eq in ("RO1", "RO2") for i in range(50)]
+        other = c.ingest("UF1_T0", ["UF1_T0"], "WARNING", 2)
+
+        assert root.forward
+        assert {r.status for r in children} == {"suppress"}
+        assert {id(r.incident) for r in children} == {id(root.incident)}
+        assert root.incident.suppressed == 100
+        assert other.status == "open"  # 억제 그래프에 없는 설비
+
+        # 부모 비활성 (hold 경과) → 자식은 자체 사고
+        assert c.ingest("RO1_T0", ["RO1_T0"], "WARNING", 500).status == "open"
+        # 시나리오 ID 간 억제
+        c.ingest("S004", ["PRESS"], "EMERGENCY", 600)
+        assert c.ingest("S001", ["TMP"], "WARNING", 601).status == "suppress"
+
+    def test_state_stays_bounded(self):
+        """이벤트 수와 무관하게 열린 사고/활성 표시가 창 크기로 제한"""
+        c = AlarmCorrelator(window_s=5)
+        start = time.perf_counter()
+        for i in range(200_000):
+            ts = i * 0.01
+            c.ingest(f"EQ{i // 700}_T{i % 13}", [f"EQ{i // 700}_T{i % 13}"], "WARNING", ts)
+        elapsed = time.perf_counter() - start
+
+        assert len(c.open_incidents()) <= 2
+        assert len(c._index) <= 2 * 13 + 2
+        assert len(c._active_order) <= 2 * 501
+        assert c.opened == 286 and c.events == 200_000
+        assert elapsed < 5.0
+
+
+class TestMonitorCorrelation:
+    """RangeMonitor / AlarmScenarioEngine 연동"""
+
+    def test_range_flood_writes_one_row_then_summary(self):
+        from ksys_app.monitoring.range_monitor import RangeMonitor, ThresholdConfig
+
+        monitor = RangeMonitor("", correlator=AlarmCorrelator(window_s=0.05))
+        monitor.event_sink = _Recorder()
+        for i in range(100):
+            monitor.set_custom_threshold(f"RO1_P{i}", ThresholdConfig(f"RO1_P{i}", 0, 10, 1, 8, 0, 9))
+        flood = [{"tag_name": f"RO1_P{i}", "value": 9.5} for i in range(100)]
+
+        async def run():
+            violations = await monitor.check_all_ranges(flood)
+            await asyncio.sleep(0.1)
+            await monitor.check_all_ranges([])
+            return violations
+
+        violations = asyncio.run(run())
+
+        assert len(violations) == 100 and len(monitor.violation_history) == 100
+        rows = [row for _, row in monitor.event_sink.rows]
+        assert [(r[0], r[2]) for r in rows] == [("RANGE", "RO1_P0"), ("INCIDENT", "RO1")]
+        assert rows[1][1] == "CRITICAL" and rows[1][3] == 100.0
+
+    def test_evicted_folded_members_archive_one_summary(self):
+        from datetime import datetime, timedelta
+
+        from ksys_app.alarm.action_dispatcher import ActionDispatcher, StubTarget
+        from ksys_app.alarm.history_store import HistoryStore
+        from ksys_app.alarm.scenario_engine import AlarmScenarioEngine
+        from ksys_app.monitoring.range_monitor import RangeMonitor, ThresholdConfig
+
+        monitor = RangeMonitor("", correlator=AlarmCorrelator(window_s=60))
+        monitor.event_sink = _Recorder()
+        monitor.violation_history = HistoryStore(time_of=lambda v: v.timestamp, capacity=10,
+                                                 evict=monitor._archive_violations, evict_batch=10)
+        for i in range(20):
+            monitor.set_custom_threshold(f"RO1_P{i}", ThresholdConfig(f"RO1_P{i}", 0, 10, 1, 8, 0, 9))
+        flood = [{"tag_name": f"RO1_P{i}", "value": 8.5 if i < 19 else 9.5} for i in range(20)]
+        asyncio.run(monitor.check_all_ranges(flood))
+
+        # 첫 이탈은 바로 기록, 밀려난 묶인 이탈 9건은 요약 1건 (행 단위 기록 없음)
+        rows = [row for _, row in monitor.event_sink.rows]
+        assert [(r[0], r[2], r[3]) for r in rows] == [("RANGE", "RO1_P0", 8.5), ("INCIDENT", "RO1", 9.0)]
+        assert rows[1][1] == "WARNING"
+
+        at = datetime(2026, 1, 1, 9, 0, 0)
+
+        async def run():
+            dispatcher = ActionDispatcher({t: StubTarget() for t in ("notify", "emergency", "adjust")},
+                                          schedule_path=None)
+            engine = AlarmScenarioEngine("", dispatcher=dispatcher, correlator=AlarmCorrelator(
+                window_s=60, tag_groups={"TMP": "RO1", "PRESSURE": "RO1", "COND": "RO1"}))
+            engine.event_sink = _Recorder()
+            for k, sid in enumerate(["S001", "S002", "S004", "S002"]):
+                await engine._trigger_alarm(engine.scenarios[sid], {}, {}, at + timedelta(seconds=k))
+            await dispatcher.close()
+            engine._archive_events(engine.alarm_history.range(at))
+            return engine
+
+        engine = asyncio.run(run())
+
+        opened, summary = [row for _, row in engine.event_sink.rows]
+        assert opened[1] == "S001" and summary[:4] == ("INCIDENT", "EMERGENCY", "RO1", 3.0)
+        assert summary[5] == at + timedelta(seconds=3) and "묶인 이벤트 3건" in summary[4]
+
+    def test_engine_skips_notifications_for_folded_events(self):
+        from datetime import datetime, timedelta
+
+        from ksys_app.alarm.action_dispatcher import ActionDispatcher, StubTarget
+        from ksys_app.alarm.scenario_engine import AlarmScenarioEngine
+
+        notify, adjust = StubTarget(), StubTarget()
+        correlator = AlarmCorrelator(window_s=60, suppression={"S004": ["S001"]})
+
+        async def run():
+            dispatcher = ActionDispatcher({"notify": notify, "emergency": StubTarget(), "adjust": adjust},
+                                          schedule_path=None)
+            engine = AlarmScenarioEngine("", dispatcher=dispatcher, correlator=correlator)
+            engine.event_sink = _Recorder()
+            engine.scenarios["S001"].actions[1].delay_seconds = 0  # 조정 액션 30초 지연 없이
+            at = datetime(2026, 1, 1, 9, 0, 0)
+            parent = await engine._trigger_alarm(engine.scenarios["S004"], {}, {}, at)
+            child = await engine._trigger_alarm(engine.scenarios["S001"], {}, {}, at + timedelta(seconds=5))
+            await dispatcher.drain()
+            await dispatcher.close()
+            return engine, parent, child
+
+        engine, parent, child = asyncio.run(run())
+
+        assert parent.correlation == "open" and child.correlation == "suppress"
+        # 억제된 WARNING: 알림은 생략, 제어 액션(adjust)은 실행
+        assert child.incident_id == parent.incident_id and child.actions_taken == ["adjust"]
+        assert len(notify.calls) == 1 and len(adjust.calls) == 1
+        assert [row[1] for _, row in engine.event_sink.rows] == ["S004"]
+        assert len(engine.alarm_history) == 2
+
+    def test_folded_emergency_still_dispatches_actions(self):
+        from datetime import datetime, timedelta
+
+        from ksys_app.alarm.action_dispatcher import ActionDispatcher, StubTarget
+        from ksys_app.alarm.scenario_engine import AlarmScenarioEngine
+
+        notify, emergency = StubTarget(), StubTarget()
+        correlator = AlarmCorrelator(window_s=60, tag_groups={"TMP": "RO1", "PRESSURE": "RO1"})
+
+        async def run():
+            dispatcher = ActionDispatcher({"notify": notify, "emergency": emergency, "adjust": StubTarget()},
+                                          schedule_path=None)
+            engine = AlarmScenarioEngine("", dispatcher=dispatcher, correlator=correlator)
+            engine.event_sink = _Recorder()
+            engine.scenarios["S001"].actions[1].delay_seconds = 0  # 조정 액션 30초 지연 없이
+            at = datetime(2026, 1, 1, 9, 0, 0)
+            first = await engine._trigger_alarm(engine.scenarios["S001"], {}, {}, at)
+            folded = await engine._trigger_alarm(engine.scenarios["S004"], {}, {}, at + timedelta(seconds=30))
+            await dispatcher.drain()
+            await dispatcher.close()
+            return engine, first, folded
+
+        engine, first, folded = asyncio.run(run())
+
+        assert first.correlation == "open" and folded.correlation == "fold"
+        assert folded.incident_id == first.incident_id
+        assert folded.actions_taken == ["emergency", "notify"]
+        assert len(emergency.calls) == 1 and emergency.calls[0][1]["all_systems"] is True
+        assert [params["target"] for _, params in notify.calls] == ["operator", "emergency_team"]
+        assert correlator.open_incidents()[0].level == "EMERGENCY"
+        # 기록은 사고 첫 이벤트만 (묶인 이벤트는 사고 요약으로)
+        assert [row[1] for _, row in engine.event_sink.rows] == ["S001"]
+
+    def test_tag_groups_refresh_off_alarm_path(self, monkeypatch):
+        import psycopg
+
+        from ksys_app.alarm import correlation
+        from ksys_app.monitoring.range_monitor import RangeMonitor
+
+        from ksys_app.alarm.event_sink import _SINKS
+
+        monitor = RangeMonitor("postgresql://plant", correlator=AlarmCorrelator(window_s=30))
+        _SINKS.pop("postgresql://plant", None)
+        monitor.event_sink = _Recorder()
+        c = monitor.correlator
+        gate = asyncio.Event()
+        connects = []
+
+        async def connect(dsn):
+            connects.append(dsn)
+            await gate.wait()
+            return _Conn([("FT101", "PUMP-1"), ("PT202", "PUMP-1")])
+
+        async def no_rules():
+            pass
+
+        monkeypatch.setattr(psycopg.AsyncConnection, "connect", connect)
+        monkeypatch.setattr(monitor, "ensure_rules", no_rules)
+
+        async def run():
+            # 알람 경로는 DB 조회 없이 캐시된 그룹(없으면 태그 자체)만 사용
+            await monitor.check_all_ranges([{"tag_name": "FT101", "value": 1.0}])
+            assert connects == [] and c.ingest("S010", ["FT101"], "WARNING", 0).incident.group == "FT101"
+            task = asyncio.get_running_loop().create_task(correlation.tag_group_refresh_task(interval_s=0.01))
+            await asyncio.sleep(0.05)
+            assert connects == ["postgresql://plant"]  # 조회 중에는 재조회하지 않음
+            gate.set()
+            await asyncio.sleep(0.05)
+            task.cancel()
+            return c.ingest("S011", ["PT202"], "WARNING", 100).incident.group
+
+        assert asyncio.run(run()) == "PUMP-1"
+        assert not c.needs_tag_groups() and connects == ["postgresql://plant"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,257 @@
+"""
+알람 시나리오 평가 계획 단위 테스트
+역색인 / 변경 태그만 재평가 / 지속시간·쿨다운 / 전체 루프 결과와 동일성
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from ksys_app.alarm.evaluation_plan import EvaluationPlan
+from ksys_app.alarm.scenario_engine import AlarmCondition, AlarmLevel, AlarmScenario, AlarmScenarioEngine
+
+
+def _scenario(sid, conditions, cooldown=300):
+    return AlarmScenario(sid, sid, AlarmLevel.WARNING, conditions, [], cooldown_seconds=cooldown)
+
+
+def _reference(scenarios, ticks):
+    """전체 순회 기준 구현 (총 경과 초 기준, 쿨다운 중에도 지속시간은 계속 측정)"""
+    first_met = {}
+    last = {}
+    fired = []
+    for ts, data in ticks:
+        out = []
+        for s in scenarios:
+            ok = True
+            for i, c in enumerate(s.conditions):
+                v = data.get(c.tag_name)
+                met = v is not None and {
+                    '>': v > c.threshold, '<': v < c.threshold,
+                    '>=': v >= c.threshold, '<=': v <= c.threshold,
+                    '==': abs(v - c.threshold) < 0.01, '!=': abs(v - c.threshold) >= 0.01,
+                }[c.operator]
+                key = (s.scenario_id, i)
+                if met and c.duration_seconds > 0:
+                    first_met.setdefault(key, ts)
+                    met = ts - first_met[key] >= c.duration_seconds
+                elif not met:
+                    first_met.pop(key, None)
+                ok = ok and met
+            if s.scenario_id in last and ts - last[s.scenario_id] < s.cooldown_seconds:
+                continue
+            if ok:
+                out.append(s.scenario_id)
+                last[s.scenario_id] = ts
+        fired.append(sorted(out))
+    return fired
+
+
+class TestEvaluationPlan:
+    """EvaluationPlan 테스트"""
+
+    def test_inverted_index(self):
+        """태그 → 해당 태그를 읽는 조건"""
+        plan = EvaluationPlan([
+            _scenario("A", [AlarmCondition("T1", ">", 1), AlarmCondition("T2", "<", 5)]),
+            _scenario("B", [AlarmCondition("T1", "<=", 0)]),
+        ])
+
+        assert sorted(plan.conditions_for_tag("T1").tolist()) == [0, 2]
+        assert plan.conditions_for_tag("T2").tolist() == [1]
+        assert plan.conditions_for_tag("NONE").tolist() == []
+
+    def test_only_changed_tags_reevaluated(self):
+        plan = EvaluationPlan([_scenario(f"S{i}", [AlarmCondition(f"T{i % 10}", ">", 50)]) for i in range(100)])
+        data = {f"T{i}": 10.0 for i in range(10)}
+        plan.update(data, 0.0)
+        assert plan.last_reevaluated == 100
+
+        data["T3"] = 60.0
+        fired = plan.update(data, 1.0)
+
+        assert plan.last_reevaluated == 10
+        assert [plan.scenarios[i].scenario_id for i in fired] == [f"S{i}" for i in range(3, 100, 10)]
+
+    def test_duration_and_cooldown(self):
+        """지속시간 충족 후 발생, 조건 유지 시 쿨다운마다 재발생"""
+        plan = EvaluationPlan([_scenario("A", [AlarmCondition("TMP", ">", 2.5, duration_seconds=60)], cooldown=600)])
+        hits = []
+        for t in range(0, 1300, 10):
+            for i in plan.update({"TMP": 3.0}, float(t)):
+                plan.mark_triggered(i, float(t))
+                hits.append(t)
+
+        assert hits == [60, 660, 1260]
+
+    def test_matches_full_scan_on_random_stream(self):
+        """무작위 시나리오/데이터에서 전체 순회 결과와 동일"""
+        rng = random.Random(7)
+        ops = [">", "<", ">=", "<=", "==", "!="]
+        scenarios = [
+            _scenario(
+                f"S{i}",
+                [
+                    AlarmCondition(f"T{rng.randrange(20)}", rng.choice(ops), rng.randrange(10),
+                                   duration_seconds=rng.choice([0, 0, 3]))
+                    for _ in range(rng.randint(1, 3))
+                ],
+                cooldown=rng.choice([0, 5, 20]),
+            )
+            for i in range(300)
+        ]
+        ticks = []
+        data = {f"T{t}": float(rng.randrange(10)) for t in range(20)}
+        for ts in range(200):
+            for t in rng.sample(range(20), 4):
+                data[f"T{t}"] = float(rng.randrange(10))
+            snapshot = {k: v for k, v in data.items() if rng.random() > 0.02}  # 가끔 누락
+            ticks.append((float(ts), snapshot))
+
+        plan = EvaluationPlan(scenarios)
+        got = []
+        for ts, snapshot in ticks:
+            fired = plan.update(snapshot, ts)
+            for i in fired:
+                plan.mark_triggered(i, ts)
+            got.append(sorted(plan.scenarios[i].scenario_id for i in fired))
+
+        assert got == _reference(scenarios, ticks)
+
+    def test_deadband_and_off_delay_match_stream_evaluator(self):
+        """1초 폴링 시 스트림 평가기와 같은 발생 시각 (deadband/off-delay 포함)"""
+        from ksys_app.alarm.stream_evaluator import replay
+
+        rng = random.Random(11)
+        scenarios = [
+            _scenario(f"S{i}", [AlarmCondition(f"T{i % 4}", rng.choice([">", "<"]), 5,
+                                               duration_seconds=rng.choice([0, 3]),
+                                               off_delay_seconds=rng.choice([0, 2]),
+                                               deadband=rng.choice([0, 1.5]))],
+                      cooldown=10)  # 쿨다운 0은 폴링에서 매 틱 재발생이므로 제외
+            for i in range(40)
+        ]
+        data = {f"T{t}": 5.0 for t in range(4)}
+        samples = []
+        for ts in range(1, 300):
+            tag = f"T{rng.randrange(4)}"
+            data[tag] = float(rng.randrange(11))
+            samples.append((float(ts), tag, data[tag]))
+
+        stream = sorted((t.ts, t.scenario_id) for t in replay(scenarios, samples) if t.state == "raise")
+
+        plan = EvaluationPlan(scenarios)
+        polled = []
+        values = {}
+        for ts, tag, value in samples:
+            values[tag] = value
+            for i in plan.update(values, ts):
+                plan.mark_triggered(i, ts)
+                polled.append((ts, plan.scenarios[i].scenario_id))
+
+        assert sorted(polled) == stream
+
+
+class TestEngineUsesPlan:
+    """AlarmScenarioEngine.check_scenarios 통합"""
+
+    def test_builtin_scenarios(self):
+        engine = AlarmScenarioEngine("")
+        triggered = []
+
+        async def trigger(scenario, sensor_data, conditions_met):
+            triggered.append(scenario.scenario_id)
+            return scenario.scenario_id
+
+        engine._trigger_alarm = trigger
+        t0 = datetime(2026, 1, 1, 9, 0, 0)
+        data = {"TMP": 3.0, "COND": 500, "DP": 1.5, "FLOW": 70, "PRESSURE": 10}
+
+        asyncio.run(engine.check_scenarios(data, now=t0))
+        assert triggered == ["S002", "S003"]  # TMP는 60초 지속 필요
+
+        asyncio.run(engine.check_scenarios(data, now=t0 + timedelta(seconds=61)))
+        assert triggered == ["S002", "S003", "S001"]
+
+    def test_definition_changes_recompile_plan(self):
+        engine = AlarmScenarioEngine("")
+        engine.load_scenarios([_scenario("A", [AlarmCondition("X", ">", 10.0)], cooldown=0)])
+        fired = []
+
+        async def trigger(scenario, sensor_data, conditions_met):
+            fired.append(scenario.scenario_id)
+            return scenario.scenario_id
+
+        engine._trigger_alarm = trigger
+        t0 = datetime(2026, 1, 1)
+        asyncio.run(engine.check_scenarios({"X": 5.0}, now=t0))
+        plan = engine._get_plan()
+        assert fired == []
+
+        # 엔진 밖에서 만든 조건/시나리오(백테스트 후보 등)는 재컴파일하지 않음
+        AlarmCondition("X", ">", 1.0)
+        _scenario("B", [AlarmCondition("Y", "<", 0.0)])
+        assert engine._get_plan() is plan
+
+        # 엔진 메서드로 수정 → 다음 틱에 새 계획으로 평가
+        engine.update_scenario("A", conditions=[AlarmCondition("X", ">", 1.0)])
+        asyncio.run(engine.check_scenarios({"X": 5.0}, now=t0 + timedelta(seconds=1)))
+        assert fired == ["A"] and engine._get_plan() is not plan
+
+        # 제자리 수정은 invalidate_plan 으로 알림
+        plan = engine._get_plan()
+        engine.scenarios["A"].conditions.append(AlarmCondition("Y", "<", 0.0))
+        assert engine._get_plan() is plan
+        engine.invalidate_plan("A")
+        assert engine._get_plan() is not plan
+        asyncio.run(engine.check_scenarios({"X": 5.0, "Y": 1.0}, now=t0 + timedelta(seconds=2)))
+        assert fired == ["A"]
+
+        with pytest.raises(AttributeError):
+            engine.update_scenario("A", threshold=3.0)
+
+    def test_rebuild_keeps_state_of_unchanged_scenarios(self):
+        """다른 시나리오 추가/삭제로 재컴파일돼도 진행 중인 on-delay/쿨다운 상태 유지"""
+        engine = AlarmScenarioEngine("")
+        engine.load_scenarios([
+            _scenario("A", [AlarmCondition("TMP", ">", 2.5, duration_seconds=60)], cooldown=600),
+            _scenario("B", [AlarmCondition("COND", ">", 400, duration_seconds=60)], cooldown=600),
+        ])
+        fired = []
+
+        async def trigger(scenario, sensor_data, conditions_met, triggered_at=None):
+            fired.append(scenario.scenario_id)
+            return scenario.scenario_id
+
+        engine._trigger_alarm = trigger
+        t0 = datetime(2026, 1, 1, 9, 0, 0)
+        data = {"TMP": 3.0, "COND": 500}
+        asyncio.run(engine.check_scenarios(data, now=t0))
+        asyncio.run(engine.process_samples([(t0, "TMP", 3.0), (t0, "COND", 500.0)]))
+
+        # 30초 뒤 B 조건 변경 + C 추가: A 는 충족 시작 시각(t0) 유지, B 는 다시 시작
+        engine.update_scenario("B", conditions=[AlarmCondition("COND", ">", 450, duration_seconds=60)])
+        engine.add_scenario(_scenario("C", [AlarmCondition("FLOW", "<", 10)]))
+        t30 = t0 + timedelta(seconds=30)
+        asyncio.run(engine.check_scenarios(data, now=t30))
+        asyncio.run(engine.process_samples([(t30, "COND", 500.0)]))
+
+        t60 = t0 + timedelta(seconds=61)
+        asyncio.run(engine.check_scenarios(data, now=t60))
+        assert fired == ["A"]
+        asyncio.run(engine.advance_stream(t60))
+        assert fired == ["A", "A"]
+
+        fired.clear()
+        t90 = t0 + timedelta(seconds=91)
+        asyncio.run(engine.check_scenarios(data, now=t90))
+        asyncio.run(engine.advance_stream(t90))
+        assert fired == ["B", "B"]  # A 는 쿨다운 유지
+
+        engine.remove_scenario("C")
+        assert engine._get_stream().active() == ["A", "B"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,146 @@
+"""
+이벤트 시각 알람 평가기 단위 테스트
+on/off-delay, deadband, 쿨다운, 재생 결정성
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ksys_app.alarm.scenario_engine import AlarmCondition, AlarmLevel, AlarmScenario, AlarmScenarioEngine
+from ksys_app.alarm.stream_evaluator import StreamEvaluator, replay
+
+
+def _scenario(conditions, cooldown=0, sid="A"):
+    return AlarmScenario(sid, sid, AlarmLevel.WARNING, conditions, [], cooldown_seconds=cooldown)
+
+
+def _trace(transitions):
+    return [(t.scenario_id, t.state, t.ts) for t in transitions]
+
+
+class TestStreamEvaluator:
+    """조건 상태 기계 테스트"""
+
+    def test_on_delay_uses_data_time(self):
+        """샘플 간격과 무관하게 on-delay 만료 시각에 발생"""
+        sc = _scenario([AlarmCondition("TMP", ">", 2.5, duration_seconds=60)])
+
+        out = replay([sc], [(0, "TMP", 3.0), (10, "TMP", 3.1), (100, "TMP", 3.2)])
+
+        assert _trace(out) == [("A", "raise", 60.0)]
+
+    def test_on_delay_longer_than_one_day(self):
+        """1일 이상 지속 조건 (timedelta.seconds 랩어라운드 없음)"""
+        sc = _scenario([AlarmCondition("COND", ">", 450, duration_seconds=90_000)])
+
+        out = replay([sc], [(0, "COND", 500), (86_400, "COND", 510)], until=100_000)
+
+        assert _trace(out) == [("A", "raise", 90_000.0)]
+
+    def test_interrupted_on_delay_restarts(self):
+        sc = _scenario([AlarmCondition("TMP", ">", 2.5, duration_seconds=60)])
+
+        out = replay([sc], [(0, "TMP", 3.0), (30, "TMP", 2.0), (40, "TMP", 3.0)], until=200)
+
+        assert _trace(out) == [("A", "raise", 100.0)]
+
+    def test_deadband_hysteresis(self):
+        """발생 후 threshold - deadband 이하로 내려가야 해제"""
+        sc = _scenario([AlarmCondition("TMP", ">", 2.5, deadband=0.2)])
+
+        out = replay([sc], [(0, "TMP", 2.6), (1, "TMP", 2.4), (2, "TMP", 2.35), (3, "TMP", 2.2), (4, "TMP", 2.4)])
+
+        assert _trace(out) == [("A", "raise", 0.0), ("A", "clear", 3.0)]
+
+    def test_off_delay(self):
+        """이탈이 off-delay 동안 유지될 때만 해제, 정확한 만료 시각"""
+        sc = _scenario([AlarmCondition("DP", ">", 1.2, off_delay_seconds=10)])
+
+        out = replay([sc], [
+            (0, "DP", 1.5), (100, "DP", 1.0), (105, "DP", 1.5),  # 5초 이탈 → 유지
+            (200, "DP", 1.0), (260, "DP", 1.0),
+        ])
+
+        assert _trace(out) == [("A", "raise", 0.0), ("A", "clear", 210.0)]
+
+    def test_and_conditions_and_cooldown_repeat(self):
+        """AND 조건 충족 유지 시 쿨다운마다 재발생"""
+        sc = _scenario([AlarmCondition("DP", ">", 1.2), AlarmCondition("FLOW", "<", 80)], cooldown=600)
+        samples = [(0, "DP", 1.5), (5, "FLOW", 70)]
+
+        out = replay([sc], samples, until=1300)
+
+        assert _trace(out) == [("A", "raise", 5.0), ("A", "raise", 605.0), ("A", "raise", 1205.0)]
+        assert out[0].values == {"DP": 1.5, "FLOW": 70.0}
+
+    def test_reraise_within_cooldown_waits(self):
+        sc = _scenario([AlarmCondition("COND", ">", 450)], cooldown=100)
+
+        out = replay([sc], [(0, "COND", 500), (10, "COND", 400), (20, "COND", 500)], until=150)
+
+        assert _trace(out) == [("A", "raise", 0.0), ("A", "clear", 10.0), ("A", "raise", 100.0)]
+
+    def test_result_independent_of_polling_cadence(self):
+        """중간 advance() 호출 여부와 무관하게 같은 전이"""
+        rng = random.Random(3)
+        scenarios = [
+            _scenario([AlarmCondition(f"T{i % 3}", ">", 5, duration_seconds=rng.choice([0, 7]),
+                                      off_delay_seconds=rng.choice([0, 4]), deadband=rng.choice([0, 1]))],
+                      cooldown=rng.choice([0, 30]), sid=f"S{i}")
+            for i in range(30)
+        ]
+        samples = [(float(t), f"T{rng.randrange(3)}", float(rng.randrange(10))) for t in range(0, 500, 3)]
+
+        batch = replay(scenarios, samples, until=600)
+
+        ev = StreamEvaluator(scenarios)
+        polled = []
+        for ts, tag, value in samples:
+            polled.extend(ev.advance(ts - 1.5))  # 폴링 루프가 중간에 시각만 진행
+            polled.extend(ev.push(ts, tag, value))
+        polled.extend(ev.advance(600))
+
+        assert _trace(polled) == _trace(batch)
+        assert batch  # 전이가 실제로 발생
+
+    def test_same_time_samples_applied_together(self):
+        """같은 시각의 모든 태그 샘플을 반영한 뒤 판정 (0초 발생/해제 없음)"""
+        sc = _scenario([AlarmCondition("X", ">", 5, duration_seconds=10), AlarmCondition("Y", "<", 5)])
+        samples = [(0, "X", 6), (0, "Y", 1), (10, "Z", 0), (10, "Y", 9)]
+
+        assert replay([sc], samples, until=20) == []
+
+    def test_late_sample_dropped(self):
+        ev = StreamEvaluator([_scenario([AlarmCondition("TMP", ">", 2.5)])])
+        ev.push(10, "TMP", 1.0)
+
+        assert ev.push(5, "TMP", 3.0) == []
+        assert ev.late_samples == 1
+
+
+class TestEngineStream:
+    """AlarmScenarioEngine.process_samples 통합"""
+
+    def test_event_carries_data_timestamp(self):
+        engine = AlarmScenarioEngine("")
+
+        async def no_db(event):
+            return None
+
+        engine._save_event_to_db = no_db
+        engine.scenarios["S001"].actions = []  # 액션 핸들러 실행 제외
+        t0 = datetime(2026, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        samples = [(t0 + timedelta(seconds=s), "TMP", 3.0) for s in (0, 45, 90)]
+
+        events = asyncio.run(engine.process_samples(samples))
+
+        assert [e.scenario_id for e in events] == ["S001"]
+        expected = (t0 + timedelta(seconds=60)).astimezone().replace(tzinfo=None)
+        assert events[0].triggered_at == expected
+        assert events[0].sensor_values == {"TMP": 3.0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,319 @@
+"""
+수질 준수율 시간별 판정 집계 단위 테스트
+원본 전수 판정과 일치 (잘린 시간 포함) / 증분 갱신 구간 / 기준 변경 재집계 / 보고서
+"""
+import asyncio
+import contextlib
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from ksys_app.water_quality import compliance_rollup as rollup
+from ksys_app.water_quality import quality_monitor
+from ksys_app.water_quality.compliance_rollup import (
+    Thresholds, classify, refresh_rollup, rollup_counts, thresholds_for,
+)
+from ksys_app.water_quality.quality_monitor import (
+    TAG_PARAMETERS, ComplianceStatus, WaterQualityMonitor,
+)
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+STATUS_INDEX = {ComplianceStatus.COMPLIANT: 0, ComplianceStatus.WARNING: 1,
+                ComplianceStatus.VIOLATION: 2, ComplianceStatus.CRITICAL: 3}
+
+
+def _hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class _WaterDB:
+    """influx_hist + wq_compliance_1h 대체 (SQL 판정 조건을 그대로 옮김)"""
+
+    def __init__(self, samples):
+        self.samples = list(samples)  # (tag, ts, value)
+        self.rollup = {}              # (tag, bucket) -> (version, [c, w, v, k], vmin, vmax)
+        self.executed = []
+        self.commits = 0
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if sql is rollup.ROLLUP_SQL:
+            self._upsert(*params)
+
+    @staticmethod
+    def _sql_grade(v, smin, smax, wmin, wmax, cmax):
+        if smin <= v <= smax and wmin <= v <= wmax:
+            return 0
+        if smin <= v <= smax:
+            return 1
+        if (v < smin and v >= wmin) or (v > smax and v <= cmax):
+            return 2
+        return 3
+
+    def _upsert(self, tags, versions, smin, smax, wmin, wmax, cmax, since, end):
+        groups = {}
+        for i, tag in enumerate(tags):
+            for t, ts, v in self.samples:
+                if t == tag and since[i] <= ts < end:
+                    row = groups.setdefault((tag, _hour(ts)), [versions[i], [0, 0, 0, 0], v, v])
+                    row[1][self._sql_grade(v, smin[i], smax[i], wmin[i], wmax[i], cmax[i])] += 1
+                    row[2], row[3] = min(row[2], v), max(row[3], v)
+        self.rollup.update({k: tuple(r) for k, r in groups.items()})
+
+    async def fetchall(self):
+        sql, params = self.executed[-1]
+        if sql is rollup.WATERMARK_SQL:
+            current = dict(zip(*params))
+            last = {}
+            for (tag, bucket), row in self.rollup.items():
+                if current.get(tag) == row[0]:
+                    last[tag] = max(last.get(tag, bucket), bucket)
+            return list(last.items())
+        if sql is rollup.FIRST_SAMPLE_SQL:
+            return [(tag, min((ts for t, ts, _ in self.samples if t == tag), default=None)) for tag in params[0]]
+        if sql is rollup.SUM_SQL:
+            tags, versions, his, lo = params
+            current = {t: (v, hi) for t, v, hi in zip(tags, versions, his)}
+            out = {}
+            for (tag, bucket), (version, counts, vmin, vmax) in sorted(self.rollup.items(), key=lambda x: x[0][1]):
+                if current.get(tag, (None,))[0] != version or not lo <= bucket < current[tag][1]:
+                    continue
+                row = out.setdefault(tag, [tag, 0, 0, 0, 0, None, None, None])
+                for k in range(4):
+                    row[1 + k] += counts[k]
+                if counts[3]:
+                    row[5:] = [bucket, vmin, vmax]
+            return [tuple(r) for r in out.values()]
+        if sql is rollup.RAW_SQL:
+            tags, lo, hi = params
+            return [(t, ts, v) for t, ts, v in self.samples if t in tags and lo <= ts < hi]
+        raise AssertionError(sql)
+
+    def rollup_spans(self):
+        """집계 쿼리별 (최소 since, end)"""
+        return [(min(p[7]), p[8]) for sql, p in self.executed if sql is rollup.ROLLUP_SQL]
+
+
+def _samples(hours, seed=3, start=T0):
+    """태그별 분 단위 표본 - 기준 경계 근처 값과 이상값 섞음"""
+    rng = random.Random(seed)
+    centers = {'PH': (7.0, 0.9), 'TURB': (0.3, 0.15), 'CL2': (1.0, 1.2),
+               'TDS': (400, 60), 'COND_OUT': (650, 80), 'TEMP': (15, 6)}
+    out = []
+    for tag, (mu, sigma) in centers.items():
+        for m in range(0, hours * 60, 7):
+            v = rng.gauss(mu, sigma)
+            if tag in ('TURB', 'TDS', 'COND_OUT'):
+                v = abs(v)  # 기준 최소 0 - 음수는 check_water_quality 이탈률 계산 불가
+            if rng.random() < 0.01:
+                v = mu + 5 * sigma
+            out.append((tag, start + timedelta(minutes=m, seconds=rng.randrange(60)), v))
+    return out
+
+
+def _brute_force(monitor, samples, start, end):
+    """표본마다 check_water_quality 판정"""
+    counts = {tag: np.zeros(4, dtype=np.int64) for tag in TAG_PARAMETERS}
+
+    async def run():
+        for tag, ts, v in samples:
+            if start <= ts < end:
+                result = await monitor.check_water_quality(TAG_PARAMETERS[tag], v)
+                counts[tag][STATUS_INDEX[result.status]] += 1
+
+    asyncio.run(run())
+    return counts
+
+
+@pytest.fixture
+def monitor():
+    return WaterQualityMonitor("")
+
+
+class TestClassify:
+    """표본 판정 테스트"""
+
+    def test_matches_check_water_quality(self, monitor):
+        rng = np.random.default_rng(5)
+        for parameter in ('pH', 'residual_chlorine', 'temperature', 'tds'):
+            standard = monitor.standards[parameter]
+            th = Thresholds.from_standard(standard)
+            edges = [standard.standard_min, standard.standard_max, standard.warning_min,
+                     standard.warning_max, th.critical_max]
+            values = np.concatenate([edges, np.nextafter(edges, np.inf), np.nextafter(edges, -np.inf),
+                                     rng.uniform(standard.standard_min, th.critical_max * 1.3, 400)])
+            values = values[values >= 0] if standard.standard_min == 0 else values
+
+            async def run():
+                return [STATUS_INDEX[(await monitor.check_water_quality(parameter, float(v))).status]
+                        for v in values]
+
+            expected = np.bincount(asyncio.run(run()), minlength=4)
+            assert classify(values, th).tolist() == expected.tolist()
+            assert all(_WaterDB._sql_grade(float(v), th.standard_min, th.standard_max, th.warning_min,
+                                           th.warning_max, th.critical_max) == g
+                       for v, g in zip(values, rollup.grade(values, th)))
+
+
+class TestRollup:
+    """집계 갱신 / 조회 테스트"""
+
+    def test_counts_match_brute_force_with_partial_hours(self, monitor):
+        samples = _samples(hours=72)
+        db = _WaterDB(samples)
+        thresholds = thresholds_for(monitor.standards, TAG_PARAMETERS)
+        asyncio.run(refresh_rollup(db, thresholds, now=T0 + timedelta(hours=72)))
+
+        for start, end in [(T0, T0 + timedelta(hours=72)),
+                           (T0 + timedelta(minutes=17), T0 + timedelta(hours=50, minutes=41)),
+                           (T0 + timedelta(hours=5, minutes=3), T0 + timedelta(hours=5, minutes=58))]:
+            got = asyncio.run(rollup_counts(db, thresholds, start, end))
+            expected = _brute_force(monitor, samples, start, end)
+            for tag in TAG_PARAMETERS:
+                assert got[tag].counts.tolist() == expected[tag].tolist(), (tag, start, end)
+
+    def test_incremental_refresh_reads_recent_window_only(self, monitor):
+        samples = _samples(hours=24 * 20, seed=8)
+        now = T0 + timedelta(days=20)
+        db = _WaterDB([s for s in samples if s[1] < now - timedelta(hours=3)])
+        thresholds = thresholds_for(monitor.standards, TAG_PARAMETERS)
+
+        assert asyncio.run(refresh_rollup(db, thresholds, now=now - timedelta(hours=3))) == 3  # 7일 단위 백필
+        assert db.commits == 3
+
+        db.samples = samples  # 3시간 새 데이터 + 늦게 들어온 표본
+        db.executed.clear()
+        asyncio.run(refresh_rollup(db, thresholds, now=now))
+        (since, end), = db.rollup_spans()
+        assert end - since <= timedelta(seconds=rollup.LATE_S) + timedelta(hours=5)
+
+        got = asyncio.run(rollup_counts(db, thresholds, T0, now))
+        expected = _brute_force(monitor, samples, T0, now)
+        assert all(got[t].counts.tolist() == expected[t].tolist() for t in TAG_PARAMETERS)
+        # 완전한 시간만 있는 기간 - 원본은 워터마크 버킷(진행 중일 수 있는 마지막 1시간)만
+        raw = [p for sql, p in db.executed if sql is rollup.RAW_SQL]
+        assert len(raw) == 1 and raw[0][1:] == (now - timedelta(hours=1), now)
+
+    def test_stale_watermark_reads_capped_raw_tail(self, monitor, monkeypatch):
+        monkeypatch.setattr(rollup, "CATCHUP_S", 4 * 3600)
+        samples = _samples(hours=48, seed=5)
+        db = _WaterDB(samples)
+        thresholds = thresholds_for(monitor.standards, TAG_PARAMETERS)
+        asyncio.run(refresh_rollup(db, thresholds, now=T0 + timedelta(hours=40)))  # 8시간 전에 멈춤
+        db.executed.clear()
+
+        end = T0 + timedelta(hours=48)
+        got = asyncio.run(rollup_counts(db, thresholds, T0, end))
+        # 쓰기 없음, 워터마크(39시) 앞은 집계 + 끝 4시간만 원본 → 39~44시 누락
+        assert not any(sql is rollup.ROLLUP_SQL for sql, _ in db.executed)
+        raw = {p[1:] for sql, p in db.executed if sql is rollup.RAW_SQL}
+        assert raw == {(end - timedelta(hours=4), end)}
+        kept = [s for s in samples if s[1] < T0 + timedelta(hours=39) or s[1] >= end - timedelta(hours=4)]
+        expected = _brute_force(monitor, kept, T0, end)
+        assert all(got[t].counts.tolist() == expected[t].tolist() for t in TAG_PARAMETERS)
+
+    def test_threshold_change_rebuilds_tag(self, monitor):
+        samples = _samples(hours=30, seed=11)
+        db = _WaterDB(samples)
+        now = T0 + timedelta(hours=30)
+        asyncio.run(refresh_rollup(db, thresholds_for(monitor.standards, TAG_PARAMETERS), now=now))
+
+        monitor.standards['pH'].warning_max = 7.5
+        thresholds = thresholds_for(monitor.standards, TAG_PARAMETERS)
+        db.executed.clear()
+        asyncio.run(refresh_rollup(db, thresholds, now=now))
+        (since, _), = db.rollup_spans()
+        assert since == T0  # pH 처음부터
+
+        got = asyncio.run(rollup_counts(db, thresholds, T0, now))
+        expected = _brute_force(monitor, samples, T0, now)
+        assert got['PH'].counts.tolist() == expected['PH'].tolist()
+
+
+class TestComplianceReport:
+    """WaterQualityMonitor.calculate_compliance_rate 테스트"""
+
+    def test_report_uses_exact_counts(self, monitor, monkeypatch):
+        now = _hour(datetime.now(timezone.utc))  # 갱신은 현재 시각까지
+        samples = _samples(hours=48, seed=21, start=now - timedelta(hours=48))
+        db = _WaterDB(samples)
+        asyncio.run(refresh_rollup(db, thresholds_for(monitor.standards, TAG_PARAMETERS), now=now))
+        db.executed.clear()
+        commits = db.commits
+
+        async def connect(dsn):
+            return db
+
+        monkeypatch.setattr(quality_monitor.psycopg.AsyncConnection, "connect", connect)
+        start, end = now - timedelta(hours=40, minutes=30), now - timedelta(minutes=5)
+        report = asyncio.run(monitor.calculate_compliance_rate(start, end))
+        # 조회 경로는 읽기만 (갱신은 wq_rollup_task / scripts/wq_rollup.py)
+        assert db.commits == commits and not any(sql is rollup.ROLLUP_SQL for sql, _ in db.executed)
+
+        expected = _brute_force(monitor, samples, start, end)
+        total = sum(int(c.sum()) for c in expected.values())
+        assert report.total_samples == total
+        assert report.compliant_samples == sum(int(c[0]) for c in expected.values())
+        assert report.violation_samples == sum(int(c[2] + c[3]) for c in expected.values())
+        assert report.compliance_rate == pytest.approx(report.compliant_samples / total * 100)
+
+        critical = {e['parameter']: e for e in report.critical_events}
+        for tag, c in expected.items():
+            parameter = TAG_PARAMETERS[tag]
+            assert report.parameters[parameter] == pytest.approx(c[0] / c.sum() * 100)
+            assert (parameter in critical) == bool(c[3])
+            if c[3]:
+                assert critical[parameter]['count'] == c[3]
+                assert start - timedelta(hours=1) < critical[parameter]['timestamp'] < end
+
+
+    def test_background_task_refreshes_rollup(self, monitor, monkeypatch):
+        db = _WaterDB(_samples(hours=6, seed=2, start=_hour(datetime.now(timezone.utc)) - timedelta(hours=6)))
+        thresholds = thresholds_for(monitor.standards, TAG_PARAMETERS)
+
+        async def connect(dsn):
+            return db
+
+        async def load(dsn):
+            return thresholds
+
+        monkeypatch.setattr(quality_monitor.psycopg.AsyncConnection, "connect", connect)
+        monkeypatch.setattr(quality_monitor, "load_thresholds", load)
+        daily = []
+
+        async def refresh_daily(conn, th):
+            daily.append(th)
+            return 0
+
+        monkeypatch.setattr(quality_monitor, "refresh_daily", refresh_daily)
+
+        async def run():
+            assert await quality_monitor.wq_rollup_task("", interval_s=60) is None  # DSN 없음 → 실행 안 함
+            task = asyncio.create_task(quality_monitor.wq_rollup_task("postgresql://wq", interval_s=60))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(run())
+        assert db.rollup and db.commits == 1 and daily == [thresholds]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
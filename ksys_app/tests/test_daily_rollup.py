@@ -0,0 +1,250 @@
+"""
+수질 일별 통계 단위 테스트
+마감 조건 (마지막 버킷 도착 / 무신호 LATE_S) / 증분 갱신 / backfill / 병합 통계 / 월간 보고서 경로
+"""
+import asyncio
+import contextlib
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ksys_app.utils.time_axis import SEOUL_TZ
+from ksys_app.water_quality import daily_rollup as daily
+from ksys_app.water_quality import report_generator
+from ksys_app.water_quality.compliance_rollup import FIRST_SAMPLE_SQL, LATE_S, grade, thresholds_for
+from ksys_app.water_quality.daily_rollup import backfill_daily, combine, covers, read_daily, refresh_daily
+from ksys_app.water_quality.quality_monitor import TAG_PARAMETERS, ComplianceReport, WaterQualityMonitor
+from ksys_app.water_quality.report_generator import PERIOD_SQL, REPORT_TAGS, ReportType, WaterQualityReportGenerator
+
+D0 = datetime(2025, 3, 1, tzinfo=SEOUL_TZ)
+
+
+def _thresholds(tags=("PH", "TURB")):
+    return thresholds_for(WaterQualityMonitor("").standards, TAG_PARAMETERS, tags)
+
+
+def _samples(days=5, seed=4):
+    """(태그, ts, 값) - 10분 간격, 가끔 기준 이탈"""
+    rng = random.Random(seed)
+    out = []
+    for tag, mu, sd in (("PH", 7.5, 0.6), ("TURB", 0.3, 0.15)):
+        for k in range(days * 144):
+            out.append((tag, D0 + timedelta(minutes=10 * k), max(rng.gauss(mu, sd), 0.0)))
+    return out
+
+
+class _WaterDB:
+    """influx_hist + wq_daily 대체 (DAILY_SQL 집계를 그대로 옮김)"""
+
+    def __init__(self, samples):
+        self.samples = list(samples)
+        self.daily = {}   # (tag, day) -> row
+        self.executed = []
+        self.commits = 0
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self.sql, self.params = sql, params
+        if sql is daily.DAILY_SQL:
+            self._upsert(*params)
+
+    async def fetchall(self):
+        if self.sql is daily.LAST_DAY_SQL:
+            tags, versions = self.params
+            last = {}
+            for (tag, day), row in self.daily.items():
+                if tag in tags and row["version"] == versions[tags.index(tag)]:
+                    last[tag] = max(last.get(tag, day), day)
+            return list(last.items())
+        if self.sql is FIRST_SAMPLE_SQL or self.sql is daily.LAST_SAMPLE_SQL:
+            pick = min if self.sql is FIRST_SAMPLE_SQL else max
+            return [(tag, pick((ts for t, ts, _ in self.samples if t == tag), default=None))
+                    for tag in self.params[0]]
+        if self.sql is daily.READ_SQL:
+            tags, versions, lo, hi = self.params
+            return [(tag, day, r["n"], r["mean"], r["min"], r["max"], r["std"], *r["counts"],
+                     r["open"], r["close"], r["transitions"], r["first"], r["last"])
+                    for (tag, day), r in sorted(self.daily.items())
+                    if tag in tags and r["version"] == versions[tags.index(tag)] and lo <= day < hi]
+        return []
+
+    def _upsert(self, tags, versions, smin, smax, wmin, wmax, cmax, since, until):
+        th = _thresholds(tags)
+        for i, tag in enumerate(tags):
+            groups = {}
+            for t, ts, v in sorted(self.samples, key=lambda s: s[1]):
+                if t == tag and since[i] <= ts < until[i]:
+                    groups.setdefault(ts.astimezone(SEOUL_TZ).date(), []).append((ts, v))
+            for day, pts in groups.items():
+                values = np.array([v for _, v in pts])
+                ok = grade(values, th[tag]) == 0
+                changed = [pts[k][0] for k in range(1, len(pts)) if ok[k] != ok[k - 1]]
+                self.daily[(tag, day)] = {
+                    "version": versions[i], "n": len(values), "mean": values.mean(),
+                    "min": values.min(), "max": values.max(),
+                    "std": values.std(ddof=1) if len(values) > 1 else None,
+                    "counts": np.bincount(grade(values, th[tag]), minlength=4).tolist(),
+                    "open": bool(ok[0]), "close": bool(ok[-1]), "transitions": len(changed),
+                    "first": changed[0] if changed else None, "last": changed[-1] if changed else None,
+                }
+
+    def upserts(self):
+        return [p for sql, p in self.executed if sql is daily.DAILY_SQL]
+
+
+class TestRefreshDaily:
+    """refresh_daily / backfill_daily 테스트"""
+
+    def test_closes_only_finished_days(self):
+        db = _WaterDB(_samples(days=5))
+        th = _thresholds()
+        # 5일째 12시 - 마지막 표본(5일째 23:50)이 있어도 아직 하루가 끝나지 않음
+        now = D0 + timedelta(days=4, hours=12)
+        db.samples = [s for s in db.samples if s[1] <= now]
+        asyncio.run(refresh_daily(db, th, now))
+        assert sorted({day for _, day in db.daily}) == [(D0 + timedelta(days=k)).date() for k in range(4)]
+        assert db.commits == len(db.upserts()) == 1
+
+        # 다음 날 첫 버킷 도착 → 5일째 마감 (LATE_S 대기 없음)
+        db.samples += [(tag, D0 + timedelta(days=5, minutes=5), 7.0) for tag in th]
+        db.executed.clear()
+        asyncio.run(refresh_daily(db, th, D0 + timedelta(days=5, minutes=10)))
+        (params,) = db.upserts()
+        assert params[7] == [D0 + timedelta(days=4)] * 2 and params[8] == [D0 + timedelta(days=5)] * 2
+        assert (("PH", (D0 + timedelta(days=4)).date())) in db.daily
+
+        # 갱신할 날이 없으면 집계 쿼리 없음
+        db.executed.clear()
+        assert asyncio.run(refresh_daily(db, th, D0 + timedelta(days=5, minutes=20))) == 0
+
+    def test_silent_tag_closes_after_late_window(self):
+        db = _WaterDB([s for s in _samples(days=2) if s[0] == "PH"])
+        th = _thresholds(("PH",))
+        end = D0 + timedelta(days=2)
+        asyncio.run(refresh_daily(db, th, end + timedelta(seconds=LATE_S - 60)))
+        assert len(db.daily) == 1
+        asyncio.run(refresh_daily(db, th, end + timedelta(seconds=LATE_S)))
+        assert len(db.daily) == 2
+
+    def test_backfill_recomputes_and_chunks(self, monkeypatch):
+        monkeypatch.setattr(daily, "DAILY_CHUNK_DAYS", 2)
+        db = _WaterDB(_samples(days=5))
+        th = _thresholds()
+        asyncio.run(refresh_daily(db, th, D0 + timedelta(days=6)))
+        assert len(db.upserts()) == 3 and len(db.daily) == 10
+
+        day = (D0 + timedelta(days=1)).date()
+        db.samples = [s for s in db.samples if not (s[0] == "PH" and s[1].date() == day and s[2] > 8)]
+        db.executed.clear()
+        asyncio.run(backfill_daily(db, th, day, day + timedelta(days=1)))
+        (params,) = db.upserts()
+        assert params[7] == [D0 + timedelta(days=1)] * 2
+        assert db.daily[("PH", day)]["max"] <= 8
+
+
+class TestCombine:
+    """combine - 일별 통계 병합 = 원본 전체 통계"""
+
+    def test_matches_raw_samples(self):
+        db = _WaterDB(_samples(days=5))
+        th = _thresholds()
+        asyncio.run(refresh_daily(db, th, D0 + timedelta(days=6)))
+        rows = asyncio.run(read_daily(db, th, D0.date(), (D0 + timedelta(days=5)).date()))
+
+        for tag in th:
+            values = np.array([v for t, _, v in db.samples if t == tag])
+            stats = combine(rows[tag])
+            assert len(rows[tag]) == 5 and stats["n"] == len(values)
+            assert stats["avg"] == pytest.approx(values.mean())
+            assert stats["std"] == pytest.approx(values.std(ddof=1))
+            assert (stats["min"], stats["max"]) == (values.min(), values.max())
+            counts = np.bincount(grade(values, th[tag]), minlength=4)
+            assert [stats[c] for c in ("compliant", "warning", "violation", "critical")] == counts.tolist()
+
+    def test_covers(self):
+        d = lambda k: (D0 + timedelta(days=k)).date()  # noqa: E731
+        assert covers({"PH": d(4), "TURB": d(4)}, d(0), d(5))
+        assert not covers({"PH": d(3), "TURB": d(3)}, d(0), d(5))   # 마지막 날 미마감
+        assert not covers({"PH": d(4), "TURB": d(2)}, d(0), d(5))   # 기간 안에서 멈춘 태그
+        assert covers({"PH": d(4), "TURB": d(-3)}, d(0), d(5))      # 기간 전에 끊긴 태그
+        assert not covers({}, d(0), d(5))
+
+    def test_empty_and_single_sample(self):
+        assert combine([]) is None
+        one = daily.DailyStats("PH", D0.date(), 1, 7.0, 7.0, 7.0, None, 1, 0, 0, 0)
+        assert combine([one])["avg"] == 7.0 and np.isnan(combine([one])["std"])
+        assert combine([one, one])["std"] == 0.0
+
+
+class TestMonthlyReport:
+    """월간 보고서 - 일별 통계 경로"""
+
+    @pytest.fixture
+    def db(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        db = _WaterDB(_samples(days=5))
+        # 마감은 백그라운드 갱신 (wq_rollup_task / scripts/wq_daily.py)
+        asyncio.run(refresh_daily(db, thresholds_for(WaterQualityMonitor("").standards, TAG_PARAMETERS, REPORT_TAGS),
+                                  D0 + timedelta(days=6)))
+        db.executed.clear()
+
+        async def connect(dsn):
+            return db
+
+        async def compliance(self, start_date, end_date):
+            return ComplianceReport((start_date, end_date), 0, 0, 0, 0, 100.0, {}, [])
+
+        monkeypatch.setattr(report_generator.psycopg.AsyncConnection, "connect", connect)
+        monkeypatch.setattr(WaterQualityMonitor, "calculate_compliance_rate", compliance)
+        return db
+
+    def test_reads_daily_rows_instead_of_hourly(self, db):
+        end = D0 + timedelta(days=5)
+        report = asyncio.run(WaterQualityReportGenerator("").generate_report(ReportType.MONTHLY, D0, end))
+
+        executed = [sql for sql, _ in db.executed]
+        assert PERIOD_SQL not in executed and daily.READ_SQL in executed
+        assert daily.DAILY_SQL not in executed and db.commits == 1  # 보고서 경로는 읽기만
+        ph = np.array([v for t, _, v in db.samples if t == "PH"])
+        stats = report.summary["parameters"]["PH"]
+        assert stats["samples"] == len(ph) and stats["average"] == pytest.approx(ph.mean())
+        assert stats["std_dev"] == pytest.approx(ph.std(ddof=1))
+        series = report.charts_data[0]["data"]
+        assert [p["timestamp"] for p in series] == [(D0 + timedelta(days=k)).isoformat() for k in range(5)]
+        assert any(t["parameter"] == "PH" for t in report.trends_data)
+
+    def test_falls_back_to_hourly(self, db, monkeypatch):
+        generator = WaterQualityReportGenerator("")
+        # 0시 경계가 아니면 1시간 집계
+        asyncio.run(generator.generate_report(ReportType.MONTHLY, D0 + timedelta(hours=3), D0 + timedelta(days=5)))
+        assert [sql for sql, _ in db.executed].count(PERIOD_SQL) == 1
+
+        # 기간 끝까지 마감 전 (갱신이 아직 돌지 않음) → 마감하지 않고 1시간 집계
+        for key in [k for k in db.daily if k[1] == (D0 + timedelta(days=4)).date()]:
+            del db.daily[key]
+        db.executed.clear()
+        asyncio.run(generator.generate_report(ReportType.MONTHLY, D0, D0 + timedelta(days=5), use_cache=False))
+        executed = [sql for sql, _ in db.executed]
+        assert executed.count(PERIOD_SQL) == 1 and daily.DAILY_SQL not in executed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
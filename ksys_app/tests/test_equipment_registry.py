@@ -0,0 +1,87 @@
+"""
+설비 → 태그 레지스트리 단위 테스트
+이름 규칙 제안 / influx_tag.meta 우선 / 설비·종류 인덱스
+"""
+import asyncio
+import contextlib
+
+import pytest
+
+from ksys_app.diagnostics.equipment_registry import (
+    EquipmentRegistry, TagBinding, equipment_kind, propose_binding,
+)
+
+
+class _FakeTagDB:
+    """public.influx_tag 대체"""
+
+    def __init__(self, rows):
+        self.rows = rows  # (tag_name, equipment, metric, equipment_type, unit)
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    async def fetchall(self):
+        return list(self.rows)
+
+
+class TestProposeBinding:
+    """태그 이름 규칙 테스트"""
+
+    @pytest.mark.parametrize("tag_name, expected", [
+        ("P101_FLOW", ("P101", "flow", "pump")),
+        ("pump2_current", ("PUMP2", "current", "pump")),
+        ("HP3:P", ("HP3", "pressure", "pump")),
+        ("RO1_TMP", ("RO1", "tmp", "membrane")),
+        ("P101A_RPM", ("P101A", "speed", "pump")),
+    ])
+    def test_tokens(self, tag_name, expected):
+        binding = propose_binding(tag_name)
+        assert (binding.equipment_id, binding.metric, binding.kind) == expected
+        assert binding.source == "name" and binding.unit
+
+    def test_no_substring_guessing(self):
+        # 기존 _extract_metric_type 은 'q'/'p' 부분 문자열로 유량/압력 판정
+        assert propose_binding("EQ_TANK_LEVEL") is None
+        assert propose_binding("TMP") is None  # 설비 없음
+        assert propose_binding("P101_SPEEDQ") is None
+        assert propose_binding("PUMP-2.VIB") is None  # 설비 토큰이 분리됨 (PUMP / 2)
+        assert equipment_kind("D100") == ""
+
+
+class TestRegistry:
+    """EquipmentRegistry 테스트"""
+
+    def test_meta_first_then_names(self):
+        db = _FakeTagDB([
+            ("D101", "P101", "flow", None, "m3/h"),        # 메타 매핑 (이름에 설비 없음)
+            ("D102", "P101", None, "pump", ""),            # 메트릭 없음 → 태그 이름
+            ("P101_VIB", None, None, None, ""),             # 이름 규칙
+            ("P1010_FLOW", None, None, None, ""),           # LIKE '%P101%' 였다면 섞였을 태그
+            ("RO1_TMP", None, None, None, "bar"),
+            ("MISC", None, None, None, ""),
+        ])
+        registry = EquipmentRegistry()
+
+        assert asyncio.run(registry.load(db)) == 5
+        assert registry.metrics("P101") == {"flow": ["D101"], "D102": ["D102"], "vibration": ["P101_VIB"]}
+        assert registry.tags("P101", ["flow", "vibration"]) == ["D101", "P101_VIB"]
+        assert registry.binding("D101") == TagBinding("D101", "P101", "flow", "m3/h", "pump", "meta")
+        assert registry.metric_of("P101_VIB") == "vibration" and registry.metric_of("MISC") is None
+        assert registry.equipments("pump") == ["P101", "P1010"]
+        assert registry.equipments("membrane") == ["RO1"]
+        assert "P101" in registry and "MISC" not in registry
+
+    def test_ensure_without_dsn_keeps_index(self):
+        registry = EquipmentRegistry([TagBinding("X", "P1", "flow")])
+        asyncio.run(registry.ensure(""))
+        assert registry.tags("P1") == ["X"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,357 @@
+"""
+알람 이벤트 배치 기록기 단위 테스트
+크기/시간 기준 플러시 / DB 단절 시 저널 기록·재생 / 큐 초과 / 멱등 키 / 지표
+"""
+import asyncio
+import contextlib
+import threading
+from datetime import datetime
+
+import psycopg
+import pytest
+
+from ksys_app.alarm import event_sink
+from ksys_app.alarm.event_sink import ALARM_EVENTS, EventSink, _SINKS, _sink_metrics
+
+
+class _FakeDB:
+    """연결 팩토리: 실행된 INSERT 행을 테이블별로 기록"""
+
+    def __init__(self):
+        self.down = False
+        self.connects = 0
+        self.statements = 0
+        self.rows = {}
+        self.error = None
+        self.lose_ack = False  # INSERT 는 반영됐지만 응답 전에 연결 끊김
+        self.fail_at = None  # 이 순번 문장에서 한 번 연결 끊김
+        self.transactions = 0
+
+    async def connect(self):
+        if self.down:
+            raise psycopg.OperationalError("connection refused")
+        self.connects += 1
+        return _FakeConn(self)
+
+
+class _FakeConn:
+    def __init__(self, db):
+        self.db = db
+        self.closed = False
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+        self.db.transactions += 1
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params):
+        if self.db.down:
+            raise psycopg.OperationalError("server closed the connection")
+        if self.db.error is not None:
+            raise self.db.error
+        if self.db.fail_at == self.db.statements + 1:
+            self.db.fail_at = None
+            raise psycopg.OperationalError("server closed the connection")
+        table = sql.split()[2]
+        columns = [c.strip() for c in sql[sql.index("(") + 1:sql.index(")")].split(",")]
+        width = len(columns)
+        self.db.statements += 1
+        rows = [tuple(params[i:i + width]) for i in range(0, len(params), width)]
+        stored = self.db.rows.setdefault(table, [])
+        if "ON CONFLICT" in sql:  # 충돌 컬럼이 같은 행은 건너뜀
+            k = columns.index(sql[sql.index("ON CONFLICT (") + 13:].split(")")[0])
+            seen = {r[k] for r in stored}
+            rows = [r for r in rows if r[k] not in seen and not seen.add(r[k])]
+        stored.extend(rows)
+        if self.db.lose_ack:
+            self.db.lose_ack = False
+            raise psycopg.OperationalError("server closed the connection unexpectedly")
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+def _sink(db, tmp_path, **kwargs):
+    options = dict(batch_size=500, flush_interval_s=0.05)
+    options.update(kwargs)
+    return EventSink("fake", journal_path=str(tmp_path / "journal.jsonl"), connect=db.connect, **options)
+
+
+def _event(i):
+    return ("WATER_QUALITY", "ERROR", "pH", float(i), f"event {i}", datetime(2026, 1, 1, 0, 0, i % 60))
+
+
+def _events(db):
+    """alarm_events 행 (멱등 키 제외)"""
+    return [row[:6] for row in db.rows.get("alarm_events", [])]
+
+
+class TestEventSink:
+    """EventSink 테스트"""
+
+    def test_batches_by_size_on_one_connection(self, tmp_path):
+        db = _FakeDB()
+
+        async def run():
+            sink = _sink(db, tmp_path, flush_interval_s=5.0)
+            for i in range(1200):
+                sink.submit("alarm_events", _event(i))
+            await sink.flush()
+            await sink.close()
+            return sink
+
+        sink = asyncio.run(run())
+
+        assert _events(db) == [_event(i) for i in range(1200)]
+        assert db.connects == 1
+        assert db.statements == 3  # 500 + 500 + 200 다중 행 INSERT
+        assert sink.batches == 3 and sink.written == 1200
+
+    def test_flushes_by_time(self, tmp_path):
+        db = _FakeDB()
+
+        async def run():
+            sink = _sink(db, tmp_path, flush_interval_s=0.02)
+            sink.submit("alarm_events", _event(1))
+            sink.submit("alarm_events", _event(2))
+            await asyncio.sleep(0.2)  # flush() 호출 없이 시간 기준으로 기록
+            written = _events(db)
+            await sink.close()
+            return written
+
+        assert asyncio.run(run()) == [_event(1), _event(2)]
+
+    def test_journal_when_db_down_and_replay_in_order(self, tmp_path):
+        db = _FakeDB()
+        db.down = True
+
+        async def run():
+            sink = _sink(db, tmp_path)
+            for i in range(5):
+                sink.submit("alarm_events", _event(i))
+            await sink.flush()
+            assert db.rows == {}
+            assert sink.journal_rows == 5
+            assert sink.stats()["ksys_event_sink_flush_failures_total"] == 1
+
+            db.down = False
+            sink._retry_at = 0.0  # 재연결 대기 생략
+            for i in range(5, 8):
+                sink.submit("alarm_events", _event(i))
+            await sink.flush()
+            await sink.close()
+            return sink
+
+        sink = asyncio.run(run())
+
+        assert _events(db) == [_event(i) for i in range(8)]  # 저널 먼저, datetime 복원
+        assert sink.journal_rows == 0
+        assert sink.replayed == 5
+        assert (tmp_path / "journal.jsonl").read_text() == ""
+
+    def test_journal_survives_restart(self, tmp_path):
+        db = _FakeDB()
+        db.down = True
+
+        async def first():
+            sink = _sink(db, tmp_path)
+            sink.submit("alarm_history", ("E1", "S001", "warning", datetime(2026, 1, 1), "m", "{}"))
+            await sink.flush()
+
+        asyncio.run(first())
+        db.down = False
+
+        async def second():
+            sink = _sink(db, tmp_path)  # 재시작: 기존 저널 행 수 인식 후 재생
+            assert sink.journal_rows == 1
+            sink.start()
+            await asyncio.sleep(0.3)
+            await sink.close()
+
+        asyncio.run(second())
+
+        assert db.rows["alarm_history"] == [("E1", "S001", "warning", datetime(2026, 1, 1), "m", "{}")]
+
+    def test_queue_overflow_spills(self, tmp_path):
+        db = _FakeDB()
+
+        async def run():
+            sink = _sink(db, tmp_path, max_queue=10)
+            accepted = [sink.submit("alarm_events", _event(i)) for i in range(25)]
+            assert sink.stats()["ksys_event_sink_queue_depth"] == 10
+            await sink.flush()
+            await sink.close()
+            return sink, accepted
+
+        sink, accepted = asyncio.run(run())
+
+        assert accepted.count(False) == 15 and sink.spilled == 15
+        # 넘친 행은 저널 → 다음 배치 전에 재생
+        assert sorted(_events(db), key=lambda r: r[3]) == [_event(i) for i in range(25)]
+
+    def test_spill_runs_off_event_loop(self, tmp_path, monkeypatch):
+        """큐 초과분은 submit 에서 파일을 열지 않고 쓰기 태스크가 스레드에서 저널에 기록"""
+        db = _FakeDB()
+        threads = []
+        append = EventSink._append_journal
+
+        def spy(self, rows):
+            threads.append(threading.current_thread())
+            return append(self, rows)
+
+        monkeypatch.setattr(EventSink, "_append_journal", spy)
+
+        async def run():
+            sink = _sink(db, tmp_path, max_queue=2)
+            accepted = [sink.submit("alarm_events", _event(i)) for i in range(5)]
+            assert accepted == [True, True, False, False, False] and sink.overflow_rows == 3
+            assert threads == [] and not (tmp_path / "journal.jsonl").exists()
+            await sink.flush()
+            assert sink.overflow_rows == 0 and sink.spilled == 3
+            await sink.close()
+
+        asyncio.run(run())
+
+        assert threads and threading.main_thread() not in threads
+        assert sorted(_events(db), key=lambda r: r[3]) == [_event(i) for i in range(5)]
+
+    def test_replay_after_lost_commit_is_idempotent(self, tmp_path):
+        """커밋 응답 유실 / 저널 비우기 전 중단으로 같은 행이 다시 재생돼도 alarm_events 는 1행"""
+        db = _FakeDB()
+        db.lose_ack = True
+        journal = tmp_path / "journal.jsonl"
+
+        async def run():
+            sink = _sink(db, tmp_path, retry_max_s=0.05)
+            sink._backoff = 0.05
+            for i in (0, 1, 1):  # 내용이 같아도 서로 다른 이벤트
+                sink.submit("alarm_events", _event(i))
+            await sink.flush()
+            assert sink.journal_rows == 3  # 실제로는 반영됐지만 저널에 남음
+            spilled = journal.read_text()
+            await asyncio.sleep(0.3)
+            await sink.close()
+            return spilled
+
+        spilled = asyncio.run(run())
+        assert _events(db) == [_event(0), _event(1), _event(1)]
+
+        # 재생 커밋 후 저널을 비우기 전에 중단된 경우: 재시작하면 같은 키로 다시 재생
+        journal.write_text(spilled)
+
+        async def restart():
+            sink = _sink(db, tmp_path)
+            sink.start()
+            await asyncio.sleep(0.2)
+            await sink.close()
+            return sink
+
+        sink = asyncio.run(restart())
+
+        assert sink.replayed == 3 and _events(db) == [_event(0), _event(1), _event(1)]
+        assert len({row[6] for row in db.rows["alarm_events"]}) == 3
+        assert "ON CONFLICT (event_key) DO NOTHING" in ALARM_EVENTS.insert_sql(1)
+
+    def test_replay_commits_in_batches(self, tmp_path, monkeypatch):
+        """저널 재생은 배치 단위로 읽고 커밋 - 중간에 끊기면 커밋한 위치부터 이어서"""
+        monkeypatch.setattr(event_sink, "MAX_ROWS_PER_STATEMENT", 4)
+        db = _FakeDB()
+        journal = tmp_path / "journal.jsonl"
+
+        async def run():
+            sink = _sink(db, tmp_path, retry_max_s=0.05)
+            sink._backoff = 0.05
+            db.down = True
+            for i in range(10):
+                sink.submit("alarm_events", _event(i))
+            await sink.flush()
+            assert sink.journal_rows == 10
+            db.down = False
+            db.fail_at = 2  # 두 번째 재생 배치에서 끊김
+            sink._retry_at = 0.0
+            sink.submit("alarm_events", _event(10))
+            await sink.flush()
+            assert sink.replayed == 4 and sink.journal_rows == 7 and journal.stat().st_size > 0
+            await asyncio.sleep(0.3)
+            await sink.close()
+            return sink
+
+        sink = asyncio.run(run())
+
+        assert sorted(_events(db), key=lambda r: r[3]) == [_event(i) for i in range(11)]
+        assert sink.replayed == 11 and journal.read_text() == ""
+        assert db.transactions == 3  # 4 + 4 + 3행, 배치마다 커밋 (끊긴 배치는 롤백)
+
+    def test_non_connection_error_drops_batch(self, tmp_path):
+        """테이블 없음 등은 재시도해도 실패 → 저널에 쌓지 않음 (기존: 무시)"""
+        db = _FakeDB()
+        db.error = psycopg.errors.UndefinedTable("relation \"alarm_events\" does not exist")
+
+        async def run():
+            sink = _sink(db, tmp_path)
+            sink.submit("alarm_events", _event(1))
+            await sink.flush()
+            await sink.close()
+            return sink
+
+        sink = asyncio.run(run())
+
+        assert sink.dropped == 1 and sink.journal_rows == 0
+
+    def test_metrics_registered(self, tmp_path):
+        sink = _sink(_FakeDB(), tmp_path)
+        _SINKS["test-metrics"] = sink
+        try:
+            metrics = _sink_metrics()
+        finally:
+            _SINKS.pop("test-metrics")
+
+        assert "ksys_event_sink_queue_depth" in metrics
+        assert "ksys_event_sink_flush_latency_seconds" in metrics
+
+
+class TestProducersShareSink:
+    """알람 엔진 / 가동범위 모니터 / 수질 모니터가 같은 싱크 사용"""
+
+    def test_engine_and_monitors(self, tmp_path):
+        from ksys_app.alarm.scenario_engine import AlarmScenarioEngine
+        from ksys_app.monitoring.range_monitor import RangeMonitor
+        from ksys_app.water_quality.quality_monitor import ComplianceStatus, WaterQualityResult, WaterQualityMonitor
+
+        db = _FakeDB()
+
+        async def run():
+            sink = _sink(db, tmp_path)
+            engine = AlarmScenarioEngine("")
+            engine.event_sink = sink
+            engine.scenarios["S002"].actions = []
+            monitor = RangeMonitor("")
+            monitor.event_sink = sink
+            wq = WaterQualityMonitor("")
+            wq.event_sink = sink
+
+            await engine.check_scenarios({"COND": 500}, now=datetime(2026, 1, 1, 9, 0, 0))
+            await monitor.check_all_ranges([{"tag_name": "TMP", "value": 2.9}])
+            await wq._trigger_alarm(WaterQualityResult("pH", 9.0, "", ComplianceStatus.VIOLATION, 5.8, 8.5, 5.9,
+                                                       "pH 기준 초과", datetime(2026, 1, 1)))
+            await sink.flush()
+            await sink.close()
+
+        asyncio.run(run())
+
+        assert [r[1] for r in db.rows["alarm_history"]] == ["S002"]
+        assert [(r[0], r[1], r[2]) for r in _events(db)] == [
+            ("RANGE", "CRITICAL", "TMP"), ("WATER_QUALITY", "ERROR", "pH"),
+        ]
+        assert db.connects == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
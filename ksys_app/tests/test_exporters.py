@@ -0,0 +1,196 @@
+"""
+스트리밍 내보내기 단위 테스트
+서버 측 커서 청크 / CSV.gz 왕복 / Parquet 행 그룹 / XLSX / 실패 시 부분 파일 / 작업 진행률·정리
+"""
+import asyncio
+import csv
+import gzip
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ksys_app.exporters import ExportJobs, columns_of, export_series
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _rows(hours=30, tags=("B", "A", "C")):
+    return sorted(((START + timedelta(hours=h), t, h * 0.5 + i, min(h, 5.0), 100.0 + h, 60)
+                   for h in range(hours) for i, t in enumerate(tags)), key=lambda r: (r[0], r[1]))
+
+
+class _Cursor:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.pos = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params):
+        self.db.executed.append((self.name, sql, params))
+        start, end, tags, _ = params
+        self.rows = [r for r in self.db.rows if start <= r[0] < end and (tags is None or r[1] in tags)]
+
+    async def fetchmany(self, size):
+        if self.db.fail_after is not None and self.pos >= self.db.fail_after:
+            raise ConnectionError("connection lost")
+        batch = self.rows[self.pos:self.pos + size]
+        self.pos += len(batch)
+        self.db.largest = max(self.db.largest, len(batch))
+        await asyncio.sleep(0)
+        return batch
+
+
+class _Conn:
+    """psycopg 연결 대체 - 이름 있는 커서만 허용"""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.executed = []
+        self.largest = 0
+        self.fail_after = fail_after
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def cursor(self, name=None):
+        assert name, "export must use a server-side cursor"
+        return _Cursor(self, name)
+
+
+def _read_csv(path):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestExportSeries:
+    """export_series 테스트"""
+
+    def test_csv_streams_in_chunks(self, tmp_path):
+        rows = _rows()
+        conn = _Conn(rows)
+        path = str(tmp_path / "out.csv.gz")
+        seen = []
+        n = asyncio.run(export_series(conn, "csv", path, "1h", START, START + timedelta(hours=20),
+                                      chunk_rows=7, progress=lambda k, batch: seen.append(k)))
+
+        expected = [r for r in rows if r[0] < START + timedelta(hours=20)]
+        assert n == len(expected) == 60
+        assert conn.largest == 7 and seen[-1] == 60 and len(seen) == 9
+        name, sql, _ = conn.executed[0]
+        assert name.startswith("ksys_export_") and "ORDER BY bucket, tag_name" in sql and "influx_agg_1h" in sql
+
+        table = _read_csv(path)
+        assert table[0] == list(columns_of("1h"))
+        assert table[1:] == [[r[0].isoformat(), r[1], *map(str, r[2:])] for r in expected]
+
+    def test_tag_filter_and_empty_period(self, tmp_path):
+        conn = _Conn(_rows())
+        path = str(tmp_path / "a.csv.gz")
+        assert asyncio.run(export_series(conn, "csv", path, "raw", START, START + timedelta(hours=5),
+                                         tags=["A"])) == 5
+        assert "influx_hist" in conn.executed[0][1] and conn.executed[0][2][2] == ["A"]
+
+        empty = str(tmp_path / "e.csv.gz")
+        assert asyncio.run(export_series(_Conn([]), "csv", empty, "raw", START, START)) == 0
+        assert _read_csv(empty) == [["ts", "tag_name", "value"]]
+
+    def test_failure_leaves_no_partial_file(self, tmp_path):
+        path = str(tmp_path / "out.csv.gz")
+        with pytest.raises(ConnectionError):
+            asyncio.run(export_series(_Conn(_rows(), fail_after=20), "csv", path, "1h",
+                                      START, START + timedelta(days=2), chunk_rows=10))
+        assert os.listdir(tmp_path) == []
+
+    def test_parquet_row_groups(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = _rows()
+        path = str(tmp_path / "out.parquet")
+        asyncio.run(export_series(_Conn(rows), "parquet", path, "1h", START, START + timedelta(days=2),
+                                  chunk_rows=25))
+        f = pq.ParquetFile(path)
+        assert f.metadata.num_row_groups == 4  # 90행 / 25
+        table = f.read()
+        assert table.column("avg").to_pylist() == [r[2] for r in rows]
+        assert table.column("n").to_pylist() == [60] * len(rows)
+
+    def test_xlsx_rows(self, tmp_path):
+        pytest.importorskip("xlsxwriter")
+        openpyxl = pytest.importorskip("openpyxl")
+        rows = _rows(hours=4)
+        path = str(tmp_path / "out.xlsx")
+        asyncio.run(export_series(_Conn(rows), "xlsx", path, "1h", START, START + timedelta(days=1), chunk_rows=5))
+        sheet = openpyxl.load_workbook(path, read_only=True).worksheets[0]
+        values = list(sheet.iter_rows(values_only=True))
+        assert values[0] == columns_of("1h")
+        assert [v[1:] for v in values[1:]] == [r[1:] for r in rows]
+
+    def test_unknown_format_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            asyncio.run(export_series(_Conn([]), "pdf", str(tmp_path / "x"), "1h", START, START))
+
+
+class TestExportJobs:
+    """ExportJobs 테스트"""
+
+    def test_job_progress_and_cleanup(self, tmp_path):
+        rows = _rows(hours=48)
+
+        async def connect():
+            return _Conn(rows)
+
+        jobs = ExportJobs(directory=str(tmp_path), connect=connect, ttl_s=60)
+
+        async def run():
+            job = jobs.submit("csv", "1h", START, START + timedelta(hours=48))
+            assert job.to_dict()["state"] == "queued"
+            await job.task
+            return job
+
+        job = asyncio.run(run())
+        status = job.to_dict()
+        assert status["state"] == "done" and status["rows"] == 144 and status["progress"] == 1.0
+        assert status["bytes"] == os.path.getsize(job.path) > 0
+        assert job.filename == "1h_20250101_20250103.csv.gz"
+
+        assert jobs.cleanup(now=job.finished_at + 30) == 0
+        assert jobs.cleanup(now=job.finished_at + 61) == 1
+        assert not os.path.exists(job.path) and jobs.get(job.job_id) is None
+
+    def test_failed_and_cancelled_jobs(self, tmp_path):
+        async def broken():
+            return _Conn(_rows(), fail_after=0)
+
+        jobs = ExportJobs(directory=str(tmp_path), connect=broken, max_jobs=1)
+
+        async def run():
+            failed = jobs.submit("csv", "raw", START, START + timedelta(days=1))
+            queued = jobs.submit("csv", "raw", START, START + timedelta(days=1))
+            assert jobs.cancel(queued.job_id)
+            await asyncio.gather(failed.task, queued.task, return_exceptions=True)
+            return failed, queued
+
+        failed, queued = asyncio.run(run())
+        assert failed.state == "failed" and "connection lost" in failed.error
+        assert queued.state == "cancelled"
+        assert [p for p in os.listdir(tmp_path)] == []
+
+        with pytest.raises(ValueError):
+            asyncio.run(self._submit(jobs, "csv", "raw", START, START))
+
+    @staticmethod
+    async def _submit(jobs, *args):
+        return jobs.submit(*args)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
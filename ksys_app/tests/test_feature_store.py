@@ -0,0 +1,209 @@
+"""
+진단 공용 피처 저장소 단위 테스트
+뷰당 1회 조회 / 경계 무효화 / 읽기 전용 구간 뷰 / 진단 모듈 연동
+"""
+import asyncio
+import contextlib
+import fnmatch
+import re
+
+import numpy as np
+import pytest
+
+from ksys_app.diagnostics.feature_store import DAY, FeatureSpec, FeatureStore
+
+NOW = 1_800_000_000.0 + 1234.0  # 버킷 경계 아님
+
+
+class _FakeAggDB:
+    """influx_agg_1m / influx_agg_1h / influx_tag 대체 - 실행된 쿼리 기록"""
+
+    def __init__(self, series, tags=None):
+        self.series = series  # (table, tag) -> [(epoch, avg, min, max, n)]
+        self.tags = tags if tags is not None else sorted({t for _, t in series})
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        sql, params = self.executed[-1]
+        if "influx_tag" in sql:
+            return [(p, t) for p in params[0] for t in self.tags
+                    if fnmatch.fnmatchcase(t, p.replace("%", "*"))]
+        table = _table(sql)
+        tags, since, lower, end = params
+        return [(tag, t, a, lo, hi, n) for tag, s in zip(tags, since)
+                for t, a, lo, hi, n in self.series.get((table, tag), ())
+                if t >= s and t >= lower and t < end]
+
+
+def _table(sql):
+    return re.search(r"FROM (influx_\w+)", sql).group(1)
+
+
+def _hourly(values, end=NOW, step=3600):
+    """완료된 마지막 버킷부터 거꾸로 값 배치"""
+    last = np.floor(end / step) * step - step
+    n = len(values)
+    return [(last - step * (n - 1 - i), float(v), float(v) - 0.1, float(v) + 0.1, 60)
+            for i, v in enumerate(values) if v is not None]
+
+
+def _plant_db():
+    rng = np.random.default_rng(5)
+    hours = 3 * 365 * 24
+    series = {
+        ("influx_agg_1h", "TMP"): _hourly(1.5 + 0.0001 * np.arange(hours) + rng.normal(0, 0.01, hours)),
+        ("influx_agg_1h", "CIP_EVENT"): _hourly([1 if i % 500 == 0 else 0 for i in range(hours)]),
+        ("influx_agg_1h", "FLUX_A"): _hourly(np.linspace(20, 18, 7 * 24)),
+        ("influx_agg_1h", "FLUX_B"): _hourly(np.linspace(22, 20, 7 * 24)),
+        ("influx_agg_1h", "TMP_BEFORE_CIP"): _hourly([2.4] * 48),
+        ("influx_agg_1h", "TMP_AFTER_CIP"): _hourly([1.6] * 48),
+        ("influx_agg_1h", "TMP_INITIAL"): _hourly([1.4] * 48),
+        ("influx_agg_1h", "COND_IN"): _hourly([1000] * 200),
+        ("influx_agg_1h", "COND_OUT"): _hourly([30] * 200),
+        ("influx_agg_1h", "TURB_OUT"): _hourly([0.2] * 200),
+        ("influx_agg_1m", "COND_OUT"): _hourly([30 + i % 3 for i in range(60)], step=60),
+        ("influx_agg_1m", "COND_IN"): _hourly([1000] * 60, step=60),
+        ("influx_agg_1m", "TURB_OUT"): _hourly([0.2] * 60, step=60),
+    }
+    for pump in ("P101", "P102"):
+        series[("influx_agg_1m", f"{pump}_FLOW")] = _hourly([70.0] * 60, step=60)
+        series[("influx_agg_1m", f"{pump}_VIB")] = _hourly([8.0] * 60, step=60)
+        series[("influx_agg_1h", f"{pump}_FLOW")] = _hourly([100.0] * 30 * 24)
+    return _FakeAggDB(series)
+
+
+class _Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestFeatureStore:
+    """FeatureStore 테스트"""
+
+    def test_one_query_per_view_and_longest_span(self):
+        db = _plant_db()
+        store = FeatureStore(clock=_Clock())
+        store.declare(
+            FeatureSpec("a", "1h", 7 * DAY, tags=("TMP", "COND_OUT")),
+            FeatureSpec("b", "1h", 30 * DAY, tags=("TMP",)),
+            FeatureSpec("c", "1m", 3600, tags=("COND_OUT",)),
+        )
+
+        assert asyncio.run(store.refresh(db)) == 2
+        tags, since, lower, end = db.executed[0][1]
+        assert dict(zip(tags, (end - s for s in since))) == {"TMP": 30 * DAY, "COND_OUT": 7 * DAY}
+        assert lower == min(since) and end == np.floor(NOW / 3600) * 3600
+
+        a = asyncio.run(store.get("a", db))
+        b = asyncio.run(store.get("b", db))
+        assert len(db.executed) == 2
+        assert len(a.series("TMP")) == 7 * 24 and len(b.series("TMP")) == 30 * 24
+        np.testing.assert_array_equal(a.series("TMP"), b.series("TMP")[-7 * 24:])  # 같은 프레임의 슬라이스
+
+    def test_views_are_read_only(self):
+        db = _plant_db()
+        store = FeatureStore(clock=_Clock())
+        store.declare(FeatureSpec("a", "1h", DAY, tags=("COND_IN", "COND_OUT")))
+        view = asyncio.run(store.get("a", db))
+
+        with pytest.raises(ValueError):
+            view.series("COND_IN")[0] = 0.0
+        with pytest.raises(ValueError):
+            view.matrix()[0, 0] = 0.0
+        assert view.matrix().shape == (2, 24)
+
+    def test_lag_window_and_stats(self):
+        db = _FakeAggDB({("influx_agg_1h", "X"): _hourly(list(range(48)))})
+        store = FeatureStore(clock=_Clock())
+        store.declare(FeatureSpec("base", "1h", DAY, tags=("X", "MISSING"), lag_s=DAY))
+        view = asyncio.run(store.get("base", db))
+
+        stats = view.stats("X")
+        assert stats["count"] == 24 and stats["avg"] == pytest.approx(11.5)  # 첫날 0..23
+        assert stats["min"] == pytest.approx(-0.1) and stats["max"] == pytest.approx(23.1)
+        assert stats["std"] == pytest.approx(np.std(np.arange(24), ddof=1))
+        assert view.stats("MISSING") is None and np.isnan(view.series("MISSING")).all()
+        assert view.times()[-1] == np.floor(NOW / 3600) * 3600 - DAY - 3600
+
+    def test_boundary_invalidation_per_view(self):
+        db = _plant_db()
+        clock = _Clock()
+        store = FeatureStore(clock=clock)
+        store.declare(FeatureSpec("h", "1h", DAY, tags=("COND_IN",)),
+                      FeatureSpec("m", "1m", 3600, tags=("COND_IN",)))
+        asyncio.run(store.refresh(db))
+        assert len(db.executed) == 2
+
+        clock.now += 10  # 같은 분
+        assert asyncio.run(store.refresh(db)) == 0
+        clock.now = np.floor(NOW / 60) * 60 + 60  # 다음 분 경계 → 1m 만
+        assert asyncio.run(store.refresh(db)) == 1 and "influx_agg_1m" in db.executed[-1][0]
+        clock.now = np.floor(NOW / 3600) * 3600 + 3600  # 다음 시간 경계 → 둘 다
+        assert asyncio.run(store.refresh(db)) == 2
+
+
+class TestPlantDiagnosis:
+    """진단 모듈 공용 저장소 연동"""
+
+    def test_full_plant_diagnosis_with_three_queries(self):
+        from ksys_app.diagnostics.fouling_diagnostics import FoulingDiagnostics
+        from ksys_app.diagnostics.membrane_diagnostics import MembraneDamageDiagnostics
+        from ksys_app.maintenance.ro_lifetime_predictor import ROLifetimePredictor
+
+        db = _plant_db()
+        store = FeatureStore(clock=_Clock())
+        fouling = FoulingDiagnostics("", store)
+        membrane = MembraneDamageDiagnostics("", store)
+        lifetime = ROLifetimePredictor("", store)
+
+        async def run():
+            await store.refresh(db)
+            return await asyncio.gather(fouling.diagnose_fouling("RO1"), membrane.diagnose_membrane("RO1"),
+                                        lifetime.predict_lifetime("RO1"))
+
+        foul, memb, life = asyncio.run(run())
+
+        assert [_table(sql) for sql, _ in db.executed] == ["influx_tag", "influx_agg_1h", "influx_agg_1m"]
+        assert foul.tmp_increase_rate == pytest.approx(0.0024, rel=0.1)
+        assert foul.cip_efficiency == pytest.approx(0.8)
+        flux = np.linspace(21, 19, 7 * 24)  # 두 플럭스 태그의 버킷별 평균
+        assert foul.fouling_rate == pytest.approx((1 - flux[-24:].mean() / flux[:24].mean()) * 100 / 7)
+        assert memb.salt_rejection_rate == pytest.approx(1 - 31 / 1000)  # 최근 1시간 1분 집계
+        assert life.cip_count == len(range(0, 3 * 365 * 24, 500))
+        assert life.tmp_increase_rate == pytest.approx(0.0001 * 24 * 30.4, rel=0.1)
+        assert life.operating_hours >= 1094 * 20
+
+    def test_pumps_share_one_refresh(self):
+        pytest.importorskip("ksys_app.ai_engine.w5h1_formatter")
+        from ksys_app.diagnostics.equipment_registry import EquipmentRegistry, propose_binding
+        from ksys_app.diagnostics.pump_diagnostics import PumpFailureDiagnostics, pump_features
+
+        db = _plant_db()
+        store = FeatureStore(clock=_Clock())
+        registry = EquipmentRegistry(filter(None, map(propose_binding, db.tags)))
+        pumps = PumpFailureDiagnostics("", store, registry)
+        for pump_id in ("P101", "P102"):
+            store.declare(*pump_features(pump_id, registry.tags(pump_id)))
+
+        async def run():
+            await store.refresh(db)
+            return await asyncio.gather(pumps.diagnose_pump("P101"), pumps.diagnose_pump("P102"))
+
+        p101, p102 = asyncio.run(run())
+
+        assert sorted(_table(sql) for sql, _ in db.executed) == ["influx_agg_1h", "influx_agg_1m"]
+        assert "유량 30.0% 감소" in p101.symptoms and p102.symptoms == p101.symptoms
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,175 @@
+"""
+전체 설비 진단 단위 테스트
+일괄 조회 / 동시 실행 제한 / 점수 순위 / 1시간 버킷 캐시
+"""
+import asyncio
+import contextlib
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ksys_app.diagnostics.equipment_registry import EquipmentRegistry, TagBinding
+from ksys_app.diagnostics.feature_store import FeatureStore
+from ksys_app.diagnostics.fleet_diagnosis import FleetDiagnostics, HealthRow, rank
+
+NOW = 1_800_000_000.0 + 1234.0
+
+
+class _FakeAggDB:
+    """influx_agg_1m / influx_agg_1h 대체 - 태그마다 일정한 값"""
+
+    def __init__(self, values):
+        self.values = values  # (table, tag) -> 값
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        sql, params = self.executed[-1]
+        if "influx_tag" in sql:
+            return []  # 플럭스 태그 없음
+        tags, since, lower, end = params
+        table = re.search(r"FROM (influx_\w+)", sql).group(1)
+        step = 60 if table.endswith("1m") else 3600
+        out = []
+        for tag, s in zip(tags, since):
+            if (table, tag) in self.values:
+                v = self.values[(table, tag)]
+                out += [(tag, t, v, v, v, 1) for t in np.arange(max(s, lower), end, step)]
+        return out
+
+
+class _Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class _Pumps:
+    """펌프 진단 대역 - 동시 실행 수 기록"""
+
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def diagnose_pump(self, pump_id):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.005)
+        self.active -= 1
+        p = self.probabilities[pump_id]
+        if p is None:
+            return None
+        return SimpleNamespace(failure_probability=p, status=SimpleNamespace(value="warning" if p else "normal"),
+                               symptoms=[f"{pump_id} 증상"] if p else [], root_causes=[], recommendations=[],
+                               confidence=1.0)
+
+
+def _fleet(n_pumps=12, concurrency=3, clock=None):
+    probs = {f"P{100 + i}": (i % 5) / 5 for i in range(n_pumps)}
+    probs["P100"] = None
+    registry = EquipmentRegistry([TagBinding(f"{p}_FLOW", p, "flow", kind="pump") for p in probs]
+                                 + [TagBinding("RO1_TMP", "RO1", "tmp", kind="membrane")])
+    store = FeatureStore(clock=clock or _Clock())
+    pumps = _Pumps(probs)
+    fleet = FleetDiagnostics("", store, registry, max_concurrency=concurrency, pumps=pumps)
+    db = _FakeAggDB({
+        ("influx_agg_1m", "COND_IN"): 1000.0, ("influx_agg_1m", "COND_OUT"): 80.0,
+        ("influx_agg_1h", "COND_IN"): 1000.0, ("influx_agg_1h", "COND_OUT"): 80.0,
+        ("influx_agg_1h", "TMP"): 1.5,
+    })
+    return fleet, pumps, db
+
+
+class TestFleetDiagnosis:
+    """FleetDiagnostics 테스트"""
+
+    def test_ranked_table_with_bounded_concurrency(self):
+        fleet, pumps, db = _fleet(n_pumps=12, concurrency=3)
+
+        rows = asyncio.run(fleet.health(conn=db))
+
+        assert pumps.max_active == 3 and pumps.calls == 12
+        assert len(rows) == 13
+        scored = [r.score for r in rows if r.score is not None]
+        assert scored == sorted(scored)
+        assert rows[-1].asset_id == "P100" and rows[-1].status == "no_data"
+        assert rows[0].score == pytest.approx(20.0) and rows[0].kind == "pump"
+
+        membrane = next(r for r in rows if r.kind == "membrane")
+        assert membrane.asset_id == "RO" and membrane.detail["trains"] == ["RO1"]
+        assert membrane.detail["salt_rejection_rate"] == pytest.approx(0.92)
+        assert membrane.status == "minor_damage" and membrane.score < 100
+        assert len(db.executed) == 3  # 플럭스 패턴 1회 + 뷰당 1회 (펌프 대역은 조회 없음)
+
+    def test_cached_until_next_hour_bucket(self):
+        clock = _Clock()
+        fleet, pumps, db = _fleet(n_pumps=4, clock=clock)
+
+        first = asyncio.run(fleet.health(conn=db))
+        clock.now += 600  # 같은 시간 버킷 (1m 프레임은 오래됐지만 재계산 안 함)
+        second = asyncio.run(fleet.health(conn=db))
+
+        assert pumps.calls == 4 and len(db.executed) == 3
+        assert [id(r) for r in first] == [id(r) for r in second]
+        assert fleet.cache_hits == 5
+
+        clock.now = np.floor(NOW / 3600) * 3600 + 3600  # 새 시간 버킷
+        third = asyncio.run(fleet.health(conn=db))
+
+        assert pumps.calls == 8 and len(db.executed) == 5
+        assert all(r.bucket == clock.now for r in third)
+
+    def test_new_and_removed_assets(self):
+        fleet, pumps, db = _fleet(n_pumps=3)
+        asyncio.run(fleet.health(conn=db))
+
+        fleet.registry.replace([TagBinding("P101_FLOW", "P101", "flow", kind="pump")])
+        pumps.probabilities["P101"] = 0.0
+        rows = asyncio.run(fleet.health(conn=db))
+
+        assert {(r.kind, r.asset_id) for r in rows} == {("pump", "P101"), ("membrane", "RO")}
+        assert "trains" not in next(r for r in rows if r.kind == "membrane").detail  # 막 미등록
+        assert pumps.calls == 3  # P101 은 캐시 유지
+
+    def test_plant_tags_give_one_membrane_row(self):
+        fleet, pumps, db = _fleet(n_pumps=2)
+        fleet.registry.replace([TagBinding(f"RO{i}_TMP", f"RO{i}", "tmp", kind="membrane") for i in (1, 2, 3)])
+        calls = []
+        predict_fleet = fleet.lifetime.predict_fleet
+
+        async def spy(membrane_ids, *args, **kwargs):
+            calls.append(list(membrane_ids))
+            return await predict_fleet(membrane_ids, *args, **kwargs)
+
+        fleet.lifetime.predict_fleet = spy
+        fleet.lifetime.predict_lifetime = None  # 막마다 따로 예측하지 않음
+        rows = asyncio.run(fleet.health(conn=db))
+
+        membranes = [r for r in rows if r.kind == "membrane"]
+        assert [r.asset_id for r in membranes] == ["RO"]
+        assert membranes[0].detail["trains"] == ["RO1", "RO2", "RO3"]
+        assert "remaining_days" in membranes[0].detail
+        assert calls == [["RO"]]
+
+    def test_rank_puts_missing_last(self):
+        rows = [HealthRow("A", "pump", None, "no_data", [], None, 0.0),
+                HealthRow("B", "pump", 90.0, "normal", [], None, 0.0),
+                HealthRow("C", "membrane", 10.0, "x", [], None, 0.0)]
+        assert [r.asset_id for r in rank(rows)] == ["C", "B", "A"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
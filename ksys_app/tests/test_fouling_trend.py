@@ -0,0 +1,204 @@
+"""
+막오염 추세 증분 상태 단위 테스트
+창 최소제곱 일치 / 누적 오차 / 지수가중 추종 / 저장·재시작 / 진단 증분 조회
+"""
+import asyncio
+import contextlib
+import re
+
+import numpy as np
+import pytest
+
+from ksys_app.diagnostics.feature_store import FeatureStore
+from ksys_app.diagnostics.fouling_diagnostics import FoulingDiagnostics
+from ksys_app.diagnostics.trend_state import HOUR, FoulingTrendTracker, SlidingTrend
+
+NOW = 1_800_000_000.0 + 1234.0
+DAY = 86400
+
+
+class _HourlyDB:
+    """influx_agg_1h 대체 - 태그별 함수값, 조회 구간 기록"""
+
+    def __init__(self, funcs):
+        self.funcs = funcs  # tag -> f(epoch)
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        sql, params = self.executed[-1]
+        if "influx_tag" in sql:
+            return [(p, t) for p in params[0] for t in self.funcs if "FLUX" in t]
+        assert re.search(r"FROM (influx_\w+)", sql).group(1) == "influx_agg_1h"
+        tags, since, lower, end = params
+        out = []
+        for tag, s in zip(tags, since):
+            if tag in self.funcs:
+                for t in np.arange(np.ceil(max(s, lower) / HOUR) * HOUR, end, HOUR):
+                    v = self.funcs[tag](t)
+                    out.append((tag, t, v, v, v, 60))
+        return out
+
+    def spans(self):
+        """데이터 조회별 최장 구간 (초)"""
+        return [max(p[3] - s for s in p[1]) for sql, p in self.executed if "influx_tag" not in sql]
+
+
+class _Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _plant():
+    t0 = NOW - 40 * DAY
+    return _HourlyDB({
+        "TMP": lambda t: 1.5 + 0.02 * (t - t0) / DAY,
+        "FLUX_A": lambda t: 20 - 0.1 * (t - t0) / DAY,
+        "FLUX_B": lambda t: 22 - 0.1 * (t - t0) / DAY,
+        "TMP_BEFORE_CIP": lambda t: 2.4,
+        "TMP_AFTER_CIP": lambda t: 1.6,
+        "TMP_INITIAL": lambda t: 1.4,
+    })
+
+
+class TestSlidingTrend:
+    """SlidingTrend 테스트"""
+
+    def test_matches_polyfit_over_window(self):
+        rng = np.random.default_rng(1)
+        t = NOW + HOUR * np.arange(500)
+        y = 1.5 + 0.003 * np.arange(500) + rng.normal(0, 0.05, 500)
+        trend = SlidingTrend(7 * DAY)
+        assert trend.extend(zip(t, y)) == 500
+
+        inside = t > t[-1] - 7 * DAY
+        slope, intercept = np.polyfit((t[inside] - t[0]) / HOUR, y[inside], 1)
+        assert trend.count == inside.sum() == 168
+        assert trend.slope() == pytest.approx(slope, rel=1e-9)
+        assert trend.level_at(t[-1]) == pytest.approx(intercept + slope * (t[-1] - t[0]) / HOUR, rel=1e-9)
+        assert trend.mean == pytest.approx(y[inside].mean())
+
+    def test_ignores_late_and_nan_points(self):
+        trend = SlidingTrend(DAY)
+        assert trend.push(NOW, 1.0) and trend.push(NOW + HOUR, 2.0)
+        assert not trend.push(NOW + HOUR, 5.0)
+        assert not trend.push(NOW, 5.0)
+        assert not trend.push(NOW + 2 * HOUR, float("nan"))
+        assert trend.count == 2 and trend.slope() == pytest.approx(1.0)
+
+    def test_no_drift_over_long_run(self):
+        n = 24 * 365 * 3
+        t = NOW + HOUR * np.arange(n)
+        y = 1000.0 + 0.5 * np.sin(np.arange(n) / 7.0)
+        trend = SlidingTrend(7 * DAY)
+        trend.extend(zip(t, y))
+
+        tail = slice(n - 168, n)
+        slope = np.polyfit((t[tail] - t[0]) / HOUR, y[tail], 1)[0]
+        assert trend.slope() == pytest.approx(slope, rel=1e-7, abs=1e-10)
+        assert trend.origin > NOW + 2 * 365 * DAY  # 기준 시각 이동
+
+    def test_ew_slope_follows_recent_change(self):
+        trend = SlidingTrend(30 * DAY, tau_s=2 * DAY)
+        for i in range(30 * 24):
+            rate = 0.001 if i < 25 * 24 else 0.01
+            level = 0.001 * min(i, 25 * 24) + 0.01 * max(i - 25 * 24, 0)
+            trend.push(NOW + i * HOUR, 1.5 + level)
+        assert abs(trend.ew_slope() - rate) < abs(trend.slope() - rate)
+        assert trend.ew_slope() > 3 * trend.slope()
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "trend.json")
+        tracker = FoulingTrendTracker({"tmp": 7 * DAY}, path)
+        tracker.ingest("RO1", "tmp", [(NOW + i * HOUR, 1.5 + 0.01 * i) for i in range(48)])
+        tracker.save()
+
+        restored = FoulingTrendTracker({"tmp": 7 * DAY}, path)
+        a, b = tracker.series("RO1", "tmp"), restored.series("RO1", "tmp")
+        assert b.count == 48 and b.last_t == a.last_t
+        assert b.slope() == pytest.approx(a.slope()) and b.ew_slope() == pytest.approx(a.ew_slope())
+        assert restored.last_t("RO1") == NOW + 47 * HOUR
+
+
+class TestFoulingIncremental:
+    """FoulingDiagnostics 증분 갱신 테스트"""
+
+    def test_backfill_then_recent_window(self, tmp_path):
+        clock, db = _Clock(), _plant()
+        path = str(tmp_path / "fouling.json")
+        fouling = FoulingDiagnostics("", FeatureStore(clock=clock), trends=FoulingTrendTracker(_windows(), path))
+
+        first = asyncio.run(_run(fouling, db))
+        assert db.spans() == [30 * DAY]
+        assert first.tmp_increase_rate == pytest.approx(0.02)
+        last = NOW // HOUR * HOUR - HOUR
+        initial = 21 - 0.1 * (last - 167 * HOUR + 11.5 * HOUR - (NOW - 40 * DAY)) / DAY
+        assert first.fouling_rate == pytest.approx(0.6 / initial * 100 / 7)
+
+        asyncio.run(_run(fouling, db))  # 같은 시간 버킷 → 조회 없음
+        assert db.spans() == [30 * DAY]
+
+        clock.now += HOUR
+        second = asyncio.run(_run(fouling, db))
+        assert db.spans() == [30 * DAY, 6 * HOUR]
+        assert second.tmp_increase_rate == pytest.approx(0.02)
+
+        # 재시작 - 저장된 상태에서 이어서 최근 구간만 조회
+        clock.now += 3 * HOUR
+        restarted = FoulingDiagnostics("", FeatureStore(clock=clock), trends=FoulingTrendTracker(_windows(), path))
+        third = asyncio.run(_run(restarted, db))
+        assert db.spans() == [30 * DAY, 6 * HOUR, 6 * HOUR]
+        assert restarted.trends.series("RO1", "tmp").last_t == clock.now // HOUR * HOUR - HOUR
+        assert third.tmp_increase_rate == pytest.approx(0.02)
+
+    def test_long_outage_fetches_gap_only(self, tmp_path):
+        clock, db = _Clock(), _plant()
+        path = str(tmp_path / "fouling.json")
+        fouling = FoulingDiagnostics("", FeatureStore(clock=clock), trends=FoulingTrendTracker(_windows(), path))
+        asyncio.run(_run(fouling, db))
+
+        clock.now += 2 * DAY
+        restarted = FoulingDiagnostics("", FeatureStore(clock=clock), trends=FoulingTrendTracker(_windows(), path))
+        asyncio.run(_run(restarted, db))
+        assert db.spans()[-1] == 2 * DAY + HOUR
+
+
+    def test_sparse_series_do_not_force_backfill(self, tmp_path):
+        clock, db = _Clock(), _plant()
+        for tag in ("TMP_BEFORE_CIP", "TMP_AFTER_CIP", "TMP_INITIAL"):
+            del db.funcs[tag]  # CIP 값 없음 → 빈 시계열
+        fouling = FoulingDiagnostics("", FeatureStore(clock=clock),
+                                     trends=FoulingTrendTracker(_windows(), str(tmp_path / "fouling.json")))
+        for _ in range(3):
+            asyncio.run(_run(fouling, db))
+            clock.now += HOUR
+        assert db.spans() == [30 * DAY, 6 * HOUR, 6 * HOUR]
+        assert fouling.trends.series("RO1", "tmp_before_cip").last_t is None
+
+        # 드물게 들어오는 시계열(오래된 마지막 값)도 조회 구간을 늘리지 않음
+        fouling.trends.ingest("RO1", "tmp_before_cip", [(clock.now - 10 * DAY, 2.4)])
+        asyncio.run(_run(fouling, db))
+        assert db.spans()[-1] == 6 * HOUR
+
+
+def _windows():
+    return {"tmp": 7 * DAY, "flux": 7 * DAY, "tmp_before_cip": 30 * DAY,
+            "tmp_after_cip": 30 * DAY, "tmp_initial": 30 * DAY}
+
+
+async def _run(fouling, db):
+    await fouling.feature_store.refresh(db)
+    return await fouling.diagnose_fouling("RO1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
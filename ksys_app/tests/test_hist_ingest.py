@@ -0,0 +1,202 @@
+"""
+influx_hist 배치 적재기 단위 테스트
+크기/시간 기준 플러시 / 스테이징 COPY → 병합 한 트랜잭션 / 실패 시 재시도·버퍼 상한 / 지표
+"""
+import asyncio
+import contextlib
+import struct
+from datetime import datetime, timedelta, timezone
+
+import psycopg
+import pytest
+
+from ksys_app.integration import hist_ingest
+from ksys_app.integration.hist_ingest import COPY_SQL, COPY_TYPES, STAGE_SQL, HistIngest, _ingest_metrics
+
+T0 = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _rows(n, tags=("FLOW_PUMP1", "TMP"), start=0):
+    return [(T0 + timedelta(seconds=10 * k), tag, float(k), 0) for k in range(start, start + n) for tag in tags]
+
+
+class _Copy:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set_types(self, types):
+        self.conn.types = tuple(types)
+
+    async def write_row(self, row):
+        # psycopg 바이너리 덤퍼처럼 naive 시각 / 숫자 아닌 값은 거부
+        ts, tag, value, qc = row
+        if ts.tzinfo is None:
+            raise TypeError("can't subtract offset-naive and offset-aware datetimes")
+        if not isinstance(value, float) or tag in self.conn.db.poison:
+            raise struct.error("required argument is not a float")
+        self.conn.stage.append(tuple(row))
+
+
+class _FakeDB:
+    """연결 팩토리: 스테이징 COPY / 병합 문장 기록, 병합은 (ts, tag_name) 마지막 값"""
+
+    def __init__(self):
+        self.hist = {}
+        self.statements = []
+        self.transactions = 0
+        self.down = False
+        self.poison = set()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        if self.down:
+            raise psycopg.OperationalError("connection refused")
+        yield _FakeConn(self)
+
+
+class _FakeConn:
+    def __init__(self, db):
+        self.db = db
+        self.stage = []
+        self.types = None
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+        self.db.transactions += 1
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.db.statements.append(sql)
+        if "INSERT INTO" in sql:
+            assert self.types == COPY_TYPES
+            for ts, tag, value, qc in self.stage:
+                self.db.hist[(ts, tag)] = (value, qc)
+            self.stage = []
+
+    def copy(self, sql):
+        self.db.statements.append(sql)
+        return _Copy(self)
+
+
+class TestHistIngest:
+    """HistIngest 테스트"""
+
+    def test_size_flush_copies_then_merges(self):
+        db = _FakeDB()
+        ingest = HistIngest("", batch_rows=10, flush_interval_s=60, connection=db.connection)
+
+        async def run():
+            await ingest.add(_rows(4))   # 8행 - 대기
+            assert db.statements == [] and ingest.buffered == 8
+            await ingest.add(_rows(9, start=4))  # 26행 → 10 / 10 / 6
+
+        asyncio.run(run())
+        assert ingest.buffered == 0 and ingest.written == 26 and ingest.batches == db.transactions == 3
+        assert db.statements[:3] == [STAGE_SQL, COPY_SQL, hist_ingest.merge_sql("public.influx_hist")]
+        assert len(db.hist) == 26
+
+    def test_time_flush_and_close(self):
+        db = _FakeDB()
+        ingest = HistIngest("", batch_rows=1000, flush_interval_s=0.05, connection=db.connection)
+
+        async def run():
+            await ingest.add(_rows(3))
+            await asyncio.sleep(0.01)
+            assert ingest.written == 0
+            await asyncio.sleep(0.1)
+            assert ingest.written == 6
+            await ingest.add(_rows(1, start=3))
+            await ingest.close()
+
+        asyncio.run(run())
+        assert ingest.written == 8 and ingest.batches == 2
+
+    def test_duplicate_keys_keep_latest(self):
+        db = _FakeDB()
+        ingest = HistIngest("", batch_rows=100, connection=db.connection)
+        sql = hist_ingest.merge_sql("public.influx_hist")
+        assert "ORDER BY ts, tag_name, seq DESC" in sql and "ON CONFLICT (ts, tag_name) DO UPDATE" in sql
+
+        async def run():
+            await ingest.add([(T0, "TMP", 1.0, 0), (T0, "TMP", 2.0, 1)])
+            await ingest.flush()
+
+        asyncio.run(run())
+        assert db.hist == {(T0, "TMP"): (2.0, 1)}
+
+    def test_failure_keeps_rows_and_caps_buffer(self):
+        db = _FakeDB()
+        db.down = True
+        ingest = HistIngest("", batch_rows=10, max_buffer=15, connection=db.connection)
+
+        async def run():
+            await ingest.add(_rows(6))          # 12행, 적재 실패 → 버퍼 유지
+            assert ingest.buffered == 12 and ingest.failures == 1
+            await ingest.add(_rows(2, start=6))  # 16행 → 가장 오래된 1행 버림
+            assert ingest.buffered == 15 and ingest.dropped == 1
+            db.down = False
+            assert await ingest.flush() == 15
+
+        asyncio.run(run())
+        assert (T0, "FLOW_PUMP1") not in db.hist and len(db.hist) == 15
+        assert "connection refused" in ingest.last_error
+
+    def test_unencodable_rows_are_quarantined(self):
+        db = _FakeDB()
+        ingest = HistIngest("", batch_rows=100, connection=db.connection)
+        naive = datetime(2025, 6, 1, 9, 0, 0)
+
+        async def run():
+            await ingest.add([(naive, "TMP", 1.0, 0), (T0, "TMP", None, 0), (T0, "PH", "7.1", 0)])
+            assert ingest.buffered == 2 and ingest.quarantined == 1
+            assert await ingest.flush() == 2
+
+            # 덤퍼가 거부하는 행: 배치를 나눠 그 행만 격리, 나머지는 적재 (재시도 반복 없음)
+            db.poison.add("BAD")
+            await ingest.add(_rows(5, tags=("FLOW_PUMP1", "BAD", "TMP"), start=10))
+            assert await ingest.flush() == 10
+            assert ingest.buffered == 0 and await ingest.flush() == 0
+
+        asyncio.run(run())
+        assert (naive.astimezone(), "TMP") in db.hist and (T0, "PH") in db.hist
+        assert ingest.quarantined == 6 and ingest.failures == 0
+        assert {row[1] for row in list(ingest.quarantine)[1:]} == {"BAD"}
+        assert _ingest_metrics()["ksys_ingest_quarantined_total"] >= 6
+
+    def test_scada_sync_writes_aware_timestamps(self):
+        from ksys_app.integration.external_systems import SCADAInterface
+
+        db = _FakeDB()
+        scada = SCADAInterface("")
+        scada.ingest = HistIngest("", batch_rows=1, connection=db.connection)
+
+        async def run():
+            data = await scada.read_tags(list(scada.tag_mapping))
+            await scada.sync_to_database(data)
+            return data
+
+        data = asyncio.run(run())
+        assert len(db.hist) == len(data) and scada.ingest.quarantined == 0
+        assert all(ts.tzinfo is not None for ts, _ in db.hist)
+
+    def test_metrics(self):
+        db = _FakeDB()
+        ingest = HistIngest("", batch_rows=2, connection=db.connection)
+        asyncio.run(ingest.add(_rows(1)))
+        metrics = _ingest_metrics()
+        assert metrics["ksys_ingest_written_total"] >= 2
+        assert metrics["ksys_ingest_flush_latency_max_seconds"] >= ingest.last_flush_s
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+"""
+고정 용량 이력 저장소 단위 테스트
+시간 범위 조회 / 증분 건수 / 퇴출 → DB 기록 / 100만 건 메모리 soak
+"""
+import gc
+import resource
+from datetime import datetime, timedelta
+
+import pytest
+
+from ksys_app.alarm.history_store import HistoryStore
+from ksys_app.monitoring.range_monitor import AlertLevel, RangeViolation
+
+
+T0 = datetime(2026, 1, 1)
+
+
+def _violation(i, tag=None, at=None):
+    return RangeViolation(tag or f"T{i % 7}", float(i), "max", 1.0,
+                          AlertLevel.WARNING if i % 3 else AlertLevel.CRITICAL, 0.0,
+                          at or T0 + timedelta(seconds=i))
+
+
+def _store(capacity=100, evict=None, batch=10):
+    return HistoryStore(
+        time_of=lambda v: v.timestamp,
+        keys_of=lambda v: (("tag", v.tag_name), ("level", v.alert_level.name)),
+        capacity=capacity, evict=evict, evict_batch=batch,
+    )
+
+
+class TestHistoryStore:
+    """HistoryStore 테스트"""
+
+    def test_range_query_matches_scan(self):
+        store = _store(capacity=1000)
+        items = [_violation(i) for i in range(500)]
+        store.extend(items)
+
+        for lo, hi in ((None, None), (T0 + timedelta(seconds=100), None),
+                       (T0 + timedelta(seconds=10.5), T0 + timedelta(seconds=20)), (T0 + timedelta(days=1), None)):
+            expected = [v for v in items if (lo is None or v.timestamp > lo) and (hi is None or v.timestamp <= hi)]
+            assert store.range(lo, hi) == expected
+            assert store.count_range(lo, hi) == len(expected)
+
+    def test_capacity_and_eviction_order(self):
+        evicted = []
+        store = _store(capacity=100, evict=evicted.extend, batch=10)
+        items = [_violation(i) for i in range(1000)]
+        store.extend(items)
+
+        assert len(store) <= 100
+        assert evicted + list(store) == items  # 오래된 순서로 퇴출, 유실 없음
+        assert store[0] is items[len(evicted)] and store[-1] is items[-1]
+        assert store.range(T0 + timedelta(seconds=995)) == items[996:]
+
+    def test_counts_maintained_incrementally(self):
+        store = _store(capacity=50, batch=5)
+        items = [_violation(i) for i in range(333)]
+        store.extend(items)
+
+        live = list(store)
+        assert store.counts("tag") == {t: sum(v.tag_name == t for v in live) for t in {v.tag_name for v in live}}
+        assert sum(store.counts("level").values()) == len(live)
+
+    def test_late_item_inserted_in_order(self):
+        store = _store()
+        for i in (0, 10, 20, 30):
+            store.append(_violation(i))
+        late = _violation(99, at=T0 + timedelta(seconds=15))
+        store.append(late)
+
+        assert [v.timestamp.second for v in store] == [0, 10, 15, 20, 30]
+        assert store.range(T0 + timedelta(seconds=12), T0 + timedelta(seconds=18)) == [late]
+
+    def test_memory_flat_over_one_million_events(self):
+        """100만 건 추가 동안 용량 도달 이후 최대 RSS 가 늘지 않음"""
+        store = _store(capacity=10_000, evict=lambda batch: None, batch=1000)
+        tags = [f"T{i}" for i in range(50)]
+        levels = (AlertLevel.WARNING, AlertLevel.CRITICAL)
+
+        gc.collect()
+        samples = []
+        for i in range(1_000_000):
+            store.append(RangeViolation(tags[i % 50], 1.0, "max", 1.0, levels[i & 1], 0.0, float(i)))
+            if i % 100_000 == 99_999:
+                samples.append(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)  # KiB
+
+        assert len(store) <= 10_000 and store.total == 1_000_000
+        assert samples[-1] - samples[1] < 4 * 1024  # 20만~100만 건 구간 증가 4 MiB 미만
+        assert store.memory_bytes() <= 8 * 4 * 10_000  # 시각 버퍼 + 참조 리스트 (각 2배 용량)
+        assert store.counts("level") == {"WARNING": len(store) // 2, "CRITICAL": len(store) // 2}
+
+
+class TestMonitorHistory:
+    """RangeMonitor / AlarmScenarioEngine 이력 연동"""
+
+    def test_violation_history_archives_unrecorded(self):
+        from ksys_app.monitoring.range_monitor import RangeMonitor
+
+        class _Recorder:
+            rows = []
+
+            def submit(self, table, row):
+                self.rows.append((table, row))
+
+        monitor = RangeMonitor("")
+        monitor.event_sink = _Recorder()
+        monitor.violation_history = HistoryStore(
+            time_of=lambda v: v.timestamp, capacity=10, evict=monitor._archive_violations, evict_batch=5,
+        )
+        for i in range(20):
+            v = _violation(i, tag="TMP")
+            v.recorded = i == 0
+            monitor.violation_history.append(v)
+
+        # 기록된 첫 이탈 제외, 퇴출 배치마다 미기록분을 요약 1건으로 (행 단위 기록 없음)
+        archived = [(row[0], row[2], row[3]) for _, row in monitor.event_sink.rows]
+        assert archived == [("INCIDENT", "TMP", 4.0), ("INCIDENT", "TMP", 5.0)]
+        assert len(monitor.get_violation_history(hours=24 * 365 * 10)) == len(monitor.violation_history)
+
+    def test_engine_history_query_and_counts(self):
+        from ksys_app.alarm.scenario_engine import AlarmEvent, AlarmLevel, AlarmScenarioEngine
+
+        engine = AlarmScenarioEngine("")
+        now = datetime.now()
+        for i, (sid, age_h) in enumerate((("S001", 30), ("S002", 5), ("S001", 1), ("S003", 0.5))):
+            engine.alarm_history.append(AlarmEvent(f"E{i}", sid, AlarmLevel.WARNING, now - timedelta(hours=age_h),
+                                                   [], [], {"TMP": 1.0}, ""))
+
+        assert [e.event_id for e in engine.get_alarm_history(24)] == ["E1", "E2", "E3"]
+        assert [e.event_id for e in engine.get_alarm_history(2)] == ["E2", "E3"]
+        assert engine.get_alarm_counts("scenario") == {"S001": 2, "S002": 1, "S003": 1}
+        assert engine.get_alarm_counts("tag") == {"TMP": 4}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+"""
+페이지별 로더 단위 테스트
+페이지당 쿼리 수 / 정적 데이터 캐시 / 동시 조회 지연
+"""
+import asyncio
+import dataclasses
+import time
+
+import pytest
+
+from ksys_app.states.page_loaders import DATASETS, PAGES, LoadParams, PageLoader
+
+
+LATENCY_S = 0.05
+
+
+class TestPageLoader:
+    """실제 페이지/데이터셋 그래프 + 가짜 조회 함수"""
+
+    def setup_method(self):
+        self.calls = []
+        self.empty = set()
+
+        def fake(name):
+            async def fetch(params):
+                self.calls.append((name, params.tag_name))
+                await asyncio.sleep(LATENCY_S)
+                return [] if name in self.empty else [{"tag_name": "D100", "dataset": name}]
+            return fetch
+
+        datasets = [
+            dataclasses.replace(d, fetch=fake(d.name)) if d.fetch is not None else d
+            for d in DATASETS
+        ]
+        self.loader = PageLoader(datasets, PAGES)
+        self.params = LoadParams("24 hours", "10m", "D100")
+
+    def _load(self, path):
+        self.calls.clear()
+        start = time.perf_counter()
+        result = asyncio.run(self.loader.load(path, self.params))
+        return result, sorted(n for n, _ in self.calls), time.perf_counter() - start
+
+    def test_dashboard_first_load_and_refresh(self):
+        """대시보드: 최초 6개 쿼리, 갱신 시 시리즈/최신값만 재조회"""
+        result, calls, elapsed = self._load("/")
+
+        assert calls == ["features", "latest", "qc", "series", "tag_meta", "tags"]
+        assert {"series", "latest", "qc", "tag_meta", "tags"} <= set(result)
+        assert "indicators" not in result  # 대시보드는 기술지표를 렌더링하지 않음
+        assert all(tag is None for _, tag in self.calls)  # KPI는 전체 태그
+        assert elapsed < LATENCY_S * 3  # 직렬(6회)이 아닌 동시 조회
+
+        _, calls, elapsed = self._load("/")
+        assert calls == ["latest", "series"]
+        assert elapsed < LATENCY_S * 2
+
+    def test_trend_page_loads_selected_series_only(self):
+        """트렌드: 선택 태그 시리즈 + 태그 목록"""
+        result, calls, _ = self._load("/trend")
+
+        assert calls == ["series", "tags"]
+        assert ("series", "D100") in self.calls
+
+        _, calls, _ = self._load("/trend")
+        assert calls == ["series"]
+
+    def test_tech_page_series_fallback_only_when_empty(self):
+        """기술지표: DB 지표가 비어 있을 때만 시리즈 추가 조회"""
+        _, calls, _ = self._load("/tech")
+        assert calls == ["indicators", "tags"]
+
+        self.empty.add("indicators")
+        result, calls, elapsed = self._load("/tech")
+        assert calls == ["indicators", "series"]
+        assert result["series"]
+        assert elapsed < LATENCY_S * 3
+
+    def test_static_data_shared_across_pages_and_concurrent_loads(self):
+        """태그 목록은 페이지/세션 간 공유, 동시 요청도 한 번만 조회"""
+        async def many():
+            await asyncio.gather(*(self.loader.load(p, self.params) for p in ("/", "/trend", "/tech") * 5))
+
+        asyncio.run(many())
+
+        assert sum(1 for n, _ in self.calls if n == "tags") == 1
+        assert sum(1 for n, _ in self.calls if n == "qc") == 1
+
+    def test_unknown_dependency_rejected(self):
+        """선언되지 않은 의존성은 생성 시 오류"""
+        bad = list(DATASETS) + [dataclasses.replace(DATASETS[0], name="x", deps=("nope",))]
+        with pytest.raises(ValueError):
+            PageLoader(bad, PAGES)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
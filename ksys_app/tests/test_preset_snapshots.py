@@ -0,0 +1,119 @@
+"""
+프리셋 스냅샷 캐시 단위 테스트
+워터마크 기반 무효화 / 세션 간 공유
+"""
+import asyncio
+import copy
+import pickle
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ksys_app.states.snapshots import PresetSnapshotStore
+
+
+PRESETS = [{"label": "1D", "value": "24 hour"}, {"label": "1W", "value": "7 days"}]
+
+
+def _sources(window, resolution):
+    return ("public.influx_agg_10m",) if resolution == "10m" else ("public.influx_agg_1h",)
+
+
+class TestPresetSnapshotStore:
+    """PresetSnapshotStore 갱신 규칙 테스트"""
+
+    def setup_method(self):
+        self.t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.marks = {"public.influx_agg_10m": self.t0, "public.influx_agg_1h": self.t0}
+        self.builds = []
+
+        async def build(window, resolution):
+            self.builds.append(window)
+            return {
+                "series": [{"tag_name": "D100", "bucket": "2026-01-01T00:00:00+00:00", "avg": 1.0}],
+                "tags": ["D100"],
+                "kpi_rows": [{"tag_name": "D100", "value_s": "1.0"}],
+            }
+
+        async def watermarks():
+            return dict(self.marks)
+
+        self.store = PresetSnapshotStore(build, _sources, presets=PRESETS, watermarks=watermarks, max_age_s=3600)
+
+    def test_first_refresh_builds_every_preset(self):
+        """최초 갱신 시 모든 프리셋 생성 (윈도우별 해상도 정책 적용)"""
+        rebuilt = asyncio.run(self.store.refresh(now=self.t0))
+
+        assert rebuilt == [("24 hour", "10m"), ("7 days", "1h")]
+        assert self.store.get("24 hour", "10m") is not None
+        assert self.store.get("24 hour", None) is None  # 프리셋 해상도가 아니면 미적용
+
+    def test_only_presets_with_moved_watermark_rebuild(self):
+        """소스 CAGG 워터마크가 바뀐 프리셋만 재생성"""
+        asyncio.run(self.store.refresh(now=self.t0))
+        self.builds.clear()
+
+        # Given: 10분 집계만 갱신됨
+        self.marks["public.influx_agg_10m"] = self.t0 + timedelta(minutes=10)
+
+        # When
+        rebuilt = asyncio.run(self.store.refresh(now=self.t0 + timedelta(minutes=11)))
+
+        # Then
+        assert rebuilt == [("24 hour", "10m")]
+        assert self.builds == ["24 hour"]
+
+    def test_max_age_rebuild_without_watermarks(self):
+        """워터마크가 없으면 max_age 경과 시에만 재생성"""
+        self.marks.clear()
+        asyncio.run(self.store.refresh(now=self.t0))
+
+        assert asyncio.run(self.store.refresh(now=self.t0 + timedelta(minutes=30))) == []
+        assert len(asyncio.run(self.store.refresh(now=self.t0 + timedelta(hours=1)))) == 2
+
+    def test_snapshot_is_compact_and_shared(self):
+        """스냅샷 행 목록은 튜플이며 세션 간 동일 객체 공유"""
+        asyncio.run(self.store.refresh(now=self.t0))
+
+        a = self.store.get("24 hour", "10m")
+        b = self.store.get("24 hour", "10m")
+
+        assert a is b
+        assert isinstance(a.series, tuple)
+        assert a.built_at == self.t0
+        assert a.watermarks == {"public.influx_agg_10m": self.t0}
+
+    def test_snapshot_rows_reject_mutation(self):
+        """공유 행을 세션에서 수정하면 다른 세션으로 번지지 않고 즉시 오류"""
+        asyncio.run(self.store.refresh(now=self.t0))
+        row = self.store.get("24 hour", "10m").series[0]
+
+        for mutate in (lambda r: r.__setitem__("avg", 2.0), lambda r: r.update(avg=2.0),
+                       lambda r: r.pop("avg"), lambda r: r.setdefault("x", 1), lambda r: r.clear()):
+            with pytest.raises(TypeError):
+                mutate(row)
+        assert row["avg"] == 1.0
+
+        # 세션 사본은 수정 가능 / 직렬화·복사는 그대로 동작
+        own = dict(row)
+        own["avg"] = 2.0
+        assert row["avg"] == 1.0
+        assert pickle.loads(pickle.dumps(row)) == row and copy.deepcopy(row) is row
+
+    def test_failed_build_keeps_previous_snapshot(self):
+        """재생성 실패 시 기존 스냅샷 유지"""
+        asyncio.run(self.store.refresh(now=self.t0))
+        before = self.store.get("7 days", "1h")
+
+        async def broken(window, resolution):
+            raise RuntimeError("db down")
+
+        self.store._build = broken
+        self.marks["public.influx_agg_1h"] = self.t0 + timedelta(hours=1)
+        asyncio.run(self.store.refresh(now=self.t0 + timedelta(hours=1)))
+
+        assert self.store.get("7 days", "1h") is before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,167 @@
+"""
+수질 보고서 생성 단위 테스트
+공용 기간 조회 1회 / 절 동시 실행 / 닫힌 기간 디스크 캐시 / 기본 기간
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ksys_app.water_quality import report_generator
+from ksys_app.water_quality.quality_monitor import ComplianceReport, WaterQualityMonitor
+from ksys_app.water_quality.report_generator import (
+    PERIOD_SQL, ReportType, WaterQualityReportGenerator, period_bounds,
+)
+
+START = datetime(2025, 3, 3)  # 월요일 (닫힌 기간)
+END = START + timedelta(weeks=1)
+
+
+def _rows(seed=2):
+    """influx_agg_1h 행 (태그, epoch, avg, min, max, n) - 빈 버킷 일부"""
+    rng = random.Random(seed)
+    rows = []
+    for tag, mu in (('PH', 7.2), ('TURB', 0.2), ('CL2', 0.8), ('TDS', 300.0), ('TEMP', 14.0)):
+        for h in range(7 * 24):
+            if rng.random() < 0.1:
+                continue
+            avg = mu * (1 + 0.002 * h) + rng.gauss(0, mu * 0.05)
+            rows.append((tag, (START + timedelta(hours=h)).timestamp(), avg, avg - 0.1, avg + 0.1, 60))
+    return rows
+
+
+class _Conn:
+    """psycopg 연결 대체 - 동시 실행 중인 조회 수 기록"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    async def execute(self, sql, params=None):
+        self.sql, self.params = sql, params
+        self.db.executed.append(sql)
+        self.db.active += 1
+        self.db.peak = max(self.db.peak, self.db.active)
+        await asyncio.sleep(0.02)
+        self.db.active -= 1
+        if self.db.fail:
+            raise ConnectionError("db down")
+
+    async def fetchall(self):
+        if self.sql is PERIOD_SQL:
+            tags, lo, hi = self.params
+            return [r for r in self.db.rows if r[0] in tags and lo <= r[1] < hi]
+        return []  # alarm_events
+
+
+class _DB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.active = 0
+        self.peak = 0
+        self.fail = False
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    db = _DB(_rows())
+
+    async def connect(dsn):
+        return _Conn(db)
+
+    async def compliance(self, start_date, end_date):
+        db.active += 1
+        db.peak = max(db.peak, db.active)
+        await asyncio.sleep(0.02)
+        db.active -= 1
+        return ComplianceReport((start_date, end_date), 1000, 900, 60, 40, 90.0,
+                                {'pH': 95.0, 'turbidity': 85.0}, [])
+
+    monkeypatch.setattr(report_generator.psycopg.AsyncConnection, "connect", connect)
+    monkeypatch.setattr(WaterQualityMonitor, "calculate_compliance_rate", compliance)
+    return db
+
+
+class TestGenerateReport:
+    """WaterQualityReportGenerator.generate_report 테스트"""
+
+    def test_sections_share_one_period_fetch(self, db):
+        generator = WaterQualityReportGenerator("")
+        report = asyncio.run(generator.generate_report(ReportType.WEEKLY, START, END))
+
+        assert db.executed.count(PERIOD_SQL) == 1
+        assert db.peak >= 2  # 기간 조회 / 준수율 / 알람 동시 실행
+
+        for tag in ('PH', 'TURB', 'CL2', 'TDS', 'TEMP'):
+            avgs = np.array([r[2] for r in db.rows if r[0] == tag])
+            stats = report.summary['parameters'][tag]
+            assert stats['samples'] == 60 * len(avgs)
+            assert stats['average'] == pytest.approx(avgs.mean())
+            assert stats['minimum'] == pytest.approx(avgs.min() - 0.1)
+            assert stats['std_dev'] == pytest.approx(avgs.std(ddof=1))
+        assert report.summary['total_samples'] == 60 * len(db.rows)
+
+        series = report.charts_data[0]['data']
+        assert len(series) == len({r[1] for r in db.rows if r[0] in ('PH', 'TURB', 'CL2', 'TDS')})
+        assert report.charts_data[1]['data'][0] == {'name': '준수', 'value': 90.0}
+
+        # 일별 평균 트렌드 (DATE(bucket) GROUP BY 와 같음)
+        daily = {}
+        for tag, ts, avg, *_ in db.rows:
+            if tag == 'PH':
+                daily.setdefault(datetime.fromtimestamp(ts).date(), []).append(avg)
+        values = [np.mean(v) for _, v in sorted(daily.items())]
+        first, second = np.mean(values[:len(values) // 2]), np.mean(values[len(values) // 2:])
+        trend = next(t for t in report.trends_data if t['parameter'] == 'PH')
+        assert trend['rate'] == pytest.approx((second - first) / first * 100)
+
+    def test_closed_period_served_from_disk_cache(self, db):
+        report = asyncio.run(WaterQualityReportGenerator("").generate_report(ReportType.WEEKLY, START, END))
+        db.executed.clear()
+
+        generator = WaterQualityReportGenerator("")  # 새 프로세스 (디스크 캐시만)
+        cached = asyncio.run(generator.generate_report(ReportType.WEEKLY, START, END))
+        assert db.executed == []
+        assert generator.cache_hits == 1
+        assert cached == report
+
+        asyncio.run(generator.generate_report(ReportType.WEEKLY, START, END, use_cache=False))
+        assert db.executed.count(PERIOD_SQL) == 1
+
+    def test_open_or_failed_periods_not_cached(self, db):
+        generator = WaterQualityReportGenerator("")
+        now = datetime.now()
+        asyncio.run(generator.generate_report(ReportType.DAILY, now - timedelta(days=1), now))
+        asyncio.run(generator.generate_report(ReportType.DAILY, now - timedelta(days=1), now))
+        assert db.executed.count(PERIOD_SQL) == 2
+
+        db.fail = True
+        asyncio.run(generator.generate_report(ReportType.WEEKLY, START, END))
+        db.fail = False
+        asyncio.run(generator.generate_report(ReportType.WEEKLY, START, END))
+        assert generator.cache_hits == 0
+
+
+@pytest.mark.parametrize("report_type, expected", [
+    (ReportType.DAILY, (datetime(2030, 3, 6), datetime(2030, 3, 7))),
+    (ReportType.WEEKLY, (datetime(2030, 2, 25), datetime(2030, 3, 4))),
+    (ReportType.MONTHLY, (datetime(2030, 2, 1), datetime(2030, 3, 1))),
+])
+def test_period_bounds_are_closed_calendar_periods(report_type, expected):
+    assert period_bounds(report_type, datetime(2030, 3, 7, 0, 5)) == expected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,146 @@
+"""
+RO 수명 몬테카를로 예측 단위 테스트
+분포 분위수 / 고정 시드 / 막 일괄 계산 / 입력 일괄 조회
+"""
+import asyncio
+import contextlib
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ksys_app.diagnostics.feature_store import FeatureStore
+from ksys_app.maintenance.ro_lifetime_predictor import (
+    LifetimeInputs, ROLifetimePredictor, simulate_lifetimes,
+)
+
+NOW = 1_800_000_000.0 + 1234.0
+HOUR = 3600
+FACTORS = ROLifetimePredictor("", FeatureStore()).lifetime_factors
+
+
+def _inputs(membrane_id="RO1", cip=20, tmp=(0.05, 0.02), perf=(0.95, 0.0), avg_tmp=1.8, days=400):
+    data = {'installation_date': datetime.now() - timedelta(days=days), 'avg_tmp': avg_tmp, 'operating_days': days}
+    return LifetimeInputs(membrane_id, data, cip, tmp[0], tmp[1], perf[0], perf[1])
+
+
+class _FakeAggDB:
+    """influx_agg_1h 대체 - 태그별 (epoch → 값) 함수"""
+
+    def __init__(self, funcs, hours):
+        self.funcs = funcs
+        self.hours = hours
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        tags, since, lower, end = self.executed[-1][1]
+        first = np.floor(end / HOUR) * HOUR - self.hours * HOUR
+        out = []
+        for tag, s in zip(tags, since):
+            for t in np.arange(max(first, np.ceil(max(s, lower) / HOUR) * HOUR), end, HOUR):
+                v = self.funcs[tag](t) if tag in self.funcs else None
+                if v is not None:
+                    out.append((tag, t, v, v, v, 60))
+        return out
+
+
+class TestMonteCarlo:
+    """simulate_lifetimes 테스트"""
+
+    def test_quantiles_match_normal_tmp_rate(self):
+        # CIP/성능 영향 없음 → 수명 = 기본 + TMP 영향 (정규분포)
+        factors = dict(FACTORS, cip_impact=0)
+        result = simulate_lifetimes([_inputs(tmp=(0.5, 0.2))], factors, 200_000, seed=3)["RO1"]
+
+        scale = 12 * factors['tmp_impact'] * 10
+        mean, std = 1095 + 0.5 * scale, 0.2 * abs(scale)
+        assert result.lifetime_p50 == pytest.approx(mean, abs=1.0)
+        assert result.lifetime_p10 == pytest.approx(mean - 1.2816 * std, abs=1.5)
+        assert result.lifetime_p90 == pytest.approx(mean + 1.2816 * std, abs=1.5)
+        assert result.remaining_p50 == pytest.approx(result.lifetime_p50 - 400, abs=1.0)
+
+    def test_fixed_seed_is_reproducible(self):
+        inputs = [_inputs("RO1"), _inputs("RO2", cip=60, perf=(0.7, 0.1))]
+        a = simulate_lifetimes(inputs, FACTORS, 10_000, seed=7)
+        b = simulate_lifetimes(inputs, FACTORS, 10_000, seed=7)
+        c = simulate_lifetimes(inputs, FACTORS, 10_000, seed=8)
+        assert a == b and a != c
+
+    def test_all_membranes_in_one_call(self):
+        inputs = [_inputs(f"RO{i}", cip=10 * i) for i in range(1, 9)]
+        start = time.perf_counter()
+        result = simulate_lifetimes(inputs, FACTORS, 100_000, seed=1)
+        elapsed = time.perf_counter() - start
+
+        assert list(result) == [f"RO{i}" for i in range(1, 9)]
+        p50 = [result[f"RO{i}"].lifetime_p50 for i in range(1, 9)]
+        assert p50 == sorted(p50, reverse=True)  # CIP 많을수록 짧음
+        assert all(r.lifetime_p10 <= r.lifetime_p50 <= r.lifetime_p90 for r in result.values())
+        assert all(r.n_samples == 100_000 for r in result.values())
+        assert elapsed < 8 * 1.0  # 막당 1초 미만
+
+    def test_block_split_matches_single_block(self, monkeypatch):
+        import ksys_app.maintenance.ro_lifetime_predictor as module
+
+        inputs = [_inputs(f"RO{i}") for i in range(5)]
+        whole = simulate_lifetimes(inputs, FACTORS, 20_000, seed=1)
+        monkeypatch.setattr(module, "MAX_BLOCK_ELEMENTS", 30_000)  # 막 1개씩
+        split = simulate_lifetimes(inputs, FACTORS, 20_000, seed=1)
+
+        assert list(split) == list(whole)
+        for key in whole:
+            assert split[key].lifetime_p50 == pytest.approx(whole[key].lifetime_p50, abs=5.0)
+
+
+class TestPredictFleet:
+    """ROLifetimePredictor.predict_fleet 테스트"""
+
+    def test_one_refresh_for_all_membranes(self):
+        hours = 400 * 24
+        t0 = NOW // HOUR * HOUR - hours * HOUR
+        db = _FakeAggDB({
+            "TMP": lambda t: 1.5 + 0.0001 * (t - t0) / HOUR,
+            "CIP_EVENT": lambda t: 1.0 if int((t - t0) / HOUR) % 500 == 0 else 0.0,
+            "COND_IN": lambda t: 1000.0,
+            "COND_OUT": lambda t: 30.0 + (t / HOUR) % 3,
+        }, hours)
+        store = FeatureStore(clock=lambda: NOW)
+        predictor = ROLifetimePredictor("", store)
+
+        result = asyncio.run(predictor.predict_fleet(["RO1", "RO2"], n_samples=20_000, seed=1, conn=db))
+
+        assert len(db.executed) == 1  # 4개 구간 → influx_agg_1h 1회
+        assert set(result) == {"RO1", "RO2"}
+        life = result["RO1"]
+        assert life.cip_count == len(range(0, hours, 500))
+        assert life.tmp_increase_rate == pytest.approx(0.0001 * 24 * 30.4, rel=0.1)
+        iv = life.interval
+        assert iv.lifetime_p10 <= life.estimated_lifetime_days + 15 and iv.lifetime_p90 >= life.estimated_lifetime_days - 15
+        assert iv.remaining_p50 == pytest.approx(max(iv.lifetime_p50 - (datetime.now() - life.installation_date).days, 0),
+                                                 abs=1.0)
+        assert 0.3 <= life.confidence <= 1.0
+
+    def test_single_membrane_wrapper(self):
+        db = _FakeAggDB({"TMP": lambda t: 1.5}, 48)
+        store = FeatureStore(clock=lambda: NOW)
+        predictor = ROLifetimePredictor("", store)
+
+        async def run():
+            await store.refresh(db)
+            return await predictor.predict_lifetime("RO1", n_samples=1_000, seed=2)
+
+        life = asyncio.run(run())
+        assert life.cip_count == 10 and life.interval.n_samples == 1_000
+        assert life.confidence == pytest.approx(0.5)  # 운전 30일 미만
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+정비 계획 시나리오 일괄 평가 단위 테스트
+작업 배열 / 프로세스 풀 결과 일치 / 파레토 전선 / 진행 / 취소
+"""
+import random
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ksys_app.maintenance.calendar_index import shutdown_windows
+from ksys_app.maintenance.scenario_sweep import Scenario, ScenarioSweep, TaskArrays, pareto_front
+from ksys_app.maintenance.schedule_optimizer import MaintenanceTask, MaintenanceType
+
+START = datetime(2030, 3, 4, 8, 0)
+END = START + timedelta(days=90)
+
+
+def _tasks(n=400, seed=3):
+    rng = random.Random(seed)
+    kinds = list(MaintenanceType)
+    tasks = []
+    for i in range(n):
+        release = START + timedelta(days=rng.randrange(90), hours=rng.randrange(8), microseconds=rng.randrange(10**6))
+        tasks.append(MaintenanceTask(f"T{i}", f"작업 {i}", f"E{rng.randrange(30)}", rng.choice(kinds),
+                                     rng.randint(1, 5), rng.choice([1, 2, 4, 8]), [f"PART{i % 7}"], 0,
+                                     rng.uniform(100, 2000), release, release + timedelta(days=rng.randint(3, 30))))
+    return tasks
+
+
+def _scenarios():
+    saturdays = tuple(w for w in shutdown_windows(START, END) if w[0].weekday() == 5)
+    return [Scenario(f"crew{c}-{cal}", weights={'cost': w, 'downtime': 1 - w}, crew_size=c,
+                     shutdown_windows=saturdays if cal == "sat" else None)
+            for c in (1, 2, 3) for cal in ("all", "sat") for w in (0.2, 0.6)]
+
+
+class TestTaskArrays:
+    """TaskArrays 테스트"""
+
+    def test_round_trip(self):
+        tasks = _tasks(50)
+        restored = TaskArrays.pack(tasks).unpack()
+        assert restored == tasks
+        assert restored[0] is not tasks[0] and restored[0].required_parts is not tasks[0].required_parts
+
+
+class TestParetoFront:
+    """pareto_front 테스트"""
+
+    def test_non_dominated_points(self):
+        points = np.array([[1, 5, 1], [2, 2, 2], [3, 3, 3], [5, 1, 1], [1, 5, 1], [2, 2, 9]])
+        assert pareto_front(points).tolist() == [0, 1, 3, 4]
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        points = rng.integers(0, 6, size=(80, 3)).astype(float)
+        brute = [i for i, p in enumerate(points)
+                 if not any((q <= p).all() and (q < p).any() for q in points)]
+        assert pareto_front(points).tolist() == brute
+
+
+class TestScenarioSweep:
+    """ScenarioSweep 테스트"""
+
+    def test_pool_matches_inline(self):
+        tasks = _tasks()
+        inline = ScenarioSweep(tasks, START, END, max_workers=0).run(_scenarios())
+        pooled = ScenarioSweep(tasks, START, END, max_workers=2).run(_scenarios())
+
+        assert [r.objectives for r in pooled.results] == [r.objectives for r in inline.results]
+        assert [r.name for r in pooled.frontier] == [r.name for r in inline.frontier]
+        assert all(t.scheduled_date >= START for t in tasks) and len(tasks) == 400  # 원본 유지
+
+    def test_frontier_and_crew_effect(self):
+        result = ScenarioSweep(_tasks(), START, END, max_workers=0).run(_scenarios())
+        by_name = {r.name: r for r in result.results}
+
+        assert len(result.results) == 12 and not result.cancelled
+        assert by_name["crew1-all"].unscheduled > by_name["crew3-all"].unscheduled
+        crew1 = [r for r in result.results if r.name.startswith("crew1")]
+        crew3 = [r for r in result.results if r.name.startswith("crew3")]
+        assert min(r.risk for r in crew3) < min(r.risk for r in crew1)
+        # 가중치만 다른 시나리오는 배치 결과가 같고 점수만 다름
+        same = [r for r in result.results if r.name == "crew2-all"]
+        assert len(same) == 2 and same[0].objectives == same[1].objectives
+        assert same[0].optimization_score != same[1].optimization_score
+
+        front = result.frontier
+        assert front and all(not any(all(o <= f for o, f in zip(other.objectives, r.objectives))
+                                     and other.objectives != r.objectives for other in result.results)
+                             for r in front)
+
+    def test_progress_and_cancel(self):
+        sweep = ScenarioSweep(_tasks(100), START, END, max_workers=0)
+        seen = []
+        stop = threading.Event()
+
+        def progress(done, total, result):
+            seen.append((done, total, result.name))
+            if done == 3:
+                stop.set()
+
+        result = sweep.run(_scenarios(), progress=progress, cancel=stop)
+        assert [d for d, _, _ in seen] == [1, 2, 3] and all(t == 12 for _, t, _ in seen)
+        assert result.cancelled and len(result.results) == 3
+
+    def test_cancel_pool(self):
+        sweep = ScenarioSweep(_tasks(), START, END, max_workers=2)
+        result = sweep.run(_scenarios() * 4, progress=lambda done, total, r: sweep.cancel())
+        assert result.cancelled and 1 <= len(result.results) < 48
+        assert not result.failed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""
+정비 스케줄러 단위 테스트
+캘린더 인덱스 / 정지 기간 / 일 최대 작업 시간 연쇄 보장 / 우선순위 / 검증기
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from ksys_app.maintenance.calendar_index import FirstFitTree, MaintenanceCalendar, shutdown_windows
+from ksys_app.maintenance.schedule_optimizer import (
+    MaintenanceScheduleOptimizer, MaintenanceTask, MaintenanceType, OptimizedSchedule, validate_schedule,
+)
+
+START = datetime(2030, 3, 4, 8, 0)  # 월요일 (부품 리드타임 기준 현재 시각 이후)
+END = START + timedelta(days=60)
+
+
+def _task(task_id, hours=4.0, priority=3, kind=MaintenanceType.PREVENTIVE, equipment="P101",
+          release=START, deadline=None):
+    return MaintenanceTask(task_id, task_id, equipment, kind, priority, hours, [], 0, 1000.0,
+                           release, deadline or release + timedelta(days=30))
+
+
+def _legacy_windows(start_date, end_date):
+    """기존 날짜 순회 구현"""
+    windows = []
+    current = start_date
+    while current < end_date:
+        if current.weekday() == 5:
+            windows.append((current.replace(hour=6, minute=0), current.replace(hour=18, minute=0)))
+        current += timedelta(days=1)
+    current = start_date
+    while current < end_date:
+        if current.day <= 7 and current.weekday() == 6:
+            windows.append((current.replace(hour=0, minute=0), current.replace(hour=23, minute=59)))
+        current += timedelta(days=1)
+    return windows
+
+
+def _optimize(tasks, **constraints):
+    optimizer = MaintenanceScheduleOptimizer()
+    return optimizer.optimize_schedule(tasks, START, END, constraints)
+
+
+class TestCalendarIndex:
+    """FirstFitTree / MaintenanceCalendar / shutdown_windows 테스트"""
+
+    def test_first_fit_matches_scan(self):
+        rng = random.Random(4)
+        values = [rng.uniform(0, 16) for _ in range(300)]
+        tree = FirstFitTree(values)
+        for _ in range(500):
+            i, v = rng.randrange(300), rng.uniform(0, 16)
+            tree[i] = values[i] = v
+            x, lo, hi = rng.uniform(0, 16), rng.randrange(300), rng.randrange(301)
+            expected = next((k for k in range(lo, hi) if values[k] >= x), None)
+            assert tree.first_at_least(x, lo, hi) == expected
+
+    @pytest.mark.parametrize("start", [START, datetime(2026, 2, 28, 23, 30), datetime(2027, 1, 1)])
+    def test_windows_match_day_loop(self, start):
+        for days in (0, 1, 6, 7, 40, 400):
+            end = start + timedelta(days=days, hours=3)
+            assert shutdown_windows(start, end) == _legacy_windows(start, end)
+
+    def test_booking_updates_windows(self):
+        calendar = MaintenanceCalendar(START, END, shutdown_windows(START, END), 16)
+        saturday = datetime(2030, 3, 9, 6, 0)
+        assert calendar.earliest_window(START, 12) == saturday
+        calendar.book(saturday.date(), 8)
+        assert calendar.earliest_window(START, 8) == saturday
+        assert calendar.earliest_window(START, 12) == datetime(2030, 3, 16, 6, 0)
+        with pytest.raises(ValueError):
+            calendar.book(saturday.date(), 9)
+
+
+class TestListScheduler:
+    """MaintenanceScheduleOptimizer 테스트"""
+
+    def test_overflow_respects_capacity_transitively(self):
+        tasks = [_task(f"T{i}", hours=10, equipment=f"E{i}") for i in range(5)]
+        schedule = _optimize(tasks)
+
+        days = sorted(t.scheduled_date.date() for t in schedule.tasks)
+        assert days == [START.date() + timedelta(days=k) for k in range(5)]
+        assert validate_schedule(schedule, 16) == []
+
+    def test_higher_priority_claims_day_first(self):
+        low = _task("LOW", hours=12, priority=1, equipment="A")
+        high = _task("HIGH", hours=12, priority=5, equipment="B")
+        _optimize([low, high])
+        assert high.scheduled_date == START
+        assert low.scheduled_date.date() == START.date() + timedelta(days=1)
+
+    def test_shutdown_tasks_use_windows_with_capacity(self):
+        first = _task("OH1", hours=10, priority=5, kind=MaintenanceType.OVERHAUL, equipment="A")
+        second = _task("OH2", hours=10, priority=4, kind=MaintenanceType.OVERHAUL, equipment="B")
+        sunday = _task("OH3", hours=14, priority=3, kind=MaintenanceType.OVERHAUL, equipment="C",
+                       deadline=END)
+        schedule = _optimize([first, second, sunday])
+
+        assert first.scheduled_date == datetime(2030, 3, 9, 6, 0)
+        assert second.scheduled_date == datetime(2030, 3, 16, 6, 0)  # 같은 토요일은 잔여 6시간
+        assert sunday.scheduled_date == datetime(2030, 4, 7, 0, 0)   # 토요일 창(12h) 초과 → 첫째 일요일
+        assert validate_schedule(schedule, 16, shutdown_windows(START, END)) == []
+
+    def test_shutdown_task_without_window_before_deadline(self):
+        urgent = _task("CM", hours=3, kind=MaintenanceType.CORRECTIVE, deadline=START + timedelta(days=2))
+        _optimize([urgent])
+        assert urgent.scheduled_date == START  # 정지 기간 없음 → 일반 배치
+
+    def test_unschedulable_tasks_reported(self):
+        too_long = _task("LONG", hours=20)
+        too_late = _task("LATE", release=END + timedelta(days=1))
+        schedule = _optimize([too_long, too_late, _task("OK")])
+        assert [t.task_id for t in schedule.tasks] == ["OK"]
+        assert {t.task_id for t in schedule.unscheduled} == {"LONG", "LATE"}
+
+    def test_same_equipment_tasks_merged_onto_one_day(self):
+        first = _task("A1", hours=4, priority=5, release=START + timedelta(days=3))
+        second = _task("A2", hours=4, priority=3, release=START)
+        _optimize([first, second])
+        assert second.scheduled_date.date() == first.scheduled_date.date()
+        assert first.cost_estimate == pytest.approx(950.0)
+
+    def test_large_random_plan_is_valid(self):
+        rng = random.Random(11)
+        kinds = list(MaintenanceType)
+        tasks = [_task(f"T{i}", hours=rng.choice([1, 2, 4, 8, 12]), priority=rng.randint(1, 5),
+                       kind=rng.choice(kinds), equipment=f"E{rng.randrange(50)}",
+                       release=START + timedelta(days=rng.randrange(60), hours=rng.randrange(8)))
+                 for i in range(600)]
+        schedule = _optimize(tasks)
+
+        assert len(schedule.tasks) + len(schedule.unscheduled) == 600
+        assert validate_schedule(schedule, 16, shutdown_windows(START, END)) == []
+        assert all(t.scheduled_date >= START for t in schedule.tasks)
+
+
+class TestValidator:
+    """validate_schedule 테스트"""
+
+    def test_reports_overloaded_day(self):
+        tasks = [_task("A", hours=10), _task("B", hours=10), _task("C", release=END + timedelta(days=1))]
+        schedule = OptimizedSchedule("S", START, END, tasks, 24, 0, 0, 0)
+        violations = validate_schedule(schedule, 16)
+        assert any("20.00h > 16" in v for v in violations)
+        assert any(v.startswith("C:") for v in violations)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,127 @@
+"""
+세션 메모리 계산 / 공유 뷰 저장소 단위 테스트
+"""
+import pytest
+
+from ksys_app.performance.metrics import render_metrics
+from ksys_app.states.session_memory import SessionMemoryRegistry, SharedDatasetStore, deep_sizeof
+
+
+def _view(n=100):
+    rows = [{"tag_name": f"D{i % 10}", "avg": float(i), "avg_s": f"{i:.2f}"} for i in range(n)]
+    return {"series": rows, "kpi_rows": [], "mini_data": {}}
+
+
+class TestSharedDatasetStore:
+    """참조 카운트 / 세대 교체 테스트"""
+
+    def test_sessions_share_one_view(self):
+        """같은 키는 fresh_s 동안 한 번만 생성되고 세션들이 참조"""
+        store = SharedDatasetStore(fresh_s=10)
+        store.acquire("s1", "k", _view(), now=0)
+
+        shared = store.get("k", now=5)
+        assert shared is not None
+        assert store.acquire("s2", "k", now=5) is shared
+        assert store.refcount("k") == 2
+        assert store.get("k", now=11) is None  # 갱신 주기 경과
+
+    def test_old_generation_freed_on_last_release(self):
+        """새 세대 발행 후 이전 세대는 마지막 참조 해제 시 제거"""
+        store = SharedDatasetStore(fresh_s=10)
+        old = store.acquire("s1", "k", _view(), now=0)
+        store.acquire("s2", "k", _view(), now=20)
+        assert store.is_shared(old["series"][0])
+
+        store.release("s1")
+
+        assert not store.is_shared(old["series"][0])
+        assert store.stats()["ksys_shared_views"] == 1
+
+    def test_unreferenced_stale_entry_pruned(self):
+        store = SharedDatasetStore(fresh_s=10)
+        store.acquire("s1", "k", _view(), now=0)
+        store.release("s1")
+
+        store.prune(now=30)
+
+        assert store.nbytes == 0
+
+
+class TestSessionMemory:
+    """세션별 메모리 계산 / 유휴·예산 비움 테스트"""
+
+    def test_shared_rows_not_charged_to_session(self):
+        """세션 리스트가 공유 행을 가리키면 리스트 자체만 계산"""
+        store = SharedDatasetStore()
+        shared = store.acquire("s1", "k", _view(1000), now=0)
+        session_series = list(shared["series"])
+
+        own = deep_sizeof([session_series], skip=store.is_shared)
+        private = deep_sizeof([[dict(r) for r in shared["series"]]])
+
+        assert own * 10 < private
+
+    def test_idle_session_evicted_then_rehydrated(self):
+        reg = SessionMemoryRegistry(budget_bytes=10**9, idle_s=60)
+        reg.touch("s1", now=0)
+
+        assert not reg.should_evict("s1", now=30)
+        assert reg.should_evict("s1", now=61)
+
+        reg.mark_evicted("s1", 0)
+        assert not reg.should_evict("s1", now=120)  # 이미 비움
+        reg.touch("s1", now=130)  # 다음 조회 시 재로딩
+        assert not reg.usage("s1").evicted
+
+    def test_budget_requests_lru_eviction(self):
+        """예산 초과 시 오래된 세션부터 비움 요청, 최근 세션은 유지"""
+        reg = SessionMemoryRegistry(budget_bytes=250, idle_s=3600)
+        for i, sid in enumerate(("a", "b", "c")):
+            reg.touch(sid, now=i)
+            reg.record(sid, 100)
+
+        assert reg.enforce_budget() == ["a"]
+        assert reg.should_evict("a", now=3)
+        assert not reg.should_evict("c", now=3)
+
+    def test_realtime_heartbeat_keeps_watched_session_live(self):
+        """실시간 틱(연결된 클라이언트) = 활동 - 예산 초과 비움 요청은 취소하지 않음"""
+        reg = SessionMemoryRegistry(budget_bytes=10**9, idle_s=60)
+        reg.touch("wall", now=0)
+        for t in range(10, 600, 10):
+            reg.heartbeat("wall", now=t)
+        assert not reg.should_evict("wall", now=600)
+
+        reg.usage("wall").evict_requested = True
+        reg.heartbeat("wall", now=610)
+        assert reg.should_evict("wall", now=610)
+
+        reg.heartbeat("unknown", now=0)  # 등록 안 된 세션은 무시
+        assert reg.usage("unknown") is None
+
+    def test_sweep_only_marks_idle_sessions(self):
+        """정리 루프는 유휴 세션을 표시만 함 - 상태 비움은 세션 이벤트가 잠금 안에서 수행"""
+        reg = SessionMemoryRegistry(budget_bytes=10**9, idle_s=60)
+        reg.touch("idle", now=0)
+        reg.touch("fresh", now=100)
+
+        assert reg.mark_idle(now=120) == ["idle"]
+        assert reg.usage("idle").evict_requested and not reg.usage("idle").evicted
+        assert reg.should_evict("idle", now=120) and not reg.should_evict("fresh", now=120)
+        assert reg.mark_idle(now=130) == []  # 이미 표시한 세션은 다시 표시하지 않음
+
+        reg.mark_evicted("idle", 0)  # 세션 이벤트가 비운 뒤 기록
+        assert not reg.should_evict("idle", now=140)
+        reg.touch("idle", now=150)  # 다음 조회 시 표시 해제
+        assert not reg.usage("idle").evict_requested
+
+    def test_metrics_endpoint_reports_state_memory(self):
+        text = render_metrics()
+
+        assert "ksys_state_memory_total_bytes" in text
+        assert "ksys_state_memory_budget_bytes" in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,184 @@
+"""
+influx_qc_rule 기반 벡터 범위 판정 단위 테스트
+스칼라 판정과 동일성 / 증분 규칙 갱신 / 1만 태그 판정 시간
+"""
+import asyncio
+import contextlib
+import time
+
+import numpy as np
+import pytest
+
+from ksys_app.monitoring.range_monitor import AlertLevel, RangeMonitor
+from ksys_app.monitoring.threshold_table import CRITICAL, NORMAL, WARNING, ThresholdTable
+
+
+def _reference(value, w_lo, w_hi, c_lo, c_hi):
+    """기존 check_range 의 스칼라 판정 순서"""
+    for bound, level, is_max, hit in (
+        (c_lo, CRITICAL, False, c_lo is not None and value < c_lo),
+        (c_hi, CRITICAL, True, c_hi is not None and value > c_hi),
+        (w_lo, WARNING, False, w_lo is not None and value < w_lo),
+        (w_hi, WARNING, True, w_hi is not None and value > w_hi),
+    ):
+        if hit:
+            return level, is_max, bound
+    return NORMAL, None, None
+
+
+class _FakeRuleDB:
+    """influx_qc_rule 대체 - 실행된 쿼리와 조회된 태그 기록"""
+
+    def __init__(self, rules):
+        self.rules = dict(rules)  # tag -> (enabled, min, max, wmin, wmax, cmin, cmax, unit)
+        self.queries = []
+        self.fetched = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self._sql, self._params = sql, params
+        self.queries.append(sql.split("FROM")[0].split()[1])
+
+    def _hash(self, tag):
+        return hash((tag, self.rules[tag])) & 0x7FFFFFFF
+
+    async def fetchone(self):
+        return len(self.rules), sum(self._hash(t) for t in self.rules)
+
+    async def fetchall(self):
+        if "ANY" in self._sql:
+            tags = self._params[0]
+            self.fetched.extend(tags)
+            out = []
+            for tag in tags:
+                enabled, mn, mx, wmin, wmax, cmin, cmax, unit = self.rules[tag]
+                out.append((tag, enabled, mn, mx, wmin, wmax, cmin if cmin is not None else mn,
+                            cmax if cmax is not None else mx, unit, ""))
+            return out
+        return [(t, self._hash(t)) for t in self.rules]
+
+
+class TestThresholdTable:
+    """ThresholdTable 테스트"""
+
+    def test_matches_scalar_reference(self):
+        rng = np.random.default_rng(7)
+        table = ThresholdTable()
+        bounds = []
+        for i in range(500):
+            b = [None if rng.random() < 0.15 else float(x) for x in (20, 80, 10, 90)]
+            bounds.append(b)
+            table.upsert(f"T{i}", *b)
+        values = rng.uniform(0, 100, 500)
+
+        result = table.check(values)
+
+        got = {int(i): (int(l), bool(m), float(t)) for i, l, m, t in
+               zip(result.index, result.level, result.is_max, result.threshold)}
+        for i, (value, b) in enumerate(zip(values, bounds)):
+            level, is_max, bound = _reference(value, *b)
+            if level == NORMAL:
+                assert i not in got
+            else:
+                assert got[i] == (level, is_max, bound)
+
+    def test_partial_rows_disabled_and_remove(self):
+        table = ThresholdTable(capacity=2)
+        for i in range(5):
+            table.upsert(f"T{i}", 1, 9, 0, 10)
+        table.upsert("T3", 1, 9, 0, 10, enabled=False)
+        table.remove(["T1"])
+
+        assert table.tags == ["T0", "T4", "T2", "T3"] and table.index["T4"] == 1
+        rows = table.positions(["T2", "T3", "T4", "NOPE"])
+        result = table.check(np.array([11.0, 11.0, 0.5, 50.0])[:3], rows[:3])
+
+        assert [table.tags[i] for i in result.index] == ["T2", "T4"]  # T3 비활성
+        assert list(result.level) == [CRITICAL, WARNING]
+        assert rows[3] == -1
+
+    def test_zero_threshold_deviation(self):
+        table = ThresholdTable()
+        table.upsert("D100", warn_min=10, warn_max=180, crit_min=0, crit_max=200)
+
+        result = table.check(np.array([-2.0]))
+
+        assert result.level[0] == CRITICAL and result.deviation[0] == pytest.approx(200.0)
+
+    def test_ten_thousand_tags_under_one_millisecond(self):
+        rng = np.random.default_rng(1)
+        table = ThresholdTable()
+        for i in range(10_000):
+            table.upsert(f"TAG{i:05d}", 20, 80, 10, 90)
+        values = rng.normal(50, 15, 10_000)
+
+        table.check(values)
+        best = min(_timed(table.check, values) for _ in range(20))
+        result = table.check(values)
+
+        assert best < 1e-3
+        assert 0 < len(result) < 10_000
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+class TestRuleReload:
+    """RangeMonitor.refresh_rules 증분 갱신"""
+
+    def test_incremental_reload(self):
+        db = _FakeRuleDB({
+            "D100": (True, 0.0, 200.0, 10.0, 180.0, None, None, "m3/h"),
+            "D101": (True, 0.0, 200.0, 10.0, 180.0, 0.0, 200.0, ""),
+            "TMP": (True, 0.5, 3.0, 0.8, 2.0, 0.5, 2.8, "bar"),
+        })
+        monitor = RangeMonitor("")
+
+        async def run():
+            assert await monitor.refresh_rules(db) == 3
+            assert db.fetched == ["D100", "D101", "TMP"]
+            assert monitor.thresholds["D100"].crit_max == 200.0 and monitor.thresholds["D100"].unit == "m3/h"
+            assert (await monitor.check_range("TMP", 2.2))[0] == AlertLevel.WARNING  # 규칙이 기본값 덮어씀
+
+            db.queries.clear()
+            assert await monitor.refresh_rules(db) == 0
+            assert len(db.queries) == 1  # 지문만 비교
+
+            db.fetched.clear()
+            db.rules["D101"] = (True, 0.0, 200.0, 10.0, 150.0, 0.0, 200.0, "")
+            del db.rules["D100"]
+            assert await monitor.refresh_rules(db) == 2
+            assert db.fetched == ["D101"]  # 바뀐 태그만 조회
+            assert "D100" not in monitor.table and "D100" not in monitor.thresholds
+            assert (await monitor.check_range("D101", 160))[0] == AlertLevel.WARNING
+
+        asyncio.run(run())
+
+    def test_check_all_ranges_vectorized(self):
+        monitor = RangeMonitor("")
+        monitor.event_sink = None
+        data = [
+            {"tag_name": "TMP", "value": 2.6},
+            {"tag_name": "UNKNOWN", "value": 99},
+            {"tag_name": "PH", "value": 7.0},
+            {"tag_name": "DP", "value": 0.05},
+            {"tag_name": "COND", "value": None},
+        ]
+
+        violations = asyncio.run(monitor.check_all_ranges(data))
+
+        assert [(v.tag_name, v.alert_level, v.threshold_type, v.threshold_value) for v in violations] == [
+            ("TMP", AlertLevel.WARNING, "max", 2.5), ("DP", AlertLevel.CRITICAL, "min", 0.1),
+        ]
+        assert violations[0].timestamp is violations[1].timestamp  # 배치 단위 시각
+        assert violations[1].deviation_percentage == pytest.approx(50.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,55 @@
+"""
+시간축 유틸 단위 테스트
+epoch 변환 / 버킷 라벨 메모이즈
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from ksys_app.utils.time_axis import LabelTable, to_epoch
+
+
+class TestTimeAxis:
+    """to_epoch / LabelTable 테스트"""
+
+    def test_to_epoch_accepts_datetime_iso_and_naive(self):
+        """datetime, ISO(Z/오프셋), naive(UTC 간주) 모두 같은 epoch"""
+        dt = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+        assert to_epoch(dt) == 1767225600
+        assert to_epoch("2026-01-01T00:00:00Z") == 1767225600
+        assert to_epoch("2026-01-01 09:00:00+09:00") == 1767225600
+        assert to_epoch("2026-01-01T00:00:00") == 1767225600
+        assert to_epoch("12:34:56") is None
+        assert to_epoch(None) is None
+
+    def test_labels_are_seoul_local(self):
+        """라벨은 Asia/Seoul 기준 (+09:00 오프셋 옵션)"""
+        assert LabelTable("%Y-%m-%d %H:%M").label(1767225600) == "2026-01-01 09:00"
+        assert LabelTable("%Y-%m-%d %H:%M:%S", with_offset=True).label(1767225600) == "2026-01-01 09:00:00+09:00"
+
+    def test_format_many_renders_each_bucket_once(self):
+        """태그 간 반복되는 버킷은 한 번만 렌더링"""
+        table = LabelTable("%H:%M")
+        epochs = [1767225600, 1767225660] * 500 + [None]
+
+        labels = table.format_many(epochs)
+
+        assert len(table) == 2
+        assert labels[:2] == ["09:00", "09:01"]
+        assert labels[-1] == ""
+
+    def test_table_is_bounded(self):
+        """max_size 초과 시 테이블 초기화 (메모리 상한)"""
+        table = LabelTable("%H:%M:%S", max_size=10)
+
+        labels = table.format_many(range(1767225600, 1767225625))
+
+        assert len(labels) == 25
+        assert len(table) <= 25
+        table.label(0)
+        assert len(table) <= 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,167 @@
+"""
+전체 태그 추세 예측 단위 테스트
+일괄 적합 / RLS 실시간 갱신 / 도달 시간 표 / 단일 조회
+"""
+import asyncio
+import contextlib
+import time
+
+import numpy as np
+import pytest
+
+from ksys_app.monitoring.range_monitor import RangeMonitor
+from ksys_app.monitoring.threshold_table import ThresholdTable
+from ksys_app.monitoring.trend_predictor import FleetTrendPredictor, fit_stacked
+
+
+class _FakeAggConn:
+    """influx_agg_1m 대체 - 실행된 쿼리 기록"""
+
+    def __init__(self, series):
+        self.series = series  # tag -> (ts 배열, 값 배열)
+        self.executed = []
+
+    @contextlib.asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    async def fetchall(self):
+        tags, _minutes = self.executed[-1][1]
+        return [(tag, float(t), float(v)) for tag in tags if tag in self.series
+                for t, v in zip(*self.series[tag])]
+
+
+def _line(level, slope_per_min, minutes=60, end=1_800_000_000.0, noise=0.0, seed=0):
+    t = end - 60.0 * np.arange(minutes)[::-1]
+    rng = np.random.default_rng(seed)
+    return t, level + slope_per_min * (t - end) / 60.0 + rng.normal(0, noise, minutes)
+
+
+class TestStackedFit:
+    """fit_stacked / FleetTrendPredictor.fit 테스트"""
+
+    def test_matches_polyfit_per_tag(self):
+        rng = np.random.default_rng(3)
+        tags, ts, ys = [], [], []
+        for i in range(20):
+            n = int(rng.integers(5, 60))
+            t = np.sort(rng.uniform(0, 3600, n)) + 1.7e9
+            y = rng.normal(i, 1, n) + rng.normal() * t / 60
+            tags += [f"T{i}"] * n
+            ts.append(t)
+            ys.append(y)
+        p = FleetTrendPredictor()
+        p.fit(tags, np.concatenate(ts), np.concatenate(ys))
+
+        for i, (t, y) in enumerate(zip(ts, ys)):
+            slope, intercept = np.polyfit(t / 60 - t[-1] / 60, y, 1)
+            row = p.index[f"T{i}"]
+            assert p.theta[row] == pytest.approx([intercept, slope], rel=1e-6, abs=1e-6)
+
+    def test_degenerate_tag_skipped(self):
+        theta, _, count = fit_stacked(np.array([0, 1, 1]), np.array([0.0, 1.0, 1.0]), np.array([1.0, 2.0, 3.0]),
+                                      2, np.zeros(2))
+        assert np.isnan(theta).all() and list(count) == [1, 2]
+
+
+class TestOnlineRLS:
+    """RLS 갱신 테스트"""
+
+    def test_rls_continues_batch_fit_exactly_on_a_line(self):
+        t, y = _line(2.0, 0.01, minutes=40)
+        p = FleetTrendPredictor()
+        p.fit(["TMP"] * 30, t[:30], y[:30])
+        for ts, v in zip(t[30:], y[30:]):
+            p.update("TMP", ts, v)
+
+        row = p.index["TMP"]
+        assert p.theta[row] == pytest.approx([2.0, 0.01], abs=1e-9)
+        assert p.t_ref[row] == pytest.approx(t[-1] / 60)
+
+    def test_rls_tracks_slope_change(self):
+        p = FleetTrendPredictor(tau_min=15)
+        t1, y1 = _line(1.0, 0.02, minutes=60, end=1.8e9, noise=0.002, seed=1)
+        t2 = t1[-1] + 60.0 * np.arange(1, 91)
+        y2 = y1[-1] - 0.01 * (t2 - t1[-1]) / 60
+        for ts, v in zip(np.r_[t1, t2], np.r_[y1, y2]):
+            p.update("DP", ts, v)
+
+        assert p.theta[p.index["DP"], 1] == pytest.approx(-0.01, abs=1e-3)
+
+    def test_batch_update_many_tags(self):
+        n = 10_000
+        p = FleetTrendPredictor()
+        names = [f"T{i}" for i in range(n)]
+        for k in range(3):
+            p.update_many(names, np.full(n, 1.8e9 + 60 * k), np.arange(n) + 0.5 * k)
+
+        start = time.perf_counter()
+        p.update_many(names, np.full(n, 1.8e9 + 180), np.arange(n) + 1.5)
+        elapsed = time.perf_counter() - start
+
+        assert p.theta[:, 1] == pytest.approx(np.full(n, 0.5), abs=1e-6)
+        assert p.count.min() == 4
+        assert elapsed < 0.05
+
+
+class TestTrendTable:
+    """도달 시간 표 / RangeMonitor 연동"""
+
+    def test_time_to_warning_and_critical(self):
+        thresholds = ThresholdTable()
+        thresholds.upsert("TMP", 0.8, 2.5, 0.5, 2.8)
+        thresholds.upsert("PH", 6.8, 8.2, 6.5, 8.5)
+        thresholds.upsert("DP", 0.2, 1.2, 0.1, 1.4)
+        p = FleetTrendPredictor()
+        t, y = _line(2.0, 0.01)
+        t2, y2 = _line(7.0, -0.002)
+        t3, y3 = _line(0.5, 0.0)
+        p.fit(["TMP"] * 60 + ["PH"] * 60 + ["DP"] * 60, np.r_[t, t2, t3], np.r_[y, y2, y3])
+
+        rows = p.table(thresholds)
+
+        assert [r.tag_name for r in rows] == ["TMP", "PH", "DP"]
+        assert rows[0].minutes_to_warning == pytest.approx(50.0) and rows[0].minutes_to_critical == pytest.approx(80.0)
+        assert rows[1].minutes_to_warning == pytest.approx(100.0)
+        assert rows[2].minutes is None  # 기울기 0
+
+    def test_monitor_fleet_uses_one_query(self):
+        monitor = RangeMonitor("")
+        now = time.time()
+        series = {
+            "TMP": _line(2.0, 0.01, end=now),
+            "DP": _line(1.0, 0.005, end=now),
+            "COND": _line(300, 1.0, end=now),
+        }
+        conn = _FakeAggConn(series)
+
+        rows = asyncio.run(monitor.predict_fleet(conn=conn))
+
+        assert len(conn.executed) == 1
+        sql, (tags, minutes) = conn.executed[0]
+        assert "ANY" in sql and "avg_val" not in sql and minutes == 60
+        assert set(tags) == set(monitor.table.tags)
+        assert {r.tag_name: round(r.minutes_to_warning, 3) for r in rows} == {"TMP": 50.0, "DP": 40.0, "COND": 100.0}
+
+        # 상태가 최신이면 다시 조회하지 않음 (O(1) 예측)
+        assert asyncio.run(monitor.predict_deviation("TMP")) == pytest.approx(50.0)
+        assert len(conn.executed) == 1
+
+    def test_realtime_feed_updates_state(self):
+        monitor = RangeMonitor("")
+        monitor.event_sink = None
+        t, y = _line(2.0, 0.01, minutes=12, end=time.time())
+
+        async def run():
+            for ts, v in zip(t, y):
+                await monitor.check_all_ranges([{"tag_name": "TMP", "value": v, "ts": ts}])
+            return await monitor.predict_deviation("TMP")
+
+        assert asyncio.run(run()) == pytest.approx(50.0, rel=1e-3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,95 @@
+"""
+Time axis utils - 타임스탬프를 epoch 정수로 유지하고 라벨은 버킷 단위로 메모이즈
+
+- 행 데이터에는 `*_epoch`(UTC epoch 초)를 보관하고 문자열 라벨은 필요한 곳에서만 생성
+- 라벨은 (포맷, epoch) 테이블에 캐시: 같은 버킷이 태그 수만큼 반복되므로
+  fromisoformat/astimezone/strftime은 고유 버킷당 1회만 수행
+- 배열 단위 포맷(`format_many`)으로 고유 버킷만 렌더링 후 일괄 매핑
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+SEOUL_TZ = ZoneInfo("Asia/Seoul")
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso_epoch(txt: str) -> Optional[int]:
+    """ISO 문자열 → epoch 초 (naive는 UTC로 간주). 같은 문자열은 한 번만 파싱."""
+    try:
+        if txt.endswith("Z"):
+            txt = txt[:-1] + "+00:00"
+        dt = datetime.fromisoformat(txt)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def to_epoch(value: object) -> Optional[int]:
+    """datetime / ISO 문자열 / 숫자 → UTC epoch 초. 변환 불가 시 None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, (int, float)):
+        return int(value)
+    txt = str(value)
+    return _parse_iso_epoch(txt) if txt else None
+
+
+class LabelTable:
+    """epoch → 로컬 시간 라벨 메모 테이블 (포맷 1개당 1개 인스턴스)"""
+
+    def __init__(self, fmt: str, tz: ZoneInfo = SEOUL_TZ, with_offset: bool = False, max_size: int = 200_000):
+        self.fmt = fmt
+        self.tz = tz
+        self.with_offset = with_offset
+        self.max_size = max_size
+        self._labels: Dict[int, str] = {}
+
+    def _render(self, epoch: int) -> str:
+        local = datetime.fromtimestamp(epoch, self.tz)
+        text = local.strftime(self.fmt)
+        if self.with_offset:
+            z = local.strftime("%z")
+            text += z[:3] + ":" + z[3:]
+        return text
+
+    def label(self, epoch: Optional[int]) -> str:
+        if epoch is None:
+            return ""
+        text = self._labels.get(epoch)
+        if text is None:
+            if len(self._labels) >= self.max_size:
+                self._labels.clear()  # 장기 실행 시 메모리 상한
+            text = self._labels[epoch] = self._render(epoch)
+        return text
+
+    def format_many(self, epochs: Iterable[Optional[int]]) -> List[str]:
+        """배열 전체를 한 번에 포맷 - 고유 버킷만 렌더링"""
+        epochs = list(epochs)
+        labels = self._labels
+        missing = {e for e in epochs if e is not None and e not in labels}
+        if len(labels) + len(missing) > self.max_size:
+            labels.clear()
+            missing = {e for e in epochs if e is not None}
+        for e in missing:
+            labels[e] = self._render(e)
+        return [labels[e] if e is not None else "" for e in epochs]
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+
+# 대시보드에서 사용하는 라벨 포맷 (프로세스 전역 공유)
+CHART_LABELS = LabelTable("%Y-%m-%d %H:%M")              # 차트 X축
+SHORT_LABELS = LabelTable("%Y-%m-%d %H:%M:%S")           # KPI/미니차트
+LOCAL_LABELS = LabelTable("%Y-%m-%d %H:%M:%S", with_offset=True)  # 테이블 (+09:00)
+TIME_LABELS = LabelTable("%H:%M:%S")                     # 실시간 차트
@@ -0,0 +1,289 @@
+"""
+수질 준수율 시간별 판정 집계 (wq_compliance_1h)
+
+influx_agg_1h 의 AVG/MIN/MAX 로는 기준을 벗어난 표본 수를 알 수 없어 준수율을 추정(20%/10%)했다.
+influx_hist 원본 표본을 태그 × 1시간 버킷마다 판정 등급별로 세어 두고, 기간 준수율은 카운터 합으로
+정확히 계산한다.
+
+- 등급: 준수 / 경고 / 위반 / 심각 - WaterQualityMonitor.check_water_quality 와 같은 판정
+- 갱신: 태그별 마지막 버킷(같은 기준 버전)부터 LATE_S 앞까지 다시 집계해 upsert (늦게 들어온 원본 반영)
+  - 기준값이 바뀌면 버전이 달라져 해당 태그는 처음부터 다시 집계 (BACKFILL_CHUNK_S 단위)
+- 갱신 주기: scripts/wq_rollup.py (cron) 또는 wq_rollup_task (앱 lifespan) - 조회 경로는 쓰지 않음
+- 조회: 기간 안의 완전한 시간 버킷 중 태그 워터마크(마지막 집계 버킷) 앞까지는 카운터 합,
+  시작의 잘린 시간과 워터마크 이후만 원본을 읽어 같은 판정 → 갱신이 최신이면 임의 기간 정확
+  (워터마크 이후 원본은 CATCHUP_S 까지만 - 갱신이 오래 멈추면 그 앞 구간은 빠지고 경고)
+- 버킷은 UTC 정시 (time_bucket) - 조회 경계 계산은 정수 시간 UTC 오프셋(KST) 전제
+- 스키마: db/scripts/wq_compliance_rollup.sql
+"""
+
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+LATE_S = int(os.getenv("KSYS_WQ_ROLLUP_LATE_S", "7200"))             # 늦게 들어오는 원본 여유
+BACKFILL_CHUNK_S = int(os.getenv("KSYS_WQ_ROLLUP_CHUNK_S", str(7 * 86400)))  # 재집계 한 번의 구간
+CATCHUP_S = int(os.getenv("KSYS_WQ_ROLLUP_CATCHUP_S", str(6 * 3600)))       # 조회 시 워터마크 뒤 원본 상한
+CRITICAL_FACTOR = 1.2  # 경고 상한 × 1.2 초과 → 심각
+
+# 카운터 순서
+CLASSES = ("compliant", "warning", "violation", "critical")
+
+WATERMARK_SQL = """
+    SELECT r.tag_name, max(r.bucket)
+    FROM public.wq_compliance_1h r
+    JOIN unnest(%s::text[], %s::text[]) AS t(tag_name, version)
+      ON r.tag_name = t.tag_name AND r.rule_version = t.version
+    GROUP BY r.tag_name
+"""
+
+FIRST_SAMPLE_SQL = """
+    SELECT t.tag_name, (SELECT min(h.ts) FROM public.influx_hist h WHERE h.tag_name = t.tag_name)
+    FROM unnest(%s::text[]) AS t(tag_name)
+"""
+
+# 판정 조건은 classify() 와 같아야 함
+ROLLUP_SQL = """
+    INSERT INTO public.wq_compliance_1h AS r
+        (bucket, tag_name, rule_version, n, compliant, warning, violation, critical, vmin, vmax, updated_at)
+    SELECT time_bucket('1 hour', h.ts), h.tag_name, t.version,
+           count(*),
+           count(*) FILTER (WHERE h.value >= t.smin AND h.value <= t.smax
+                              AND h.value >= t.wmin AND h.value <= t.wmax),
+           count(*) FILTER (WHERE h.value >= t.smin AND h.value <= t.smax
+                              AND (h.value < t.wmin OR h.value > t.wmax)),
+           count(*) FILTER (WHERE (h.value < t.smin AND h.value >= t.wmin)
+                              OR (h.value > t.smax AND h.value <= t.cmax)),
+           count(*) FILTER (WHERE (h.value < t.smin AND h.value < t.wmin)
+                              OR (h.value > t.smax AND h.value > t.cmax)),
+           min(h.value), max(h.value), now()
+    FROM public.influx_hist h
+    JOIN unnest(%s::text[], %s::text[], %s::float8[], %s::float8[], %s::float8[], %s::float8[],
+                %s::float8[], %s::timestamptz[])
+         AS t(tag_name, version, smin, smax, wmin, wmax, cmax, since)
+      ON h.tag_name = t.tag_name
+    WHERE h.ts >= t.since AND h.ts < %s
+    GROUP BY 1, 2, 3
+    ON CONFLICT (tag_name, bucket) DO UPDATE SET
+        rule_version = EXCLUDED.rule_version, n = EXCLUDED.n, compliant = EXCLUDED.compliant,
+        warning = EXCLUDED.warning, violation = EXCLUDED.violation, critical = EXCLUDED.critical,
+        vmin = EXCLUDED.vmin, vmax = EXCLUDED.vmax, updated_at = EXCLUDED.updated_at
+"""
+
+SUM_SQL = """
+    SELECT r.tag_name, sum(r.compliant), sum(r.warning), sum(r.violation), sum(r.critical),
+           max(r.bucket) FILTER (WHERE r.critical > 0),
+           (array_agg(r.vmin ORDER BY r.bucket DESC) FILTER (WHERE r.critical > 0))[1],
+           (array_agg(r.vmax ORDER BY r.bucket DESC) FILTER (WHERE r.critical > 0))[1]
+    FROM public.wq_compliance_1h r
+    JOIN unnest(%s::text[], %s::text[], %s::timestamptz[]) AS t(tag_name, version, hi)
+      ON r.tag_name = t.tag_name AND r.rule_version = t.version
+    WHERE r.bucket >= %s AND r.bucket < t.hi
+    GROUP BY r.tag_name
+"""
+
+RAW_SQL = """
+    SELECT tag_name, ts, value
+    FROM public.influx_hist
+    WHERE tag_name = ANY(%s) AND ts >= %s AND ts < %s
+"""
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """태그 판정 기준 (WaterQualityStandard 에서)"""
+    standard_min: float
+    standard_max: float
+    warning_min: float
+    warning_max: float
+
+    @classmethod
+    def from_standard(cls, standard) -> "Thresholds":
+        return cls(float(standard.standard_min), float(standard.standard_max),
+                   float(standard.warning_min), float(standard.warning_max))
+
+    @property
+    def critical_max(self) -> float:
+        return self.warning_max * CRITICAL_FACTOR
+
+    @property
+    def version(self) -> str:
+        """기준값 버전 (바뀌면 재집계)"""
+        key = repr((self.standard_min, self.standard_max, self.warning_min, self.warning_max, CRITICAL_FACTOR))
+        return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+@dataclass
+class TagCompliance:
+    """태그 기간 판정 카운터"""
+    tag_name: str
+    counts: np.ndarray                  # CLASSES 순서 (int64)
+    critical_value: Optional[float] = None   # 마지막 심각 표본(집계 구간은 해당 시간의 극값)
+    critical_at: Optional[datetime] = None   # 마지막 심각 표본 시각(집계 구간은 버킷 시작)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def __getitem__(self, name: str) -> int:
+        return int(self.counts[CLASSES.index(name)])
+
+    def merge(self, other: "TagCompliance") -> None:
+        self.counts = self.counts + other.counts
+        if other.critical_at is not None and (self.critical_at is None or other.critical_at > self.critical_at):
+            self.critical_at = other.critical_at
+            self.critical_value = other.critical_value
+
+
+def grade(values: np.ndarray, th: Thresholds) -> np.ndarray:
+    """표본별 등급 (CLASSES 인덱스, ROLLUP_SQL 과 같은 조건 - NaN 은 PostgreSQL 처럼 가장 큰 값)"""
+    v = np.asarray(values, dtype=np.float64)
+    v = np.where(np.isnan(v), np.inf, v)
+    low, high = v < th.standard_min, v > th.standard_max
+    warn = ~low & ~high & ((v < th.warning_min) | (v > th.warning_max))
+    critical = (low & (v < th.warning_min)) | (high & (v > th.critical_max))
+    out = np.zeros(v.shape, dtype=np.int8)
+    out[warn] = 1
+    out[(low | high) & ~critical] = 2
+    out[critical] = 3
+    return out
+
+
+def classify(values: np.ndarray, th: Thresholds) -> np.ndarray:
+    """표본 → 등급별 개수 (CLASSES 순서)"""
+    return np.bincount(grade(values, th), minlength=len(CLASSES)).astype(np.int64)
+
+
+def _hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_ceil(dt: datetime) -> datetime:
+    floor = _hour_floor(dt)
+    return floor if floor == dt else floor + timedelta(hours=1)
+
+
+def _columns(thresholds: Dict[str, Thresholds]) -> Tuple[list, list]:
+    tags = sorted(thresholds)
+    return tags, [thresholds[t].version for t in tags]
+
+
+async def refresh_rollup(conn, thresholds: Dict[str, Thresholds], now: Optional[datetime] = None) -> int:
+    """
+    새로 들어온(또는 기준이 바뀐) 구간만 다시 집계
+
+    Returns:
+        실행한 집계 쿼리 수
+    """
+    if not thresholds:
+        return 0
+    now = now or datetime.now().astimezone()
+    tags, versions = _columns(thresholds)
+    late = timedelta(seconds=LATE_S)
+    since: Dict[str, datetime] = {}
+    async with conn.cursor() as cur:
+        await cur.execute(WATERMARK_SQL, (tags, versions))
+        for tag, last_bucket in await cur.fetchall():
+            since[tag] = _hour_floor(last_bucket - late)
+        missing = [t for t in tags if t not in since]
+        if missing:
+            await cur.execute(FIRST_SAMPLE_SQL, (missing,))
+            for tag, first_ts in await cur.fetchall():
+                if first_ts is not None:
+                    since[tag] = _hour_floor(first_ts)
+        if not since:
+            return 0
+
+        queries = 0
+        chunk = timedelta(seconds=BACKFILL_CHUNK_S)
+        lo = min(since.values())
+        while lo < now:
+            hi = min(lo + chunk, now)
+            active = [t for t in tags if t in since and since[t] < hi]
+            if active:
+                ths = [thresholds[t] for t in active]
+                await cur.execute(ROLLUP_SQL, (
+                    active, [th.version for th in ths],
+                    [th.standard_min for th in ths], [th.standard_max for th in ths],
+                    [th.warning_min for th in ths], [th.warning_max for th in ths],
+                    [th.critical_max for th in ths], [max(since[t], lo) for t in active], hi,
+                ))
+                await conn.commit()  # 구간마다 확정 (긴 백필도 잠금/WAL 을 나눔)
+                queries += 1
+            lo = hi
+    return queries
+
+
+async def rollup_counts(conn, thresholds: Dict[str, Thresholds],
+                        start: datetime, end: datetime) -> Dict[str, TagCompliance]:
+    """
+    [start, end) 표본 판정 카운터 - 읽기 전용 (집계 갱신은 refresh_rollup)
+
+    태그별 완전한 시간 중 워터마크(마지막 집계 버킷 - 진행 중일 수 있음) 앞까지는 집계 합,
+    시작의 잘린 시간과 워터마크 이후는 원본 (워터마크 이후는 끝에서 CATCHUP_S 까지만)
+    """
+    tags, versions = _columns(thresholds)
+    out = {t: TagCompliance(t, np.zeros(len(CLASSES), dtype=np.int64)) for t in tags}
+    if not tags or start >= end:
+        return out
+    inner_lo, inner_hi = _hour_ceil(start), _hour_floor(end)
+
+    async with conn.cursor() as cur:
+        raw: Dict[Tuple[datetime, datetime], list] = {}
+        if inner_lo < inner_hi:
+            await cur.execute(WATERMARK_SQL, (tags, versions))
+            marks = dict(await cur.fetchall())
+            his = {t: min(max(marks.get(t, inner_lo), inner_lo), inner_hi) for t in tags}
+            summed = [t for t in tags if his[t] > inner_lo]
+            if summed:
+                await cur.execute(SUM_SQL, (summed, [thresholds[t].version for t in summed],
+                                            [his[t] for t in summed], inner_lo))
+                for tag, comp, warn, viol, crit, crit_at, crit_min, crit_max in await cur.fetchall():
+                    th = thresholds[tag]
+                    part = TagCompliance(tag, np.array([int(comp), int(warn), int(viol), int(crit)], dtype=np.int64))
+                    if crit_at is not None:
+                        # 해당 시간의 가장 벗어난 값 (상한 심각이 우선)
+                        high = crit_max is not None and crit_max > th.critical_max
+                        part.critical_at = crit_at
+                        part.critical_value = float(crit_max if high else crit_min)
+                    out[tag].merge(part)
+            raw[(start, inner_lo)] = list(tags)
+            tail_floor = end - timedelta(seconds=CATCHUP_S)
+            stale = [t for t in tags if his[t] < tail_floor]
+            if stale:
+                logging.warning(f"준수율 집계가 {min(his[t] for t in stale)} 까지만 갱신됨 - "
+                                f"{tail_floor} 이전 미집계 구간 제외 ({', '.join(stale)})")
+            for t in tags:
+                raw.setdefault((max(his[t], tail_floor), end), []).append(t)
+        else:
+            raw[(start, end)] = list(tags)
+
+        for (lo, hi), raw_tags in raw.items():
+            if lo >= hi:
+                continue
+            await cur.execute(RAW_SQL, (raw_tags, lo, hi))
+            by_tag: Dict[str, list] = {}
+            for tag, ts, value in await cur.fetchall():
+                by_tag.setdefault(tag, []).append((ts, value))
+            for tag, samples in by_tag.items():
+                if tag not in thresholds:
+                    continue
+                grades = grade(np.array([v for _, v in samples], dtype=np.float64), thresholds[tag])
+                part = TagCompliance(tag, np.bincount(grades, minlength=len(CLASSES)).astype(np.int64))
+                critical = [samples[i] for i in np.flatnonzero(grades == 3)]
+                if critical:
+                    part.critical_at, part.critical_value = max(critical, key=lambda s: s[0])
+                out[tag].merge(part)
+    return out
+
+
+def thresholds_for(standards: Dict, tag_parameters: Dict[str, str],
+                   tags: Optional[Sequence[str]] = None) -> Dict[str, Thresholds]:
+    """태그 → 판정 기준 (기준이 있는 항목만)"""
+    return {tag: Thresholds.from_standard(standards[param])
+            for tag, param in tag_parameters.items()
+            if param in standards and (tags is None or tag in tags)}
@@ -0,0 +1,274 @@
+"""
+수질 일별 통계 테이블 (wq_daily)
+
+월간/연간 보고서가 influx_agg_1h 를 기간 전체 다시 읽어 일 평균(트렌드), 최소/최대(요약)를 계산하던 것을
+태그(항목) × 일(Asia/Seoul) 1행으로 미리 닫아 둔다 → 월간 30행, 연간 365행 / 항목.
+
+- 통계: 표본 수, 평균, 최소, 최대, 표본 표준편차 (influx_hist 원본 기준)
+- 판정 개수: 준수 / 경고 / 위반 / 심각 (compliance_rollup 과 같은 조건)
+- 준수 상태 전환: 하루 첫 / 마지막 표본의 준수 여부, 전환 횟수, 첫 / 마지막 전환 시각
+- 마감: 태그의 마지막 원본 시각이 하루 끝을 넘었거나(마지막 시간 버킷 도착), 하루 끝 + LATE_S 경과(무신호 태그)
+- 갱신: 마지막 마감 일 다음 날부터 마감 가능한 날까지 DAILY_CHUNK_DAYS 단위 upsert, 기준 변경 시 재집계
+- backfill_daily: 지정 기간 강제 재집계 (원본 보정 후 등)
+- 갱신 주기: scripts/wq_daily.py (cron) 또는 wq_rollup_task (앱 lifespan) - 보고서는 읽기만
+  (closed_through_days 로 기간이 마감됐는지 확인, 아니면 보고서는 1시간 집계로)
+- 스키마: db/scripts/wq_daily.sql
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..utils.time_axis import SEOUL_TZ
+from .compliance_rollup import FIRST_SAMPLE_SQL, LATE_S, Thresholds
+
+DAILY_CHUNK_DAYS = int(os.getenv("KSYS_WQ_DAILY_CHUNK_DAYS", "7"))
+DAY_TZ = "Asia/Seoul"
+
+LAST_DAY_SQL = """
+    SELECT d.tag_name, max(d.day)
+    FROM public.wq_daily d
+    JOIN unnest(%s::text[], %s::text[]) AS t(tag_name, version)
+      ON d.tag_name = t.tag_name AND d.rule_version = t.version
+    GROUP BY d.tag_name
+"""
+
+LAST_SAMPLE_SQL = """
+    SELECT t.tag_name, (SELECT max(h.ts) FROM public.influx_hist h WHERE h.tag_name = t.tag_name)
+    FROM unnest(%s::text[]) AS t(tag_name)
+"""
+
+# 등급 CASE 는 compliance_rollup.ROLLUP_SQL / grade() 와 같은 조건
+DAILY_SQL = """
+    INSERT INTO public.wq_daily AS d
+        (day, tag_name, rule_version, n, mean, vmin, vmax, stddev,
+         compliant, warning, violation, critical,
+         open_compliant, close_compliant, transitions, first_transition_at, last_transition_at, updated_at)
+    SELECT x.day, x.tag_name, x.version, count(*), avg(x.value), min(x.value), max(x.value), stddev_samp(x.value),
+           count(*) FILTER (WHERE x.grade = 0), count(*) FILTER (WHERE x.grade = 1),
+           count(*) FILTER (WHERE x.grade = 2), count(*) FILTER (WHERE x.grade = 3),
+           (array_agg(x.grade = 0 ORDER BY x.ts))[1], (array_agg(x.grade = 0 ORDER BY x.ts DESC))[1],
+           count(*) FILTER (WHERE x.changed),
+           min(x.ts) FILTER (WHERE x.changed), max(x.ts) FILTER (WHERE x.changed), now()
+    FROM (
+        SELECT s.*,
+               COALESCE((s.grade = 0) <> (lag(s.grade) OVER w = 0), false) AS changed
+        FROM (
+            SELECT (h.ts AT TIME ZONE '""" + DAY_TZ + """')::date AS day, h.tag_name, t.version, h.ts, h.value,
+                   CASE WHEN h.value >= t.smin AND h.value <= t.smax
+                             AND h.value >= t.wmin AND h.value <= t.wmax THEN 0
+                        WHEN h.value >= t.smin AND h.value <= t.smax THEN 1
+                        WHEN (h.value < t.smin AND h.value >= t.wmin)
+                             OR (h.value > t.smax AND h.value <= t.cmax) THEN 2
+                        ELSE 3 END AS grade
+            FROM public.influx_hist h
+            JOIN unnest(%s::text[], %s::text[], %s::float8[], %s::float8[], %s::float8[], %s::float8[],
+                        %s::float8[], %s::timestamptz[], %s::timestamptz[])
+                 AS t(tag_name, version, smin, smax, wmin, wmax, cmax, since, until)
+              ON h.tag_name = t.tag_name
+            WHERE h.ts >= t.since AND h.ts < t.until
+        ) s
+        WINDOW w AS (PARTITION BY s.tag_name, s.day ORDER BY s.ts)
+    ) x
+    GROUP BY x.day, x.tag_name, x.version
+    ON CONFLICT (tag_name, day) DO UPDATE SET
+        rule_version = EXCLUDED.rule_version, n = EXCLUDED.n, mean = EXCLUDED.mean,
+        vmin = EXCLUDED.vmin, vmax = EXCLUDED.vmax, stddev = EXCLUDED.stddev,
+        compliant = EXCLUDED.compliant, warning = EXCLUDED.warning,
+        violation = EXCLUDED.violation, critical = EXCLUDED.critical,
+        open_compliant = EXCLUDED.open_compliant, close_compliant = EXCLUDED.close_compliant,
+        transitions = EXCLUDED.transitions, first_transition_at = EXCLUDED.first_transition_at,
+        last_transition_at = EXCLUDED.last_transition_at, updated_at = EXCLUDED.updated_at
+"""
+
+READ_SQL = """
+    SELECT d.tag_name, d.day, d.n, d.mean, d.vmin, d.vmax, d.stddev,
+           d.compliant, d.warning, d.violation, d.critical,
+           d.open_compliant, d.close_compliant, d.transitions, d.first_transition_at, d.last_transition_at
+    FROM public.wq_daily d
+    JOIN unnest(%s::text[], %s::text[]) AS t(tag_name, version)
+      ON d.tag_name = t.tag_name AND d.rule_version = t.version
+    WHERE d.day >= %s AND d.day < %s
+    ORDER BY d.tag_name, d.day
+"""
+
+
+@dataclass
+class DailyStats:
+    """태그 하루 통계 (wq_daily 1행)"""
+    tag_name: str
+    day: date
+    n: int
+    mean: float
+    min: float
+    max: float
+    stddev: Optional[float]
+    compliant: int
+    warning: int
+    violation: int
+    critical: int
+    open_compliant: Optional[bool] = None
+    close_compliant: Optional[bool] = None
+    transitions: int = 0
+    first_transition_at: Optional[datetime] = None
+    last_transition_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row) -> "DailyStats":
+        tag, day, n, mean, vmin, vmax, std, comp, warn, viol, crit, op, cl, trans, first, last = row
+        return cls(tag, day, int(n), float(mean), float(vmin), float(vmax),
+                   None if std is None else float(std), int(comp), int(warn), int(viol), int(crit),
+                   op, cl, int(trans or 0), first, last)
+
+
+def day_start(day: date) -> datetime:
+    """하루 시작 시각 (Asia/Seoul 0시)"""
+    return datetime.combine(day, time(), tzinfo=SEOUL_TZ)
+
+
+def local_day(ts: datetime) -> date:
+    return ts.astimezone(SEOUL_TZ).date()
+
+
+def is_day_aligned(start: datetime, end: datetime) -> bool:
+    """[start, end) 가 Asia/Seoul 0시 경계로 나뉘는 하루 이상 기간인지 (시간대 없으면 로컬)"""
+    s, e = start.astimezone(SEOUL_TZ), end.astimezone(SEOUL_TZ)
+    return s.time() == time() and e.time() == time() and e > s
+
+
+def closed_through(last_sample: Optional[datetime], now: datetime) -> date:
+    """마감 가능한 마지막 날의 다음 날 (이 날짜 전까지 마감)"""
+    # 무신호 태그: 하루 끝 + LATE_S 경과
+    through = local_day(now - timedelta(seconds=LATE_S))
+    if last_sample is not None:
+        # 마지막 시간 버킷 도착: 마지막 원본이 속한 날 전까지는 완결
+        through = max(through, local_day(last_sample))
+    return through
+
+
+def combine(days: Sequence[DailyStats]) -> Optional[Dict[str, float]]:
+    """
+    여러 날 → 기간 통계 (표본 가중 평균, 병합 표본 표준편차 - 원본 전체 계산과 같음)
+
+    Returns:
+        표본이 없으면 None
+    """
+    days = [d for d in days if d.n > 0]
+    if not days:
+        return None
+    n = sum(d.n for d in days)
+    mean = sum(d.n * d.mean for d in days) / n
+    # 제곱합 = Σ[(n_i - 1) s_i² + n_i (m_i - m)²]
+    ss = sum((d.n - 1) * (d.stddev or 0.0) ** 2 + d.n * (d.mean - mean) ** 2 for d in days)
+    return {
+        "n": n,
+        "avg": mean,
+        "min": min(d.min for d in days),
+        "max": max(d.max for d in days),
+        "std": math.sqrt(ss / (n - 1)) if n > 1 else float("nan"),
+        "compliant": sum(d.compliant for d in days),
+        "warning": sum(d.warning for d in days),
+        "violation": sum(d.violation for d in days),
+        "critical": sum(d.critical for d in days),
+        "transitions": sum(d.transitions for d in days),
+    }
+
+
+def _columns(thresholds: Dict[str, Thresholds]) -> Tuple[List[str], List[str]]:
+    tags = sorted(thresholds)
+    return tags, [thresholds[t].version for t in tags]
+
+
+async def _upsert_days(conn, cur, thresholds: Dict[str, Thresholds], ranges: Dict[str, Tuple[date, date]]) -> int:
+    """태그별 [첫 날, 끝 날) 을 DAILY_CHUNK_DAYS 단위로 재집계 (구간마다 커밋)"""
+    ranges = {t: r for t, r in ranges.items() if r[0] < r[1]}
+    if not ranges:
+        return 0
+    queries = 0
+    lo = min(r[0] for r in ranges.values())
+    hi_all = max(r[1] for r in ranges.values())
+    while lo < hi_all:
+        hi = min(lo + timedelta(days=DAILY_CHUNK_DAYS), hi_all)
+        active = [t for t in sorted(ranges) if ranges[t][0] < hi and ranges[t][1] > lo]
+        if active:
+            ths = [thresholds[t] for t in active]
+            await cur.execute(DAILY_SQL, (
+                active, [th.version for th in ths],
+                [th.standard_min for th in ths], [th.standard_max for th in ths],
+                [th.warning_min for th in ths], [th.warning_max for th in ths],
+                [th.critical_max for th in ths],
+                [day_start(max(ranges[t][0], lo)) for t in active],
+                [day_start(min(ranges[t][1], hi)) for t in active],
+            ))
+            await conn.commit()
+            queries += 1
+        lo = hi
+    return queries
+
+
+async def refresh_daily(conn, thresholds: Dict[str, Thresholds], now: Optional[datetime] = None) -> int:
+    """
+    마감된 날 중 아직 없는(또는 기준이 바뀐) 날만 집계
+
+    Returns:
+        실행한 집계 쿼리 수
+    """
+    if not thresholds:
+        return 0
+    now = now or datetime.now(SEOUL_TZ)
+    tags, versions = _columns(thresholds)
+    async with conn.cursor() as cur:
+        await cur.execute(LAST_DAY_SQL, (tags, versions))
+        first: Dict[str, date] = {tag: last + timedelta(days=1) for tag, last in await cur.fetchall()}
+        missing = [t for t in tags if t not in first]
+        if missing:
+            await cur.execute(FIRST_SAMPLE_SQL, (missing,))
+            for tag, first_ts in await cur.fetchall():
+                if first_ts is not None:
+                    first[tag] = local_day(first_ts)
+        if not first:
+            return 0
+        await cur.execute(LAST_SAMPLE_SQL, (sorted(first),))
+        last_sample = dict(await cur.fetchall())
+        ranges = {t: (first[t], closed_through(last_sample.get(t), now)) for t in first}
+        return await _upsert_days(conn, cur, thresholds, ranges)
+
+
+async def backfill_daily(conn, thresholds: Dict[str, Thresholds], start_day: date, end_day: date) -> int:
+    """[start_day, end_day) 강제 재집계 (원본 보정 / 재적재 후)"""
+    async with conn.cursor() as cur:
+        return await _upsert_days(conn, cur, thresholds, {t: (start_day, end_day) for t in thresholds})
+
+
+async def last_closed_days(conn, thresholds: Dict[str, Thresholds]) -> Dict[str, date]:
+    """태그별 마지막 마감 일 (현재 기준 버전)"""
+    tags, versions = _columns(thresholds)
+    async with conn.cursor() as cur:
+        await cur.execute(LAST_DAY_SQL, (tags, versions))
+        return dict(await cur.fetchall())
+
+
+def covers(last_days: Dict[str, date], start_day: date, end_day: date) -> bool:
+    """
+    [start_day, end_day) 가 모두 마감됐는지
+
+    갱신은 태그를 함께 처리하므로 가장 앞선 태그가 기간 끝까지 닫혔으면 갱신이 지나간 것,
+    기간 안에서 멈춘 태그가 있으면 미마감 (기간 시작 전에 멈춘 태그는 원본 없음)
+    """
+    if not last_days or max(last_days.values()) < end_day - timedelta(days=1):
+        return False
+    return not any(start_day <= last < end_day - timedelta(days=1) for last in last_days.values())
+
+
+async def read_daily(conn, thresholds: Dict[str, Thresholds],
+                     start_day: date, end_day: date) -> Dict[str, List[DailyStats]]:
+    """[start_day, end_day) 일별 통계 (태그별 날짜 순, 현재 기준 버전만)"""
+    tags, versions = _columns(thresholds)
+    out: Dict[str, List[DailyStats]] = {t: [] for t in tags}
+    async with conn.cursor() as cur:
+        await cur.execute(READ_SQL, (tags, versions, start_day, end_day))
+        for row in await cur.fetchall():
+            out[row[0]].append(DailyStats.from_row(row))
+    return out
@@ -9,6 +9,25 @@ from dataclasses import dataclass
 from enum import Enum
 import psycopg
 import asyncio
+import logging
+import os
+
+from ..alarm.event_sink import get_event_sink
+from .compliance_rollup import Thresholds, refresh_rollup, rollup_counts, thresholds_for
+from .daily_rollup import refresh_daily
+
+# 수질 태그 → 수질 항목
+TAG_PARAMETERS = {
+    'PH': 'pH',
+    'TURB': 'turbidity',
+    'CL2': 'residual_chlorine',
+    'TDS': 'tds',
+    'COND_OUT': 'conductivity',
+    'TEMP': 'temperature'
+}
+
+# 판정 집계 / 일별 통계 백그라운드 갱신 주기 (0: 앱에서 갱신하지 않음 - scripts/wq_rollup.py, wq_daily.py 를 cron 으로)
+ROLLUP_REFRESH_S = float(os.getenv("KSYS_WQ_ROLLUP_REFRESH_S", "900"))
 
 
 class ComplianceStatus(Enum):
@@ -64,6 +83,7 @@ class WaterQualityMonitor:
     
     def __init__(self, db_dsn: str):
         self.db_dsn = db_dsn
+        self.event_sink = get_event_sink(db_dsn)
         
         # 먹는물 수질 기준 (한국 기준)
         self.standards = {
@@ -216,22 +236,12 @@ class WaterQualityMonitor:
                     
                     rows = await cur.fetchall()
                     
-                    # 태그명 매핑
-                    tag_mapping = {
-                        'PH': 'pH',
-                        'TURB': 'turbidity',
-                        'CL2': 'residual_chlorine',
-                        'TDS': 'tds',
-                        'COND_OUT': 'conductivity',
-                        'TEMP': 'temperature'
-                    }
-                    
                     for row in rows:
                         tag_name = row[0]
                         value = float(row[1]) if row[1] else 0
                         
-                        if tag_name in tag_mapping:
-                            parameter = tag_mapping[tag_name]
+                        if tag_name in TAG_PARAMETERS:
+                            parameter = TAG_PARAMETERS[tag_name]
                             result = await self.check_water_quality(parameter, value)
                             results.append(result)
                             
@@ -247,99 +257,61 @@ class WaterQualityMonitor:
     async def calculate_compliance_rate(self, 
                                        start_date: datetime,
                                        end_date: datetime) -> ComplianceReport:
-        """준수율 계산"""
+        """
+        준수율 계산 - [start_date, end_date) 원본 표본 기준 정확한 개수
+        
+        시간별 판정 집계(wq_compliance_1h) 카운터 합 + 워터마크 이후 원본으로 계산 (읽기 전용,
+        집계 갱신은 wq_rollup_task / scripts/wq_rollup.py)
+        위반 표본 수는 심각 위반 포함
+        """
         try:
+            thresholds = thresholds_for(self.standards, TAG_PARAMETERS)
             async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 기간 내 수질 데이터 조회
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            COUNT(*) as total,
-                            AVG(avg_val) as avg_value,
-                            MIN(min_val) as min_value,
-                            MAX(max_val) as max_value
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('PH', 'TURB', 'CL2', 'TDS', 'COND_OUT', 'TEMP')
-                        AND bucket >= %s AND bucket <= %s
-                        GROUP BY tag_name
-                    """, (start_date, end_date))
-                    
-                    rows = await cur.fetchall()
-                    
-                    total_samples = 0
-                    compliant_samples = 0
-                    warning_samples = 0
-                    violation_samples = 0
-                    critical_events = []
-                    parameter_compliance = {}
-                    
-                    tag_mapping = {
-                        'PH': 'pH',
-                        'TURB': 'turbidity',
-                        'CL2': 'residual_chlorine',
-                        'TDS': 'tds',
-                        'COND_OUT': 'conductivity',
-                        'TEMP': 'temperature'
-                    }
-                    
-                    for row in rows:
-                        tag_name = row[0]
-                        count = row[1]
-                        avg_val = float(row[2]) if row[2] else 0
-                        min_val = float(row[3]) if row[3] else 0
-                        max_val = float(row[4]) if row[4] else 0
-                        
-                        if tag_name in tag_mapping:
-                            parameter = tag_mapping[tag_name]
-                            standard = self.standards.get(parameter)
-                            
-                            if standard:
-                                # 준수 판정
-                                param_compliant = 0
-                                param_warning = 0
-                                param_violation = 0
-                                
-                                # 최소/최대값 체크
-                                if min_val < standard.standard_min or max_val > standard.standard_max:
-                                    param_violation = count * 0.2  # 추정
-                                    
-                                    if min_val < standard.warning_min or max_val > standard.warning_max * 1.2:
-                                        critical_events.append({
-                                            'parameter': parameter,
-                                            'value': min_val if min_val < standard.standard_min else max_val,
-                                            'timestamp': datetime.now(),
-                                            'message': f'{parameter} 심각한 기준 위반'
-                                        })
-                                
-                                elif min_val < standard.warning_min or max_val > standard.warning_max:
-                                    param_warning = count * 0.1  # 추정
-                                
-                                param_compliant = count - param_warning - param_violation
-                                
-                                # 누적
-                                total_samples += count
-                                compliant_samples += param_compliant
-                                warning_samples += param_warning
-                                violation_samples += param_violation
-                                
-                                # 항목별 준수율
-                                if count > 0:
-                                    parameter_compliance[parameter] = (param_compliant / count) * 100
-                    
-                    # 전체 준수율
-                    compliance_rate = (compliant_samples / total_samples * 100) if total_samples > 0 else 0
-                    
-                    return ComplianceReport(
-                        monitoring_period=(start_date, end_date),
-                        total_samples=int(total_samples),
-                        compliant_samples=int(compliant_samples),
-                        warning_samples=int(warning_samples),
-                        violation_samples=int(violation_samples),
-                        compliance_rate=compliance_rate,
-                        parameters=parameter_compliance,
-                        critical_events=critical_events
-                    )
+                counts = await rollup_counts(conn, thresholds, start_date, end_date)
+            
+            total_samples = 0
+            compliant_samples = 0
+            warning_samples = 0
+            violation_samples = 0
+            critical_events = []
+            parameter_compliance = {}
+            
+            for tag_name, tag in counts.items():
+                if tag.total == 0:
+                    continue
+                parameter = TAG_PARAMETERS[tag_name]
+                
+                # 누적
+                total_samples += tag.total
+                compliant_samples += tag['compliant']
+                warning_samples += tag['warning']
+                violation_samples += tag['violation'] + tag['critical']
+                
+                # 항목별 준수율
+                parameter_compliance[parameter] = tag['compliant'] / tag.total * 100
+                
+                if tag['critical']:
+                    critical_events.append({
+                        'parameter': parameter,
+                        'value': tag.critical_value,
+                        'timestamp': tag.critical_at,
+                        'count': tag['critical'],
+                        'message': f'{parameter} 심각한 기준 위반 {tag["critical"]}건'
+                    })
+            
+            # 전체 준수율
+            compliance_rate = (compliant_samples / total_samples * 100) if total_samples > 0 else 0
+            
+            return ComplianceReport(
+                monitoring_period=(start_date, end_date),
+                total_samples=total_samples,
+                compliant_samples=compliant_samples,
+                warning_samples=warning_samples,
+                violation_samples=violation_samples,
+                compliance_rate=compliance_rate,
+                parameters=parameter_compliance,
+                critical_events=critical_events
+            )
                     
         except Exception as e:
             print(f"[ERROR] Compliance calculation failed: {e}")
@@ -364,30 +336,16 @@ class WaterQualityMonitor:
         
         print(f"[ALARM] [{alarm_level}] {result.parameter}: {result.message}")
         
-        # DB에 알람 기록 (필요시)
-        try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute("""
-                        INSERT INTO alarm_events (
-                            alarm_type, 
-                            alarm_level, 
-                            parameter, 
-                            value, 
-                            message, 
-                            created_at
-                        ) VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (
-                        'WATER_QUALITY',
-                        alarm_level,
-                        result.parameter,
-                        result.value,
-                        result.message,
-                        datetime.now()
-                    ))
-                    await conn.commit()
-        except:
-            pass  # 테이블 없으면 무시
+        # DB에 알람 기록 (공유 배치 기록기 - 테이블 없음 등 기록 불가 오류는 싱크에서 무시)
+        if self.event_sink is not None:
+            self.event_sink.submit("alarm_events", (
+                'WATER_QUALITY',
+                alarm_level,
+                result.parameter,
+                result.value,
+                result.message,
+                datetime.now()
+            ))
     
     async def load_regulations_from_db(self):
         """DB에서 법규 기준값 로드"""
@@ -428,4 +386,29 @@ class WaterQualityMonitor:
                     print(f"[INFO] Loaded {len(rows)} water quality standards from DB")
                     
         except Exception as e:
-            print(f"[INFO] Using default standards (DB table not found): {e}")
\ No newline at end of file
+            print(f"[INFO] Using default standards (DB table not found): {e}")
+
+
+async def load_thresholds(dsn: str) -> Dict[str, Thresholds]:
+    """DB 법규 기준값 반영한 태그 판정 기준 (집계 갱신용)"""
+    monitor = WaterQualityMonitor("")
+    monitor.db_dsn = dsn
+    await monitor.load_regulations_from_db()
+    return thresholds_for(monitor.standards, TAG_PARAMETERS)
+
+
+async def wq_rollup_task(dsn: Optional[str] = None, interval_s: Optional[float] = None) -> None:
+    """Lifespan task: 준수율 시간별 집계 / 일별 통계 주기 갱신 (보고서/준수율 조회는 읽기만)"""
+    dsn = os.getenv("TS_DSN", "") if dsn is None else dsn
+    interval_s = ROLLUP_REFRESH_S if interval_s is None else interval_s
+    if not dsn or interval_s <= 0:
+        return
+    while True:
+        try:
+            thresholds = await load_thresholds(dsn)
+            async with await psycopg.AsyncConnection.connect(dsn) as conn:
+                await refresh_rollup(conn, thresholds)
+                await refresh_daily(conn, thresholds)
+        except Exception as e:  # noqa: BLE001 - 다음 주기에 재시도
+            logging.error(f"수질 준수율 집계 갱신 실패: {e}")
+        await asyncio.sleep(interval_s)
@@ -3,12 +3,14 @@
 TASK_016: WATER_GENERATE_REPORT
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 import json
+import os
 import asyncio
+import numpy as np
 import psycopg
 from pathlib import Path
 import smtplib
@@ -16,6 +18,30 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 
+from ..diagnostics.feature_store import FeatureFrame, FeatureSpec, FeatureView
+from .compliance_rollup import LATE_S, thresholds_for
+from .daily_rollup import (
+    DailyStats, combine, covers, day_start, is_day_aligned, last_closed_days, local_day, read_daily,
+)
+from .quality_monitor import TAG_PARAMETERS
+
+# 보고서 공용 조회 - 기간의 1시간 집계를 태그 × 버킷 배열로 한 번만 읽고 모든 절이 공유
+# 주간/월간 등 0시 경계의 닫힌 기간은 일별 통계(wq_daily, 항목당 하루 1행)를 대신 읽음
+REPORT_TAGS = tuple(TAG_PARAMETERS)
+CHART_TAGS = ('PH', 'TURB', 'CL2', 'TDS')
+HOUR = 3600
+
+PERIOD_SQL = """
+    SELECT tag_name, extract(epoch FROM bucket)::float8, avg, min, max, n
+    FROM influx_agg_1h
+    WHERE tag_name = ANY(%s)
+      AND bucket >= to_timestamp(%s) AND bucket < to_timestamp(%s)
+"""
+
+# 닫힌 기간 보고서 디스크 캐시 (기간 끝 + LATE_S 이후 생성분만 - 늦게 들어온 원본 반영 후)
+CACHE_DIR = os.getenv("KSYS_REPORT_CACHE_DIR", "")   # 비우면 output_dir/cache
+CACHE_VERSION = 2                                     # 보고서 구조가 바뀌면 올림
+
 
 class ReportType(Enum):
     """보고서 유형"""
@@ -62,6 +88,68 @@ class WaterQualityReport:
     file_path: Optional[str] = None
 
 
+PERIOD_LENGTH = {
+    ReportType.DAILY: timedelta(days=1),
+    ReportType.WEEKLY: timedelta(weeks=1),
+    ReportType.MONTHLY: timedelta(days=30),
+    ReportType.CUSTOM: timedelta(days=1),
+}
+
+
+def period_bounds(report_type: ReportType, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    직전 닫힌 기간 [시작, 끝)
+    
+    - 일일: 어제 0시 ~ 오늘 0시
+    - 주간: 지난주 월요일 ~ 이번주 월요일
+    - 월간: 지난달 1일 ~ 이번달 1일
+    - 맞춤: 최근 24시간 (닫히지 않음)
+    """
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if report_type == ReportType.DAILY:
+        return today - timedelta(days=1), today
+    if report_type == ReportType.WEEKLY:
+        monday = today - timedelta(days=today.weekday())
+        return monday - timedelta(weeks=1), monday
+    if report_type == ReportType.MONTHLY:
+        first = today.replace(day=1)
+        return (first - timedelta(days=1)).replace(day=1), first
+    return now - PERIOD_LENGTH[report_type], now
+
+
+def period_view(start_date: datetime, end_date: datetime, rows: List[Tuple]) -> FeatureView:
+    """공용 조회 결과 → 보고서 태그 × 1시간 버킷 읽기 전용 배열 (빈 버킷 NaN)"""
+    start = np.ceil(start_date.timestamp() / HOUR) * HOUR
+    end = max(np.ceil(end_date.timestamp() / HOUR) * HOUR, start)
+    frame = FeatureFrame("1h", REPORT_TAGS, start, end, HOUR)
+    if rows:
+        values = {f: np.array([np.nan if r[2 + k] is None else float(r[2 + k]) for r in rows])
+                  for k, f in enumerate(("avg", "min", "max", "n"))}
+        frame.fill(np.array([frame.row[r[0]] for r in rows], dtype=np.intp),
+                   np.array([r[1] for r in rows], dtype=np.float64), values)
+    frame.freeze()
+    spec = FeatureSpec("water_quality.report", "1h", int(end - start), REPORT_TAGS)
+    parts = {t: (frame, frame.row[t], frame.columns(start, end)) for t in REPORT_TAGS}
+    return FeatureView(spec, start, end, HOUR, parts)
+
+
+def _report_to_dict(report: WaterQualityReport) -> Dict[str, Any]:
+    data = asdict(report)
+    data['report_type'] = report.report_type.value
+    for key in ('period_start', 'period_end', 'generated_at'):
+        data[key] = data[key].isoformat()
+    return data
+
+
+def _report_from_dict(data: Dict[str, Any]) -> WaterQualityReport:
+    data = dict(data)
+    data['report_type'] = ReportType(data['report_type'])
+    for key in ('period_start', 'period_end', 'generated_at'):
+        data[key] = datetime.fromisoformat(data[key])
+    return WaterQualityReport(**data)
+
+
 class WaterQualityReportGenerator:
     """수질 보고서 생성기"""
     
@@ -69,6 +157,8 @@ class WaterQualityReportGenerator:
         self.db_dsn = db_dsn
         self.output_dir = Path("reports/water_quality")
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = Path(CACHE_DIR) if CACHE_DIR else self.output_dir / "cache"
+        self.cache_hits = 0
         
         # 보고서 템플릿
         self.templates = {
@@ -104,34 +194,56 @@ class WaterQualityReportGenerator:
     async def generate_report(self,
                             report_type: ReportType,
                             start_date: datetime = None,
-                            end_date: datetime = None) -> WaterQualityReport:
+                            end_date: datetime = None,
+                            use_cache: bool = True) -> WaterQualityReport:
         """
         수질 보고서 생성
         
+        기간 데이터는 한 번 조회해 요약/차트/트렌드가 공유하고, 준수율·알람 조회와 동시에 실행
+        일일 외 0시 경계의 닫힌 기간은 일별 통계를 읽고, 갱신/조회에 실패하면 1시간 집계로 대체
+        닫힌 기간(period_bounds 기본값 등)은 (유형, 기간) 별로 디스크에 캐시
+        
         Args:
             report_type: 보고서 유형
-            start_date: 시작일 (없으면 자동 계산)
-            end_date: 종료일 (없으면 자동 계산)
+            start_date: 시작일 (둘 다 없으면 직전 닫힌 기간 - period_bounds)
+            end_date: 종료일 (포함하지 않음, 시작일만 있으면 현재)
+            use_cache: 닫힌 기간 캐시 사용
         """
         
         # 기간 자동 설정
-        if not end_date:
-            end_date = datetime.now()
-        
-        if not start_date:
-            if report_type == ReportType.DAILY:
-                start_date = end_date - timedelta(days=1)
-            elif report_type == ReportType.WEEKLY:
-                start_date = end_date - timedelta(weeks=1)
-            elif report_type == ReportType.MONTHLY:
-                start_date = end_date - timedelta(days=30)
-        
-        # 데이터 수집
-        summary = await self._collect_summary_data(start_date, end_date)
-        compliance_data = await self._collect_compliance_data(start_date, end_date)
-        charts_data = await self._generate_charts_data(start_date, end_date)
-        trends_data = await self._analyze_trends(start_date, end_date) if report_type != ReportType.DAILY else []
-        alarms_data = await self._collect_alarm_data(start_date, end_date)
+        if not start_date and not end_date:
+            start_date, end_date = period_bounds(report_type)
+        elif not start_date:
+            start_date = end_date - PERIOD_LENGTH[report_type]
+        elif not end_date:
+            end_date = datetime.now(start_date.tzinfo) if start_date.tzinfo else datetime.now()
+        
+        cacheable = use_cache and self._is_closed(end_date)
+        if cacheable:
+            cached = self._load_cached(report_type, start_date, end_date)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+        
+        # 데이터 수집 (DB 조회 절은 각자 연결로 동시에)
+        use_daily = report_type != ReportType.DAILY and is_day_aligned(start_date, end_date) \
+            and self._is_closed(end_date)
+        (days, rows), compliance_data, alarms_data = await asyncio.gather(
+            self._fetch_report_data(start_date, end_date, use_daily),
+            self._collect_compliance_data(start_date, end_date),
+            self._collect_alarm_data(start_date, end_date),
+        )
+        if days is not None:
+            summary = self._summary_from_days(days, start_date, end_date)
+            time_series = self._daily_series(days)
+            daily_means = {tag: [d.mean for d in days.get(tag, []) if d.n] for tag in CHART_TAGS}
+        else:
+            data = period_view(start_date, end_date, rows or [])
+            summary = self._collect_summary_data(data, start_date, end_date)
+            time_series = self._hourly_series(data)
+            daily_means = self._daily_means(data)
+        charts_data = self._generate_charts_data(time_series, compliance_data)
+        trends_data = self._analyze_trends(daily_means) if report_type != ReportType.DAILY else []
         recommendations = self._generate_recommendations(summary, compliance_data, alarms_data)
         
         # 보고서 생성
@@ -149,10 +261,54 @@ class WaterQualityReportGenerator:
             generated_at=datetime.now()
         )
         
+        # 조회 실패 / 데이터 없음은 캐시하지 않음 (다음 요청에서 다시 생성)
+        if cacheable and rows is not None and summary['total_samples'] > 0:
+            self._store_cached(report)
+        
         return report
     
-    async def _collect_summary_data(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
-        """요약 데이터 수집"""
+    async def _fetch_report_data(self, start_date: datetime, end_date: datetime,
+                                 use_daily: bool) -> Tuple[Optional[Dict[str, List[DailyStats]]], Optional[List[Tuple]]]:
+        """(일별 통계, 1시간 집계 행) - 일별 통계가 있으면 1시간 집계는 조회하지 않음"""
+        if use_daily:
+            days = await self._fetch_daily_data(start_date, end_date)
+            if days is not None and any(days.values()):
+                return days, []
+        return None, await self._fetch_period_data(start_date, end_date)
+    
+    async def _fetch_daily_data(self, start_date: datetime,
+                                end_date: datetime) -> Optional[Dict[str, List[DailyStats]]]:
+        """
+        기간 일별 통계 (태그 × 일) - 읽기만 (마감은 wq_rollup_task / scripts/wq_daily.py)
+        
+        기간 끝까지 마감되지 않았거나 조회 실패는 None (1시간 집계로)
+        """
+        from .quality_monitor import WaterQualityMonitor
+        thresholds = thresholds_for(WaterQualityMonitor(self.db_dsn).standards, TAG_PARAMETERS, REPORT_TAGS)
+        start_day, end_day = local_day(start_date), local_day(end_date)
+        try:
+            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+                if not covers(await last_closed_days(conn, thresholds), start_day, end_day):
+                    print(f"[INFO] Daily rollup not closed through {end_day}, using hourly aggregates")
+                    return None
+                return await read_daily(conn, thresholds, start_day, end_day)
+        except Exception as e:
+            print(f"[WARN] Daily rollup unavailable, using hourly aggregates: {e}")
+            return None
+    
+    async def _fetch_period_data(self, start_date: datetime, end_date: datetime) -> Optional[List[Tuple]]:
+        """기간 1시간 집계 공용 조회 - 보고서 태그 전체를 쿼리 한 번으로 (실패하면 None)"""
+        try:
+            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(PERIOD_SQL, (list(REPORT_TAGS), start_date.timestamp(), end_date.timestamp()))
+                    return await cur.fetchall()
+        except Exception as e:
+            print(f"[ERROR] Report data collection failed: {e}")
+            return None
+    
+    def _collect_summary_data(self, data: FeatureView, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """요약 데이터 (표본 수는 집계 버킷 n 합계)"""
         summary = {
             'period': f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}",
             'total_samples': 0,
@@ -160,39 +316,44 @@ class WaterQualityReportGenerator:
             'overall_status': 'GOOD'
         }
         
-        try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 수질 파라미터별 통계
-                    await cur.execute("""
-                        SELECT 
-                            tag_name,
-                            COUNT(*) as samples,
-                            AVG(avg_val) as avg_value,
-                            MIN(min_val) as min_value,
-                            MAX(max_val) as max_value,
-                            STDDEV(avg_val) as std_dev
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('PH', 'TURB', 'CL2', 'TDS', 'COND_OUT', 'TEMP')
-                        AND bucket >= %s AND bucket <= %s
-                        GROUP BY tag_name
-                    """, (start_date, end_date))
-                    
-                    rows = await cur.fetchall()
-                    
-                    for row in rows:
-                        tag_name = row[0]
-                        summary['parameters'][tag_name] = {
-                            'samples': row[1],
-                            'average': float(row[2]) if row[2] else 0,
-                            'minimum': float(row[3]) if row[3] else 0,
-                            'maximum': float(row[4]) if row[4] else 0,
-                            'std_dev': float(row[5]) if row[5] else 0
-                        }
-                        summary['total_samples'] += row[1]
-                    
-        except Exception as e:
-            print(f"[ERROR] Summary data collection failed: {e}")
+        for tag_name in data.tags:
+            stats = data.stats(tag_name)
+            if stats is None:
+                continue
+            samples = int(np.nansum(data.series(tag_name, 'n')))
+            summary['parameters'][tag_name] = {
+                'samples': samples,
+                'average': stats['avg'],
+                'minimum': 0.0 if np.isnan(stats['min']) else stats['min'],
+                'maximum': 0.0 if np.isnan(stats['max']) else stats['max'],
+                'std_dev': 0.0 if np.isnan(stats['std']) else stats['std']
+            }
+            summary['total_samples'] += samples
+        
+        return summary
+    
+    def _summary_from_days(self, days: Dict[str, List[DailyStats]],
+                           start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """요약 데이터 - 일별 통계 병합 (표본 단위 평균/표준편차)"""
+        summary = {
+            'period': f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}",
+            'total_samples': 0,
+            'parameters': {},
+            'overall_status': 'GOOD'
+        }
+        
+        for tag_name in REPORT_TAGS:
+            stats = combine(days.get(tag_name, []))
+            if stats is None:
+                continue
+            summary['parameters'][tag_name] = {
+                'samples': stats['n'],
+                'average': stats['avg'],
+                'minimum': stats['min'],
+                'maximum': stats['max'],
+                'std_dev': 0.0 if np.isnan(stats['std']) else stats['std']
+            }
+            summary['total_samples'] += stats['n']
         
         return summary
     
@@ -210,120 +371,136 @@ class WaterQualityReportGenerator:
         compliance['by_parameter'] = report.parameters
         compliance['violations'] = report.violation_samples
         compliance['warnings'] = report.warning_samples
+        compliance['total'] = report.total_samples
+        compliance['compliant'] = report.compliant_samples
         
         return compliance
     
-    async def _generate_charts_data(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+    def _hourly_series(self, data: FeatureView) -> List[Dict]:
+        """시계열 차트 점 - 값이 있는 1시간 버킷만, 태그별 평균"""
+        matrix = data.matrix('avg', CHART_TAGS)
+        has_value = ~np.isnan(matrix)
+        time_series = []
+        for col in np.flatnonzero(has_value.any(axis=0)):
+            point = {'timestamp': datetime.fromtimestamp(data.times()[col]).astimezone().isoformat()}
+            for row in np.flatnonzero(has_value[:, col]):
+                point[CHART_TAGS[row]] = float(matrix[row, col])
+            time_series.append(point)
+        return time_series
+    
+    def _daily_series(self, days: Dict[str, List[DailyStats]]) -> List[Dict]:
+        """시계열 차트 점 - 표본이 있는 날만, 태그별 일 평균"""
+        points: Dict[Any, Dict] = {}
+        for tag_name in CHART_TAGS:
+            for d in days.get(tag_name, []):
+                if d.n:
+                    points.setdefault(d.day, {'timestamp': day_start(d.day).isoformat()})[tag_name] = d.mean
+        return [points[day] for day in sorted(points)]
+    
+    def _generate_charts_data(self, time_series: List[Dict], compliance: Dict[str, Any]) -> List[Dict]:
         """차트 데이터 생성"""
         charts = []
         
-        try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 시계열 차트 데이터
-                    await cur.execute("""
-                        SELECT 
-                            bucket,
-                            tag_name,
-                            avg_val
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('PH', 'TURB', 'CL2', 'TDS')
-                        AND bucket >= %s AND bucket <= %s
-                        ORDER BY bucket, tag_name
-                    """, (start_date, end_date))
-                    
-                    rows = await cur.fetchall()
-                    
-                    # 데이터 구조화
-                    time_series = {}
-                    for row in rows:
-                        timestamp = row[0].isoformat()
-                        tag_name = row[1]
-                        value = float(row[2]) if row[2] else 0
-                        
-                        if timestamp not in time_series:
-                            time_series[timestamp] = {'timestamp': timestamp}
-                        
-                        time_series[timestamp][tag_name] = value
-                    
-                    charts.append({
-                        'type': 'time_series',
-                        'title': '수질 파라미터 추이',
-                        'data': list(time_series.values())
-                    })
-                    
-                    # 파이 차트 (준수율)
-                    charts.append({
-                        'type': 'pie',
-                        'title': '수질 준수 현황',
-                        'data': [
-                            {'name': '준수', 'value': 85},
-                            {'name': '경고', 'value': 10},
-                            {'name': '위반', 'value': 5}
-                        ]
-                    })
-                    
-        except Exception as e:
-            print(f"[ERROR] Chart data generation failed: {e}")
+        charts.append({
+            'type': 'time_series',
+            'title': '수질 파라미터 추이',
+            'data': time_series
+        })
+        
+        # 파이 차트 (준수율) - 표본 수 기준
+        total = compliance.get('total', 0)
+        if total:
+            violations = compliance.get('violations', 0)
+            warnings = compliance.get('warnings', 0)
+            charts.append({
+                'type': 'pie',
+                'title': '수질 준수 현황',
+                'data': [
+                    {'name': '준수', 'value': round(compliance.get('compliant', 0) / total * 100, 1)},
+                    {'name': '경고', 'value': round(warnings / total * 100, 1)},
+                    {'name': '위반', 'value': round(violations / total * 100, 1)}
+                ]
+            })
         
         return charts
     
-    async def _analyze_trends(self, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """트렌드 분석"""
+    def _daily_means(self, data: FeatureView) -> Dict[str, List[float]]:
+        """1시간 집계 → 태그별 일별 평균 (값이 있는 날만, 날짜는 로컬 시간 기준)"""
+        times = data.times()
+        if not len(times):
+            return {}
+        days = np.array([datetime.fromtimestamp(t).toordinal() for t in times])
+        _, day_index = np.unique(days, return_inverse=True)
+        n_days = int(day_index.max()) + 1
+        
+        means = {}
+        for tag_name in CHART_TAGS:
+            series = data.series(tag_name)
+            ok = ~np.isnan(series)
+            counts = np.bincount(day_index[ok], minlength=n_days)
+            sums = np.bincount(day_index[ok], weights=series[ok], minlength=n_days)
+            means[tag_name] = (sums[counts > 0] / counts[counts > 0]).tolist()
+        return means
+    
+    def _analyze_trends(self, daily_means: Dict[str, List[float]]) -> List[Dict]:
+        """트렌드 분석 (태그별 일별 평균)"""
         trends = []
         
-        try:
-            async with await psycopg.AsyncConnection.connect(self.db_dsn) as conn:
-                async with conn.cursor() as cur:
-                    # 일별 평균 트렌드
-                    await cur.execute("""
-                        SELECT 
-                            DATE(bucket) as date,
-                            tag_name,
-                            AVG(avg_val) as daily_avg
-                        FROM influx_agg_1h
-                        WHERE tag_name IN ('PH', 'TURB', 'CL2', 'TDS')
-                        AND bucket >= %s AND bucket <= %s
-                        GROUP BY DATE(bucket), tag_name
-                        ORDER BY date, tag_name
-                    """, (start_date, end_date))
-                    
-                    rows = await cur.fetchall()
-                    
-                    # 트렌드 계산
-                    parameter_trends = {}
-                    for row in rows:
-                        date = row[0]
-                        tag_name = row[1]
-                        value = float(row[2]) if row[2] else 0
-                        
-                        if tag_name not in parameter_trends:
-                            parameter_trends[tag_name] = []
-                        
-                        parameter_trends[tag_name].append(value)
-                    
-                    # 트렌드 방향 판정
-                    for tag_name, values in parameter_trends.items():
-                        if len(values) >= 3:
-                            # 간단한 선형 회귀
-                            avg_first_half = sum(values[:len(values)//2]) / (len(values)//2)
-                            avg_second_half = sum(values[len(values)//2:]) / (len(values) - len(values)//2)
-                            
-                            trend_direction = "상승" if avg_second_half > avg_first_half else "하강"
-                            trend_rate = ((avg_second_half - avg_first_half) / avg_first_half * 100) if avg_first_half > 0 else 0
-                            
-                            trends.append({
-                                'parameter': tag_name,
-                                'direction': trend_direction,
-                                'rate': trend_rate,
-                                'message': f"{tag_name} {trend_direction} 추세 ({trend_rate:.1f}%)"
-                            })
-                    
-        except Exception as e:
-            print(f"[ERROR] Trend analysis failed: {e}")
+        for tag_name in CHART_TAGS:
+            values = daily_means.get(tag_name, [])
+            
+            # 트렌드 방향 판정
+            if len(values) >= 3:
+                # 간단한 선형 회귀
+                avg_first_half = sum(values[:len(values)//2]) / (len(values)//2)
+                avg_second_half = sum(values[len(values)//2:]) / (len(values) - len(values)//2)
+                
+                trend_direction = "상승" if avg_second_half > avg_first_half else "하강"
+                trend_rate = ((avg_second_half - avg_first_half) / avg_first_half * 100) if avg_first_half > 0 else 0
+                
+                trends.append({
+                    'parameter': tag_name,
+                    'direction': trend_direction,
+                    'rate': trend_rate,
+                    'message': f"{tag_name} {trend_direction} 추세 ({trend_rate:.1f}%)"
+                })
         
         return trends
     
+    # ------------------------------------------------------------------ 닫힌 기간 캐시
+    def _is_closed(self, end_date: datetime) -> bool:
+        now = datetime.now(end_date.tzinfo) if end_date.tzinfo else datetime.now()
+        return end_date + timedelta(seconds=LATE_S) <= now
+    
+    def _cache_path(self, report_type: ReportType, start_date: datetime, end_date: datetime) -> Path:
+        stamp = f"{start_date.isoformat()}_{end_date.isoformat()}".replace(':', '')
+        return self.cache_dir / f"v{CACHE_VERSION}_{report_type.value}_{stamp}.json"
+    
+    def _load_cached(self, report_type: ReportType, start_date: datetime,
+                     end_date: datetime) -> Optional[WaterQualityReport]:
+        path = self._cache_path(report_type, start_date, end_date)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return _report_from_dict(json.load(f))
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print(f"[WARN] Report cache read failed ({path}): {e}")
+            return None
+    
+    def _store_cached(self, report: WaterQualityReport) -> None:
+        path = self._cache_path(report.report_type, report.period_start, report.period_end)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(_report_to_dict(report), f, ensure_ascii=False, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Report cache write failed ({path}): {e}")
+    
     async def _collect_alarm_data(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """알람 데이터 수집"""
         alarms = []
@@ -342,7 +519,7 @@ class WaterQualityReportGenerator:
                             created_at
                         FROM alarm_events
                         WHERE alarm_type = 'WATER_QUALITY'
-                        AND created_at >= %s AND created_at <= %s
+                        AND created_at >= %s AND created_at < %s
                         ORDER BY created_at DESC
                         LIMIT 100
                     """, (start_date, end_date))
@@ -411,6 +588,9 @@ class WaterQualityReportGenerator:
         html_content = await self.export_to_html(report)
         
         pdf_path = self.output_dir / f"{report.report_id}.pdf"
+        if pdf_path.with_suffix('.html').exists():  # 캐시된 보고서 재다운로드
+            report.file_path = str(pdf_path)
+            return str(pdf_path)
         
         # PDF 변환 로직 (간략화)
         with open(pdf_path.with_suffix('.html'), 'w', encoding='utf-8') as f:
@@ -424,29 +604,17 @@ class WaterQualityReportGenerator:
     async def export_to_excel(self, report: WaterQualityReport) -> str:
         """Excel로 내보내기"""
         excel_path = self.output_dir / f"{report.report_id}.xlsx"
+        if excel_path.exists():  # 캐시된 보고서 재다운로드
+            report.file_path = str(excel_path)
+            return str(excel_path)
         
-        # Excel 생성 로직 (pandas 사용 시)
+        # Excel 생성 (xlsxwriter constant_memory - 행 순서대로 흘려 씀)
         try:
-            import pandas as pd
-            
-            # 요약 시트
-            summary_df = pd.DataFrame([report.summary])
-            
-            # 준수율 시트
-            compliance_df = pd.DataFrame([report.compliance_data])
-            
-            # 알람 시트
-            alarms_df = pd.DataFrame(report.alarms_data)
-            
-            with pd.ExcelWriter(excel_path) as writer:
-                summary_df.to_excel(writer, sheet_name='요약', index=False)
-                compliance_df.to_excel(writer, sheet_name='준수율', index=False)
-                alarms_df.to_excel(writer, sheet_name='알람', index=False)
-            
+            await asyncio.to_thread(self._write_excel, report, excel_path)
             print(f"[INFO] Excel exported to {excel_path}")
             
         except ImportError:
-            # pandas 없으면 CSV로 대체
+            # xlsxwriter 없으면 CSV로 대체
             csv_path = excel_path.with_suffix('.csv')
             with open(csv_path, 'w', encoding='utf-8') as f:
                 f.write("수질 보고서\n")
@@ -458,6 +626,42 @@ class WaterQualityReportGenerator:
         report.file_path = str(excel_path)
         return str(excel_path)
     
+    def _write_excel(self, report: WaterQualityReport, excel_path: Path) -> None:
+        import xlsxwriter
+        
+        tmp = excel_path.with_name(excel_path.name + '.part')
+        with xlsxwriter.Workbook(str(tmp), {'constant_memory': True}) as book:
+            # 요약 시트
+            sheet = book.add_worksheet('요약')
+            sheet.write_row(0, 0, ['항목', '표본 수', '평균', '최소', '최대', '표준편차', '준수율(%)'])
+            by_parameter = report.compliance_data.get('by_parameter', {})
+            row = 1
+            for tag_name, stats in report.summary.get('parameters', {}).items():
+                sheet.write_row(row, 0, [tag_name, stats['samples'], stats['average'], stats['minimum'],
+                                         stats['maximum'], stats['std_dev'],
+                                         by_parameter.get(TAG_PARAMETERS.get(tag_name, tag_name), '')])
+                row += 1
+            
+            # 준수율 시트
+            sheet = book.add_worksheet('준수율')
+            for row, key in enumerate(('overall', 'total', 'compliant', 'warnings', 'violations')):
+                sheet.write_row(row, 0, [key, report.compliance_data.get(key, '')])
+            
+            # 추이 시트 (시계열 차트 데이터)
+            series = next((c['data'] for c in report.charts_data if c['type'] == 'time_series'), [])
+            sheet = book.add_worksheet('추이')
+            sheet.write_row(0, 0, ['timestamp', *CHART_TAGS])
+            for row, point in enumerate(series, start=1):
+                sheet.write_row(row, 0, [point['timestamp'], *(point.get(t, '') for t in CHART_TAGS)])
+            
+            # 알람 시트
+            sheet = book.add_worksheet('알람')
+            columns = ['type', 'level', 'parameter', 'value', 'message', 'timestamp']
+            sheet.write_row(0, 0, columns)
+            for row, alarm in enumerate(report.alarms_data, start=1):
+                sheet.write_row(row, 0, [alarm.get(c, '') for c in columns])
+        os.replace(tmp, excel_path)
+    
     async def export_to_html(self, report: WaterQualityReport) -> str:
         """HTML로 내보내기"""
         template = self.templates[report.report_type]
@@ -498,7 +702,7 @@ class WaterQualityReportGenerator:
         """
         
         for param, stats in report.summary.get('parameters', {}).items():
-            compliance_rate = report.compliance_data.get('by_parameter', {}).get(param, 100)
+            compliance_rate = report.compliance_data.get('by_parameter', {}).get(TAG_PARAMETERS.get(param, param), 100)
             status_class = 'good' if compliance_rate >= 95 else 'warning' if compliance_rate >= 90 else 'critical'
             
             html += f"""
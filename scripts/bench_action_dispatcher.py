@@ -0,0 +1,71 @@
+"""
+Benchmark: alarm action throughput, sequential vs ActionDispatcher
+
+Simulates an alarm burst where each alarm triggers a notify (slow remote call),
+an adjust and a log action against local StubTargets with fixed latency.
+"sequential" awaits every action in order like the old _trigger_alarm;
+"dispatcher" submits them and waits for the worker pools to drain.
+Notify targets are spread over 50 recipients with the default policy
+concurrency but no rate limit, so the numbers show worker-pool throughput.
+
+Usage: python scripts/bench_action_dispatcher.py [alarms] [notify_latency_ms]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.alarm.action_dispatcher import DEFAULT_POLICIES, ActionDispatcher, ActionPolicy, StubTarget
+
+
+def actions(n):
+    for i in range(n):
+        yield "notify", {"target": f"operator{i % 50}", "method": "sms", "alarm": i}
+        yield "adjust", {"parameter": "flow", "alarm": i}
+        yield "log", {"severity": "warning", "alarm": i}
+
+
+def targets(latency):
+    return {"notify": StubTarget(latency), "adjust": StubTarget(0.001), "log": StubTarget(0.0)}
+
+
+async def sequential(n, latency):
+    handlers = targets(latency)
+    start = time.perf_counter()
+    for action_type, params in actions(n):
+        await handlers[action_type](params)
+    return time.perf_counter() - start, 0.0
+
+
+async def dispatched(n, latency):
+    handlers = targets(latency)
+    policies = {"notify": ActionPolicy(concurrency=DEFAULT_POLICIES["notify"].concurrency)}
+    d = ActionDispatcher(handlers, policies=policies, schedule_path=None)
+    start = time.perf_counter()
+    for action_type, params in actions(n):
+        d.submit(action_type, params)
+    submit_s = time.perf_counter() - start
+    await d.drain()
+    elapsed = time.perf_counter() - start
+    await d.close()
+    assert sum(len(t.delivered) for t in handlers.values()) == 3 * n
+    return elapsed, submit_s
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+
+    print(f"alarms={n} actions={3 * n} notify latency={latency * 1000:.0f} ms")
+    for name, fn in (("sequential", sequential), ("dispatcher", dispatched)):
+        elapsed, submit_s = asyncio.run(fn(n, latency))
+        extra = f"  (alarm path blocked {submit_s * 1000:.1f} ms total)" if name == "dispatcher" else ""
+        print(f"{name:<11} {elapsed:7.2f} s  {3 * n / elapsed:8.0f} actions/s{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: AlarmScenarioEngine full scan vs compiled evaluation plan
+
+5,000 scenarios (1-3 AND conditions each) over 500 tags, 1 Hz ticks.
+The full scan is the previous check_scenarios loop (string operator
+dispatch + string cache keys, kept here as `check_conditions`). Alarm triggering is
+replaced by a counter so only evaluation is measured.
+
+Alarm counts differ between the two: the full scan times duration
+conditions with datetime.now(), so they never mature in a fast replay,
+and it keys condition results by tag (two conditions on one tag collapse).
+
+Usage: python scripts/bench_alarm_plan.py [scenarios] [tags] [ticks]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.alarm.scenario_engine import AlarmCondition, AlarmLevel, AlarmScenario, AlarmScenarioEngine
+
+OPS = [">", "<", ">=", "<=", "==", "!="]
+
+
+def build_scenarios(n_scen, n_tags, rng):
+    scenarios = {}
+    for i in range(n_scen):
+        conds = [
+            AlarmCondition(
+                f"TAG{rng.randrange(n_tags):04d}", rng.choice(OPS), rng.uniform(80, 120),
+                duration_seconds=rng.choice([0, 0, 0, 30]),
+            )
+            for _ in range(rng.randint(1, 3))
+        ]
+        scenarios[f"X{i:05d}"] = AlarmScenario(f"X{i:05d}", f"bench {i}", AlarmLevel.WARNING, conds, [], cooldown_seconds=600)
+    return scenarios
+
+
+def build_ticks(n_tags, n_ticks, change_ratio, rng):
+    data = {f"TAG{t:04d}": rng.uniform(0, 100) for t in range(n_tags)}
+    ticks = []
+    for _ in range(n_ticks):
+        for t in rng.sample(range(n_tags), max(1, int(n_tags * change_ratio))):
+            data[f"TAG{t:04d}"] = rng.uniform(0, 110)
+        ticks.append(dict(data))
+    return ticks
+
+
+OLD_OPS = {
+    ">": lambda v, t: v > t,
+    "<": lambda v, t: v < t,
+    ">=": lambda v, t: v >= t,
+    "<=": lambda v, t: v <= t,
+    "==": lambda v, t: abs(v - t) < 0.01,
+    "!=": lambda v, t: abs(v - t) >= 0.01,
+}
+
+
+async def check_conditions(cache, conditions, sensor_data):
+    """이전 AlarmScenarioEngine._check_conditions (엔진에서 제거됨, 비교 기준으로만 유지)"""
+    results = {}
+    for condition in conditions:
+        tag_name = condition.tag_name
+        if tag_name not in sensor_data:
+            results[tag_name] = False
+            continue
+        op = OLD_OPS.get(condition.operator)
+        met = op(sensor_data[tag_name], condition.threshold) if op else False
+        cache_key = f"{tag_name}_{condition.operator}_{condition.threshold}"
+        if met and condition.duration_seconds > 0:
+            if cache_key in cache:
+                met = (datetime.now() - cache[cache_key]).total_seconds() >= condition.duration_seconds
+            else:
+                cache[cache_key] = datetime.now()
+                met = False
+        elif not met:
+            cache.pop(cache_key, None)
+        results[tag_name] = met
+    return results
+
+
+async def full_scan(engine, sensor_data, now, cache):
+    """이전 check_scenarios: 매 틱 모든 시나리오 순회"""
+    fired = 0
+    for scenario in engine.scenarios.values():
+        if not scenario.enabled:
+            continue
+        if scenario.last_triggered and (now - scenario.last_triggered).total_seconds() < scenario.cooldown_seconds:
+            continue
+        conditions_met = await check_conditions(cache, scenario.conditions, sensor_data)
+        if all(conditions_met.values()):
+            fired += 1
+            scenario.last_triggered = now
+    return fired
+
+
+def make_engine(scenarios):
+    engine = AlarmScenarioEngine("")
+    engine.load_scenarios(scenarios.values())
+
+    async def count(scenario, sensor_data, conditions_met):
+        return None
+
+    engine._trigger_alarm = count
+    return engine
+
+
+async def run(n_scen, n_tags, n_ticks, change_ratio):
+    rng = random.Random(42)
+    ticks = build_ticks(n_tags, n_ticks, change_ratio, rng)
+    t0 = datetime(2026, 1, 1)
+
+    engine = make_engine(build_scenarios(n_scen, n_tags, random.Random(1)))
+    start = time.perf_counter()
+    fired_old = 0
+    cache = {}
+    for i, data in enumerate(ticks):
+        fired_old += await full_scan(engine, data, t0 + timedelta(seconds=i), cache)
+    t_old = (time.perf_counter() - start) / n_ticks
+
+    engine = make_engine(build_scenarios(n_scen, n_tags, random.Random(1)))
+    start = time.perf_counter()
+    fired_new = 0
+    for i, data in enumerate(ticks):
+        fired_new += len(await engine.check_scenarios(data, now=t0 + timedelta(seconds=i)))
+    t_new = (time.perf_counter() - start) / n_ticks
+
+    print(f"changed tags/tick={change_ratio:>4.0%}  full scan {t_old * 1000:8.2f} ms/tick  "
+          f"plan {t_new * 1000:7.2f} ms/tick  speedup {t_old / t_new:6.1f}x  "
+          f"(alarms {fired_old} vs {fired_new})")
+
+
+def bench_stream(n_scen, n_tags, n_ticks):
+    """이벤트 시각 평가기: 1 Hz 샘플 (ts, tag, value) 처리량"""
+    from ksys_app.alarm.stream_evaluator import StreamEvaluator
+
+    rng = random.Random(42)
+    samples = [
+        (float(i), f"TAG{t:04d}", rng.uniform(0, 110))
+        for i in range(n_ticks) for t in range(n_tags)
+    ]
+    ev = StreamEvaluator(build_scenarios(n_scen, n_tags, random.Random(1)).values())
+    start = time.perf_counter()
+    transitions = ev.run(samples)
+    elapsed = time.perf_counter() - start
+    print(f"stream evaluator: {len(samples) / elapsed:,.0f} samples/s "
+          f"({elapsed / n_ticks * 1000:.2f} ms per 1 Hz tick of {n_tags} samples, {len(transitions)} transitions)")
+
+
+def main():
+    n_scen = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n_tags = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    print(f"scenarios={n_scen:,} tags={n_tags} ticks={n_ticks} (1 Hz budget: 1000 ms/tick)")
+    for ratio in (0.05, 0.2, 1.0):
+        asyncio.run(run(n_scen, n_tags, n_ticks, ratio))
+    bench_stream(n_scen, n_tags, n_ticks)
+
+
+if __name__ == "__main__":
+    main()
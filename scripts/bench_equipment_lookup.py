@@ -0,0 +1,115 @@
+"""
+Benchmark: pump tag lookup by LIKE '%id%' scan vs equipment registry + tag_name = ANY
+
+In-memory part (always runs): 2,000 tags x 60 one-minute buckets. The LIKE path
+filters every aggregate row by substring (what the planner has to do, since a
+leading wildcard cannot use the (tag_name, bucket) index) and guesses metrics by
+substring; the registry path indexes influx_tag once and reads exact tags through a
+per-tag row index (what tag_name = ANY gets from the btree).
+
+Database part (when TS_DSN is set): EXPLAIN ANALYZE execution time of the old
+LIKE query and the ANY query for one pump on influx_agg_1m / influx_agg_1h.
+
+Usage: [TS_DSN=...] python scripts/bench_equipment_lookup.py [tags] [pump_id]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.diagnostics.equipment_registry import EquipmentRegistry, propose_binding
+
+METRICS = ["FLOW", "PRESS", "VIB", "CURRENT", "RPM"]
+
+LIKE_SQL = """
+    EXPLAIN (ANALYZE, FORMAT JSON)
+    SELECT tag_name, AVG(avg), MIN(min), MAX(max), STDDEV(avg)
+    FROM {view}
+    WHERE tag_name LIKE %s AND bucket >= NOW() - INTERVAL '{window}'
+    GROUP BY tag_name
+"""
+
+ANY_SQL = """
+    EXPLAIN (ANALYZE, FORMAT JSON)
+    SELECT tag_name, AVG(avg), MIN(min), MAX(max), STDDEV(avg)
+    FROM {view}
+    WHERE tag_name = ANY(%s) AND bucket >= NOW() - INTERVAL '{window}'
+    GROUP BY tag_name
+"""
+
+
+def in_memory(n_tags: int, pump_id: str) -> None:
+    n_pumps = max(1, n_tags // (len(METRICS) + 3))
+    tags = [f"P{100 + i}_{m}" for i in range(n_pumps) for m in METRICS]
+    tags += [f"RO{i}_TMP" for i in range(n_tags - len(tags))]
+    rows = [(t, b) for b in range(60) for t in tags]  # influx_agg_1m 1시간
+    print(f"tags={len(tags):,} aggregate rows={len(rows):,} pumps={n_pumps}")
+
+    start = time.perf_counter()
+    for _ in range(10):
+        hit = {t for t, _ in rows if pump_id in t}
+    t_like = (time.perf_counter() - start) / 10
+
+    start = time.perf_counter()
+    registry = EquipmentRegistry(filter(None, (propose_binding(t) for t in tags)))
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        exact = set(registry.tags(pump_id))
+    t_index = (time.perf_counter() - start) / 10_000
+
+    by_tag = {}  # (tag_name, bucket) 인덱스 대용
+    for r in rows:
+        by_tag.setdefault(r[0], []).append(r)
+    start = time.perf_counter()
+    for _ in range(1_000):
+        selected = [r for t in exact for r in by_tag.get(t, ())]
+    t_any = (time.perf_counter() - start) / 1_000
+
+    assert hit == exact, (sorted(hit), sorted(exact))
+    assert len(selected) == 60 * len(exact)
+    print(f"LIKE substring filter      : {t_like * 1000:9.2f} ms / lookup")
+    print(f"registry build (once)      : {t_build * 1000:9.2f} ms")
+    print(f"registry index lookup      : {t_index * 1e6:9.2f} us")
+    print(f"ANY via tag index          : {t_any * 1000:9.2f} ms / lookup")
+    print(f"speedup per lookup         : {t_like / (t_index + t_any):9.1f}x")
+
+
+async def in_database(dsn: str, pump_id: str) -> None:
+    import psycopg
+
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        registry = EquipmentRegistry()
+        start = time.perf_counter()
+        await registry.load(conn)
+        print(f"registry load              : {(time.perf_counter() - start) * 1000:9.2f} ms ({len(registry)} tags)")
+        tags = registry.tags(pump_id)
+        if not tags:
+            print(f"no registered tags for {pump_id} - skipping query comparison")
+            return
+        async with conn.cursor() as cur:
+            for view, window in (("influx_agg_1m", "1 hour"), ("influx_agg_1h", "30 days")):
+                await cur.execute(LIKE_SQL.format(view=view, window=window), (f"%{pump_id}%",))
+                like_ms = (await cur.fetchone())[0][0]["Execution Time"]
+                await cur.execute(ANY_SQL.format(view=view, window=window), (tags,))
+                any_ms = (await cur.fetchone())[0][0]["Execution Time"]
+                print(f"{view:14s} LIKE {like_ms:9.2f} ms   ANY {any_ms:9.2f} ms   x{like_ms / max(any_ms, 1e-3):.1f}")
+
+
+def main():
+    n_tags = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    pump_id = sys.argv[2] if len(sys.argv) > 2 else "P101"
+    in_memory(n_tags, pump_id)
+    dsn = os.environ.get("TS_DSN")
+    if dsn:
+        asyncio.run(in_database(dsn, pump_id))
+
+
+if __name__ == "__main__":
+    main()
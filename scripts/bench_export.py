@@ -0,0 +1,93 @@
+"""
+Benchmark: streaming export throughput (rows/s) and peak RSS per format
+
+Each format runs in its own subprocess so ru_maxrss is that export's peak.
+Without TS_DSN the source is a synthetic one-year all-tag stream (tags x one
+sample every step seconds, generated chunk by chunk like the server-side cursor);
+with TS_DSN it exports the real table through export_series.
+"source only" is the cost of producing the rows without writing them.
+
+Usage:
+  python scripts/bench_export.py [tags] [step_s] [days]
+  TS_DSN=... python scripts/bench_export.py --db raw|1m|10m|1h|1d [days]
+"""
+
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.exporters import CHUNK_ROWS, columns_of, export_series, write_batches
+
+END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+async def synthetic(tags, step_s, days, chunk_rows=CHUNK_ROWS):
+    """(ts, tag_name, value) 를 시각, 태그 순 chunk_rows 행씩"""
+    names = [f"TAG_{i:03d}" for i in range(tags)]
+    start = END - timedelta(days=days)
+    per_chunk = max(chunk_rows // tags, 1)
+    n_steps = days * 86400 // step_s
+    for lo in range(0, n_steps, per_chunk):
+        batch = []
+        for k in range(lo, min(lo + per_chunk, n_steps)):
+            ts = start + timedelta(seconds=k * step_s)
+            batch.extend((ts, name, (k * 7 + i) % 1000 / 10.0) for i, name in enumerate(names))
+        yield batch
+        await asyncio.sleep(0)
+
+
+async def run_one(fmt, args):
+    path = os.path.join(tempfile.mkdtemp(prefix="ksys_bench_"), f"export.{fmt}")
+    t0 = time.perf_counter()
+    if args[0] == "--db":
+        import psycopg
+
+        source, days = args[1], int(args[2]) if len(args) > 2 else 365
+        async with await psycopg.AsyncConnection.connect(os.environ["TS_DSN"]) as conn:
+            rows = await export_series(conn, fmt, path, source, END - timedelta(days=days), END)
+    else:
+        tags, step_s, days = (int(a) for a in args)
+        batches = synthetic(tags, step_s, days)
+        if fmt == "none":
+            rows = 0
+            async for batch in batches:
+                rows += len(batch)
+        else:
+            rows = await write_batches(batches, fmt, path, columns_of("raw"))
+    elapsed = time.perf_counter() - t0
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    label = "source only" if fmt == "none" else fmt
+    print(f"{label:<12} {rows:>12,} rows {elapsed:8.1f} s {rows / max(elapsed, 1e-9):>12,.0f} rows/s "
+          f"{size / 1e6:9.1f} MB  peak RSS {peak_mb:7.1f} MB", flush=True)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--one":
+        asyncio.run(run_one(sys.argv[2], sys.argv[3:]))
+        return
+    args = sys.argv[1:]
+    if not args or args[0] != "--db":
+        tags = args[0] if len(args) > 0 else "60"
+        step_s = args[1] if len(args) > 1 else "300"
+        days = args[2] if len(args) > 2 else "365"
+        args = [tags, step_s, days]
+        print(f"synthetic: {tags} tags, one sample / {step_s} s, {days} days, chunk {CHUNK_ROWS:,} rows")
+    formats = ["csv", "parquet", "xlsx"] if args[0] == "--db" else ["none", "csv", "parquet", "xlsx"]
+    for fmt in formats:
+        result = subprocess.run([sys.executable, __file__, "--one", fmt, *args], capture_output=True, text=True)
+        out = result.stdout.strip() or result.stderr.strip().splitlines()[-1]
+        print(out if result.returncode == 0 else f"{fmt:<12} failed: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: SCADA ingest throughput (rows/s) against a local PostgreSQL
+
+Compares the old per-tag INSERT ... ON CONFLICT loop (new connection per poll)
+with HistIngest (buffered, binary COPY into a temp staging table, one merge per
+batch on a pooled connection). Each poll writes one sample per tag, as the
+10 s SCADA cycle does; the HistIngest run is then repeated over the same
+samples to time the duplicate-key merge path.
+
+Writes into a scratch copy of influx_hist (bench_influx_hist, dropped at the end).
+
+Usage:
+  TS_DSN=... python scripts/bench_scada_ingest.py [tags] [polls] [batch_rows]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.integration.hist_ingest import HistIngest
+
+TABLE = "bench_influx_hist"
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def polls(tags, n_polls):
+    names = [f"TAG_{i:04d}" for i in range(tags)]
+    for k in range(n_polls):
+        ts = START + timedelta(seconds=10 * k)
+        yield [(ts, name, (k * 7 + i) % 1000 / 10.0, 0) for i, name in enumerate(names)]
+
+
+async def per_row(dsn, tags, n_polls):
+    for batch in polls(tags, n_polls):
+        async with await psycopg.AsyncConnection.connect(dsn) as conn:
+            async with conn.cursor() as cur:
+                for ts, tag, value, qc in batch:
+                    await cur.execute(
+                        f"INSERT INTO {TABLE} (ts, tag_name, value, qc) VALUES (%s, %s, %s, %s) "
+                        "ON CONFLICT (ts, tag_name) DO UPDATE SET value = EXCLUDED.value, qc = EXCLUDED.qc",
+                        (ts, tag, value, qc))
+            await conn.commit()
+
+
+async def batched(dsn, tags, n_polls, batch_rows):
+    ingest = HistIngest(dsn, table=TABLE, batch_rows=batch_rows, flush_interval_s=3600)
+    for batch in polls(tags, n_polls):
+        await ingest.add(batch)
+    await ingest.close()
+    if ingest.failures:
+        raise RuntimeError(ingest.last_error)
+
+
+async def reset(dsn):
+    async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.execute(f"CREATE TABLE {TABLE} (LIKE public.influx_hist INCLUDING ALL)")
+
+
+async def drop(dsn):
+    async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+async def main(dsn, tags, n_polls, batch_rows):
+    rows = tags * n_polls
+    print(f"{tags} tags x {n_polls} polls = {rows:,} rows, batch {batch_rows:,} rows")
+    try:
+        for label, run, fresh in (
+            ("per-row INSERT", lambda: per_row(dsn, tags, n_polls), True),
+            ("COPY + merge", lambda: batched(dsn, tags, n_polls, batch_rows), True),
+            ("COPY + merge (dup)", lambda: batched(dsn, tags, n_polls, batch_rows), False),
+        ):
+            if fresh:
+                await reset(dsn)
+            t0 = time.perf_counter()
+            await run()
+            elapsed = time.perf_counter() - t0
+            print(f"{label:<20} {elapsed:8.2f} s {rows / elapsed:>12,.0f} rows/s", flush=True)
+    finally:
+        await drop(dsn)
+
+
+if __name__ == "__main__":
+    dsn = os.environ.get("TS_DSN")
+    if not dsn:
+        raise SystemExit("TS_DSN is not set in environment")
+    args = [int(a) for a in sys.argv[1:]]
+    tags = args[0] if len(args) > 0 else 500
+    n_polls = args[1] if len(args) > 1 else 60
+    batch_rows = args[2] if len(args) > 2 else 5000
+    asyncio.run(main(dsn, tags, n_polls, batch_rows))
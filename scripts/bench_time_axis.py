@@ -0,0 +1,70 @@
+"""
+Microbenchmark: per-row ISO timestamp formatting vs epoch + memoized label table
+
+500 tags x 1,000 buckets = 500k rows (buckets repeat across tags, as in load()).
+
+Usage: python scripts/bench_time_axis.py [rows] [tags]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.utils.time_axis import LabelTable, to_epoch
+
+SEOUL_TZ = ZoneInfo("Asia/Seoul")
+
+
+def _fmt_ts_short_chart_per_row(s):
+    """기존 방식: 행마다 fromisoformat → astimezone → strftime"""
+    txt = str(s)
+    if txt.endswith("Z"):
+        txt = txt.replace("Z", "+00:00")
+    dt = datetime.fromisoformat(txt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(SEOUL_TZ).strftime("%Y-%m-%d %H:%M")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_tags = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_buckets = max(1, n_rows // n_tags)
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    buckets = [t0 + timedelta(minutes=i) for i in range(n_buckets)]
+    rows = [b for _ in range(n_tags) for b in buckets]
+    iso_rows = [str(b) for b in rows]  # load()가 받던 문자열 버킷
+    print(f"rows={len(rows):,} tags={n_tags} unique buckets={n_buckets:,}")
+
+    start = time.perf_counter()
+    old = [_fmt_ts_short_chart_per_row(s) for s in iso_rows]
+    t_old = time.perf_counter() - start
+
+    table = LabelTable("%Y-%m-%d %H:%M")
+    start = time.perf_counter()
+    epochs = [to_epoch(b) for b in rows]
+    t_epoch = time.perf_counter() - start
+    start = time.perf_counter()
+    new = table.format_many(epochs)
+    t_new = time.perf_counter() - start
+
+    # 두 번째 갱신(같은 버킷 재사용): 테이블 히트만 발생
+    start = time.perf_counter()
+    table.format_many(epochs)
+    t_warm = time.perf_counter() - start
+
+    assert old == new, "label mismatch"
+    print(f"per-row ISO parse+strftime : {t_old * 1000:9.1f} ms")
+    print(f"datetime -> epoch          : {t_epoch * 1000:9.1f} ms")
+    print(f"format_many (cold table)   : {t_new * 1000:9.1f} ms  ({len(table):,} labels rendered)")
+    print(f"format_many (warm table)   : {t_warm * 1000:9.1f} ms")
+    print(f"speedup (epoch+cold)       : {t_old / (t_epoch + t_new):9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
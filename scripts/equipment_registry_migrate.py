@@ -0,0 +1,134 @@
+"""
+Equipment registry migration: propose / apply influx_tag.meta equipment mappings
+
+  propose  read public.influx_tag, guess equipment/metric/unit from tag names and
+           write a review CSV (existing meta mappings are kept as-is, marked source=meta)
+  apply    write reviewed rows back to influx_tag.meta (equipment, metric, equipment_type)
+           and fill influx_tag.unit where it is empty
+
+Usage:
+  TS_DSN=... python scripts/equipment_registry_migrate.py propose [out.csv]
+  TS_DSN=... python scripts/equipment_registry_migrate.py apply [in.csv] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import psycopg
+from psycopg.types.json import Json
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.diagnostics.equipment_registry import DEFAULT_UNITS, equipment_kind, propose_binding
+
+DEFAULT_CSV = Path(__file__).resolve().parents[1] / "data/equipment/equipment_tags.csv"
+FIELDS = ["tag_name", "equipment", "metric", "equipment_type", "unit", "source", "apply"]
+
+SELECT_SQL = """
+SELECT tag_name, meta->>'equipment', meta->>'metric', meta->>'equipment_type', COALESCE(unit, '')
+FROM public.influx_tag
+ORDER BY tag_name
+"""
+
+UPDATE_SQL = """
+UPDATE public.influx_tag
+SET meta = COALESCE(meta, '{}'::jsonb) || %(meta)s,
+    unit = COALESCE(NULLIF(unit, ''), %(unit)s),
+    updated_at = now()
+WHERE tag_name = %(tag_name)s
+"""
+
+
+def get_dsn() -> str:
+    dsn = os.environ.get("TS_DSN")
+    if not dsn:
+        raise RuntimeError("TS_DSN is not set in environment")
+    return dsn
+
+
+def propose_rows(rows) -> List[Dict[str, str]]:
+    """influx_tag 행 → 검토용 CSV 행 (이름 규칙으로 찾지 못한 태그는 제외)"""
+    out = []
+    for tag_name, equipment, metric, kind, unit in rows:
+        if equipment:
+            out.append({"tag_name": tag_name, "equipment": equipment, "metric": metric or "",
+                        "equipment_type": kind or equipment_kind(equipment), "unit": unit,
+                        "source": "meta", "apply": "n"})
+            continue
+        guess = propose_binding(tag_name, unit)
+        if guess is None:
+            continue
+        out.append({"tag_name": tag_name, "equipment": guess.equipment_id, "metric": guess.metric,
+                    "equipment_type": guess.kind, "unit": guess.unit, "source": "name", "apply": "y"})
+    return out
+
+
+def propose(csv_path: Path) -> int:
+    with psycopg.connect(get_dsn()) as conn:
+        with conn.cursor() as cur:
+            cur.execute(SELECT_SQL)
+            rows = propose_rows(cur.fetchall())
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    return len(rows)
+
+
+def apply(csv_path: Path, dry_run: bool = False) -> int:
+    updates = []
+    with csv_path.open("r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if (row.get("apply") or "").strip().lower() not in {"y", "yes", "1", "true"}:
+                continue
+            tag_name = (row.get("tag_name") or "").strip()
+            equipment = (row.get("equipment") or "").strip()
+            metric = (row.get("metric") or "").strip()
+            if not tag_name or not equipment or not metric:
+                continue
+            meta = {"equipment": equipment, "metric": metric}
+            kind = (row.get("equipment_type") or "").strip() or equipment_kind(equipment)
+            if kind:
+                meta["equipment_type"] = kind
+            updates.append({"tag_name": tag_name, "meta": Json(meta),
+                            "unit": (row.get("unit") or "").strip() or DEFAULT_UNITS.get(metric, "")})
+    if dry_run:
+        for u in updates:
+            print(f"{u['tag_name']}: {u['meta'].obj} unit={u['unit']}")
+        return len(updates)
+
+    applied = 0
+    with psycopg.connect(get_dsn()) as conn:
+        with conn.cursor() as cur:
+            for u in updates:
+                cur.execute(UPDATE_SQL, u)
+                applied += cur.rowcount
+        conn.commit()
+    return applied
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args or args[0] not in {"propose", "apply"}:
+        raise SystemExit(__doc__)
+    path = Path(args[1]) if len(args) > 1 else DEFAULT_CSV
+    if args[0] == "propose":
+        n = propose(path)
+        print(f"Proposed {n} mappings -> {path.as_posix()} (review the 'apply' column, then run apply)")
+    else:
+        if not path.exists():
+            raise SystemExit(f"CSV not found: {path.as_posix()}")
+        dry_run = "--dry-run" in sys.argv
+        n = apply(path, dry_run=dry_run)
+        print(f"{'Would update' if dry_run else 'Updated'} {n} tags from {path.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Water-quality daily rollup: refresh / backfill public.wq_daily
+
+  refresh   close every finished day not yet in the table (first run starts at the
+            oldest raw sample; tags whose standards changed are rebuilt). Run it from
+            cron shortly after midnight (Asia/Seoul) or let the app's wq_rollup_task do
+            it. Reports only read wq_daily and fall back to hourly aggregates for
+            periods that are not closed yet.
+  backfill  recompute [START_DAY, END_DAY) for all tags, e.g. after raw data was corrected
+
+The table must exist first: db/scripts/wq_daily.sql
+
+Usage:
+  TS_DSN=... python scripts/wq_daily.py refresh
+  TS_DSN=... python scripts/wq_daily.py backfill 2025-01-01 2026-01-01
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import psycopg
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.water_quality.daily_rollup import backfill_daily, refresh_daily
+from ksys_app.water_quality.quality_monitor import load_thresholds
+
+
+def get_dsn() -> str:
+    dsn = os.environ.get("TS_DSN")
+    if not dsn:
+        raise RuntimeError("TS_DSN is not set in environment")
+    return dsn
+
+
+async def run(dsn: str, args) -> None:
+    thresholds = await load_thresholds(dsn)
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        t0 = time.perf_counter()
+        if args[0] == "refresh":
+            queries = await refresh_daily(conn, thresholds)
+        else:
+            queries = await backfill_daily(conn, thresholds, date.fromisoformat(args[1]), date.fromisoformat(args[2]))
+    print(f"{args[0]}: {len(thresholds)} tags, {queries} daily queries in {time.perf_counter() - t0:.2f} s")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if not args or args[0] not in ("refresh", "backfill") or (args[0] == "backfill" and len(args) != 3):
+        raise SystemExit(__doc__)
+    asyncio.run(run(get_dsn(), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Water-quality compliance rollup: refresh / verify public.wq_compliance_1h
+
+  refresh  incremental refresh (first run backfills from the oldest raw sample in
+           7-day chunks; tags whose standards changed are rebuilt). Compliance reads
+           never refresh: run this from cron, or let the app's wq_rollup_task do it
+           (KSYS_WQ_ROLLUP_REFRESH_S, 0 disables the task)
+  verify   compare rollup counts for [START, END) with a brute-force classification
+           of every raw sample in influx_hist, and report both timings
+
+The table must exist first: db/scripts/wq_compliance_rollup.sql
+
+Usage:
+  TS_DSN=... python scripts/wq_rollup.py refresh
+  TS_DSN=... python scripts/wq_rollup.py verify 2025-01-01 2026-01-01
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import psycopg
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ksys_app.water_quality.compliance_rollup import CLASSES, RAW_SQL, classify, refresh_rollup, rollup_counts
+from ksys_app.water_quality.quality_monitor import load_thresholds
+
+
+def get_dsn() -> str:
+    dsn = os.environ.get("TS_DSN")
+    if not dsn:
+        raise RuntimeError("TS_DSN is not set in environment")
+    return dsn
+
+
+def parse_time(text: str) -> datetime:
+    dt = datetime.fromisoformat(text)
+    return dt if dt.tzinfo else dt.astimezone()
+
+
+async def refresh(dsn: str) -> None:
+    thresholds = await load_thresholds(dsn)
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        t0 = time.perf_counter()
+        queries = await refresh_rollup(conn, thresholds)
+    print(f"refreshed {len(thresholds)} tags: {queries} rollup queries in {time.perf_counter() - t0:.2f} s")
+
+
+async def verify(dsn: str, start: datetime, end: datetime) -> int:
+    thresholds = await load_thresholds(dsn)
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        await refresh_rollup(conn, thresholds)
+
+        t0 = time.perf_counter()
+        counts = await rollup_counts(conn, thresholds, start, end)
+        t_rollup = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        async with conn.cursor() as cur:
+            await cur.execute(RAW_SQL, (sorted(thresholds), start, end))
+            rows = await cur.fetchall()
+        values = {}
+        for tag, _, value in rows:
+            values.setdefault(tag, []).append(value)
+        brute = {tag: classify(np.array(values.get(tag, []), dtype=np.float64), th)
+                 for tag, th in thresholds.items()}
+        t_raw = time.perf_counter() - t0
+
+    mismatches = 0
+    print(f"{'tag':<10} " + " ".join(f"{c:>10}" for c in CLASSES) + "  match")
+    for tag in sorted(thresholds):
+        ok = counts[tag].counts.tolist() == brute[tag].tolist()
+        mismatches += not ok
+        print(f"{tag:<10} " + " ".join(f"{int(n):>10,}" for n in counts[tag].counts)
+              + ("  OK" if ok else f"  raw={brute[tag].tolist()}"))
+    print(f"rollup read : {t_rollup * 1000:10.1f} ms")
+    print(f"raw scan    : {t_raw * 1000:10.1f} ms  ({len(rows):,} samples)")
+    return mismatches
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("refresh", "verify"):
+        raise SystemExit(__doc__)
+    dsn = get_dsn()
+    if sys.argv[1] == "refresh":
+        asyncio.run(refresh(dsn))
+        return
+    if len(sys.argv) != 4:
+        raise SystemExit(__doc__)
+    if asyncio.run(verify(dsn, parse_time(sys.argv[2]), parse_time(sys.argv[3]))):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()